@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+添加area_version字段到tennis_courts表，并按当前区域规则重新分配全部场馆区域
+"""
+
+import sqlite3
+import os
+import sys
+
+def add_area_version_field():
+    """添加area_version字段到tennis_courts表"""
+    
+    # 数据库路径
+    db_path = "data/courts.db"
+    
+    if not os.path.exists(db_path):
+        print(f"❌ 数据库文件不存在: {db_path}")
+        return False
+    
+    conn = None
+    try:
+        # 连接数据库
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        # 检查字段是否已存在
+        cursor.execute("PRAGMA table_info(tennis_courts)")
+        columns = [column[1] for column in cursor.fetchall()]
+        
+        if 'area_version' in columns:
+            print("✅ area_version字段已存在")
+            return True
+        
+        # 添加area_version字段
+        cursor.execute("""
+            ALTER TABLE tennis_courts 
+            ADD COLUMN area_version INTEGER
+        """)
+        
+        # 提交更改
+        conn.commit()
+        print("✅ 成功添加area_version字段到tennis_courts表")
+        return True
+            
+    except Exception as e:
+        print(f"❌ 添加字段失败: {e}")
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    print("🔧 开始添加area_version字段...")
+    if not add_area_version_field():
+        print("💥 数据库更新失败！")
+        sys.exit(1)
+    
+    # ====== 按当前规则重新分配区域 ======
+    sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+    from app.database import get_db
+    from app.scrapers.area_assigner import AreaAssigner
+    
+    db = next(get_db())
+    result = AreaAssigner().reassign_all(db)
+    print(f"✅ 区域分配完成: 处理 {result['total']} 个场馆, 变更 {result['changed']} 个, 规则版本 {result['rules_version']}")
+    print("🎉 数据库更新完成！")
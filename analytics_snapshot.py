@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析快照：导出 Parquet 列式文件并用 DuckDB 查询（取代逐行读库解析JSON的 check_/analyze_/count_ 脚本）
+导出时在线复制数据库，不与线上库争用；查询只读 data/analytics 下的 Parquet 文件
+用法:
+  python analytics_snapshot.py export [来源]        导出（来源为空时为当前数据库，也可为快照ID或数据库文件）
+  python analytics_snapshot.py report               价格字段覆盖、BING价格区间分布、按类型的价格汇总
+  python analytics_snapshot.py query "<SQL>"        任意SQL，表: courts, details, prices
+      例: python analytics_snapshot.py query "SELECT price_type, COUNT(*) FROM prices WHERE column_name='bing_prices' GROUP BY 1"
+"""
+import sys
+import time
+from app.analytics import Analytics, AnalyticsError, export_snapshot
+
+def print_rows(rows):
+    if not rows:
+        print("（无结果）")
+        return
+    columns = list(rows[0])
+    print("  ".join(f"{c:<14}" for c in columns))
+    for row in rows:
+        print("  ".join(f"{'' if v is None else v!s:<14}" for v in row.values()))
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ("export", "report", "query") or (args[0] == "query" and len(args) < 2):
+        print(__doc__)
+        sys.exit(1)
+    try:
+        if args[0] == "export":
+            manifest = export_snapshot(args[1] if len(args) > 1 else None)
+            print(f"✅ 分析快照已导出（{manifest['seconds']} 秒）: {manifest['row_counts']}")
+            return
+        with Analytics() as analytics:
+            print(f"📦 快照时间: {analytics.manifest['created_at']}（来源 {analytics.manifest['source']}）")
+            started = time.perf_counter()
+            if args[0] == "query":
+                print_rows(analytics.query(args[1]))
+            else:
+                print("\n📊 价格字段覆盖:")
+                print_rows(analytics.price_coverage())
+                print("\n📈 BING价格区间分布:")
+                print_rows(analytics.price_distribution("bing_prices"))
+                print("\n🏟️ 场馆类型与价格:")
+                print_rows(analytics.type_price_summary())
+            print(f"\n⏱️ 查询耗时 {(time.perf_counter() - started) * 1000:.1f} ms")
+    except AnalyticsError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
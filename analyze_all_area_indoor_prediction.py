@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 import json
 from collections import defaultdict
 
@@ -37,7 +38,7 @@ def analyze_all_area_indoor_prediction():
         # merged_prices
         if detail.merged_prices:
             try:
-                merged_data = json.loads(detail.merged_prices)
+                merged_data = load_json(detail.merged_prices)
                 if isinstance(merged_data, list):
                     for price in merged_data:
                         if price.get('source') == 'BING_PROCESSED':
@@ -47,7 +48,7 @@ def analyze_all_area_indoor_prediction():
         # predict_prices
         if detail.predict_prices:
             try:
-                predict_data = json.loads(detail.predict_prices)
+                predict_data = load_json(detail.predict_prices)
                 v = predict_data.get('peak_price')
                 if v: area_stats[court.area]['predict'].append(v)
             except: pass
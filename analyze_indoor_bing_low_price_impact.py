@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 import json
 from collections import defaultdict
 
@@ -36,7 +37,7 @@ def analyze_indoor_bing_low_price_impact():
         # BING原始价格
         if detail.bing_prices:
             try:
-                bing_data = json.loads(detail.bing_prices)
+                bing_data = load_json(detail.bing_prices)
                 if isinstance(bing_data, list):
                     for price in bing_data:
                         v = extract_price_value(price.get('price',''))
@@ -48,7 +49,7 @@ def analyze_indoor_bing_low_price_impact():
         # merged_prices
         if detail.merged_prices:
             try:
-                merged_data = json.loads(detail.merged_prices)
+                merged_data = load_json(detail.merged_prices)
                 if isinstance(merged_data, list):
                     for price in merged_data:
                         if price.get('source') == 'BING_PROCESSED':
@@ -58,7 +59,7 @@ def analyze_indoor_bing_low_price_impact():
         # predict_prices
         if detail.predict_prices:
             try:
-                predict_data = json.loads(detail.predict_prices)
+                predict_data = load_json(detail.predict_prices)
                 v = predict_data.get('peak_price')
                 if v: area_stats[court.area]['predict'].append(v)
             except: pass
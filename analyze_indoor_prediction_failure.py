@@ -10,6 +10,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 from app.scrapers.price_predictor import PricePredictor
 import json
 from datetime import datetime
@@ -44,7 +45,7 @@ def analyze_indoor_prediction_failure():
         current_prediction = None
         if detail and detail.predict_prices:
             try:
-                current_prediction = json.loads(detail.predict_prices)
+                current_prediction = load_json(detail.predict_prices)
             except:
                 pass
         
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分析快照（Parquet + DuckDB）
+导出时先用在线备份API把数据库复制到临时文件（或使用已有快照/备份库），再展开为带类型的 Parquet 文件：
+courts（场馆）、details（详情及展示价格）、prices（各价格字段逐条展开并解析数值）；
+分析脚本通过 Analytics 在 DuckDB 中对这些列式文件做SQL查询，不再打开线上数据库逐行解析JSON。
+依赖 pyarrow 与 duckdb（未安装时导出/查询抛出 AnalyticsError）
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from .config import settings
+from .geo import normalize_lnglat
+from .json_types import load_json
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # 未安装时不能导出
+    pa = pq = None
+
+try:
+    import duckdb
+except ImportError:  # 未安装时不能查询
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+TABLES = ("courts", "details", "prices")
+MANIFEST = "manifest.json"
+# 展开到 prices 表的价格字段
+PRICE_COLUMNS = ("manual_prices", "merged_prices", "bing_prices", "prices", "dianping_prices",
+                 "meituan_prices", "predict_prices", "predicted_prices")
+# 未标注 is_predicted 时按字段推定：人工价格为真实价格，预测字段为预测价格
+PRICE_IS_PREDICTED = {"manual_prices": False, "predict_prices": True, "predicted_prices": True}
+PRICE_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+class AnalyticsError(Exception):
+    """分析快照导出或查询失败"""
+
+def _require(module, name: str):
+    if module is None:
+        raise AnalyticsError(f"分析快照需要安装 {name}: pip install {name}")
+
+# ========== 解析 ==========
+def _number(value) -> Optional[float]:
+    """价格值中的第一个数字（如 "197元/小时" -> 197.0）"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = PRICE_NUMBER_RE.search(str(value))
+    return float(match.group()) if match else None
+
+def _text(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+def _time(value) -> Optional[datetime]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+def _bool(value) -> Optional[bool]:
+    return None if value is None else bool(value)
+
+def _parse(value):
+    """价格字段的JSON值，空文本或无法解析时为None"""
+    return load_json(value)
+
+def price_entries(value) -> List[Dict]:
+    """
+    把一个价格字段展开为逐条价格：列表字段每项一条；
+    对象字段（人工价格、预测价格）每个 *_price 键一条，类型为键名
+    """
+    parsed = _parse(value)
+    if isinstance(parsed, list):
+        return [item for item in parsed if isinstance(item, dict)]
+    if isinstance(parsed, dict):
+        return [{"type": key, "price": price, "source": parsed.get("source"),
+                 "confidence": parsed.get("confidence")}
+                for key, price in parsed.items() if key.endswith("_price") and price not in (None, "", 0)]
+    return []
+
+# ========== 导出 ==========
+COURTS_SCHEMA = [
+    ("id", "int64"), ("name", "string"), ("address", "string"), ("area", "string"), ("area_name", "string"),
+    ("latitude", "float64"), ("longitude", "float64"), ("lng", "float64"), ("lat", "float64"),
+    ("court_type", "string"), ("resolved_court_type", "string"), ("court_count", "int64"),
+    ("has_roof", "bool"), ("is_open", "bool"), ("peak_price", "string"), ("off_peak_price", "string"),
+    ("member_price", "string"), ("data_source", "string"),
+    ("created_at", "timestamp"), ("updated_at", "timestamp"), ("price_updated_at", "timestamp"),
+]
+DETAILS_SCHEMA = [
+    # is_primary: 同一场馆ID最小的详情（列表接口使用的一条）
+    ("id", "int64"), ("court_id", "int64"), ("is_primary", "bool"), ("rating", "float64"), ("review_count", "int64"),
+    ("display_price_source", "string"), ("display_peak_price", "float64"), ("display_off_peak_price", "float64"),
+    ("manual_remark", "string"), ("map_image", "string"),
+    ("created_at", "timestamp"), ("updated_at", "timestamp"),
+] + [(f"{column}_count", "int64") for column in PRICE_COLUMNS]
+PRICES_SCHEMA = [
+    ("court_id", "int64"), ("detail_id", "int64"), ("column_name", "string"), ("position", "int64"),
+    ("price_type", "string"), ("price", "float64"), ("price_text", "string"), ("unit", "string"),
+    ("source", "string"), ("confidence", "float64"), ("is_predicted", "bool"), ("keyword", "string"),
+    ("time_range", "string"),
+]
+
+def _arrow_type(name: str):
+    return {"int64": pa.int64(), "float64": pa.float64(), "string": pa.string(),
+            "bool": pa.bool_(), "timestamp": pa.timestamp("us")}[name]
+
+def _to_table(rows: List[Dict], schema: Sequence) -> "pa.Table":
+    arrow_schema = pa.schema([(name, _arrow_type(kind)) for name, kind in schema])
+    return pa.table({name: [row[name] for row in rows] for name, _ in schema}, schema=arrow_schema)
+
+def _court_rows(conn: sqlite3.Connection) -> List[Dict]:
+    from .scrapers.price_predictor import PricePredictor
+
+    predictor = PricePredictor()
+    try:
+        rows = []
+        for court in conn.execute("SELECT * FROM tennis_courts ORDER BY id"):
+            court = dict(court)
+            lnglat = normalize_lnglat(court["latitude"], court["longitude"])
+            rows.append({
+                "id": court["id"], "name": court["name"], "address": court["address"],
+                "area": court["area"], "area_name": court["area_name"],
+                "latitude": court["latitude"], "longitude": court["longitude"],
+                "lng": lnglat[0] if lnglat else None, "lat": lnglat[1] if lnglat else None,
+                "court_type": court["court_type"],
+                "resolved_court_type": predictor.determine_court_type(court["name"], court["address"]),
+                "court_count": court["court_count"],
+                "has_roof": _bool(court["has_roof"]), "is_open": _bool(court["is_open"]),
+                "peak_price": court["peak_price"], "off_peak_price": court["off_peak_price"],
+                "member_price": court["member_price"], "data_source": court["data_source"],
+                "created_at": _time(court["created_at"]), "updated_at": _time(court["updated_at"]),
+                "price_updated_at": _time(court.get("price_updated_at")),
+            })
+        return rows
+    finally:
+        predictor.db.close()
+
+def _detail_rows(conn: sqlite3.Connection):
+    from types import SimpleNamespace
+    from .api.courts import resolve_detail_prices
+
+    details, prices, seen = [], [], set()
+    for detail in conn.execute("SELECT * FROM court_details ORDER BY id"):
+        detail = {key: detail[key] for key in detail.keys()}
+        for column in PRICE_COLUMNS:
+            detail.setdefault(column, None)
+        source, fields = resolve_detail_prices(SimpleNamespace(**detail))
+        row = {
+            "id": detail["id"], "court_id": detail["court_id"],
+            "is_primary": detail["court_id"] not in seen,
+            "rating": detail.get("rating"), "review_count": detail.get("review_count"),
+            "display_price_source": source,
+            "display_peak_price": _number(fields.get("peak_price")),
+            "display_off_peak_price": _number(fields.get("off_peak_price")),
+            "manual_remark": detail.get("manual_remark"), "map_image": detail.get("map_image"),
+            "created_at": _time(detail.get("created_at")), "updated_at": _time(detail.get("updated_at")),
+        }
+        seen.add(detail["court_id"])
+        for column in PRICE_COLUMNS:
+            entries = price_entries(detail[column])
+            row[f"{column}_count"] = len(entries) if _parse(detail[column]) is not None else None
+            for position, entry in enumerate(entries):
+                prices.append({
+                    "court_id": detail["court_id"], "detail_id": detail["id"], "column_name": column,
+                    "position": position, "price_type": _text(entry.get("type")),
+                    "price": _number(entry.get("price")), "price_text": _text(entry.get("price")),
+                    "unit": _text(entry.get("unit")), "source": _text(entry.get("source")),
+                    "confidence": _number(entry.get("confidence")),
+                    "is_predicted": _bool(entry.get("is_predicted", PRICE_IS_PREDICTED.get(column))),
+                    "keyword": _text(entry.get("keyword")), "time_range": _text(entry.get("time_range")),
+                })
+        details.append(row)
+    return details, prices
+
+def _write_parquet(table: "pa.Table", path: str):
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".parquet", dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+@contextmanager
+def _source_copy(source: Optional[str]) -> Iterator[str]:
+    """导出来源：为空时在线复制当前数据库到临时文件，否则为快照ID或数据库文件路径"""
+    from .backup import online_copy, sqlite_path
+    from .snapshot_diff import open_source
+
+    if source:
+        with open_source(source) as path:
+            yield path
+        return
+    fd, tmp_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        online_copy(sqlite_path(), tmp_path)
+        yield tmp_path
+    finally:
+        os.remove(tmp_path)
+
+def export_snapshot(source: Optional[str] = None, out_dir: Optional[str] = None) -> Dict:
+    """导出分析快照，返回清单（来源、各表行数、耗时）"""
+    _require(pa, "pyarrow")
+    out_dir = os.path.abspath(out_dir or settings.analytics_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    started = time.time()
+    with _source_copy(source) as path:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        try:
+            courts = _court_rows(conn)
+            details, prices = _detail_rows(conn)
+        finally:
+            conn.close()
+
+    for name, rows, schema in (("courts", courts, COURTS_SCHEMA), ("details", details, DETAILS_SCHEMA),
+                               ("prices", prices, PRICES_SCHEMA)):
+        _write_parquet(_to_table(rows, schema), os.path.join(out_dir, f"{name}.parquet"))
+    manifest = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "source": source or "live",
+        "row_counts": {"courts": len(courts), "details": len(details), "prices": len(prices)},
+        "seconds": round(time.time() - started, 3),
+    }
+    with open(os.path.join(out_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    logger.info(f"分析快照已导出: {out_dir} {manifest['row_counts']}")
+    return manifest
+
+def ensure_snapshot(max_age: float = 3600, out_dir: Optional[str] = None) -> Dict:
+    """分析快照不存在或早于 max_age 秒时重新导出，返回清单"""
+    out_dir = os.path.abspath(out_dir or settings.analytics_dir)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    if os.path.exists(manifest_path) and time.time() - os.path.getmtime(manifest_path) < max_age:
+        with open(manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+    return export_snapshot(out_dir=out_dir)
+
+# ========== 查询 ==========
+class Analytics:
+    """DuckDB 查询分析快照：courts / details / prices 为 Parquet 文件上的视图"""
+
+    def __init__(self, snapshot_dir: Optional[str] = None):
+        _require(duckdb, "duckdb")
+        self.snapshot_dir = os.path.abspath(snapshot_dir or settings.analytics_dir)
+        manifest_path = os.path.join(self.snapshot_dir, MANIFEST)
+        if not os.path.exists(manifest_path):
+            raise AnalyticsError(f"分析快照不存在: {self.snapshot_dir}，请先运行 python analytics_snapshot.py export")
+        with open(manifest_path, encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.conn = duckdb.connect()
+        for table in TABLES:
+            path = os.path.join(self.snapshot_dir, f"{table}.parquet").replace("'", "''")
+            self.conn.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{path}')")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def query(self, sql: str, params: Optional[Sequence] = None) -> List[Dict]:
+        """执行SQL，返回字典列表"""
+        cursor = self.conn.execute(sql, params or [])
+        names = [d[0] for d in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def scalar(self, sql: str, params: Optional[Sequence] = None):
+        row = self.conn.execute(sql, params or []).fetchone()
+        return row[0] if row else None
+
+    def df(self, sql: str, params: Optional[Sequence] = None):
+        """执行SQL，返回 pandas DataFrame"""
+        return self.conn.execute(sql, params or []).df()
+
+    # ========== 常用分析 ==========
+    def price_coverage(self) -> List[Dict]:
+        """各价格字段：有值的场馆数、价格条数、其中明确为真实（非预测）价格的条数"""
+        return self.query("""
+            SELECT column_name,
+                   COUNT(DISTINCT court_id) AS courts,
+                   COUNT(*) AS entries,
+                   COUNT(*) FILTER (WHERE NOT is_predicted) AS real_entries
+            FROM prices GROUP BY column_name ORDER BY courts DESC
+        """)
+
+    def price_distribution(self, column: str = "bing_prices", bins: Sequence[float] = (0, 100, 150, 200, 300, 500)) -> List[Dict]:
+        """某价格字段的价格区间分布（元）"""
+        if column not in PRICE_COLUMNS:
+            raise AnalyticsError(f"不支持的价格字段: {column}，可选: {', '.join(PRICE_COLUMNS)}")
+        edges = sorted(bins)
+        cases = " ".join(f"WHEN price < {float(high)} THEN '{low:g}-{high:g}'"
+                         for low, high in zip(edges, edges[1:]))
+        return self.query(f"""
+            SELECT CASE {cases} ELSE '{edges[-1]:g}+' END AS bucket,
+                   MIN(price) AS low, COUNT(*) AS entries, COUNT(DISTINCT court_id) AS courts
+            FROM prices WHERE column_name = ? AND price IS NOT NULL AND price >= {float(edges[0])}
+            GROUP BY bucket ORDER BY low
+        """, [column])
+
+    def type_price_summary(self) -> List[Dict]:
+        """按场馆类型（三层判断法）：场馆数、有展示价格的场馆数、有真实价格的场馆数、展示高峰价的中位数"""
+        return self.query("""
+            WITH real AS (SELECT DISTINCT court_id FROM prices WHERE NOT is_predicted)
+            SELECT COALESCE(NULLIF(c.resolved_court_type, ''), '未知') AS court_type,
+                   COUNT(*) AS courts,
+                   COUNT(*) FILTER (WHERE d.display_peak_price IS NOT NULL
+                                       OR d.display_off_peak_price IS NOT NULL) AS priced,
+                   COUNT(real.court_id) AS real_priced,
+                   MEDIAN(d.display_peak_price) AS median_peak_price
+            FROM courts c
+            LEFT JOIN details d ON d.court_id = c.id AND d.is_primary
+            LEFT JOIN real ON real.court_id = c.id
+            GROUP BY 1 ORDER BY courts DESC
+        """)
@@ -0,0 +1,126 @@
+from contextlib import ExitStack
+from fastapi import APIRouter, Body, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional
+from ..backup import BackupError, BackupStore
+from ..geo_index import bump_data_version
+from ..json_types import dumps
+from ..snapshot_diff import MERGE_MODES, SnapshotDiff, merge_from_snapshot, open_source
+
+router = APIRouter(prefix="/api/backup", tags=["backup"])
+
+def _store() -> BackupStore:
+    try:
+        return BackupStore()
+    except BackupError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/")
+def list_snapshots() -> Dict:
+    """快照列表及存储占用"""
+    store = _store()
+    return {"snapshots": store.list_snapshots(), "stats": store.stats()}
+
+@router.post("/")
+def create_snapshot(label: Optional[str] = Query(None, description="快照说明"), prune: bool = True) -> Dict:
+    """创建数据库快照（在线备份，不阻塞写入），默认随后按保留策略清理"""
+    store = _store()
+    try:
+        summary = store.snapshot(label=label)
+    except BackupError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if prune:
+        summary["prune"] = store.prune()
+    return summary
+
+@router.post("/prune")
+def prune_snapshots() -> Dict:
+    """按保留策略清理快照"""
+    return _store().prune()
+
+@router.get("/{snapshot_id}/verify")
+def verify_snapshot(snapshot_id: str) -> Dict:
+    """校验快照可恢复"""
+    try:
+        return _store().verify(snapshot_id)
+    except BackupError as e:
+        raise HTTPException(status_code=404 if "不存在" in str(e) else 500, detail=str(e))
+
+@router.post("/{snapshot_id}/restore")
+def restore_snapshot(snapshot_id: str, safety_snapshot: bool = True) -> Dict:
+    """在线恢复快照（恢复前校验，并默认为当前数据库创建安全快照）"""
+    try:
+        result = _store().restore(snapshot_id, safety_snapshot=safety_snapshot)
+    except BackupError as e:
+        raise HTTPException(status_code=404 if "不存在" in str(e) else 500, detail=str(e))
+    # 数据整体替换，使地理索引等进程内缓存失效
+    bump_data_version()
+    return result
+
+
+def _split(value: Optional[str]) -> Optional[List[str]]:
+    return [v.strip() for v in value.split(",") if v.strip()] if value else None
+
+def _diff_error(e: Exception) -> HTTPException:
+    if isinstance(e, BackupError):
+        return HTTPException(status_code=404 if "不存在" in str(e) else 500, detail=str(e))
+    return HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{snapshot_id}/diff")
+def diff_snapshot(
+    snapshot_id: str,
+    table: Optional[str] = Query(None, description="只对比该表，为空时对比所有表"),
+    key: Optional[str] = Query(None, description="键列，逗号分隔，默认主键"),
+    columns: Optional[str] = Query(None, description="对比的列，逗号分隔，默认全部共有列")
+) -> Dict:
+    """当前数据库与快照的差异计数（按表、按列）"""
+    try:
+        with open_source(snapshot_id, _store()) as path, SnapshotDiff(path) as diff:
+            if table:
+                return {"snapshot": snapshot_id, "tables": [diff.summary(table, _split(key), _split(columns))]}
+            return {"snapshot": snapshot_id, "tables": diff.summary_all()}
+    except (BackupError, ValueError) as e:
+        raise _diff_error(e)
+
+@router.get("/{snapshot_id}/diff/{table}/rows")
+def diff_snapshot_rows(
+    snapshot_id: str,
+    table: str,
+    key: Optional[str] = Query(None, description="键列，逗号分隔，默认主键"),
+    columns: Optional[str] = Query(None, description="对比的列，逗号分隔，默认全部共有列")
+) -> StreamingResponse:
+    """逐行差异，以NDJSON流式返回（live 为当前值，snapshot 为快照值）"""
+    stack = ExitStack()
+    try:
+        path = stack.enter_context(open_source(snapshot_id, _store()))
+        diff = stack.enter_context(SnapshotDiff(path))
+        rows = diff.diff_rows(table, _split(key), _split(columns))
+        first = next(rows, None)
+    except (BackupError, ValueError) as e:
+        stack.close()
+        raise _diff_error(e)
+
+    def body():
+        with stack:
+            if first is not None:
+                yield dumps(first) + "\n"
+            for row in rows:
+                yield dumps(row) + "\n"
+
+    return StreamingResponse(body(), media_type="application/x-ndjson; charset=utf-8")
+
+@router.post("/{snapshot_id}/merge")
+def merge_snapshot_column(
+    snapshot_id: str,
+    table: str = Body(..., description="表名，如 court_details"),
+    column: str = Body(..., description="合并的列，如 bing_prices"),
+    when: str = Body("live_empty", description=f"合并条件：{'/'.join(MERGE_MODES)}"),
+    key: Optional[List[str]] = Body(None, description="键列，默认主键"),
+    keys: Optional[List] = Body(None, description="只合并这些键（单列键）"),
+    dry_run: bool = Body(True, description="只统计不写入")
+) -> Dict:
+    """从快照选择性合并某列，如当前 bing_prices 为空时取快照中的值"""
+    try:
+        return merge_from_snapshot(snapshot_id, table, column, when, key, keys, dry_run)
+    except (BackupError, ValueError) as e:
+        raise _diff_error(e)
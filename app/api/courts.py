@@ -1,11 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import String, and_, cast, literal, or_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from ..database import get_db
-from ..models import TennisCourt, TennisCourtResponse, TennisCourtCreate, TennisCourtUpdate
+from ..models import TennisCourt, CourtDetail, TennisCourtResponse, TennisCourtCreate, TennisCourtUpdate
 from ..config import settings
+from ..responses import ORJSONResponse, GeoJSONResponse
+from ..json_types import load_json
 from ..scrapers.price_predictor import PricePredictor
+from ..scrapers.area_assigner import AreaAssigner, AREA_RULES_VERSION
+from ..scrapers.coord_validator import apply_to_courts
+from ..geo_index import get_geo_index
+from ..court_snapshot import get_court_snapshot, court_rows
+from ..court_rollup import courts_summary
 from urllib.parse import quote
+import base64
+import numpy as np
+import json
 
 router = APIRouter(prefix="/api/courts", tags=["courts"])
 
@@ -44,84 +55,201 @@ def get_dynamic_area(court):
     # 其他区域使用原有area字段
     return court.area
 
+def resolve_detail_prices(detail: Optional[CourtDetail]) -> Tuple[Optional[str], Dict]:
+    """
+    按 人工价格 > 融合价格 > 预测价格 的优先级解析场馆展示价格
+    返回 (价格来源, 需要覆盖到场馆对象上的价格字段)
+    """
+    if not detail:
+        return None, {}
+    
+    fields = {}
+    # 字段为空文本时视为无数据，已解析的空列表/空对象仍视为有数据
+    # 优先使用手动录入的价格
+    if detail.manual_prices is not None:
+        try:
+            manual_prices = load_json(detail.manual_prices)
+            if isinstance(manual_prices, dict):
+                fields['peak_price'] = str(manual_prices.get('peak_price', '')) if manual_prices.get('peak_price') else None
+                fields['off_peak_price'] = str(manual_prices.get('off_peak_price', '')) if manual_prices.get('off_peak_price') else None
+                fields['member_price'] = str(manual_prices.get('member_price', '')) if manual_prices.get('member_price') else None
+                fields['price_unit'] = manual_prices.get('price_unit', '元/小时')
+        except:
+            pass
+        return 'manual', fields
+    # 其次使用融合价格
+    elif detail.merged_prices is not None:
+        try:
+            merged_prices = load_json(detail.merged_prices)
+            if isinstance(merged_prices, list) and merged_prices:
+                # 取第一个价格作为主要价格
+                first_price = merged_prices[0]
+                if isinstance(first_price, dict):
+                    price_value = first_price.get('price', '')
+                    price_type = first_price.get('type', '')
+                    if '黄金' in price_type or '高峰' in price_type:
+                        fields['peak_price'] = str(price_value)
+                    elif '非黄金' in price_type or 'off' in price_type:
+                        fields['off_peak_price'] = str(price_value)
+                    else:
+                        fields['peak_price'] = str(price_value)
+                    fields['price_unit'] = first_price.get('unit', '元/小时')
+        except:
+            pass
+        return 'merged', fields
+    # 最后使用预测价格
+    elif detail.predict_prices is not None:
+        try:
+            predict_prices = load_json(detail.predict_prices)
+            if isinstance(predict_prices, dict):
+                if predict_prices.get('peak_price'):
+                    fields['peak_price'] = str(predict_prices['peak_price'])
+                if predict_prices.get('off_peak_price'):
+                    fields['off_peak_price'] = str(predict_prices['off_peak_price'])
+                fields['price_unit'] = '元/小时'
+        except:
+            pass
+        return 'predict', fields
+    
+    return None, fields
+
+# 游标分页支持的排序键
+CURSOR_ORDERS = {
+    "area": TennisCourt.area,
+    "updated_at": TennisCourt.updated_at,
+}
+
+def encode_cursor(order_by: str, key: Optional[str], court_id: int) -> str:
+    """将最后一条记录的排序键（数据库中的原始文本）编码为不透明游标"""
+    raw = json.dumps([order_by, key, court_id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[str, object, int]:
+    """解析游标，返回 (排序键名, 排序键值, 场馆ID)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        order_by, key, court_id = json.loads(raw)
+        if order_by not in CURSOR_ORDERS or not isinstance(court_id, int):
+            raise ValueError(order_by)
+        if key is not None and not isinstance(key, str):
+            raise ValueError(key)
+        return order_by, key, court_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="无效的游标")
+
+def cursor_key(db: Session, order_by: str, court_id: int) -> Optional[str]:
+    """
+    读取排序键在数据库中的原始文本
+    SQLite中时间按文本比较，且存量数据有带/不带微秒两种格式，需用原始文本续页
+    """
+    column = CURSOR_ORDERS[order_by]
+    return db.query(cast(column, String)).filter(TennisCourt.id == court_id).scalar()
+
+def apply_keyset(query, order_by: str, cursor: Optional[str]):
+    """按 (排序键, id) 进行游标分页，由复合索引支撑，任意页的代价与首页相同"""
+    column = CURSOR_ORDERS[order_by]
+    if cursor:
+        _, key, last_id = decode_cursor(cursor)
+        if key is None:
+            # SQLite升序时NULL排在最前
+            query = query.filter(or_(
+                and_(column.is_(None), TennisCourt.id > last_id),
+                column.isnot(None)
+            ))
+        else:
+            key = literal(key, String)
+            query = query.filter(or_(
+                column > key,
+                and_(column == key, TennisCourt.id > last_id)
+            ))
+    return query.order_by(column, TennisCourt.id)
+
 @router.get("/", response_model=List[TennisCourtResponse])
 def get_courts(
     area: Optional[str] = Query(None, description="区域筛选：wangjing, dongba, jiuxianqiao, fengtai_east, fengtai_west, yizhuang"),
     skip: int = Query(0, ge=0, description="跳过记录数"),
     limit: int = Query(100, ge=1, le=1000, description="返回记录数"),
+    order_by: Optional[str] = Query(None, description="游标分页排序：area, updated_at；指定后忽略skip"),
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 返回的游标"),
     db: Session = Depends(get_db)
 ):
-    """获取网球场馆列表"""
-    query = db.query(TennisCourt)
-    
-    # 不再过滤类型为空的场馆，因为我们会实时判断类型
-    # query = query.filter(TennisCourt.court_type != '').filter(TennisCourt.court_type.isnot(None))
+    """获取网球场馆列表（支持offset分页和游标分页）"""
+    if cursor and not order_by:
+        order_by = decode_cursor(cursor)[0]
+    if order_by and order_by not in CURSOR_ORDERS:
+        raise HTTPException(status_code=400, detail=f"无效的排序字段：{order_by}")
     
-    if area:
-        if area not in settings.target_areas:
-            raise HTTPException(status_code=400, detail=f"无效的区域：{area}")
-        
-        # 所有区域都使用数据库中的area字段，包括丰台和亦庄
-        query = query.filter(TennisCourt.area == area)
+    if area and area not in settings.target_areas:
+        raise HTTPException(status_code=400, detail=f"无效的区域：{area}")
     
-    courts = query.offset(skip).limit(limit).all()
-    
-    # 实时判断每个场馆的类型，覆盖数据库字段
-    predictor = PricePredictor()
-    for court in courts:
-        court.court_type = predictor.determine_court_type(court.name, court.address)
-        
-        # 从详情表中获取价格数据
-        from ..models import CourtDetail
-        detail = db.query(CourtDetail).filter(CourtDetail.court_id == court.id).first()
-        if detail:
-            # 优先使用手动录入的价格
-            if detail.manual_prices:
-                try:
-                    import json
-                    manual_prices = json.loads(detail.manual_prices)
-                    if isinstance(manual_prices, dict):
-                        court.peak_price = str(manual_prices.get('peak_price', '')) if manual_prices.get('peak_price') else None
-                        court.off_peak_price = str(manual_prices.get('off_peak_price', '')) if manual_prices.get('off_peak_price') else None
-                        court.member_price = str(manual_prices.get('member_price', '')) if manual_prices.get('member_price') else None
-                        court.price_unit = manual_prices.get('price_unit', '元/小时')
-                except:
-                    pass
-            # 其次使用融合价格
-            elif detail.merged_prices:
-                try:
-                    import json
-                    merged_prices = json.loads(detail.merged_prices)
-                    if isinstance(merged_prices, list) and merged_prices:
-                        # 取第一个价格作为主要价格
-                        first_price = merged_prices[0]
-                        if isinstance(first_price, dict):
-                            price_value = first_price.get('price', '')
-                            price_type = first_price.get('type', '')
-                            if '黄金' in price_type or '高峰' in price_type:
-                                court.peak_price = str(price_value)
-                            elif '非黄金' in price_type or 'off' in price_type:
-                                court.off_peak_price = str(price_value)
-                            else:
-                                court.peak_price = str(price_value)
-                            court.price_unit = first_price.get('unit', '元/小时')
-                except:
-                    pass
-            # 最后使用预测价格
-            elif detail.predict_prices:
-                try:
-                    import json
-                    predict_prices = json.loads(detail.predict_prices)
-                    if isinstance(predict_prices, dict):
-                        if predict_prices.get('peak_price'):
-                            court.peak_price = str(predict_prices['peak_price'])
-                        if predict_prices.get('off_peak_price'):
-                            court.off_peak_price = str(predict_prices['off_peak_price'])
-                        court.price_unit = '元/小时'
-                except:
-                    pass
-    
-    return courts
+    # 行内容（实时判断的类型、按优先级解析的展示价格）取自场馆快照
+    snapshot = get_court_snapshot()
+    headers = {}
+    if order_by:
+        # 游标的排序键为数据库中的原始文本，本页ID仍由复合索引查询确定
+        query = db.query(TennisCourt.id)
+        if area:
+            query = query.filter(TennisCourt.area == area)
+        ids = [row.id for row in apply_keyset(query, order_by, cursor).limit(limit)]
+        if len(ids) == limit:
+            headers["X-Next-Cursor"] = encode_cursor(order_by, cursor_key(db, order_by, ids[-1]), ids[-1])
+        positions = snapshot.positions(ids)
+        # 快照尚未包含的场馆（刚写入、后台重建未完成）直接从数据库读取，保证整页不缺行
+        missing = [court_id for court_id, i in zip(ids, positions) if i < 0]
+        fallback = court_rows(db, missing) if missing else {}
+        content = [snapshot.row(i) if i >= 0 else fallback[court_id]
+                   for court_id, i in zip(ids, positions) if i >= 0 or court_id in fallback]
+    else:
+        positions = np.flatnonzero(snapshot.area_mask(area))[skip:skip + limit]
+        content = snapshot.rows_at(positions)
+    return ORJSONResponse(content, headers=headers)
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """解析 bbox 参数：最小经度,最小纬度,最大经度,最大纬度"""
+    try:
+        min_lng, min_lat, max_lng, max_lat = [float(v) for v in bbox.split(',')]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"无效的bbox：{bbox}")
+    if min_lng > max_lng or min_lat > max_lat:
+        raise HTTPException(status_code=400, detail=f"无效的bbox：{bbox}")
+    return min_lng, min_lat, max_lng, max_lat
+
+@router.get("/geo")
+def get_courts_geo(
+    bbox: str = Query(..., description="视野范围：最小经度,最小纬度,最大经度,最大纬度"),
+    zoom: int = Query(12, ge=0, le=22, description="地图缩放级别"),
+):
+    """获取视野范围内的场馆GeoJSON，低缩放级别返回服务端聚类结果"""
+    collection = get_geo_index().query_bbox(parse_bbox(bbox), zoom)
+    return GeoJSONResponse(collection)
+
+@router.get("/nearby")
+def get_nearby_courts(
+    lat: float = Query(..., ge=-90, le=90, description="纬度"),
+    lng: float = Query(..., ge=-180, le=180, description="经度"),
+    k: int = Query(5, ge=1, le=50, description="返回场馆数量"),
+    court_type: Optional[str] = Query(None, alias="type", description="场馆类型筛选：室内, 室外"),
+    max_km: Optional[float] = Query(None, gt=0, description="最大距离（KM）"),
+):
+    """按距离升序返回最近的场馆及其展示价格"""
+    index = get_geo_index()
+    courts = []
+    for i, distance in index.nearest(lng, lat, k=k, court_type=court_type, max_km=max_km):
+        courts.append({
+            "id": int(index.ids[i]),
+            "name": index.names[i],
+            "court_type": index.court_types[i],
+            "longitude": float(index.lng[i]),
+            "latitude": float(index.lat[i]),
+            "distance_km": round(distance, 3),
+            **index.extras[i],
+        })
+    return ORJSONResponse({
+        "latitude": lat,
+        "longitude": lng,
+        "count": len(courts),
+        "courts": courts
+    })
 
 @router.get("/{court_id}", response_model=TennisCourtResponse)
 def get_court(court_id: int, db: Session = Depends(get_db)):
@@ -139,12 +267,25 @@ def get_court(court_id: int, db: Session = Depends(get_db)):
 @router.post("/", response_model=TennisCourtResponse)
 def create_court(court: TennisCourtCreate, db: Session = Depends(get_db)):
     """创建新的网球场馆"""
-    db_court = TennisCourt(**court.dict())
+    court_data = court.dict()
+    db_court = TennisCourt(**court_data)
+    # 调用方指定了区域时以指定为准，未指定时按规则分配
+    if court_data.get("area"):
+        apply_explicit_area(db_court, court_data)
+    else:
+        AreaAssigner().apply_to_court(db_court)
     db.add(db_court)
+    apply_to_courts(db, [db_court], "api")
     db.commit()
     db.refresh(db_court)
     return db_court
 
+def apply_explicit_area(db_court: TennisCourt, data: Dict):
+    """调用方指定区域：未给区域名称时按配置补全，并记为当前规则版本（避免批量重分配覆盖）"""
+    if not data.get("area_name") and db_court.area in settings.target_areas:
+        db_court.area_name = settings.target_areas[db_court.area]["name"]
+    db_court.area_version = AREA_RULES_VERSION
+
 @router.put("/{court_id}", response_model=TennisCourtResponse)
 def update_court(court_id: int, court: TennisCourtUpdate, db: Session = Depends(get_db)):
     """更新网球场馆信息"""
@@ -156,6 +297,14 @@ def update_court(court_id: int, court: TennisCourtUpdate, db: Session = Depends(
     for field, value in update_data.items():
         setattr(db_court, field, value)
     
+    # 名称、地址或坐标变化时重新分配区域；调用方显式指定区域时以指定为准
+    if set(update_data) & {"name", "address", "latitude", "longitude"}:
+        if "area" not in update_data:
+            AreaAssigner().apply_to_court(db_court)
+        apply_to_courts(db, [db_court], "api")
+    if update_data.get("area"):
+        apply_explicit_area(db_court, update_data)
+    
     db.commit()
     db.refresh(db_court)
     return db_court
@@ -186,6 +335,14 @@ def get_areas():
         ]
     }
 
+@router.post("/areas/reassign")
+def reassign_areas(
+    only_stale: bool = Query(False, description="只处理区域规则版本过旧的场馆"),
+    db: Session = Depends(get_db)
+):
+    """按当前区域规则批量重新分配场馆区域"""
+    return AreaAssigner().reassign_all(db, only_stale=only_stale)
+
 @router.get("/{court_id}/coordinates")
 def get_court_coordinates(court_id: int, db: Session = Depends(get_db)):
     """获取场馆坐标信息"""
@@ -204,38 +361,5 @@ def get_court_coordinates(court_id: int, db: Session = Depends(get_db)):
 
 @router.get("/stats/summary")
 def get_courts_summary(db: Session = Depends(get_db)):
-    """获取网球场馆统计信息"""
-    # 获取所有场馆，实时判断类型
-    all_courts = db.query(TennisCourt).all()
-    predictor = PricePredictor()
-    
-    # 实时判断每个场馆的类型
-    total_courts = 0
-    area_stats = {}
-    source_stats = {}
-    
-    for court in all_courts:
-        court_type = predictor.determine_court_type(court.name, court.address)
-        if court_type and court_type != "未知":
-            total_courts += 1
-            
-            # 按区域统计
-            if court.area in settings.target_areas:
-                if court.area not in area_stats:
-                    area_stats[court.area] = {
-                        "name": settings.target_areas[court.area]["name"],
-                        "count": 0
-                    }
-                area_stats[court.area]["count"] += 1
-            
-            # 按数据来源统计
-            if court.data_source:
-                if court.data_source not in source_stats:
-                    source_stats[court.data_source] = 0
-                source_stats[court.data_source] += 1
-    
-    return {
-        "total_courts": total_courts,
-        "area_stats": area_stats,
-        "source_stats": source_stats
-    } 
\ No newline at end of file
+    """获取网球场馆统计信息（场馆类型实时判断，只统计类型可判断的场馆；读汇总表）"""
+    return courts_summary(db) 
\ No newline at end of file
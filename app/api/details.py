@@ -1,29 +1,158 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
-from sqlalchemy.orm import Session
-from typing import Optional
+from sqlalchemy.orm import Session, load_only
+from typing import Dict, List, Optional
 from ..database import get_db
+from ..responses import ORJSONResponse
+from ..json_types import load_json
+from .. import price_history
+from ..price_history import price_writer
 from ..models import TennisCourt, CourtDetail, CourtDetailResponse, CourtDetailCreate
 from ..scrapers.detail_scraper import DetailScraper
 from ..scrapers.price_predictor import PricePredictor
 # from ..scrapers.map_generator import MapGenerator  # 暂时注释，避免PIL依赖问题
 from datetime import datetime, timedelta
-import json
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/details", tags=["details"])
 
+# ========== 详情字段解析 ==========
+def standardize_price_type(price):
+    """标准化价格type字段"""
+    t = price.get('type', '')
+    if not t:
+        t = ''
+    t = t.lower()
+    if '黄金' in t or '高峰' in t or 'peak' in t:
+        price['type'] = '黄金时段'
+    elif '非黄金' in t or 'off' in t:
+        price['type'] = '非黄金'
+    elif '会员' in t or 'member' in t:
+        price['type'] = '会员价'
+    else:
+        price['type'] = '综合价格'
+    return price
+
+# 统一所有价格对象的type字段
+def standardize_prices(prices):
+    if not prices:
+        return []
+    result = []
+    for p in prices:
+        if isinstance(p, dict):
+            # 复制后再修改，不影响实例上缓存的已解析值
+            result.append(standardize_price_type(dict(p)))
+    return result
+
+# 处理predict_prices为数组并补全type
+def standardize_predict_prices(pred):
+    if not pred:
+        return []
+    result = []
+    if isinstance(pred, list):
+        for p in pred:
+            if isinstance(p, dict):
+                p = dict(p)
+                t = p.get('type', '')
+                if not t and p.get('label'):
+                    t = p['label']
+                p['type'] = t or '综合价格'
+                result.append(standardize_price_type(p))
+    elif isinstance(pred, dict):
+        # 兼容旧结构
+        if 'peak_price' in pred:
+            result.append({'type': '黄金时段', 'price': pred['peak_price'], 'source': pred.get('source', '预测'), 'predict_method': pred.get('predict_method', '')})
+        if 'off_peak_price' in pred:
+            result.append({'type': '非黄金', 'price': pred['off_peak_price'], 'source': pred.get('source', '预测'), 'predict_method': pred.get('predict_method', '')})
+    return result
+
+def _merged_prices(detail):
+    if detail.manual_prices is not None:
+        return standardize_prices(load_json(detail.manual_prices, []))
+    return standardize_prices(load_json(detail.merged_prices, []))
+
+# 响应字段 -> (依赖的详情表字段, 取值函数)，court_name/address 取自场馆表
+DETAIL_FIELDS = {
+    "id": ((), lambda d, c: d.id),
+    "court_id": ((), lambda d, c: d.court_id),
+    "court_name": ((), lambda d, c: c.name),
+    "address": ((), lambda d, c: c.address),
+    "merged_description": (("merged_description",), lambda d, c: d.merged_description),
+    "merged_facilities": (("merged_facilities",), lambda d, c: d.merged_facilities),
+    "merged_traffic_info": (("merged_traffic_info",), lambda d, c: d.merged_traffic_info),
+    "merged_business_hours": (("merged_business_hours",), lambda d, c: d.merged_business_hours),
+    "manual_prices": (("manual_prices",), lambda d, c: load_json(d.manual_prices, [])),
+    "manual_remark": (("manual_remark",), lambda d, c: d.manual_remark),
+    "prices": (("prices",), lambda d, c: standardize_prices(load_json(d.prices, []))),
+    "dianping_prices": (("dianping_prices",), lambda d, c: standardize_prices(load_json(d.dianping_prices, []))),
+    "meituan_prices": (("meituan_prices",), lambda d, c: standardize_prices(load_json(d.meituan_prices, []))),
+    "merged_prices": (("manual_prices", "merged_prices"), lambda d, c: _merged_prices(d)),
+    "predict_prices": (("predict_prices",), lambda d, c: standardize_predict_prices(load_json(d.predict_prices, []))),
+    "dianping_rating": (("dianping_rating",), lambda d, c: d.dianping_rating),
+    "meituan_rating": (("meituan_rating",), lambda d, c: d.meituan_rating),
+    "merged_rating": (("merged_rating",), lambda d, c: d.merged_rating),
+    "dianping_reviews": (("dianping_reviews",), lambda d, c: load_json(d.dianping_reviews, [])),
+    "meituan_reviews": (("meituan_reviews",), lambda d, c: load_json(d.meituan_reviews, [])),
+    "dianping_images": (("dianping_images",), lambda d, c: load_json(d.dianping_images, [])),
+    "meituan_images": (("meituan_images",), lambda d, c: load_json(d.meituan_images, [])),
+    "map_image": (("map_image",), lambda d, c: d.map_image),  # 地图图片字段
+    "last_dianping_update": (("last_dianping_update",), lambda d, c: d.last_dianping_update),
+    "last_meituan_update": (("last_meituan_update",), lambda d, c: d.last_meituan_update),
+    "cache_expires_at": (("cache_expires_at",), lambda d, c: d.cache_expires_at),
+    "created_at": (("created_at",), lambda d, c: d.created_at),
+    "updated_at": (("updated_at",), lambda d, c: d.updated_at),
+}
+
+# 评论、图片子资源：platform -> 详情表字段
+REVIEW_COLUMNS = {"dianping": "dianping_reviews", "meituan": "meituan_reviews"}
+IMAGE_COLUMNS = {"dianping": "dianping_images", "meituan": "meituan_images"}
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """解析逗号分隔的字段列表，未指定时返回None（返回全部字段）"""
+    if not fields:
+        return None
+    names = []
+    for name in fields.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in DETAIL_FIELDS:
+            raise HTTPException(status_code=400, detail=f"无效的字段：{name}")
+        if name not in names:
+            names.append(name)
+    return names or None
+
+def _detail_load_columns(names: List[str]) -> List:
+    columns = {"id", "court_id"}
+    for name in names:
+        columns.update(DETAIL_FIELDS[name][0])
+    return [getattr(CourtDetail, column) for column in sorted(columns)]
+
 @router.get("/{court_id}")
-async def get_court_detail(court_id: int, force_update: bool = Query(False, description="强制更新数据"), db: Session = Depends(get_db)):
-    """获取场馆融合详情（手动反序列化所有JSON字段，返回dict）"""
+async def get_court_detail(
+    court_id: int,
+    force_update: bool = Query(False, description="强制更新数据"),
+    fields: Optional[str] = Query(None, description="只返回指定字段，逗号分隔，如 court_name,merged_prices,map_image"),
+    db: Session = Depends(get_db)
+):
+    """获取场馆融合详情（手动反序列化JSON字段，返回dict；指定fields时只读取并返回所需字段）"""
     try:
+        names = parse_fields(fields)
+
         # 检查场馆是否存在
-        court = db.query(TennisCourt).filter(TennisCourt.id == court_id).first()
+        court_query = db.query(TennisCourt)
+        if not force_update:
+            court_query = court_query.options(load_only(TennisCourt.id, TennisCourt.name, TennisCourt.address))
+        court = court_query.filter(TennisCourt.id == court_id).first()
         if not court:
             raise HTTPException(status_code=404, detail="场馆不存在")
         
-        # 查找或创建详情记录
-        detail = db.query(CourtDetail).filter(CourtDetail.court_id == court_id).first()
+        # 查找或创建详情记录，强制更新时需要完整记录
+        if names and not force_update:
+            detail_query = db.query(CourtDetail).options(load_only(*_detail_load_columns(names)))
+        else:
+            detail_query = db.query(CourtDetail)
+        detail = detail_query.filter(CourtDetail.court_id == court_id).first()
         if not detail:
             detail = CourtDetail(court_id=court_id)
             db.add(detail)
@@ -39,95 +168,9 @@ async def get_court_detail(court_id: int, force_update: bool = Query(False, desc
                 if not detail.merged_description:
                     raise HTTPException(status_code=500, detail="获取详情数据失败")
         
-        # 手动反序列化所有JSON字段
-        def safe_json_loads(val):
-            if not val:
-                return []
-            try:
-                return json.loads(val)
-            except Exception as e:
-                logger.error(f"JSON解析失败: {e}, 值: {val}")
-                return []
-        
-        def standardize_price_type(price):
-            """标准化价格type字段"""
-            t = price.get('type', '')
-            if not t:
-                t = ''
-            t = t.lower()
-            if '黄金' in t or '高峰' in t or 'peak' in t:
-                price['type'] = '黄金时段'
-            elif '非黄金' in t or 'off' in t:
-                price['type'] = '非黄金'
-            elif '会员' in t or 'member' in t:
-                price['type'] = '会员价'
-            else:
-                price['type'] = '综合价格'
-            return price
-        
-        # 统一所有价格对象的type字段
-        def standardize_prices(prices):
-            if not prices:
-                return []
-            result = []
-            for p in prices:
-                if isinstance(p, dict):
-                    result.append(standardize_price_type(p))
-            return result
-        
-        # 处理predict_prices为数组并补全type
-        def standardize_predict_prices(pred):
-            if not pred:
-                return []
-            result = []
-            if isinstance(pred, list):
-                for p in pred:
-                    if isinstance(p, dict):
-                        t = p.get('type', '')
-                        if not t and p.get('label'):
-                            t = p['label']
-                        p['type'] = t or '综合价格'
-                        result.append(standardize_price_type(p))
-            elif isinstance(pred, dict):
-                # 兼容旧结构
-                if 'peak_price' in pred:
-                    result.append({'type': '黄金时段', 'price': pred['peak_price'], 'source': pred.get('source', '预测'), 'predict_method': pred.get('predict_method', '')})
-                if 'off_peak_price' in pred:
-                    result.append({'type': '非黄金', 'price': pred['off_peak_price'], 'source': pred.get('source', '预测'), 'predict_method': pred.get('predict_method', '')})
-            return result
-        
         try:
-            result = {
-                "id": detail.id,
-                "court_id": detail.court_id,
-                "court_name": court.name,
-                "address": court.address,
-                "merged_description": detail.merged_description,
-                "merged_facilities": detail.merged_facilities,
-                "merged_traffic_info": detail.merged_traffic_info,
-                "merged_business_hours": detail.merged_business_hours,
-                "manual_prices": safe_json_loads(detail.manual_prices),
-                "manual_remark": detail.manual_remark,
-                "prices": standardize_prices(safe_json_loads(detail.prices)),
-                "dianping_prices": standardize_prices(safe_json_loads(detail.dianping_prices)),
-                "meituan_prices": standardize_prices(safe_json_loads(detail.meituan_prices)),
-                "merged_prices": standardize_prices(safe_json_loads(detail.manual_prices)) if detail.manual_prices else standardize_prices(safe_json_loads(detail.merged_prices)),
-                "predict_prices": standardize_predict_prices(safe_json_loads(detail.predict_prices)),
-                "dianping_rating": detail.dianping_rating,
-                "meituan_rating": detail.meituan_rating,
-                "merged_rating": detail.merged_rating,
-                "dianping_reviews": safe_json_loads(detail.dianping_reviews),
-                "meituan_reviews": safe_json_loads(detail.meituan_reviews),
-                "dianping_images": safe_json_loads(detail.dianping_images),
-                "meituan_images": safe_json_loads(detail.meituan_images),
-                "map_image": detail.map_image,  # 地图图片字段
-                "last_dianping_update": detail.last_dianping_update,
-                "last_meituan_update": detail.last_meituan_update,
-                "cache_expires_at": detail.cache_expires_at,
-                "created_at": detail.created_at,
-                "updated_at": detail.updated_at
-            }
-            return result
+            result = {name: DETAIL_FIELDS[name][1](detail, court) for name in (names or DETAIL_FIELDS)}
+            return ORJSONResponse(result)
         except Exception as e:
             logger.error(f"构建响应数据失败: {e}")
             raise HTTPException(status_code=500, detail=f"构建响应数据失败: {str(e)}")
@@ -138,6 +181,56 @@ async def get_court_detail(court_id: int, force_update: bool = Query(False, desc
         logger.error(f"获取场馆详情失败: {e}")
         raise HTTPException(status_code=500, detail=f"获取场馆详情失败: {str(e)}")
 
+def _paged_collection(db: Session, court_id: int, columns: Dict[str, str], platform: Optional[str],
+                      offset: int, limit: int) -> Dict:
+    """分页返回评论/图片等JSON数组字段，platform 为空时按平台顺序合并"""
+    if platform and platform not in columns:
+        raise HTTPException(status_code=400, detail=f"无效的平台：{platform}")
+    if not db.query(TennisCourt.id).filter(TennisCourt.id == court_id).first():
+        raise HTTPException(status_code=404, detail="场馆不存在")
+
+    platforms = [platform] if platform else list(columns)
+    row = db.query(*[getattr(CourtDetail, columns[p]) for p in platforms]).filter(
+        CourtDetail.court_id == court_id
+    ).first()
+
+    items = []
+    if row:
+        for p, value in zip(platforms, row):
+            for item in load_json(value, []):
+                if isinstance(item, dict):
+                    item = {**item, "platform": p}
+                items.append(item)
+    return {
+        "court_id": court_id,
+        "total": len(items),
+        "offset": offset,
+        "limit": limit,
+        "items": items[offset:offset + limit],
+    }
+
+@router.get("/{court_id}/reviews")
+async def get_court_reviews(
+    court_id: int,
+    platform: Optional[str] = Query(None, description="平台：dianping, meituan，为空返回全部"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """分页获取场馆评论"""
+    return _paged_collection(db, court_id, REVIEW_COLUMNS, platform, offset, limit)
+
+@router.get("/{court_id}/images")
+async def get_court_images(
+    court_id: int,
+    platform: Optional[str] = Query(None, description="平台：dianping, meituan，为空返回全部"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """分页获取场馆图片"""
+    return _paged_collection(db, court_id, IMAGE_COLUMNS, platform, offset, limit)
+
 @router.post("/{court_id}/update")
 async def update_court_detail(court_id: int, db: Session = Depends(get_db)):
     """手动更新场馆详情数据"""
@@ -153,7 +246,8 @@ async def update_court_detail(court_id: int, db: Session = Depends(get_db)):
         db.refresh(detail)
     
     try:
-        await update_court_detail_data(court, detail, db)
+        with price_writer(db, "detail_update"):
+            await update_court_detail_data(court, detail, db)
         return {"message": "详情数据更新成功", "court_id": court_id}
     except Exception as e:
         logger.error(f"更新详情数据失败: {e}")
@@ -169,15 +263,8 @@ async def preview_court_detail(court_id: int, db: Session = Depends(get_db)):
     detail = db.query(CourtDetail).filter(CourtDetail.court_id == court_id).first()
     
     # 新增：只要有价格或地图图片就返回has_detail: True
-    def safe_json_loads(val):
-        if not val:
-            return []
-        try:
-            return json.loads(val)
-        except Exception:
-            return []
-    merged_prices = safe_json_loads(detail.merged_prices) if detail else []
-    predict_prices = safe_json_loads(detail.predict_prices) if detail else []
+    merged_prices = load_json(detail.merged_prices, []) if detail else []
+    predict_prices = load_json(detail.predict_prices, []) if detail else []
     has_price = (merged_prices and len(merged_prices) > 0) or (predict_prices and isinstance(predict_prices, dict) and (predict_prices.get('peak_price') or predict_prices.get('off_peak_price')))
     has_map = detail and detail.map_image and detail.map_image.strip()
     has_description = detail and detail.merged_description and detail.merged_description.strip()
@@ -199,14 +286,14 @@ async def preview_court_detail(court_id: int, db: Session = Depends(get_db)):
             "facilities": detail.merged_facilities,
             "business_hours": detail.merged_business_hours,
             "rating": detail.merged_rating,
-            "prices": safe_json_loads(detail.prices),
-            "bing_prices": safe_json_loads(detail.bing_prices),
-            "merged_prices": safe_json_loads(detail.merged_prices),
-            "predict_prices": safe_json_loads(detail.predict_prices),
-            "manual_prices": safe_json_loads(detail.manual_prices),
+            "prices": load_json(detail.prices, []),
+            "bing_prices": load_json(detail.bing_prices, []),
+            "merged_prices": load_json(detail.merged_prices, []),
+            "predict_prices": load_json(detail.predict_prices, []),
+            "manual_prices": load_json(detail.manual_prices, []),
             "manual_remark": detail.manual_remark,
-            "reviews": safe_json_loads(detail.dianping_reviews)[:3],
-            "images": safe_json_loads(detail.dianping_images)[:3],
+            "reviews": load_json(detail.dianping_reviews, [])[:3],
+            "images": load_json(detail.dianping_images, [])[:3],
             "map_image": detail.map_image,  # 添加地图图片字段
             "last_update": detail.updated_at.isoformat() if detail.updated_at else None
         }
@@ -228,7 +315,7 @@ async def set_manual_price(court_id: int, manual_prices: dict = Body(...), manua
         db.commit()
         db.refresh(detail)
     # 写入人工价格
-    detail.manual_prices = json.dumps(manual_prices, ensure_ascii=False)
+    detail.manual_prices = manual_prices
     # 同步写入真实价格字段
     real_prices = []
     for k, v in manual_prices.items():
@@ -240,18 +327,47 @@ async def set_manual_price(court_id: int, manual_prices: dict = Body(...), manua
                 'source': '人工录入'
             })
     if real_prices:
-        detail.prices = json.dumps(real_prices, ensure_ascii=False)
+        detail.prices = real_prices
         # 融合价格优先用人工录入
-        detail.merged_prices = json.dumps(real_prices, ensure_ascii=False)
+        detail.merged_prices = real_prices
     # 写入备注
     if manual_remark is not None:
         detail.manual_remark = manual_remark
     else:
         detail.manual_remark = manual_prices.get("remark") if isinstance(manual_prices, dict) else None
-    db.commit()
+    with price_writer(db, "manual"):
+        db.commit()
     db.refresh(detail)
     return {"message": "人工价格和备注已更新", "court_id": court_id}
 
+@router.get("/{court_id}/price_history")
+async def get_price_history(
+    court_id: int,
+    column: Optional[str] = Query(None, description="价格字段，如 bing_prices、merged_prices，为空返回全部"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """场馆价格字段的历史版本（时间倒序）"""
+    try:
+        rows = price_history.history(db, court_id, column, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"court_id": court_id, "history": rows}
+
+@router.post("/price_history/restore")
+async def restore_prices_as_of(
+    column: str = Body(..., description="价格字段"),
+    as_of: datetime = Body(..., description="恢复到该时刻的值"),
+    court_ids: Optional[List[int]] = Body(None, description="只恢复这些场馆，为空时全部"),
+    dry_run: bool = Body(True, description="只统计不写入"),
+    db: Session = Depends(get_db)
+):
+    """把某价格字段恢复到指定时刻的值（as_of之前没有历史的场馆不变）"""
+    try:
+        return price_history.restore_as_of(db, column, as_of, court_ids, dry_run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 async def update_court_detail_data(court: TennisCourt, detail: CourtDetail, db: Session):
     """更新场馆详情数据"""
     scraper = DetailScraper()
@@ -265,7 +381,7 @@ async def update_court_detail_data(court: TennisCourt, detail: CourtDetail, db:
         # 优先点评
         if detail.dianping_prices:
             try:
-                prices = json.loads(detail.dianping_prices)
+                prices = load_json(detail.dianping_prices)
                 if prices and isinstance(prices, list) and any(p.get('price') for p in prices):
                     real_prices.extend(prices)
             except:
@@ -273,7 +389,7 @@ async def update_court_detail_data(court: TennisCourt, detail: CourtDetail, db:
         # 其次美团
         if not real_prices and detail.meituan_prices:
             try:
-                prices = json.loads(detail.meituan_prices)
+                prices = load_json(detail.meituan_prices)
                 if prices and isinstance(prices, list) and any(p.get('price') for p in prices):
                     real_prices.extend(prices)
             except:
@@ -283,7 +399,7 @@ async def update_court_detail_data(court: TennisCourt, detail: CourtDetail, db:
         bing_prices = []
         if detail.merged_prices:
             try:
-                existing_prices = json.loads(detail.merged_prices)
+                existing_prices = load_json(detail.merged_prices)
                 if existing_prices and isinstance(existing_prices, list):
                     # 分离BING价格和真实价格
                     for price in existing_prices:
@@ -296,13 +412,13 @@ async def update_court_detail_data(court: TennisCourt, detail: CourtDetail, db:
         
         # 更新价格数据 - 只保留真实价格（非BING）
         if real_prices:
-            detail.merged_prices = json.dumps(real_prices, ensure_ascii=False)
+            detail.merged_prices = real_prices
         else:
-            detail.merged_prices = json.dumps([], ensure_ascii=False)
+            detail.merged_prices = []
         
         # ====== 处理BING价格作为预测价格 ======
         # 如果没有真实价格但有BING价格，将BING价格转换为预测价格格式
-        if not real_prices and bing_prices and not detail.predict_prices:
+        if not real_prices and bing_prices and detail.predict_prices is None:
             try:
                 # 从BING价格中提取价格信息
                 peak_prices = []
@@ -327,19 +443,19 @@ async def update_court_detail_data(court: TennisCourt, detail: CourtDetail, db:
                         'source': 'BING_SCRAPED',
                         'sample_count': len(bing_prices)
                     }
-                    detail.predict_prices = json.dumps(predict_result, ensure_ascii=False)
+                    detail.predict_prices = predict_result
                     logger.info(f"场馆 {court.name} 将BING价格转换为预测价格: {predict_result}")
             except Exception as e:
                 logger.error(f"转换BING价格为预测价格失败: {e}")
         
         # ====== 自动预测价格 ======
         # 如果没有真实价格和BING价格，自动调用预测算法
-        if not real_prices and not bing_prices and not detail.predict_prices:
+        if not real_prices and not bing_prices and detail.predict_prices is None:
             try:
                 predictor = PricePredictor()
                 predict_result = predictor.predict_price_for_court(court)
                 if predict_result:
-                    detail.predict_prices = json.dumps(predict_result, ensure_ascii=False)
+                    detail.predict_prices = predict_result
                     logger.info(f"场馆 {court.name} 自动生成预测价格: {predict_result}")
             except Exception as e:
                 logger.error(f"自动预测价格失败: {e}")
@@ -350,8 +466,8 @@ async def update_court_detail_data(court: TennisCourt, detail: CourtDetail, db:
         detail.merged_facilities = ''   # 清空设施
         detail.merged_business_hours = ''  # 清空营业时间
         detail.merged_rating = 0.0      # 清空评分
-        detail.dianping_reviews = json.dumps([], ensure_ascii=False)  # 清空评论
-        detail.dianping_images = json.dumps([], ensure_ascii=False)   # 清空图片
+        detail.dianping_reviews = []  # 清空评论
+        detail.dianping_images = []   # 清空图片
         
         # 只保留真实爬取的数据（如果有的话）
         xiaohongshu_data = all_data.get('platforms', {}).get('xiaohongshu', {}).get('data', {})
@@ -370,10 +486,10 @@ async def update_court_detail_data(court: TennisCourt, detail: CourtDetail, db:
                 detail.merged_rating = xiaohongshu_data.get('rating', 0.0)
             
             if xiaohongshu_data.get('reviews') and len(xiaohongshu_data.get('reviews', [])) > 0:
-                detail.dianping_reviews = json.dumps(xiaohongshu_data.get('reviews', []), ensure_ascii=False)
+                detail.dianping_reviews = xiaohongshu_data.get('reviews', [])
             
             if xiaohongshu_data.get('images') and len(xiaohongshu_data.get('images', [])) > 0:
-                detail.dianping_images = json.dumps(xiaohongshu_data.get('images', []), ensure_ascii=False)
+                detail.dianping_images = xiaohongshu_data.get('images', [])
         
         # ====== 生成智能地图图片 ======
         # 已禁用地图图片自动生成和覆盖，保护本地缓存
@@ -421,7 +537,8 @@ async def batch_update_details(limit: int = Query(10, ge=1, le=50, description="
                 db.commit()
                 db.refresh(detail)
             
-            await update_court_detail_data(court, detail, db)
+            with price_writer(db, "detail_update"):
+                await update_court_detail_data(court, detail, db)
             updated_count += 1
             
         except Exception as e:
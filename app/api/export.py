@@ -0,0 +1,185 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Dict, Iterator, List, Optional
+from datetime import datetime
+import csv
+import io
+import json
+from ..database import SessionLocal
+from ..models import TennisCourt, CourtDetail
+from ..config import settings
+from ..geo import court_lnglat
+from ..json_types import load_json
+from ..scrapers.price_predictor import PricePredictor
+from .courts import resolve_detail_prices
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+# 服务端游标每批读取的行数
+YIELD_PER = 500
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+    "geojson": "application/geo+json; charset=utf-8",
+}
+
+COURT_FIELDS = [c.name for c in TennisCourt.__table__.columns]
+DETAIL_FIELDS = [c.name for c in CourtDetail.__table__.columns]
+PRICE_FIELDS = [
+    "court_id", "name", "area", "area_name", "court_type",
+    "peak_price", "off_peak_price", "member_price", "price_unit", "price_source",
+    "manual_prices", "merged_prices", "predict_prices", "bing_prices",
+]
+# 价格导出中需要反序列化的JSON字段
+PRICE_JSON_FIELDS = ("manual_prices", "merged_prices", "predict_prices", "bing_prices")
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, default=_json_default)
+
+def _row_dict(obj, fields: List[str]) -> Dict:
+    return {field: getattr(obj, field) for field in fields}
+
+def _iter_rows(kind: str, area: Optional[str], court_type: Optional[str]) -> Iterator[Dict]:
+    """使用服务端游标逐批读取并产出导出行，行中带 _lnglat 供GeoJSON使用"""
+    db = SessionLocal()
+    predictor = PricePredictor()
+    try:
+        if kind == "courts":
+            query = db.query(TennisCourt)
+        elif kind == "details":
+            query = db.query(TennisCourt, CourtDetail).join(CourtDetail, CourtDetail.court_id == TennisCourt.id)
+        else:
+            query = db.query(TennisCourt, CourtDetail).outerjoin(CourtDetail, CourtDetail.court_id == TennisCourt.id)
+        if area:
+            query = query.filter(TennisCourt.area == area)
+        query = query.order_by(TennisCourt.id).yield_per(YIELD_PER)
+
+        for item in query:
+            court, detail = (item, None) if kind == "courts" else item
+            realtime_type = predictor.determine_court_type(court.name, court.address)
+            if court_type and realtime_type != court_type:
+                continue
+
+            if kind == "courts":
+                row = _row_dict(court, COURT_FIELDS)
+                row["court_type"] = realtime_type
+            elif kind == "details":
+                row = _row_dict(detail, DETAIL_FIELDS)
+                row["court_name"] = court.name
+            else:
+                source, prices = resolve_detail_prices(detail)
+                row = {
+                    "court_id": court.id,
+                    "name": court.name,
+                    "area": court.area,
+                    "area_name": court.area_name,
+                    "court_type": realtime_type,
+                    "peak_price": prices.get("peak_price", court.peak_price),
+                    "off_peak_price": prices.get("off_peak_price", court.off_peak_price),
+                    "member_price": prices.get("member_price", court.member_price),
+                    "price_unit": prices.get("price_unit", court.price_unit),
+                    "price_source": source,
+                }
+                for field in PRICE_JSON_FIELDS:
+                    row[field] = load_json(getattr(detail, field)) if detail else None
+            row["_lnglat"] = court_lnglat(court)
+            yield row
+    finally:
+        predictor.db.close()
+        db.close()
+
+def _stream_ndjson(rows: Iterator[Dict]) -> Iterator[str]:
+    for row in rows:
+        row.pop("_lnglat", None)
+        yield _dumps(row) + "\n"
+
+def _stream_csv(rows: Iterator[Dict], fields: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # 带BOM，方便Excel直接打开中文内容
+    writer.writerow(fields)
+    yield "\ufeff" + buffer.getvalue()
+
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate(0)
+        values = []
+        for field in fields:
+            value = row.get(field)
+            if isinstance(value, (dict, list)):
+                value = _dumps(value)
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            values.append(value)
+        writer.writerow(values)
+        yield buffer.getvalue()
+
+def _stream_geojson(rows: Iterator[Dict]) -> Iterator[str]:
+    yield '{"type": "FeatureCollection", "features": ['
+    first = True
+    for row in rows:
+        lnglat = row.pop("_lnglat", None)
+        if not lnglat:
+            continue
+        feature = {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [lnglat[0], lnglat[1]]},
+            "properties": row,
+        }
+        yield ("" if first else ",") + _dumps(feature)
+        first = False
+    yield "]}"
+
+def _export_response(kind: str, fields: List[str], fmt: str, area: Optional[str], court_type: Optional[str]) -> StreamingResponse:
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"无效的导出格式：{fmt}")
+    if area and area not in settings.target_areas:
+        raise HTTPException(status_code=400, detail=f"无效的区域：{area}")
+
+    rows = _iter_rows(kind, area, court_type)
+    if fmt == "ndjson":
+        body = _stream_ndjson(rows)
+    elif fmt == "csv":
+        body = _stream_csv(rows, fields)
+    else:
+        body = _stream_geojson(rows)
+
+    filename = f"{kind}.{fmt}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/courts")
+def export_courts(
+    format: str = Query("ndjson", description="导出格式：ndjson, csv, geojson"),
+    area: Optional[str] = Query(None, description="区域筛选"),
+    court_type: Optional[str] = Query(None, description="场馆类型筛选：室内, 室外"),
+):
+    """流式导出场馆数据"""
+    return _export_response("courts", COURT_FIELDS, format, area, court_type)
+
+@router.get("/details")
+def export_details(
+    format: str = Query("ndjson", description="导出格式：ndjson, csv, geojson"),
+    area: Optional[str] = Query(None, description="区域筛选"),
+    court_type: Optional[str] = Query(None, description="场馆类型筛选：室内, 室外"),
+):
+    """流式导出场馆详情数据"""
+    return _export_response("details", DETAIL_FIELDS + ["court_name"], format, area, court_type)
+
+@router.get("/prices")
+def export_prices(
+    format: str = Query("ndjson", description="导出格式：ndjson, csv, geojson"),
+    area: Optional[str] = Query(None, description="区域筛选"),
+    court_type: Optional[str] = Query(None, description="场馆类型筛选：室内, 室外"),
+):
+    """流式导出场馆展示价格（人工 > 融合 > 预测）及原始价格字段"""
+    return _export_response("prices", PRICE_FIELDS, format, area, court_type)
@@ -3,9 +3,15 @@ from sqlalchemy.orm import Session
 from typing import Dict, List
 from datetime import datetime
 from ..database import get_db
-from ..models import TennisCourt, ScrapedCourtData
+from ..models import TennisCourt, ScrapedCourtData, CoordinateAudit
 from ..scrapers.amap_scraper import AmapScraper
+from ..scrapers.area_assigner import AreaAssigner, AREA_RULES_VERSION
+from ..scrapers.dedupe import DedupeIndex
+from ..scrapers.coord_validator import CoordinateValidator, make_audit, parse_district
 from ..config import settings
+from ..court_rollup import scraper_status
+from ..quality_rules import report_counts, run_quality_rules
+from ..geo import normalize_lnglat
 
 router = APIRouter(prefix="/api/scraper", tags=["scraper"])
 
@@ -55,33 +61,28 @@ def scrape_all_sources(
 
 @router.get("/status")
 def get_scraper_status(db: Session = Depends(get_db)):
-    """获取爬虫状态信息"""
-    total_courts = db.query(TennisCourt).count()
-    
-    # 按数据来源统计
-    source_stats = {}
-    sources = db.query(TennisCourt.data_source).distinct().all()
-    for source in sources:
-        if source[0]:
-            count = db.query(TennisCourt).filter(TennisCourt.data_source == source[0]).count()
-            latest_update = db.query(TennisCourt.updated_at).filter(
-                TennisCourt.data_source == source[0]
-            ).order_by(TennisCourt.updated_at.desc()).first()
-            
-            source_stats[source[0]] = {
-                "count": count,
-                "latest_update": latest_update[0] if latest_update else None
-            }
-    
-    return {
-        "total_courts": total_courts,
-        "source_stats": source_stats,
-        "target_areas": settings.target_areas
-    }
+    """获取爬虫状态信息（读统计汇总表）"""
+    status = scraper_status(db)
+    status["target_areas"] = settings.target_areas
+    return status
+
+@router.get("/quality")
+def get_data_quality(rules: str = None, workers: int = 1, db: Session = Depends(get_db)):
+    """数据质量检查（一次扫描执行全部或指定规则，rules 为逗号分隔的规则名）"""
+    try:
+        return run_quality_rules(db, rules.split(",") if rules else None, workers=max(1, min(workers, 8)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 def run_amap_scraping(areas: List[str], db: Session) -> Dict:
     """执行高德地图数据抓取"""
     scraper = AmapScraper()
+    assigner = AreaAssigner()
+    validator = CoordinateValidator()
+    # 已入库场馆的疑似重复索引，新抓取的近似重复场馆不再新建
+    dedupe_index = DedupeIndex.from_courts(
+        db.query(TennisCourt.id, TennisCourt.name, TennisCourt.address, TennisCourt.latitude, TennisCourt.longitude)
+    )
     results = {}
     
     for area in areas:
@@ -89,34 +90,72 @@ def run_amap_scraping(areas: List[str], db: Session) -> Dict:
             print(f"开始抓取 {settings.target_areas[area]['name']} 区域数据...")
             courts_data = scraper.search_tennis_courts(area)
             
+            # 入库前批量校验坐标：颠倒的自动修正，明显错误的置空隔离
+            checks = validator.validate_many(
+                [c.latitude for c in courts_data],
+                [c.longitude for c in courts_data],
+                [area] * len(courts_data),
+                [parse_district((c.raw_data or {}).get('adname'), c.address, c.name) for c in courts_data]
+            )
+            originals = [(c.latitude, c.longitude) for c in courts_data]
+            for court_data, check in zip(courts_data, checks):
+                court_data.latitude = check["latitude"]
+                court_data.longitude = check["longitude"]
+            
+            # 按区域规则批量分配区域
+            assigned_areas = assigner.assign_many(
+                [c.name for c in courts_data],
+                [c.address for c in courts_data],
+                [normalize_lnglat(c.latitude, c.longitude) for c in courts_data],
+                [area] * len(courts_data)
+            )
+            
             # 保存到数据库
             saved_count = 0
-            for court_data in courts_data:
-                # 检查是否已存在
+            duplicate_count = 0
+            for court_data, assigned_area, check, original in zip(courts_data, assigned_areas, checks, originals):
+                lnglat = normalize_lnglat(court_data.latitude, court_data.longitude)
+                # 检查是否已存在（兼容按抓取区域保存的旧记录）
                 existing = db.query(TennisCourt).filter(
                     TennisCourt.name == court_data.name,
-                    TennisCourt.area == area
+                    TennisCourt.area.in_([area, assigned_area])
                 ).first()
                 
-                if existing:
-                    # 更新现有记录
+                duplicate_id = None if existing else dedupe_index.find_match(court_data.name, court_data.address, lnglat)
+                if duplicate_id:
+                    # 近似重复（如同一场馆的不同名称）：只补充已有记录缺失的字段
+                    duplicate = db.get(TennisCourt, duplicate_id)
+                    if duplicate:
+                        duplicate.phone = duplicate.phone or court_data.phone
+                        duplicate.business_hours = duplicate.business_hours or court_data.business_hours
+                        duplicate.description = duplicate.description or court_data.description
+                    duplicate_count += 1
+                    target_id = duplicate_id
+                elif existing:
+                    # 更新现有记录（新坐标被隔离时保留原坐标）
                     existing.address = court_data.address
                     existing.phone = court_data.phone
-                    existing.latitude = court_data.latitude
-                    existing.longitude = court_data.longitude
+                    if check["action"] != "quarantined":
+                        existing.latitude = court_data.latitude
+                        existing.longitude = court_data.longitude
                     existing.business_hours = court_data.business_hours
                     existing.description = court_data.description
                     existing.updated_at = datetime.now()
                     existing.data_source = court_data.data_source
                     existing.source_url = court_data.source_url
+                    existing.area = assigned_area
+                    existing.area_name = settings.target_areas[assigned_area]['name']
+                    existing.area_version = AREA_RULES_VERSION
+                    target_id = existing.id
                 else:
                     # 创建新记录
                     new_court = TennisCourt(
                         name=court_data.name,
                         address=court_data.address,
                         phone=court_data.phone,
-                        area=area,
-                        area_name=settings.target_areas[area]['name'],
+                        area=assigned_area,
+                        area_name=settings.target_areas[assigned_area]['name'],
+                        area_version=AREA_RULES_VERSION,
                         latitude=court_data.latitude,
                         longitude=court_data.longitude,
                         business_hours=court_data.business_hours,
@@ -125,13 +164,20 @@ def run_amap_scraping(areas: List[str], db: Session) -> Dict:
                         source_url=court_data.source_url
                     )
                     db.add(new_court)
+                    db.flush()
+                    dedupe_index.add(new_court.id, new_court.name, new_court.address, lnglat)
                     saved_count += 1
+                    target_id = new_court.id
+                
+                if check["action"]:
+                    db.add(CoordinateAudit(**make_audit(check, target_id, court_data.name, "amap", *original)))
             
             db.commit()
             results[area] = {
                 "scraped": len(courts_data),
                 "saved": saved_count,
-                "updated": len(courts_data) - saved_count
+                "updated": len(courts_data) - saved_count - duplicate_count,
+                "duplicates": duplicate_count
             }
             
             print(f"{settings.target_areas[area]['name']} 区域抓取完成：{len(courts_data)} 个场馆")
@@ -157,6 +203,12 @@ def run_all_scraping(db: Session) -> Dict:
     # results["dianping"] = run_dianping_scraping(db)
     # results["meituan"] = run_meituan_scraping(db)
     
+    # 抓取后做一次数据质量检查，只返回各规则的问题数
+    try:
+        results["quality"] = report_counts(run_quality_rules(db))
+    except Exception as e:
+        results["quality"] = {"error": str(e)}
+    
     return results
 
 @router.delete("/clear")
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SQLite在线备份
+使用SQLite在线备份API分步复制页面（每步之间释放锁，不阻塞写入），
+快照按固定大小分块，以内容哈希去重并压缩存储，清单文件记录块序列；
+按保留策略清理旧快照及不再引用的块，恢复前校验哈希与完整性，恢复时无需停止应用
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.engine import make_url
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# 每步复制的页数，步间休眠让出写锁
+BACKUP_STEP_PAGES = 256
+BACKUP_STEP_SLEEP = 0.005
+# 去重分块大小（页大小的整数倍）
+CHUNK_SIZE = 64 * 1024
+ZLIB_LEVEL = 6
+SNAPSHOT_ID_RE = re.compile(r"^\d{8}_\d{6}_\d{6}$")
+
+_backup_lock = threading.Lock()
+
+class BackupError(Exception):
+    """备份/恢复失败"""
+
+def sqlite_path(database_url: Optional[str] = None) -> str:
+    """SQLite数据库文件路径，非SQLite数据库时抛出 BackupError"""
+    url = make_url(database_url or settings.database_url)
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        raise BackupError("仅支持SQLite文件数据库的备份")
+    return os.path.abspath(url.database)
+
+def online_copy(source_path: str, target_path: str):
+    """在线备份API分步复制数据库（步间释放锁，不阻塞写入）"""
+    source = sqlite3.connect(source_path, timeout=30)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target, pages=BACKUP_STEP_PAGES, sleep=BACKUP_STEP_SLEEP)
+    finally:
+        target.close()
+        source.close()
+
+class BackupStore:
+    """快照存储：chunks/ 下为按哈希命名的压缩块，manifests/ 下为快照清单"""
+
+    def __init__(self, backup_dir: Optional[str] = None, db_path: Optional[str] = None):
+        self.backup_dir = os.path.abspath(backup_dir or settings.backup_dir)
+        self.db_path = db_path or sqlite_path()
+        self.chunk_dir = os.path.join(self.backup_dir, "chunks")
+        self.manifest_dir = os.path.join(self.backup_dir, "manifests")
+
+    # ========== 块存储 ==========
+    def _chunk_path(self, digest: str) -> str:
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def _put_chunk(self, data: bytes) -> Tuple[str, bool]:
+        """写入块，返回 (哈希, 是否新写入)"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(zlib.compress(data, ZLIB_LEVEL))
+        os.replace(tmp, path)
+        return digest, True
+
+    def _read_chunk(self, digest: str) -> bytes:
+        with open(self._chunk_path(digest), "rb") as f:
+            data = zlib.decompress(f.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise BackupError(f"数据块校验失败: {digest}")
+        return data
+
+    # ========== 清单 ==========
+    def _manifest_path(self, snapshot_id: str) -> str:
+        return os.path.join(self.manifest_dir, f"{snapshot_id}.json")
+
+    def load_manifest(self, snapshot_id: str) -> Dict:
+        path = self._manifest_path(snapshot_id)
+        if not SNAPSHOT_ID_RE.match(snapshot_id) or not os.path.exists(path):
+            raise BackupError(f"快照不存在: {snapshot_id}")
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def list_snapshots(self) -> List[Dict]:
+        """所有快照清单（不含块列表），按时间从新到旧"""
+        if not os.path.isdir(self.manifest_dir):
+            return []
+        snapshots = []
+        for name in os.listdir(self.manifest_dir):
+            if name.endswith(".json"):
+                manifest = self.load_manifest(name[:-5])
+                manifest.pop("chunks", None)
+                snapshots.append(manifest)
+        return sorted(snapshots, key=lambda m: m["created_at"], reverse=True)
+
+    # ========== 快照 ==========
+    def _online_copy(self, target_path: str, source_path: Optional[str] = None):
+        """在线备份API分步复制数据库"""
+        online_copy(source_path or self.db_path, target_path)
+
+    @staticmethod
+    def _check_database(path: str) -> Dict:
+        """完整性检查并统计主要表行数"""
+        conn = sqlite3.connect(path)
+        try:
+            result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+            tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+            counts = {t: conn.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0]
+                      for t in ("tennis_courts", "court_details") if t in tables}
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        finally:
+            conn.close()
+        return {"integrity": result, "row_counts": counts, "page_size": page_size}
+
+    def snapshot(self, label: Optional[str] = None) -> Dict:
+        """创建快照，返回清单摘要"""
+        with _backup_lock:
+            os.makedirs(self.manifest_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(suffix=".db", dir=self.backup_dir)
+            os.close(fd)
+            try:
+                self._online_copy(tmp_path)
+                check = self._check_database(tmp_path)
+                if check["integrity"] != "ok":
+                    raise BackupError(f"快照完整性检查失败: {check['integrity']}")
+
+                chunks, new_chunks, new_bytes = [], 0, 0
+                file_hash = hashlib.sha256()
+                with open(tmp_path, "rb") as f:
+                    while True:
+                        data = f.read(CHUNK_SIZE)
+                        if not data:
+                            break
+                        file_hash.update(data)
+                        digest, created = self._put_chunk(data)
+                        chunks.append(digest)
+                        if created:
+                            new_chunks += 1
+                            new_bytes += os.path.getsize(self._chunk_path(digest))
+                size = os.path.getsize(tmp_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            now = datetime.now()
+            snapshot_id = now.strftime("%Y%m%d_%H%M%S_%f")
+            manifest = {
+                "id": snapshot_id,
+                "label": label,
+                "created_at": now.isoformat(),
+                "size": size,
+                "sha256": file_hash.hexdigest(),
+                "chunk_size": CHUNK_SIZE,
+                "chunk_count": len(chunks),
+                "new_chunks": new_chunks,
+                "new_bytes": new_bytes,
+                "page_size": check["page_size"],
+                "row_counts": check["row_counts"],
+                "chunks": chunks,
+            }
+            tmp_manifest = f"{self._manifest_path(snapshot_id)}.tmp"
+            with open(tmp_manifest, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            os.replace(tmp_manifest, self._manifest_path(snapshot_id))
+
+        logger.info(f"数据库快照 {snapshot_id}: {len(chunks)} 块, 新增 {new_chunks} 块 ({new_bytes} 字节)")
+        summary = dict(manifest)
+        summary.pop("chunks")
+        return summary
+
+    def _assemble(self, snapshot_id: str, target_path: str) -> Dict:
+        """由块重建数据库文件并校验哈希与完整性"""
+        manifest = self.load_manifest(snapshot_id)
+        file_hash = hashlib.sha256()
+        with open(target_path, "wb") as f:
+            for digest in manifest["chunks"]:
+                data = self._read_chunk(digest)
+                file_hash.update(data)
+                f.write(data)
+        if file_hash.hexdigest() != manifest["sha256"]:
+            raise BackupError(f"快照文件校验失败: {snapshot_id}")
+        check = self._check_database(target_path)
+        if check["integrity"] != "ok":
+            raise BackupError(f"快照完整性检查失败: {check['integrity']}")
+        return manifest
+
+    @contextmanager
+    def checkout(self, snapshot_id: str):
+        """把快照重建到临时文件供只读使用（如对比），退出时删除"""
+        self.load_manifest(snapshot_id)
+        fd, tmp_path = tempfile.mkstemp(suffix=".db", dir=self.backup_dir)
+        os.close(fd)
+        try:
+            self._assemble(snapshot_id, tmp_path)
+            yield tmp_path
+        finally:
+            os.remove(tmp_path)
+
+    def verify(self, snapshot_id: str) -> Dict:
+        """校验快照可恢复（重建到临时文件）"""
+        fd, tmp_path = tempfile.mkstemp(suffix=".db", dir=self.backup_dir)
+        os.close(fd)
+        try:
+            manifest = self._assemble(snapshot_id, tmp_path)
+        finally:
+            os.remove(tmp_path)
+        return {"id": snapshot_id, "verified": True, "sha256": manifest["sha256"], "row_counts": manifest["row_counts"]}
+
+    def restore(self, snapshot_id: str, safety_snapshot: bool = True) -> Dict:
+        """
+        在线恢复快照：校验通过后通过备份API写回正在使用的数据库，
+        恢复前默认先为当前数据库创建一个安全快照
+        """
+        safety = self.snapshot(label=f"恢复 {snapshot_id} 前自动备份") if safety_snapshot else None
+        with _backup_lock:
+            fd, tmp_path = tempfile.mkstemp(suffix=".db", dir=self.backup_dir)
+            os.close(fd)
+            try:
+                manifest = self._assemble(snapshot_id, tmp_path)
+                source = sqlite3.connect(tmp_path)
+                target = sqlite3.connect(self.db_path, timeout=30)
+                try:
+                    source.backup(target, pages=BACKUP_STEP_PAGES, sleep=BACKUP_STEP_SLEEP)
+                finally:
+                    target.close()
+                    source.close()
+            finally:
+                os.remove(tmp_path)
+
+        check = self._check_database(self.db_path)
+        if check["integrity"] != "ok" or check["row_counts"] != manifest["row_counts"]:
+            raise BackupError(f"恢复后校验失败: {check}")
+        logger.info(f"已恢复数据库快照 {snapshot_id}")
+        return {
+            "id": snapshot_id,
+            "restored": True,
+            "row_counts": check["row_counts"],
+            "safety_snapshot": safety["id"] if safety else None,
+        }
+
+    # ========== 保留策略 ==========
+    def prune(self, keep_last: Optional[int] = None, keep_daily: Optional[int] = None,
+              keep_weekly: Optional[int] = None) -> Dict:
+        """
+        保留最近 keep_last 个快照，以及最近 keep_daily 天每天最新一个、最近 keep_weekly 周每周最新一个，
+        删除其余快照后清理不再引用的块
+        """
+        keep_last = settings.backup_keep_last if keep_last is None else keep_last
+        keep_daily = settings.backup_keep_daily if keep_daily is None else keep_daily
+        keep_weekly = settings.backup_keep_weekly if keep_weekly is None else keep_weekly
+
+        with _backup_lock:
+            snapshots = self.list_snapshots()
+            now = datetime.now()
+            keep = {s["id"] for s in snapshots[:keep_last]}
+            seen_days, seen_weeks = set(), set()
+            for s in snapshots:  # 从新到旧，每个时间段保留最新的一个
+                created = datetime.fromisoformat(s["created_at"])
+                day = created.date()
+                week = tuple(created.isocalendar()[:2])
+                if now - created <= timedelta(days=keep_daily) and day not in seen_days:
+                    seen_days.add(day)
+                    keep.add(s["id"])
+                if now - created <= timedelta(weeks=keep_weekly) and week not in seen_weeks:
+                    seen_weeks.add(week)
+                    keep.add(s["id"])
+
+            removed = [s["id"] for s in snapshots if s["id"] not in keep]
+            for snapshot_id in removed:
+                os.remove(self._manifest_path(snapshot_id))
+
+            # 清理不再被任何快照引用的块
+            referenced = set()
+            for snapshot_id in keep:
+                referenced.update(self.load_manifest(snapshot_id)["chunks"])
+            removed_chunks = 0
+            if os.path.isdir(self.chunk_dir):
+                for root, _, files in os.walk(self.chunk_dir):
+                    for name in files:
+                        if name not in referenced:
+                            os.remove(os.path.join(root, name))
+                            removed_chunks += 1
+
+        logger.info(f"快照清理: 删除 {len(removed)} 个快照, {removed_chunks} 个数据块")
+        return {"kept": len(keep), "removed": removed, "removed_chunks": removed_chunks}
+
+    def stats(self) -> Dict:
+        """存储占用统计"""
+        chunk_bytes = chunk_count = 0
+        if os.path.isdir(self.chunk_dir):
+            for root, _, files in os.walk(self.chunk_dir):
+                for name in files:
+                    chunk_count += 1
+                    chunk_bytes += os.path.getsize(os.path.join(root, name))
+        snapshots = self.list_snapshots()
+        return {
+            "snapshots": len(snapshots),
+            "logical_bytes": sum(s["size"] for s in snapshots),
+            "stored_bytes": chunk_bytes,
+            "chunks": chunk_count,
+        }
+
+def snapshot_before(label: str, db_path: Optional[str] = None) -> Optional[Dict]:
+    """批量脚本执行前创建快照，失败时只记录日志不中断脚本"""
+    try:
+        summary = BackupStore(db_path=db_path).snapshot(label=label)
+        print(f"💾 已创建数据库快照 {summary['id']}（新增 {summary['new_chunks']}/{summary['chunk_count']} 块）")
+        return summary
+    except (BackupError, OSError, sqlite3.Error) as e:
+        logger.error(f"创建快照失败: {e}")
+        print(f"⚠️ 创建数据库快照失败: {e}")
+        return None
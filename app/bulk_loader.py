@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+场馆数据流式批量导入
+增量解析JSON文件，记录转换为行元组后按块 executemany 写入，
+每张表一个事务，二级索引在导入完成后再创建；
+每块一个保存点，写入失败的块逐行重试，无效记录跳过并记录，不影响同表其它记录
+"""
+
+import os
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import ijson
+except ImportError:  # 未安装时退化为整体读取
+    ijson = None
+
+from sqlalchemy import Table, DateTime, select, func
+from sqlalchemy.exc import DBAPIError
+
+from .database import engine
+from .json_types import JSONText, dumps
+from .models import TennisCourt, CourtDetail, CoordinateAudit
+from .scrapers.coord_validator import validate_records
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# 字段缺失时的默认值（与ORM导入时保持一致）
+COLUMN_DEFAULTS = {
+    TennisCourt.__tablename__: {
+        'has_roof': False,
+        'court_count': 1,
+        'is_open': True,
+    },
+    CourtDetail.__tablename__: {},
+}
+
+def _timestamp_converter(dialect_name: str):
+    """返回时间字段转换函数：SQLite直接写入文本，其它数据库转换为datetime"""
+    if dialect_name == 'sqlite':
+        def convert(value):
+            # SQLite按 "YYYY-MM-DD HH:MM:SS.ffffff" 文本存储，只需统一分隔符
+            if isinstance(value, str):
+                return value.replace('T', ' ', 1) if value else None
+            return value
+    else:
+        def convert(value):
+            if isinstance(value, str):
+                return datetime.fromisoformat(value) if value else None
+            return value
+    return convert
+
+def _detect_format(data_file: str) -> str:
+    """判断数据文件格式：完整格式(dict，含courts/details)或旧格式(list)"""
+    with open(data_file, 'r', encoding='utf-8') as f:
+        while True:
+            ch = f.read(1)
+            if not ch:
+                return 'empty'
+            if not ch.isspace():
+                return 'complete' if ch == '{' else 'list'
+
+def _skip(errors: Optional[List[Dict]], table: str, record_id, error):
+    """记录一条被跳过的无效记录"""
+    logger.warning(f"跳过无效记录 {table} id={record_id}: {error}")
+    if errors is not None:
+        errors.append({'table': table, 'id': record_id, 'error': str(error)})
+
+def iter_records(data_file: str, prefix: str, errors: Optional[List[Dict]] = None) -> Iterator[Dict]:
+    """按ijson前缀流式读取记录，prefix如 'courts.item'、'details.item'、'item'，非对象的记录跳过"""
+    for record in _iter_items(data_file, prefix):
+        if isinstance(record, dict):
+            yield record
+        else:
+            _skip(errors, prefix, None, f"记录不是对象: {record!r:.80}")
+
+def _iter_items(data_file: str, prefix: str) -> Iterator:
+    if ijson is None:
+        with open(data_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for key in prefix.split('.')[:-1]:
+            data = data.get(key, []) if isinstance(data, dict) else []
+        yield from data
+        return
+
+    with open(data_file, 'rb') as f:
+        yield from ijson.items(f, prefix, use_float=True)
+
+def iter_rows(records: Iterable[Dict], table: Table, dialect_name: str, keep_id: bool = True,
+              errors: Optional[List[Dict]] = None) -> Iterator[Tuple]:
+    """将JSON记录转换为与表列顺序一致的行元组，无法转换的记录跳过"""
+    columns = [c for c in table.columns if keep_id or c.name != 'id']
+    defaults = COLUMN_DEFAULTS.get(table.name, {})
+    convert_ts = _timestamp_converter(dialect_name)
+    timestamp_idx = {i for i, c in enumerate(columns) if isinstance(c.type, DateTime)}
+    # JSON列在数据文件中可能是已展开的对象/数组，需序列化为文本
+    json_idx = {i for i, c in enumerate(columns) if isinstance(c.type, JSONText)}
+    names = [c.name for c in columns]
+
+    for record in records:
+        row = []
+        try:
+            for i, name in enumerate(names):
+                value = record.get(name, defaults.get(name))
+                if i in timestamp_idx:
+                    value = convert_ts(value)
+                elif i in json_idx and isinstance(value, (dict, list)):
+                    value = dumps(value)
+                row.append(value)
+        except (AttributeError, TypeError, ValueError) as e:
+            _skip(errors, table.name, record.get('id') if isinstance(record, dict) else None, e)
+            continue
+        yield tuple(row)
+
+def _chunks(rows: Iterable[Tuple], size: int) -> Iterator[List[Tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _placeholder(dialect) -> str:
+    return '?' if dialect.paramstyle in ('qmark', 'numeric') else '%s'
+
+def _insert_chunk(conn, sql: str, chunk: List[Tuple], table: str, id_idx: Optional[int],
+                  errors: Optional[List[Dict]]) -> int:
+    """在保存点内写入一块，失败时回滚该块并逐行重试，跳过写入失败的行，返回写入行数"""
+    savepoint = conn.begin_nested()
+    try:
+        conn.exec_driver_sql(sql, chunk)
+        savepoint.commit()
+        return len(chunk)
+    except DBAPIError:
+        savepoint.rollback()
+
+    count = 0
+    for row in chunk:
+        savepoint = conn.begin_nested()
+        try:
+            conn.exec_driver_sql(sql, row)
+            savepoint.commit()
+            count += 1
+        except DBAPIError as e:
+            savepoint.rollback()
+            _skip(errors, table, row[id_idx] if id_idx is not None else None, e.orig)
+    return count
+
+def bulk_insert(table: Table, records: Iterable[Dict], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                keep_id: bool = True, bind=None, errors: Optional[List[Dict]] = None) -> int:
+    """
+    单事务内分块 executemany 写入一张表
+    空表导入时先删除二级索引，写入完成后重建，返回写入行数
+    无效记录跳过，跳过的记录追加到 errors
+    """
+    bind = bind or engine
+    dialect = bind.dialect
+    columns = [c.name for c in table.columns if keep_id or c.name != 'id']
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        table.name,
+        ', '.join(columns),
+        ', '.join([_placeholder(dialect)] * len(columns))
+    )
+
+    id_idx = columns.index('id') if 'id' in columns else None
+
+    count = 0
+    with bind.begin() as conn:
+        if dialect.name == 'sqlite':
+            # pysqlite 在首条DML前才隐式开启事务，在此之前的保存点释放时会直接提交，需先显式开启
+            conn.exec_driver_sql('BEGIN')
+        is_empty = conn.execute(select(func.count()).select_from(table)).scalar() == 0
+        indexes = list(table.indexes) if is_empty else []
+        for index in indexes:
+            index.drop(conn, checkfirst=True)
+
+        for chunk in _chunks(iter_rows(records, table, dialect.name, keep_id, errors), chunk_size):
+            count += _insert_chunk(conn, sql, chunk, table.name, id_idx, errors)
+
+        for index in indexes:
+            index.create(conn, checkfirst=True)
+    return count
+
+def load_courts_file(data_file: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     keep_id: bool = True, bind=None) -> Optional[Dict[str, int]]:
+    """
+    流式导入场馆数据文件，兼容完整格式({"courts": [...], "details": [...]})与旧格式([...])
+    返回各表导入数量及跳过的无效记录数，文件不存在或为空时返回None
+    """
+    if not os.path.exists(data_file):
+        return None
+
+    fmt = _detect_format(data_file)
+    if fmt == 'empty':
+        return None
+
+    result = {'courts': 0, 'details': 0}
+    # 场馆坐标按块校验，修正/隔离的记录在导入后写入审计表
+    audits = []
+    errors = []
+    court_prefix = 'courts.item' if fmt == 'complete' else 'item'
+    courts = validate_records(iter_records(data_file, court_prefix, errors), audits, 'import', chunk_size)
+    result['courts'] = bulk_insert(TennisCourt.__table__, courts, chunk_size, keep_id, bind, errors)
+    if fmt == 'complete':
+        result['details'] = bulk_insert(CourtDetail.__table__, iter_records(data_file, 'details.item', errors),
+                                        chunk_size, keep_id, bind, errors)
+    if audits:
+        created_at = datetime.now().isoformat()
+        for audit in audits:
+            audit['created_at'] = created_at
+            if not keep_id:
+                audit['court_id'] = None  # 重新编号导入时原ID无效
+        bulk_insert(CoordinateAudit.__table__, audits, chunk_size, keep_id=False, bind=bind)
+    result['coordinate_audits'] = len(audits)
+    result['skipped'] = len(errors)
+    return result
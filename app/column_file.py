@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+列式内存映射文件
+文件头为JSON元数据（各列的类型、形状、偏移），其后为按64字节对齐的原始数组；
+读取时 mmap 整个文件，各列为指向映射内存的只读 NumPy 视图，多个进程映射同一文件时共享页缓存。
+写入先写临时文件再原子重命名，已映射旧文件的进程不受影响
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"COLFILE1"
+ALIGN = 64
+_HEADER_LEN = struct.Struct("<Q")
+
+class ColumnFileError(Exception):
+    """列文件格式错误"""
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+def write_columns(path: str, columns: Dict[str, np.ndarray], meta: Optional[Dict] = None):
+    """把各列写入 path（临时文件 + fsync + 原子重命名）"""
+    layout, offset = {}, 0
+    arrays = {}
+    for name, array in columns.items():
+        array = np.require(array, requirements="C")  # ascontiguousarray 会把0维数组变成1维
+        if array.dtype.hasobject:
+            raise ColumnFileError(f"列 {name} 不能是对象数组")
+        arrays[name] = array
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _aligned(offset + array.nbytes)
+
+    header = json.dumps({"meta": meta or {}, "columns": layout}, ensure_ascii=False).encode("utf-8")
+    data_start = _aligned(len(MAGIC) + _HEADER_LEN.size + len(header))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + _HEADER_LEN.pack(len(header)) + header)
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def map_columns(path: str) -> Tuple[Dict[str, np.ndarray], Dict, mmap.mmap]:
+    """映射列文件，返回 (列视图, 元数据, mmap对象)；列视图只读，需保持 mmap 对象存活"""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        if mapped[:len(MAGIC)] != MAGIC:
+            raise ColumnFileError(f"不是列文件: {path}")
+        start = len(MAGIC) + _HEADER_LEN.size
+        (header_len,) = _HEADER_LEN.unpack_from(mapped, len(MAGIC))
+        header = json.loads(mapped[start:start + header_len].decode("utf-8"))
+        data_start = _aligned(start + header_len)
+        columns = {}
+        for name, spec in header["columns"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"])) if spec["shape"] else 1
+            array = np.frombuffer(mapped, dtype=dtype, count=count, offset=data_start + spec["offset"])
+            columns[name] = array.reshape(spec["shape"])
+    except (ValueError, KeyError, struct.error) as e:
+        mapped.close()
+        raise ColumnFileError(f"列文件损坏: {path}: {e}")
+    return columns, header["meta"], mapped
@@ -12,6 +12,20 @@ class Settings(BaseSettings):
     # 数据库配置
     database_url: str = "sqlite:///./data/courts.db"
     
+    # 数据库备份配置（仅SQLite）
+    backup_dir: str = "data/backups"
+    backup_keep_last: int = 10   # 保留最近的快照数
+    backup_keep_daily: int = 7   # 另外每天保留一个，保留天数
+    backup_keep_weekly: int = 4  # 另外每周保留一个，保留周数
+
+    # 分析快照目录（Parquet文件，供 app/analytics.py 的DuckDB查询使用）
+    analytics_dir: str = "data/analytics"
+    # 场馆快照共享文件（多worker部署时设置，如 data/court_snapshot.bin；为空时各进程在内存中构建）
+    court_snapshot_path: Optional[str] = None
+
+    # 响应压缩配置
+    compression_minimum_size: int = 1000  # 小于该字节数的响应不压缩
+    
     # 高德地图API配置
     amap_api_key: Optional[str] = None
     amap_base_url: str = "https://restapi.amap.com/v3"
@@ -20,7 +34,27 @@ class Settings(BaseSettings):
     request_delay: float = 1.0  # 请求间隔（秒）
     max_retries: int = 3
     timeout: int = 30
-    
+
+    # HTTP响应缓存配置
+    http_cache_mode: str = "cache-first"  # live（总是请求并写缓存）/ cache-first / replay-only（只读缓存，离线运行）
+    http_cache_dir: str = "data/http_cache"
+    http_cache_max_mb: int = 500  # 超出后按最近访问时间淘汰
+    http_cache_ttls: Dict[str, int] = {  # 各数据源缓存有效期（秒）
+        "amap": 7 * 86400,
+        "bing": 86400,
+        "baidu": 86400,
+        "xiaohongshu": 6 * 3600,
+        "default": 86400
+    }
+
+    # 地图瓦片配置（场馆地图由本地拼接瓦片生成）
+    # 瓦片源：默认为本地瓦片目录（自建瓦片服务导出或允许批量使用的服务商），也可以是含 {z}/{x}/{y} 的URL模板；
+    # 使用OSM公共瓦片服务（tile.openstreetmap.org）时按其使用政策限制为2个连接且不批量预取
+    map_tile_url: str = "data/map_tiles/{z}/{x}/{y}.png"
+    map_tile_cache_dir: str = "data/tile_cache"  # 各场馆共用的瓦片磁盘缓存
+    map_tile_workers: int = 8  # 并发下载瓦片的线程数（也是连接池大小）
+    map_tile_attribution: str = "© OpenStreetMap contributors"  # 绘制在地图右下角的版权声明，随瓦片源修改
+
     # 用户代理配置
     user_agents: List[str] = [
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
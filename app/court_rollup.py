@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+场馆统计汇总表
+court_rollup_keys 为每个场馆一行的分类键（区域、三层判断法实时判断的类型、数据来源、展示价格来源），
+court_rollups 按分类键组合存场馆数、组内最小场馆ID和最新更新时间。
+ORM写入时在同一事务内只重算受影响场馆的分类键和受影响的组合；
+直接SQL写库的脚本、快照合并等批量写入后由 rebuild_rollups 一次 GROUP BY 整体重算（启动时也会重算）。
+/stats/summary 与 /api/scraper/status 只读汇总表，耗时与场馆数量无关
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import CourtDetail, CourtRollup, CourtRollupKey, TennisCourt
+
+logger = logging.getLogger(__name__)
+
+GROUP_COLUMNS = ("area", "court_type", "data_source", "price_bucket")
+# 展示价格来源（与列表接口的价格优先级一致），没有可展示价格时为 none
+PRICE_BUCKETS = ("manual", "merged", "predict", "none")
+REAL_PRICE_BUCKETS = ("manual", "merged")
+# 统计时视为类型无法判断的值
+UNKNOWN_TYPES = (None, "", "未知")
+
+_predictor = None
+
+def _court_type(name: Optional[str], address: Optional[str]) -> str:
+    """三层判断法实时判断的场馆类型（与列表接口一致）"""
+    global _predictor
+    if _predictor is None:
+        # price_predictor 导入了 models，只能延迟导入；它不注册会话事件
+        from .scrapers.price_predictor import PricePredictor
+        _predictor = PricePredictor()
+    return _predictor.determine_court_type(name, address)
+
+def price_bucket(detail) -> str:
+    """场馆展示价格的来源，没有高峰/非高峰价格时为 none"""
+    # api.courts 导入了 court_rollup，只能延迟导入；它依赖的会话事件模块已由 models 提前注册
+    from .api.courts import resolve_detail_prices
+
+    source, fields = resolve_detail_prices(detail)
+    if source and (fields.get("peak_price") or fields.get("off_peak_price")):
+        return source
+    return "none"
+
+def _key_rows(connection, court_ids: Optional[List[int]] = None) -> List[Dict]:
+    """由场馆表和详情表计算分类键；court_ids 为空时计算全部场馆"""
+    courts = select(TennisCourt.id, TennisCourt.name, TennisCourt.address, TennisCourt.area,
+                    TennisCourt.data_source, TennisCourt.updated_at)
+    details = (select(CourtDetail.court_id, CourtDetail.manual_prices, CourtDetail.merged_prices,
+                      CourtDetail.predict_prices)
+               .order_by(CourtDetail.id))
+    if court_ids is not None:
+        courts = courts.where(TennisCourt.id.in_(court_ids))
+        details = details.where(CourtDetail.court_id.in_(court_ids))
+
+    # 同一场馆有多条详情时与列表接口一致，取ID最小的一条
+    first_details = {}
+    for detail in connection.execute(details):
+        first_details.setdefault(detail.court_id, detail)
+    return [{
+        "court_id": court.id,
+        "area": court.area,
+        "court_type": _court_type(court.name, court.address),
+        "data_source": court.data_source,
+        "price_bucket": price_bucket(first_details.get(court.id)),
+        "updated_at": court.updated_at,
+    } for court in connection.execute(courts)]
+
+def _group_condition(table, group: Tuple):
+    return [getattr(table.c, column).is_not_distinct_from(value) for column, value in zip(GROUP_COLUMNS, group)]
+
+def _rollup_select():
+    keys = CourtRollupKey.__table__
+    return select(
+        *[getattr(keys.c, column) for column in GROUP_COLUMNS],
+        func.count().label("court_count"),
+        func.min(keys.c.court_id).label("first_court_id"),
+        func.max(keys.c.updated_at).label("latest_update"),
+    ).group_by(*[getattr(keys.c, column) for column in GROUP_COLUMNS])
+
+def _insert_rollups(connection, query):
+    connection.execute(insert(CourtRollup.__table__).from_select(
+        list(GROUP_COLUMNS) + ["court_count", "first_court_id", "latest_update"], query))
+
+def refresh_courts(connection, court_ids: Iterable[int]) -> int:
+    """重算这些场馆的分类键及其新旧所在组合的汇总行，返回受影响的组合数"""
+    court_ids = sorted(set(court_ids))
+    if not court_ids:
+        return 0
+    keys, rollups = CourtRollupKey.__table__, CourtRollup.__table__
+    groups: Set[Tuple] = set()
+    for start in range(0, len(court_ids), 500):
+        chunk = court_ids[start:start + 500]
+        old = connection.execute(select(*[getattr(keys.c, c) for c in GROUP_COLUMNS])
+                                 .where(keys.c.court_id.in_(chunk)))
+        groups.update(tuple(row) for row in old)
+        rows = _key_rows(connection, chunk)
+        groups.update(tuple(row[c] for c in GROUP_COLUMNS) for row in rows)
+        connection.execute(delete(keys).where(keys.c.court_id.in_(chunk)))
+        if rows:
+            connection.execute(insert(keys), rows)
+
+    for group in groups:
+        connection.execute(delete(rollups).where(*_group_condition(rollups, group)))
+        _insert_rollups(connection, _rollup_select().where(*_group_condition(keys, group)))
+    return len(groups)
+
+def rebuild_rollups(db: Session) -> int:
+    """整体重算分类键与汇总表，返回场馆数"""
+    connection = db.connection()
+    rows = _key_rows(connection)
+    connection.execute(delete(CourtRollupKey.__table__))
+    if rows:
+        connection.execute(insert(CourtRollupKey.__table__), rows)
+    connection.execute(delete(CourtRollup.__table__))
+    _insert_rollups(connection, _rollup_select())
+    db.commit()
+    logger.info(f"场馆统计汇总表已重算: {len(rows)} 个场馆")
+    return len(rows)
+
+def _rollups_built(connection) -> bool:
+    return connection.execute(select(CourtRollup.id).limit(1)).first() is not None
+
+# ========== 增量维护 ==========
+def _touched_court_ids(session: Session) -> Set[int]:
+    court_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, TennisCourt) and obj.id is not None:
+            court_ids.add(obj.id)
+        elif isinstance(obj, CourtDetail) and obj.court_id is not None:
+            court_ids.add(obj.court_id)
+    return court_ids
+
+@event.listens_for(Session, "after_flush")
+def _refresh_on_flush(session: Session, flush_context):
+    court_ids = _touched_court_ids(session)
+    if not court_ids:
+        return
+    try:
+        connection = session.connection()
+        # 尚未整体构建时不做增量，避免得到只含部分场馆的汇总
+        if _rollups_built(connection):
+            refresh_courts(connection, court_ids)
+    except OperationalError as e:  # 旧库尚未建表时不影响正常写入
+        logger.warning(f"统计汇总表更新失败，跳过: {e}")
+
+# ========== 查询 ==========
+def _load_rollups(db: Session) -> List[CourtRollup]:
+    """全部汇总行，按组内最小场馆ID排序（累加时字典键即为首次出现顺序）"""
+    if not _rollups_built(db.connection()):
+        rebuild_rollups(db)
+    return db.query(CourtRollup).order_by(CourtRollup.first_court_id).all()
+
+def courts_summary(db: Session) -> Dict:
+    """场馆统计（只统计类型可判断的场馆），区域、来源按首次出现顺序；附各区域价格覆盖率"""
+    area_counts, source_counts, coverage = {}, {}, {}
+    total = 0
+    for rollup in _load_rollups(db):
+        if rollup.court_type in UNKNOWN_TYPES:
+            continue
+        total += rollup.court_count
+        area_counts[rollup.area] = area_counts.get(rollup.area, 0) + rollup.court_count
+        if rollup.data_source:
+            source_counts[rollup.data_source] = source_counts.get(rollup.data_source, 0) + rollup.court_count
+        buckets = coverage.setdefault(rollup.area, dict.fromkeys(PRICE_BUCKETS, 0))
+        buckets[rollup.price_bucket] = buckets.get(rollup.price_bucket, 0) + rollup.court_count
+
+    area_stats, price_coverage = {}, {}
+    for area, count in area_counts.items():
+        if area not in settings.target_areas:
+            continue
+        name = settings.target_areas[area]["name"]
+        buckets = coverage[area]
+        priced = count - buckets["none"]
+        area_stats[area] = {"name": name, "count": count}
+        price_coverage[area] = {
+            "name": name,
+            "total": count,
+            "priced": priced,
+            "real_priced": sum(buckets[b] for b in REAL_PRICE_BUCKETS),
+            "predicted": buckets["predict"],
+            "coverage": round(priced / count, 4) if count else 0.0,
+        }
+    return {
+        "total_courts": total,
+        "area_stats": area_stats,
+        "source_stats": source_counts,
+        "price_coverage": price_coverage,
+    }
+
+def scraper_status(db: Session) -> Dict:
+    """各数据来源的场馆数与最新更新时间（包含类型无法判断的场馆）"""
+    source_stats = {}
+    total = 0
+    for rollup in _load_rollups(db):
+        total += rollup.court_count
+        if not rollup.data_source:
+            continue
+        stats = source_stats.setdefault(rollup.data_source, {"count": 0, "latest_update": None})
+        stats["count"] += rollup.court_count
+        if rollup.latest_update is not None and (stats["latest_update"] is None
+                                                 or rollup.latest_update > stats["latest_update"]):
+            stats["latest_update"] = rollup.latest_update
+    return {"total_courts": total, "source_stats": source_stats}
@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+场馆列式快照
+整表场馆与展示价格一次读出，按列存为 NumPy 数组（ID、坐标、区域/类型/来源等字符串编码、解析后的价格、置信度），
+字符串存入紧凑的字符串表；快照构建后不再修改，读接口直接按数组下标取值，无需加锁。
+是否过期由写入标记判断：SQLite为专用监视连接上的 PRAGMA data_version，任何其他连接（其他进程、脚本
+及本进程的会话）提交后都会变化，不受文件修改时间精度影响；过期时由后台线程重建并整体替换。
+配置 court_snapshot_path 后（多 worker 部署），快照写入列文件并原子重命名发布，
+各 worker 以只读内存映射共享同一份数据，由文件锁保证同一时刻只有一个进程构建；
+跨进程时以数据库文件修改时间为版本号，构建期间有写入的快照以更旧的版本号发布，读取方会重新构建。
+剩余的竞争窗口：构建完成后、与构建开始时同一文件时间刻度内的写入，其他 worker 要到下一次写入后才会发现
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import load_only
+
+from .config import settings
+from .database import SessionLocal
+from .geo import court_lnglat
+from .geo_index import data_version
+from .models import TennisCourt, CourtDetail, TennisCourtResponse
+
+try:
+    import fcntl
+except ImportError:  # Windows 下没有文件锁，退化为各进程独立构建
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 构建快照时从详情表读取的字段（展示价格与预测用的真实价格）
+DETAIL_FIELDS = ("id", "court_id", "manual_prices", "merged_prices", "predict_prices",
+                 "bing_prices", "dianping_prices", "meituan_prices")
+# 列表接口返回的字段（与 TennisCourtResponse 一致）
+RESPONSE_FIELDS = tuple(TennisCourtResponse.model_fields)
+# 列表行中按字符串表编码存储的字段
+STRING_FIELDS = ("name", "address", "phone", "area", "area_name", "court_type", "business_hours",
+                 "peak_price", "off_peak_price", "member_price", "price_unit", "description",
+                 "facilities", "traffic_info", "data_source", "source_url")
+BOOL_FIELDS = ("has_roof", "is_open")
+DATETIME_FIELDS = ("created_at", "updated_at", "price_updated_at")
+# 数据版本变化后，读请求等待重建的最长时间（秒），超时返回上一版快照
+REBUILD_WAIT = 2.0
+PRICE_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+EPOCH = datetime(1970, 1, 1)
+NULL_TIME = np.iinfo(np.int64).min
+
+# ========== 字符串表 ==========
+class StringTable:
+    """构建期的字符串驻留表：相同的值只存一份，编码0固定表示None"""
+
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self._codes: Dict[Optional[str], int] = {None: 0}
+
+    def code(self, value: Optional[str]) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def codes(self, values: Sequence[Optional[str]]) -> np.ndarray:
+        return np.fromiter((self.code(v) for v in values), dtype=np.int32, count=len(values))
+
+    def get(self, code: int) -> Optional[str]:
+        return self.values[code]
+
+    def lookup(self, value: Optional[str]) -> int:
+        """值的编码，不存在时返回-1"""
+        return self._codes.get(value, -1)
+
+    def pack(self) -> Tuple[np.ndarray, np.ndarray]:
+        """序列化为 (偏移数组, UTF-8字节)，第i个字符串为 blob[offsets[i]:offsets[i+1]]"""
+        encoded = [b""] + [str(v).encode("utf-8") for v in self.values[1:]]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+class PackedStringTable:
+    """映射文件中的字符串表，按需解码；反查表在首次使用时构建"""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self.offsets = offsets
+        self.blob = blob
+        self._codes: Optional[Dict[str, int]] = None
+
+    def get(self, code: int) -> Optional[str]:
+        if code == 0:
+            return None
+        return self.blob[self.offsets[code]:self.offsets[code + 1]].tobytes().decode("utf-8")
+
+    def lookup(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        if self._codes is None:
+            self._codes = {self.get(code): code for code in range(1, len(self.offsets) - 1)}
+        return self._codes.get(value, -1)
+
+# ========== 快照 ==========
+def _price_number(value) -> float:
+    """展示价格中的第一个数字，没有时为NaN"""
+    if value is None:
+        return np.nan
+    match = PRICE_NUMBER_RE.search(str(value))
+    return float(match.group()) if match else np.nan
+
+def _price_confidence(source: Optional[str], detail: Optional[CourtDetail]) -> float:
+    """展示价格的置信度：人工录入为1，融合价格取首条价格的置信度，其余为NaN"""
+    if source == "manual":
+        return 1.0
+    if source == "merged" and isinstance(detail.merged_prices, list) and detail.merged_prices:
+        first = detail.merged_prices[0]
+        if isinstance(first, dict) and isinstance(first.get("confidence"), (int, float)):
+            return float(first["confidence"])
+    return np.nan
+
+def _float_column(values: Sequence) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+def _time_value(value: Optional[datetime]) -> int:
+    return NULL_TIME if value is None else (value - EPOCH) // timedelta(microseconds=1)
+
+def _optional_float(value: float):
+    return None if np.isnan(value) else float(value)
+
+def _optional_int(value: float):
+    return None if np.isnan(value) else int(value)
+
+def load_details(db, court_ids: Optional[Sequence[int]] = None) -> Dict[int, CourtDetail]:
+    """各场馆的第一条详情 {场馆ID: 详情}，只加载展示价格需要的字段"""
+    query = (db.query(CourtDetail)
+             .options(load_only(*[getattr(CourtDetail, f) for f in DETAIL_FIELDS]))
+             .order_by(CourtDetail.id))
+    if court_ids is not None:
+        query = query.filter(CourtDetail.court_id.in_(list(court_ids)))
+    details = {}
+    for detail in query:
+        details.setdefault(detail.court_id, detail)
+    return details
+
+def response_row(court: TennisCourt, detail: Optional[CourtDetail], predictor) -> Tuple[Optional[str], Dict]:
+    """列表接口的一行（场馆类型使用三层判断法实时计算、展示价格按优先级解析），返回 (价格来源, 行)"""
+    from .api.courts import resolve_detail_prices
+
+    source, fields = resolve_detail_prices(detail)
+    row = {field: getattr(court, field) for field in RESPONSE_FIELDS}
+    row["court_type"] = predictor.determine_court_type(court.name, court.address)
+    row.update(fields)
+    return source, row
+
+def court_rows(db, court_ids: Sequence[int]) -> Dict[int, Dict]:
+    """直接从数据库读取列表行 {场馆ID: 行}，用于快照尚未包含的场馆"""
+    from .scrapers.price_predictor import PricePredictor
+
+    court_ids = list(court_ids)
+    courts = db.query(TennisCourt).filter(TennisCourt.id.in_(court_ids)).all()
+    details = load_details(db, court_ids)
+    predictor = PricePredictor()
+    try:
+        return {court.id: response_row(court, details.get(court.id), predictor)[1] for court in courts}
+    finally:
+        predictor.db.close()
+
+class CourtSnapshot:
+    """
+    不可变的场馆列式快照，行按场馆ID升序。
+    latitude/longitude 为数据库字段原值（价格预测按原值计算距离），lng/lat 为规范化后的经纬度；
+    version 为构建时的数据库版本戳
+    """
+
+    def __init__(self, version: int, columns: Dict[str, np.ndarray], strings, mapped=None):
+        self.version = version
+        self.marker: Optional[int] = None  # 构建开始时本进程的写入标记，None 表示不确定是否最新
+        self.columns = columns
+        self.strings = strings
+        self._mapped = mapped  # 映射文件时保持 mmap 存活
+        for name, array in columns.items():
+            setattr(self, name, array)
+
+    @classmethod
+    def from_courts(cls, version: int, courts: List[TennisCourt], details: Dict[int, CourtDetail],
+                    predictor) -> "CourtSnapshot":
+        """由ORM对象构建，场馆类型使用三层判断法实时计算"""
+        strings = StringTable()
+        n = len(courts)
+        rows, price_source, real_prices, confidence = [], [], [], []
+        for court in courts:
+            detail = details.get(court.id)
+            source, row = response_row(court, detail, predictor)
+            rows.append(row)
+            price_source.append(source)
+            confidence.append(_price_confidence(source, detail))
+            real_prices.append(predictor._extract_real_prices(detail) if detail else None)
+
+        lnglats = [court_lnglat(c) for c in courts]
+        columns = {
+            "ids": np.fromiter((c.id for c in courts), dtype=np.int64, count=n),
+            "latitude": _float_column([c.latitude for c in courts]),
+            "longitude": _float_column([c.longitude for c in courts]),
+            "lng": _float_column([p[0] if p else None for p in lnglats]),
+            "lat": _float_column([p[1] if p else None for p in lnglats]),
+            "court_count": _float_column([r["court_count"] for r in rows]),
+            # 价格预测的邻域筛选按名称判断类型（与预测算法一致）
+            "name_type_code": strings.codes([predictor.determine_court_type(c.name) for c in courts]),
+            "is_pool": np.fromiter(("游泳池" in (c.name or "") for c in courts), dtype=bool, count=n),
+            "has_raw_coords": np.fromiter((bool(c.latitude) and bool(c.longitude) for c in courts),
+                                          dtype=bool, count=n),
+            "price_source_code": strings.codes(price_source),
+            "peak_price_value": np.array([_price_number(r["peak_price"]) for r in rows], dtype=np.float64),
+            "off_peak_price_value": np.array([_price_number(r["off_peak_price"]) for r in rows], dtype=np.float64),
+            "member_price_value": np.array([_price_number(r["member_price"]) for r in rows], dtype=np.float64),
+            "confidence": np.array(confidence, dtype=np.float64),
+            "has_real_prices": np.array([bool(p) for p in real_prices], dtype=bool),
+            "real_peak_price": _float_column([p.get("peak_price") if p else None for p in real_prices]),
+            "real_off_peak_price": _float_column([p.get("off_peak_price") if p else None for p in real_prices]),
+        }
+        for field in STRING_FIELDS:
+            columns[f"{field}_code"] = strings.codes([r[field] for r in rows])
+        for field in BOOL_FIELDS:
+            columns[field] = np.array([-1 if r[field] is None else int(r[field]) for r in rows], dtype=np.int8)
+        for field in DATETIME_FIELDS:
+            columns[field] = np.array([_time_value(r[field]) for r in rows], dtype=np.int64)
+        return cls(version, columns, strings)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def string(self, code: int) -> Optional[str]:
+        return self.strings.get(int(code))
+
+    def row(self, i: int) -> Dict:
+        """列表接口的一行（实时判断的类型、按优先级解析的展示价格）"""
+        row = {}
+        for field in RESPONSE_FIELDS:
+            if field == "id":
+                value = int(self.ids[i])
+            elif field in STRING_FIELDS:
+                value = self.string(self.columns[f"{field}_code"][i])
+            elif field in BOOL_FIELDS:
+                flag = int(self.columns[field][i])
+                value = None if flag < 0 else bool(flag)
+            elif field in DATETIME_FIELDS:
+                micros = int(self.columns[field][i])
+                value = None if micros == NULL_TIME else EPOCH + timedelta(microseconds=micros)
+            elif field == "court_count":
+                value = _optional_int(self.court_count[i])
+            else:
+                value = _optional_float(self.columns[field][i])
+            row[field] = value
+        return row
+
+    def rows_at(self, positions: Sequence[int]) -> List[Dict]:
+        return [self.row(i) for i in positions if i >= 0]
+
+    def real_prices(self, i: int) -> Optional[Dict]:
+        """价格预测使用的真实价格 {'peak_price', 'off_peak_price'}，没有时为None"""
+        if not self.has_real_prices[i]:
+            return None
+        return {
+            "peak_price": _optional_int(self.real_peak_price[i]),
+            "off_peak_price": _optional_int(self.real_off_peak_price[i]),
+        }
+
+    def positions(self, court_ids: Sequence[int]) -> np.ndarray:
+        """场馆ID对应的行下标，不存在的ID为-1"""
+        court_ids = np.asarray(court_ids, dtype=np.int64)
+        if len(self.ids) == 0:
+            return np.full(len(court_ids), -1, dtype=np.int64)
+        pos = np.searchsorted(self.ids, court_ids).clip(max=len(self.ids) - 1)
+        return np.where(self.ids[pos] == court_ids, pos, -1)
+
+    def area_mask(self, area: Optional[str]) -> np.ndarray:
+        if not area:
+            return np.ones(len(self), dtype=bool)
+        return self.area_code == self.strings.lookup(area)
+
+    def price_neighbors(self, exclude_id: int, type_code: Optional[int] = None) -> np.ndarray:
+        """价格预测的候选邻域行（排除自身、游泳池、无坐标，及可选的类型不同者）"""
+        mask = (self.ids != exclude_id) & ~self.is_pool & self.has_raw_coords
+        if type_code is not None:
+            mask &= self.name_type_code == type_code
+        return np.flatnonzero(mask)
+
+    # ========== 列文件 ==========
+    def save(self, path: str):
+        """写入列文件（原子替换）"""
+        from .column_file import write_columns
+
+        offsets, blob = self.strings.pack()
+        columns = dict(self.columns, string_offsets=offsets, string_blob=blob)
+        write_columns(path, columns, meta={"version": self.version, "created_at": time.time()})
+
+    @classmethod
+    def load(cls, path: str) -> "CourtSnapshot":
+        """只读映射列文件，各列为共享映射内存的视图"""
+        from .column_file import map_columns
+
+        columns, meta, mapped = map_columns(path)
+        strings = PackedStringTable(columns.pop("string_offsets"), columns.pop("string_blob"))
+        return cls(int(meta["version"]), columns, strings, mapped=mapped)
+
+# ========== 版本戳 ==========
+def _database_files() -> List[str]:
+    from .backup import BackupError, sqlite_path
+
+    try:
+        path = sqlite_path()
+    except BackupError:
+        return []
+    return [path, f"{path}-wal"]
+
+_db_files = _database_files()
+
+def db_stamp() -> int:
+    """
+    数据库版本戳：SQLite数据库文件（及WAL文件）的最新修改时间（纳秒），
+    任何进程提交写入后都会变化；非SQLite文件数据库时使用进程内写入版本号
+    """
+    stamp = 0
+    for path in _db_files:
+        try:
+            stamp = max(stamp, os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            continue
+    return stamp or data_version()
+
+_monitor: Optional[sqlite3.Connection] = None
+_monitor_lock = threading.Lock()
+
+def write_marker() -> int:
+    """
+    本进程观察到的写入标记，单调递增：SQLite文件数据库为专用只读连接上的 PRAGMA data_version
+    （该连接自身从不写入，其他任何连接提交后都会变化），其它数据库为进程内写入版本号
+    """
+    global _monitor
+    if not _db_files:
+        return data_version()
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = sqlite3.connect(_db_files[0], timeout=30, isolation_level=None, check_same_thread=False)
+        return _monitor.execute("PRAGMA data_version").fetchone()[0]
+
+def _is_current(snapshot: Optional["CourtSnapshot"], marker: int) -> bool:
+    return snapshot is not None and snapshot.marker is not None and snapshot.marker >= marker
+
+# ========== 构建与发布 ==========
+def build_court_snapshot(version: Optional[int] = None) -> CourtSnapshot:
+    """从数据库构建快照，写入标记在读取数据之前取得（构建期间的写入会使其过期）"""
+    from .scrapers.price_predictor import PricePredictor
+
+    marker = write_marker()
+    version = db_stamp() if version is None else version
+    db = SessionLocal()
+    predictor = PricePredictor()
+    try:
+        details = load_details(db)
+        courts = db.query(TennisCourt).order_by(TennisCourt.id).all()
+        snapshot = CourtSnapshot.from_courts(version, courts, details, predictor)
+        snapshot.marker = marker
+    finally:
+        predictor.db.close()
+        db.close()
+    logger.info(f"场馆快照构建完成: {len(snapshot)} 个场馆, 版本 {version}")
+    return snapshot
+
+class SharedSnapshotFile:
+    """多进程共享的快照文件：文件锁保证单一写入者，读取方按文件标识判断是否有新版本"""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self.lock_path = f"{self.path}.lock"
+        self._identity = None
+
+    def _stat_identity(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def changed(self) -> bool:
+        """是否有本进程尚未映射的新发布版本"""
+        identity = self._stat_identity()
+        return identity is not None and identity != self._identity
+
+    def load(self, marker: Optional[int] = None) -> Optional[CourtSnapshot]:
+        """
+        映射当前发布的版本，文件不存在或损坏时返回None；
+        版本号不旧于数据库文件修改时间时视为最新，标记为读取前取得的 marker
+        """
+        from .column_file import ColumnFileError
+
+        stamp = db_stamp()
+        identity = self._stat_identity()
+        if identity is None:
+            return None
+        try:
+            snapshot = CourtSnapshot.load(self.path)
+        except (ColumnFileError, OSError) as e:
+            logger.warning(f"场馆快照文件读取失败: {e}")
+            return None
+        self._identity = identity
+        if marker is not None and snapshot.version >= stamp:
+            snapshot.marker = marker
+        return snapshot
+
+    def rebuild(self) -> CourtSnapshot:
+        """持有文件锁时：其他进程已发布最新版本则直接映射，否则构建并发布"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                published = self.load(write_marker())
+                if published is not None and published.marker is not None:
+                    return published
+                built = build_court_snapshot()
+                if write_marker() != built.marker:
+                    # 构建期间有写入：写入时间可能与版本号同一刻度，以更旧的版本号发布，其他进程读取时视为过期
+                    built.version -= 1
+                built.save(self.path)
+                logger.info(f"已发布场馆快照文件: {self.path}, 版本 {built.version}")
+                published = self.load()
+                if published is None:
+                    return built
+                published.marker = built.marker
+                return published
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+_snapshot: Optional[CourtSnapshot] = None
+_builder: Optional[threading.Thread] = None
+_cond = threading.Condition()
+_initial_lock = threading.Lock()
+_shared = SharedSnapshotFile(settings.court_snapshot_path) if settings.court_snapshot_path else None
+
+def _refresh() -> CourtSnapshot:
+    if _shared is not None:
+        return _shared.rebuild()
+    return build_court_snapshot()
+
+def _publish(snapshot: CourtSnapshot):
+    global _snapshot
+    with _cond:
+        if _snapshot is None or (snapshot.marker is not None
+                                 and (_snapshot.marker is None or snapshot.marker >= _snapshot.marker)):
+            _snapshot = snapshot
+        _cond.notify_all()
+
+def _rebuild_loop():
+    global _builder
+    try:
+        # 构建期间又有写入时继续重建，直到追上当前写入标记
+        while not _is_current(_snapshot, write_marker()):
+            _publish(_refresh())
+    except Exception:
+        logger.exception("场馆快照重建失败")
+    finally:
+        with _cond:
+            _builder = None
+            _cond.notify_all()
+
+def get_court_snapshot(max_wait: float = REBUILD_WAIT) -> CourtSnapshot:
+    """
+    当前场馆快照。写入标记未变化时直接返回（无锁）；
+    共享模式下先映射其他进程已发布的新版本；仍落后时启动后台重建并最多等待 max_wait 秒，超时返回上一版
+    """
+    global _builder
+    snapshot = _snapshot
+    marker = write_marker()
+    if _is_current(snapshot, marker):
+        return snapshot
+
+    if _shared is not None and _shared.changed():
+        published = _shared.load(marker)
+        if published is not None:
+            _publish(published)
+            if _is_current(published, marker):
+                return published
+
+    if _snapshot is None:
+        # 首次构建在调用线程中进行，失败时直接抛出
+        with _initial_lock:
+            if _snapshot is None:
+                _publish(_refresh())
+        return _snapshot
+
+    with _cond:
+        if _builder is None:
+            _builder = threading.Thread(target=_rebuild_loop, name="court-snapshot", daemon=True)
+            _builder.start()
+        _cond.wait_for(lambda: _is_current(_snapshot, marker) or _builder is None, timeout=max_wait)
+        return _snapshot
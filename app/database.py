@@ -31,6 +31,10 @@ def init_db():
     import app.models  # 确保模型注册到Base
     # 创建所有表
     Base.metadata.create_all(bind=engine)
+    # 已存在的表补建新增索引
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
     print("数据库初始化完成")
 
 def close_db():
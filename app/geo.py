@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+坐标工具
+注意：场馆表的坐标字段存在两种存储约定，
+高德抓取的数据 latitude 字段存储经度、longitude 字段存储纬度（见 get_court_coordinates），
+早期导入的数据则按字段名存储。这里统一转换为 (经度, 纬度)。
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+# Web Mercator 瓦片尺寸与纬度上限
+TILE_SIZE = 256
+MAX_MERCATOR_LAT = 85.05112878
+
+def normalize_lnglat(latitude_field: Optional[float], longitude_field: Optional[float]) -> Optional[Tuple[float, float]]:
+    """
+    将数据库中的两个坐标字段转换为 (经度, 纬度)
+    绝对值超过90的一定是经度；无法区分时按 latitude 字段存储经度的约定处理
+    """
+    if latitude_field is None or longitude_field is None:
+        return None
+    try:
+        a = float(latitude_field)
+        b = float(longitude_field)
+    except (TypeError, ValueError):
+        return None
+    if a == 0 and b == 0:
+        return None
+
+    if abs(b) > 90 >= abs(a):
+        return b, a
+    return a, b
+
+def court_lnglat(court) -> Optional[Tuple[float, float]]:
+    """获取场馆的 (经度, 纬度)"""
+    return normalize_lnglat(court.latitude, court.longitude)
+
+def lnglat_to_world_px(lng, lat, zoom: float, tile_size: int = TILE_SIZE):
+    """
+    经纬度转换为指定缩放级别下的 Web Mercator 世界像素坐标
+    支持标量或numpy数组输入
+    """
+    scale = tile_size * (2.0 ** zoom)
+    lat = np.clip(lat, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT)
+    x = (np.asarray(lng, dtype=float) + 180.0) / 360.0 * scale
+    sin_lat = np.sin(np.radians(lat))
+    y = (0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)) * scale
+    return x, y
+
+def world_px_to_lnglat(x, y, zoom: float, tile_size: int = TILE_SIZE):
+    """Web Mercator 世界像素坐标转换为经纬度（lnglat_to_world_px 的逆运算），支持标量或numpy数组输入"""
+    scale = tile_size * (2.0 ** zoom)
+    lng = np.asarray(x, dtype=float) / scale * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(y, dtype=float) / scale))))
+    return lng, lat
+
+def meters_per_pixel(lat: float, zoom: float, tile_size: int = TILE_SIZE) -> float:
+    """指定纬度、缩放级别下一个像素对应的地面距离（米）"""
+    return 2 * np.pi * EARTH_RADIUS_KM * 1000 * np.cos(np.radians(lat)) / (tile_size * 2.0 ** zoom)
+
+class MapViewport:
+    """以 (center_lng, center_lat) 为中心、zoom 级、width×height 像素的地图视口，视口像素与经纬度精确互换"""
+
+    def __init__(self, center_lng: float, center_lat: float, zoom: float, width: int, height: int,
+                 tile_size: int = TILE_SIZE):
+        self.center_lng, self.center_lat = center_lng, center_lat
+        self.zoom, self.width, self.height, self.tile_size = zoom, width, height, tile_size
+        cx, cy = lnglat_to_world_px(center_lng, center_lat, zoom, tile_size)
+        # 视口左上角的世界像素坐标
+        self.left = float(cx) - width / 2.0
+        self.top = float(cy) - height / 2.0
+
+    def to_pixel(self, lng, lat):
+        """经纬度转换为视口像素坐标（以视口左上角为原点）"""
+        x, y = lnglat_to_world_px(lng, lat, self.zoom, self.tile_size)
+        return x - self.left, y - self.top
+
+    def to_lnglat(self, x, y):
+        """视口像素坐标转换为经纬度"""
+        return world_px_to_lnglat(np.asarray(x, dtype=float) + self.left, np.asarray(y, dtype=float) + self.top,
+                                  self.zoom, self.tile_size)
+
+def haversine_km(lng1, lat1, lng2, lat2):
+    """Haversine球面距离（KM），支持numpy数组广播"""
+    lng1, lat1, lng2, lat2 = map(np.radians, (lng1, lat1, lng2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+场馆地理索引
+由场馆快照构建，按缩放级别预计算网格聚类，并提供网格最近邻查询；
+场馆或详情数据提交后快照更新，索引随之重建
+"""
+
+import logging
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .geo import EARTH_RADIUS_KM, haversine_km, lnglat_to_world_px
+from .models import TennisCourt, CourtDetail
+
+logger = logging.getLogger(__name__)
+
+# 聚类的最大缩放级别，超过后直接返回单个场馆
+CLUSTER_MAX_ZOOM = 15
+MIN_ZOOM = 0
+# 聚类网格边长（像素）
+CLUSTER_CELL_PX = 64
+# 最近邻查询使用的经纬度网格边长（度）
+NEAREST_CELL_DEG = 0.01
+# 最近邻逐圈扩展的最大圈数，超过后（或查询点在数据范围外时）改为对全部场馆一次向量化计算
+NEAREST_MAX_RINGS = 16
+# 一度纬度对应的距离（KM），与 haversine_km 使用同一地球半径
+KM_PER_DEG = 2 * math.pi * EARTH_RADIUS_KM / 360.0
+
+# ========== 写入版本跟踪 ==========
+_data_version = 0
+_version_lock = threading.Lock()
+_WATCHED_MODELS = (TennisCourt, CourtDetail)
+
+def data_version() -> int:
+    """场馆相关数据的进程内写入版本号"""
+    return _data_version
+
+def bump_data_version():
+    global _data_version
+    with _version_lock:
+        _data_version += 1
+
+@event.listens_for(Session, "after_flush")
+def _track_court_writes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, _WATCHED_MODELS):
+            session.info["courts_changed"] = True
+            return
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session):
+    if session.info.pop("courts_changed", False):
+        bump_data_version()
+
+@event.listens_for(Session, "after_rollback")
+def _reset_on_rollback(session):
+    session.info.pop("courts_changed", None)
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_writes(orm_execute_state):
+    # query(...).update()/delete() 等批量写入不会经过flush
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_ in _WATCHED_MODELS:
+            orm_execute_state.session.info["courts_changed"] = True
+
+# ========== 索引 ==========
+class CourtGeoIndex:
+    """场馆坐标数组、按缩放级别预计算的网格聚类及最近邻网格"""
+
+    def __init__(self, ids: List[int], lngs: List[float], lats: List[float],
+                 names: List[str], court_types: List[str],
+                 extras: Optional[List[Dict]] = None, version: int = 0):
+        self.version = version
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.lng = np.asarray(lngs, dtype=np.float64)
+        self.lat = np.asarray(lats, dtype=np.float64)
+        self.names = names
+        self.court_types = court_types
+        self._type_array = np.asarray(court_types, dtype=object)
+        self._type_set = set(court_types)
+        # 地址、区域、展示价格等最近邻查询返回的附加信息
+        self.extras = extras if extras is not None else [{} for _ in ids]
+        self.clusters = {z: self._build_clusters(z) for z in range(MIN_ZOOM, CLUSTER_MAX_ZOOM + 1)}
+        self._build_nearest_grid()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _build_clusters(self, zoom: int) -> Dict[str, np.ndarray]:
+        """将世界像素坐标落入固定大小网格，同一格内的场馆合并为一个聚类"""
+        if len(self.ids) == 0:
+            empty = np.empty(0)
+            return {"lng": empty, "lat": empty, "count": empty.astype(np.int64), "first": empty.astype(np.int64)}
+
+        x, y = lnglat_to_world_px(self.lng, self.lat, zoom)
+        cells = np.stack([(x // CLUSTER_CELL_PX).astype(np.int64), (y // CLUSTER_CELL_PX).astype(np.int64)], axis=1)
+        _, first, inverse, counts = np.unique(cells, axis=0, return_index=True, return_inverse=True, return_counts=True)
+        inverse = inverse.ravel()
+        return {
+            "lng": np.bincount(inverse, weights=self.lng) / counts,
+            "lat": np.bincount(inverse, weights=self.lat) / counts,
+            "count": counts,
+            "first": first,
+        }
+
+    def _build_nearest_grid(self):
+        """按经纬度网格分桶，供最近邻查询逐圈扩展"""
+        self.grid = {}
+        if len(self.ids) == 0:
+            self.cell_km = 0.0
+            return
+        cx = np.floor(self.lng / NEAREST_CELL_DEG).astype(np.int64)
+        cy = np.floor(self.lat / NEAREST_CELL_DEG).astype(np.int64)
+        order = np.lexsort((cy, cx))
+        keys = np.stack([cx[order], cy[order]], axis=1)
+        _, starts = np.unique(keys, axis=0, return_index=True)
+        for start, end in zip(starts, list(starts[1:]) + [len(order)]):
+            self.grid[(int(keys[start, 0]), int(keys[start, 1]))] = order[start:end]
+        self.cell_x_range = (int(cx.min()), int(cx.max()))
+        self.cell_y_range = (int(cy.min()), int(cy.max()))
+        # 网格单元的最小边长（KM），经度方向按网格覆盖的最高纬度计算；留0.1%余量抵消球面距离与网格边长的差异
+        max_lat = min(90.0, max(abs(self.cell_y_range[0]), abs(self.cell_y_range[1] + 1)) * NEAREST_CELL_DEG)
+        self.cell_km = NEAREST_CELL_DEG * KM_PER_DEG * min(1.0, math.cos(math.radians(max_lat))) * 0.999
+
+    def nearest(self, lng: float, lat: float, k: int = 5, court_type: Optional[str] = None,
+                max_km: Optional[float] = None) -> List[Tuple[int, float]]:
+        """
+        查找距离最近的k个场馆，返回 [(下标, 距离KM), ...]，按距离升序
+        从查询点所在网格逐圈向外扩展，已覆盖半径内确定找到k个时停止；
+        查询点在数据范围外或扩展 NEAREST_MAX_RINGS 圈仍不能确定时，对全部场馆一次向量化计算
+        """
+        if len(self.ids) == 0 or k <= 0 or (court_type and court_type not in self._type_set):
+            return []
+
+        qx = math.floor(lng / NEAREST_CELL_DEG)
+        qy = math.floor(lat / NEAREST_CELL_DEG)
+        if not (self.cell_x_range[0] <= qx <= self.cell_x_range[1]
+                and self.cell_y_range[0] <= qy <= self.cell_y_range[1]):
+            return self._nearest_scan(lng, lat, k, court_type, max_km)
+
+        found_idx = []
+        found_dist = []
+        ring = 0
+        while True:
+            if ring > NEAREST_MAX_RINGS:
+                return self._nearest_scan(lng, lat, k, court_type, max_km)
+            cells = []
+            if ring == 0:
+                cells.append((qx, qy))
+            else:
+                for dx in range(-ring, ring + 1):
+                    cells.append((qx + dx, qy - ring))
+                    cells.append((qx + dx, qy + ring))
+                for dy in range(-ring + 1, ring):
+                    cells.append((qx - ring, qy + dy))
+                    cells.append((qx + ring, qy + dy))
+
+            for cell in cells:
+                members = self.grid.get(cell)
+                if members is None:
+                    continue
+                if court_type:
+                    members = [i for i in members if self.court_types[i] == court_type]
+                    if not members:
+                        continue
+                    members = np.asarray(members)
+                found_idx.append(members)
+                found_dist.append(haversine_km(lng, lat, self.lng[members], self.lat[members]))
+
+            # 第ring圈扩展完成后，距离小于 ring*cell_km 的场馆已全部覆盖
+            covered_km = ring * self.cell_km
+            if found_idx:
+                dist = np.concatenate(found_dist)
+                if len(dist) >= k and np.partition(dist, k - 1)[k - 1] <= covered_km:
+                    break
+            if max_km is not None and covered_km >= max_km:
+                break
+            ring += 1
+
+        if not found_idx:
+            return []
+        return self._top_k(np.concatenate(found_idx), np.concatenate(found_dist), k, max_km)
+
+    def _nearest_scan(self, lng: float, lat: float, k: int, court_type: Optional[str],
+                      max_km: Optional[float]) -> List[Tuple[int, float]]:
+        """对全部（符合类型的）场馆一次向量化计算距离"""
+        if court_type:
+            idx = np.flatnonzero(self._type_array == court_type)
+        else:
+            idx = np.arange(len(self.ids))
+        if len(idx) == 0:
+            return []
+        return self._top_k(idx, haversine_km(lng, lat, self.lng[idx], self.lat[idx]), k, max_km)
+
+    @staticmethod
+    def _top_k(idx: np.ndarray, dist: np.ndarray, k: int, max_km: Optional[float]) -> List[Tuple[int, float]]:
+        if max_km is not None:
+            keep = dist <= max_km
+            idx, dist = idx[keep], dist[keep]
+        order = np.lexsort((idx, dist))[:k]
+        return [(int(idx[i]), float(dist[i])) for i in order]
+
+    def _point_feature(self, i: int) -> Dict:
+        return {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [float(self.lng[i]), float(self.lat[i])]},
+            "properties": {
+                "id": int(self.ids[i]),
+                "name": self.names[i],
+                "court_type": self.court_types[i],
+            }
+        }
+
+    def query_bbox(self, bbox: Tuple[float, float, float, float], zoom: int) -> Dict:
+        """返回视野范围内的场馆或聚类（GeoJSON FeatureCollection）"""
+        min_lng, min_lat, max_lng, max_lat = bbox
+        features = []
+
+        if zoom > CLUSTER_MAX_ZOOM:
+            mask = (self.lng >= min_lng) & (self.lng <= max_lng) & (self.lat >= min_lat) & (self.lat <= max_lat)
+            features = [self._point_feature(i) for i in np.flatnonzero(mask)]
+        else:
+            c = self.clusters[max(zoom, MIN_ZOOM)]
+            mask = (c["lng"] >= min_lng) & (c["lng"] <= max_lng) & (c["lat"] >= min_lat) & (c["lat"] <= max_lat)
+            for k in np.flatnonzero(mask):
+                count = int(c["count"][k])
+                if count == 1:
+                    features.append(self._point_feature(int(c["first"][k])))
+                    continue
+                features.append({
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [float(c["lng"][k]), float(c["lat"][k])]},
+                    "properties": {"cluster": True, "point_count": count}
+                })
+
+        return {"type": "FeatureCollection", "features": features}
+
+def build_geo_index(snapshot=None) -> CourtGeoIndex:
+    """由场馆快照构建地理索引（只含坐标有效的场馆），类型与展示价格直接取快照中已解析的值"""
+    from .court_snapshot import get_court_snapshot
+
+    snapshot = snapshot or get_court_snapshot()
+    rows = np.flatnonzero(~np.isnan(snapshot.lng))
+    names, types, extras = [], [], []
+    for i in rows:
+        row = snapshot.row(i)
+        names.append(row["name"])
+        types.append(row["court_type"])
+        extras.append({
+            "address": row["address"],
+            "area": row["area"],
+            "area_name": row["area_name"],
+            "peak_price": row["peak_price"],
+            "off_peak_price": row["off_peak_price"],
+            "member_price": row["member_price"],
+            "price_unit": row["price_unit"],
+            "price_source": snapshot.string(snapshot.price_source_code[i]),
+        })
+
+    index = CourtGeoIndex(snapshot.ids[rows], snapshot.lng[rows], snapshot.lat[rows], names, types, extras,
+                          version=snapshot.version)
+    # 同一版本号可能重建出不同的快照（构建期间有写入），按快照对象判断索引是否过期
+    index.snapshot = snapshot
+    logger.info(f"场馆地理索引构建完成: {len(index)} 个场馆, 版本 {snapshot.version}")
+    return index
+
+_index: Optional[CourtGeoIndex] = None
+_index_lock = threading.Lock()
+
+def get_geo_index() -> CourtGeoIndex:
+    """获取当前地理索引，场馆快照更新后重建"""
+    from .court_snapshot import get_court_snapshot
+
+    global _index
+    snapshot = get_court_snapshot()
+    index = _index
+    if index is not None and index.snapshot is snapshot:
+        return index
+    with _index_lock:
+        if _index is None or _index.snapshot is not snapshot:
+            _index = build_geo_index(snapshot)
+        return _index
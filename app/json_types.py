@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+JSON列类型
+数据库中仍以文本存储；行加载时解析一次并缓存在实例上，
+顶层的增删改会标记字段已修改，flush时只重新序列化变更的列（嵌套对象的就地修改不跟踪）。
+赋值时兼容旧代码写入的JSON字符串（自动解析）；load_json 直接返回已解析的值（只读），
+需要就地修改后重新赋值的调用方使用 load_json_copy。
+"""
+
+import copy
+import json
+import logging
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # 未安装时退化为标准库json
+    orjson = None
+
+from sqlalchemy import Text
+from sqlalchemy.ext.mutable import Mutable, MutableDict, MutableList
+from sqlalchemy.types import TypeDecorator
+
+logger = logging.getLogger(__name__)
+
+def loads(text):
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+def dumps(value) -> str:
+    """序列化为JSON文本（中文不转义）"""
+    if orjson is not None:
+        return orjson.dumps(value).decode("utf-8")
+    return json.dumps(value, ensure_ascii=False)
+
+def load_json(value, default: Any = None):
+    """
+    读取JSON字段值：文本则解析，ORM实例上已解析的对象原样返回（只读，不要就地修改）
+    为空或解析失败时返回default，兼容ORM对象与原生SQL查询结果
+    """
+    if value is None or value == "":
+        return default
+    if not isinstance(value, (str, bytes)):
+        return value
+    try:
+        return loads(value)
+    except ValueError:
+        logger.error(f"JSON解析失败, 值: {value[:200]!r}")
+        return default
+
+def load_json_copy(value, default: Any = None):
+    """
+    同 load_json，但ORM实例上的对象返回深拷贝（与 json.loads 一致）：
+    就地修改不会改动实例上已跟踪的值，改完重新赋值才会写库并记录价格历史
+    """
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return load_json(value, default)
+
+class JSONText(TypeDecorator):
+    """以文本存储的JSON对象/数组"""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            # 已序列化的文本，如查询条件中的 '[]'
+            return value
+        return dumps(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None or value == "":
+            return None
+        parsed = load_json(value)
+        if parsed is not None and not isinstance(parsed, (dict, list)):
+            logger.warning(f"JSON字段不是对象或数组，按空值处理: {value[:200]!r}")
+            return None
+        return parsed
+
+class MutableJSON(Mutable):
+    """JSON对象/数组的修改跟踪，按值类型分派为 JSONDict 或 JSONList"""
+
+    @classmethod
+    def coerce(cls, key, value):
+        if value is None or isinstance(value, MutableJSON):
+            return value
+        if isinstance(value, (str, bytes)):
+            if not value:
+                return None
+            value = loads(value)
+        if isinstance(value, dict):
+            return JSONDict(value)
+        if isinstance(value, list):
+            return JSONList(value)
+        if value is None:
+            return None
+        raise ValueError(f"字段 {key} 只能是JSON对象或数组")
+
+class JSONDict(MutableDict, MutableJSON):
+    pass
+
+class JSONList(MutableList, MutableJSON):
+    pass
+
+# 模型中使用的JSON列类型
+JSONColumn = MutableJSON.as_mutable(JSONText)
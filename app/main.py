@@ -14,7 +14,9 @@ except Exception as e:
     print('!!! config导入失败:', e)
     raise
 from .database import init_db
-from .api import courts, scraper, details
+from .responses import ORJSONResponse
+from .compression import CompressionMiddleware
+from .api import courts, scraper, details, export, backup
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -22,7 +24,8 @@ app = FastAPI(
     version=settings.version,
     description="北京网球场馆信息抓取系统",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # 添加CORS中间件
@@ -32,8 +35,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# 响应压缩（支持时优先brotli，其次gzip）
+app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_minimum_size)
+
 # 挂载静态文件
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
@@ -44,6 +51,8 @@ templates = Jinja2Templates(directory="app/templates")
 app.include_router(courts.router)
 app.include_router(scraper.router)
 app.include_router(details.router)
+app.include_router(export.router)
+app.include_router(backup.router)
 
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
@@ -95,15 +104,31 @@ async def startup_event():
     except Exception as e:
         print(f"数据检查失败: {e}")
     
+    # 构建场馆地理索引
+    try:
+        from .geo_index import get_geo_index
+        print(f"场馆地理索引: {len(get_geo_index())} 个场馆")
+    except Exception as e:
+        print(f"地理索引构建失败: {e}")
+    
+    # 重算统计汇总表（直接写库的脚本不经过会话事件，启动时整体重算一次）
+    try:
+        from .database import SessionLocal
+        from .court_rollup import rebuild_rollups
+        db = SessionLocal()
+        try:
+            print(f"统计汇总表: {rebuild_rollups(db)} 个场馆")
+        finally:
+            db.close()
+    except Exception as e:
+        print(f"统计汇总表重算失败: {e}")
+    
     print("应用启动完成")
 
 async def import_initial_data():
-    """导入初始数据"""
+    """导入初始数据（流式批量导入）"""
     try:
-        import json
-        from .database import get_db
-        from .models import TennisCourt, CourtDetail
-        from datetime import datetime
+        from .bulk_loader import load_courts_file
         
         # 优先使用完整数据文件
         data_file = "complete_courts_data.json"
@@ -113,131 +138,17 @@ async def import_initial_data():
                 print(f"数据文件不存在，跳过导入")
                 return
         
-        # 读取数据
-        with open(data_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # 判断数据格式
-        if 'courts' in data and 'details' in data:
-            # 完整数据格式
-            courts_data = data['courts']
-            details_data = data['details']
-            print(f"读取到完整数据: {len(courts_data)} 个场馆, {len(details_data)} 个详情")
-        else:
-            # 旧格式，只有场馆数据
-            courts_data = data
-            details_data = []
-            print(f"读取到场馆数据: {len(courts_data)} 个场馆")
-        
-        # 导入数据
-        db = next(get_db())
-        imported_courts = 0
-        imported_details = 0
-        
-        # 导入场馆数据
-        for court_data in courts_data:
-            try:
-                # 处理时间字段
-                created_at = None
-                updated_at = None
-                if court_data.get('created_at'):
-                    created_at = datetime.fromisoformat(court_data['created_at'])
-                if court_data.get('updated_at'):
-                    updated_at = datetime.fromisoformat(court_data['updated_at'])
-                
-                # 创建场馆对象
-                court = TennisCourt(
-                    id=court_data.get('id'),  # 保持原有ID
-                    name=court_data.get('name'),
-                    address=court_data.get('address'),
-                    area=court_data.get('area'),
-                    area_name=court_data.get('area_name'),
-                    court_type=court_data.get('court_type'),
-                    phone=court_data.get('phone'),
-                    latitude=court_data.get('latitude'),
-                    longitude=court_data.get('longitude'),
-                    has_roof=court_data.get('has_roof', False),
-                    court_count=court_data.get('court_count', 1),
-                    business_hours=court_data.get('business_hours'),
-                    is_open=court_data.get('is_open', True),
-                    peak_price=court_data.get('peak_price'),
-                    off_peak_price=court_data.get('off_peak_price'),
-                    member_price=court_data.get('member_price'),
-                    price_unit=court_data.get('price_unit'),
-                    description=court_data.get('description'),
-                    facilities=court_data.get('facilities'),
-                    traffic_info=court_data.get('traffic_info'),
-                    data_source=court_data.get('data_source'),
-                    source_url=court_data.get('source_url'),
-                    created_at=created_at,
-                    updated_at=updated_at,
-                    price_updated_at=court_data.get('price_updated_at')
-                )
-                
-                db.add(court)
-                imported_courts += 1
-                
-            except Exception as e:
-                print(f"导入场馆 {court_data.get('name', 'unknown')} 失败: {e}")
-                continue
-        
-        # 提交场馆数据
-        db.commit()
-        print(f"✅ 场馆数据导入完成: {imported_courts} 个场馆")
-        
-        # 导入详情数据
-        for detail_data in details_data:
-            try:
-                # 处理时间字段
-                created_at = None
-                updated_at = None
-                if detail_data.get('created_at'):
-                    created_at = datetime.fromisoformat(detail_data['created_at'])
-                if detail_data.get('updated_at'):
-                    updated_at = datetime.fromisoformat(detail_data['updated_at'])
-                
-                # 创建详情对象
-                detail = CourtDetail(
-                    id=detail_data.get('id'),  # 保持原有ID
-                    court_id=detail_data.get('court_id'),
-                    merged_description=detail_data.get('merged_description'),
-                    merged_facilities=detail_data.get('merged_facilities'),
-                    merged_traffic_info=detail_data.get('merged_traffic_info'),
-                    merged_business_hours=detail_data.get('merged_business_hours'),
-                    prices=detail_data.get('prices'),
-                    dianping_prices=detail_data.get('dianping_prices'),
-                    meituan_prices=detail_data.get('meituan_prices'),
-                    merged_prices=detail_data.get('merged_prices'),
-                    predict_prices=detail_data.get('predict_prices'),
-                    bing_prices=detail_data.get('bing_prices'),
-                    dianping_rating=detail_data.get('dianping_rating'),
-                    meituan_rating=detail_data.get('meituan_rating'),
-                    merged_rating=detail_data.get('merged_rating'),
-                    dianping_reviews=detail_data.get('dianping_reviews'),
-                    meituan_reviews=detail_data.get('meituan_reviews'),
-                    dianping_images=detail_data.get('dianping_images'),
-                    meituan_images=detail_data.get('meituan_images'),
-                    map_image=detail_data.get('map_image'),
-                    last_dianping_update=detail_data.get('last_dianping_update'),
-                    last_meituan_update=detail_data.get('last_meituan_update'),
-                    cache_expires_at=detail_data.get('cache_expires_at'),
-                    manual_prices=detail_data.get('manual_prices'),
-                    manual_remark=detail_data.get('manual_remark'),
-                    created_at=created_at,
-                    updated_at=updated_at
-                )
-                
-                db.add(detail)
-                imported_details += 1
-                
-            except Exception as e:
-                print(f"导入详情 {detail_data.get('court_id', 'unknown')} 失败: {e}")
-                continue
+        print(f"开始流式导入数据文件: {data_file}")
+        result = load_courts_file(data_file)
+        if not result:
+            print(f"数据文件为空，跳过导入")
+            return
         
-        # 提交详情数据
-        db.commit()
-        print(f"✅ 详情数据导入完成: {imported_details} 个详情")
-        print(f"✅ 总导入完成: {imported_courts} 个场馆, {imported_details} 个详情")
+        print(f"✅ 总导入完成: {result['courts']} 个场馆, {result['details']} 个详情")
+        if result['skipped']:
+            print(f"⚠️ 跳过 {result['skipped']} 条无效记录，详见日志")
+        if result['coordinate_audits']:
+            print(f"坐标校验: {result['coordinate_audits']} 条坐标已修正或隔离，详见 coordinate_audits 表")
         
     except Exception as e:
         print(f"数据导入失败: {e}")
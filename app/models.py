@@ -1,10 +1,11 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, Index
 # from sqlalchemy.ext.declarative import declarative_base  # 删除本地Base定义
 from sqlalchemy.sql import func
 from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel
 from app.database import Base  # 统一使用 app.database.Base
+from app.json_types import JSONColumn
 
 class TennisCourt(Base):
     """网球场馆数据库模型"""
@@ -16,6 +17,7 @@ class TennisCourt(Base):
     phone = Column(String(50))
     area = Column(String(50), nullable=False, index=True)  # 区域：wangjing, dongba, jiuxianqiao
     area_name = Column(String(50), nullable=False)  # 区域名称：望京、东坝、酒仙桥
+    area_version = Column(Integer)  # 区域分配规则版本
     
     # 位置信息
     latitude = Column(Float)
@@ -49,6 +51,12 @@ class TennisCourt(Base):
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     price_updated_at = Column(DateTime)  # 价格更新时间
+    
+    __table_args__ = (
+        # 列表游标分页使用的复合索引
+        Index('ix_tennis_courts_area_id', 'area', 'id'),
+        Index('ix_tennis_courts_updated_at_id', 'updated_at', 'id'),
+    )
 
 # Pydantic模型用于API
 class TennisCourtBase(BaseModel):
@@ -146,12 +154,12 @@ class CourtDetail(Base):
     merged_business_hours = Column(String(200))  # 融合后的营业时间
     
     # 价格信息（从点评/美团获取）
-    prices = Column(Text)           # 真实价格信息（JSON格式）
-    dianping_prices = Column(Text)  # 点评价格信息（JSON格式）
-    meituan_prices = Column(Text)   # 美团价格信息（JSON格式）
-    merged_prices = Column(Text)    # 融合后的价格信息（JSON格式）
-    predict_prices = Column(Text)   # 2KM类别步进融合预测价格（JSON格式）
-    bing_prices = Column(Text)      # BING搜索价格信息（JSON格式）
+    prices = Column(JSONColumn)           # 真实价格信息（JSON格式）
+    dianping_prices = Column(JSONColumn)  # 点评价格信息（JSON格式）
+    meituan_prices = Column(JSONColumn)   # 美团价格信息（JSON格式）
+    merged_prices = Column(JSONColumn)    # 融合后的价格信息（JSON格式）
+    predict_prices = Column(JSONColumn)   # 2KM类别步进融合预测价格（JSON格式）
+    bing_prices = Column(JSONColumn)      # BING搜索价格信息（JSON格式）
     
     # 评分信息
     dianping_rating = Column(Float)  # 点评评分
@@ -159,13 +167,13 @@ class CourtDetail(Base):
     merged_rating = Column(Float)    # 融合评分
     
     # 评论信息
-    dianping_reviews = Column(Text)  # 点评评论（JSON格式）
-    meituan_reviews = Column(Text)   # 美团评论（JSON格式）
+    dianping_reviews = Column(JSONColumn)  # 点评评论（JSON格式）
+    meituan_reviews = Column(JSONColumn)   # 美团评论（JSON格式）
     
     # 图片信息
-    dianping_images = Column(Text)   # 点评图片（JSON格式）
-    meituan_images = Column(Text)    # 美团图片（JSON格式）
-    map_image = Column(String(500))  # 地图图片路径
+    dianping_images = Column(JSONColumn)  # 点评图片（JSON格式）
+    meituan_images = Column(JSONColumn)   # 美团图片（JSON格式）
+    map_image = Column(String(500))       # 地图图片路径
     
     # 缓存信息
     last_dianping_update = Column(DateTime)  # 最后更新点评数据时间
@@ -173,29 +181,100 @@ class CourtDetail(Base):
     cache_expires_at = Column(DateTime)      # 缓存过期时间
     
     # 人工价格和备注
-    manual_prices = Column(Text)      # 人工录入价格（JSON格式，含黄金/非黄金/会员/标准/备注）
-    manual_remark = Column(Text)      # 人工备注
+    manual_prices = Column(JSONColumn)  # 人工录入价格（JSON格式，含黄金/非黄金/会员/标准/备注）
+    manual_remark = Column(Text)        # 人工备注
     
     # 时间戳
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
+class CoordinateAudit(Base):
+    """坐标校验审计记录（入库时修正或隔离的坐标）"""
+    __tablename__ = "coordinate_audits"
+
+    id = Column(Integer, primary_key=True, index=True)
+    court_id = Column(Integer, index=True)  # 关联的场馆ID（按名称导入时可能为空）
+    court_name = Column(String(200))
+    source = Column(String(50))   # 入库途径：amap, import, api
+    issues = Column(String(200))  # 问题代码，逗号分隔：swapped, out_of_bounds, district_mismatch, far_from_area
+    action = Column(String(20))   # 处理方式：fixed（已修正）、quarantined（已隔离，坐标置空）、flagged（仅记录）
+
+    # 原始坐标与处理后坐标（数据库字段原值）
+    original_latitude = Column(Float)
+    original_longitude = Column(Float)
+    latitude = Column(Float)
+    longitude = Column(Float)
+    detail = Column(Text)
+
+    created_at = Column(DateTime, default=func.now())
+
+class PriceHistory(Base):
+    """价格字段历史（只追加，相同的连续值只记一次）"""
+    __tablename__ = "price_history"
+
+    id = Column(Integer, primary_key=True, index=True)
+    court_id = Column(Integer, nullable=False)
+    column_name = Column(String(50), nullable=False)  # 价格字段：manual_prices, prices, merged_prices, bing_prices, predict_prices
+    version = Column(Integer, nullable=False)          # 该场馆该字段的版本号，从1递增
+    value_hash = Column(String(64))                    # 值的规范化哈希，为空表示值被清空
+    payload = Column(Text)                             # 值的JSON文本
+    writer = Column(String(100))                       # 写入方：manual, detail_update, predictor, 脚本名等
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        # 按时间点恢复：某字段在某时刻之前的最后一个版本
+        Index('ix_price_history_column_created', 'column_name', 'created_at', 'court_id'),
+        Index('ix_price_history_court_column_id', 'court_id', 'column_name', 'id'),
+    )
+
+class CourtRollupKey(Base):
+    """场馆的统计分类键（每个场馆一行，类型为三层判断法的实时结果）"""
+    __tablename__ = "court_rollup_keys"
+
+    court_id = Column(Integer, primary_key=True)
+    area = Column(String(50))
+    court_type = Column(String(50))
+    data_source = Column(String(50))
+    price_bucket = Column(String(20), nullable=False)  # 展示价格来源：manual, merged, predict, none
+    updated_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('ix_court_rollup_keys_group', 'area', 'court_type', 'data_source', 'price_bucket', 'updated_at'),
+    )
+
+class CourtRollup(Base):
+    """按 区域×类型×来源×价格来源 汇总的场馆计数"""
+    __tablename__ = "court_rollups"
+
+    id = Column(Integer, primary_key=True)
+    area = Column(String(50))
+    court_type = Column(String(50))
+    data_source = Column(String(50))
+    price_bucket = Column(String(20), nullable=False)
+    court_count = Column(Integer, nullable=False)
+    first_court_id = Column(Integer, nullable=False)  # 组内最小场馆ID，统计结果按首次出现顺序排列
+    latest_update = Column(DateTime)
+
+    __table_args__ = (
+        Index('ix_court_rollups_group', 'area', 'court_type', 'data_source', 'price_bucket'),
+    )
+
 class CourtDetailCreate(BaseModel):
     court_id: int
     merged_description: Optional[str] = None
     merged_facilities: Optional[str] = None
     merged_traffic_info: Optional[str] = None
     merged_business_hours: Optional[str] = None
-    dianping_prices: Optional[str] = None
-    meituan_prices: Optional[str] = None
-    merged_prices: Optional[str] = None
+    dianping_prices: Optional[list] = None
+    meituan_prices: Optional[list] = None
+    merged_prices: Optional[list] = None
     dianping_rating: Optional[float] = None
     meituan_rating: Optional[float] = None
     merged_rating: Optional[float] = None
-    dianping_reviews: Optional[str] = None
-    meituan_reviews: Optional[str] = None
-    dianping_images: Optional[str] = None
-    meituan_images: Optional[str] = None
+    dianping_reviews: Optional[list] = None
+    meituan_reviews: Optional[list] = None
+    dianping_images: Optional[list] = None
+    meituan_images: Optional[list] = None
 
 class CourtDetailResponse(BaseModel):
     id: int
@@ -204,16 +283,16 @@ class CourtDetailResponse(BaseModel):
     merged_facilities: Optional[str] = None
     merged_traffic_info: Optional[str] = None
     merged_business_hours: Optional[str] = None
-    dianping_prices: Optional[str] = None
-    meituan_prices: Optional[str] = None
-    merged_prices: Optional[str] = None
+    dianping_prices: Optional[list] = None
+    meituan_prices: Optional[list] = None
+    merged_prices: Optional[list] = None
     dianping_rating: Optional[float] = None
     meituan_rating: Optional[float] = None
     merged_rating: Optional[float] = None
-    dianping_reviews: Optional[str] = None
-    meituan_reviews: Optional[str] = None
-    dianping_images: Optional[str] = None
-    meituan_images: Optional[str] = None
+    dianping_reviews: Optional[list] = None
+    meituan_reviews: Optional[list] = None
+    dianping_images: Optional[list] = None
+    meituan_images: Optional[list] = None
     last_dianping_update: Optional[datetime] = None
     last_meituan_update: Optional[datetime] = None
     cache_expires_at: Optional[datetime] = None
@@ -244,4 +323,9 @@ class MeituanData(BaseModel):
     images: Optional[list] = None
     description: Optional[str] = None
     facilities: Optional[str] = None
-    business_hours: Optional[str] = None 
\ No newline at end of file
+    business_hours: Optional[str] = None 
+# 注册空间索引、价格字段历史、统计汇总表的会话事件
+# 所有会话事件都必须在这里提前注册：在事件处理中首次导入注册事件的模块会修改正在遍历的监听器列表
+import app.geo_index  # noqa: E402,F401
+import app.price_history  # noqa: E402,F401
+import app.court_rollup  # noqa: E402,F401
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+价格字段历史
+通过会话事件在每次flush时把 CourtDetail 价格字段的变更追加到 price_history 表，
+与该场馆该字段上一版本哈希相同的值不重复记录；
+“把某字段恢复到某时刻”为一次按索引的查询，不再需要打开整个备份库
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from .json_types import dumps, load_json
+from .models import CourtDetail, PriceHistory
+
+logger = logging.getLogger(__name__)
+
+# 记录历史的价格字段
+TRACKED_COLUMNS = ("manual_prices", "prices", "merged_prices", "bing_prices", "predict_prices")
+# 会话 info 中记录写入方的键
+WRITER_KEY = "price_writer"
+
+def value_hash(value) -> Optional[str]:
+    """值的规范化哈希（键排序后序列化），空值返回None"""
+    if value is None:
+        return None
+    canonical = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def default_writer() -> str:
+    """未指定写入方时使用运行的脚本名"""
+    name = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else ""
+    name = os.path.splitext(name)[0]
+    return name if name and name not in ("-", "-c") else "unknown"
+
+@contextmanager
+def price_writer(db: Session, writer: str):
+    """在此范围内写入的价格历史标记为 writer"""
+    previous = db.info.get(WRITER_KEY)
+    db.info[WRITER_KEY] = writer
+    try:
+        yield db
+    finally:
+        if previous is None:
+            db.info.pop(WRITER_KEY, None)
+        else:
+            db.info[WRITER_KEY] = previous
+
+def _latest_versions(connection, keys: Iterable[Tuple[int, str]]) -> Dict[Tuple[int, str], Tuple[int, Optional[str]]]:
+    """各 (场馆ID, 字段) 的最新 (版本号, 哈希)"""
+    court_ids = sorted({court_id for court_id, _ in keys})
+    latest = {}
+    table = PriceHistory.__table__
+    for start in range(0, len(court_ids), 500):
+        last = (select(func.max(table.c.id).label("id"))
+                .where(table.c.court_id.in_(court_ids[start:start + 500]))
+                .group_by(table.c.court_id, table.c.column_name)
+                .subquery())
+        rows = connection.execute(
+            select(table.c.court_id, table.c.column_name, table.c.version, table.c.value_hash)
+            .join(last, table.c.id == last.c.id)
+        )
+        for court_id, column, version, digest in rows:
+            latest[(court_id, column)] = (version, digest)
+    return latest
+
+def _collect_changes(session: Session) -> List[Tuple[int, str, object]]:
+    """本次flush中新增或修改的价格字段 [(场馆ID, 字段, 新值)]"""
+    changes = []
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, CourtDetail) or obj.court_id is None:
+            continue
+        state = inspect(obj)
+        for column in TRACKED_COLUMNS:
+            value = getattr(obj, column)
+            if obj in session.new:
+                if value is not None:
+                    changes.append((obj.court_id, column, value))
+            elif state.attrs[column].history.has_changes():
+                changes.append((obj.court_id, column, value))
+    return changes
+
+def _append(connection, changes: List[Tuple[int, str, object]], writer: str) -> int:
+    """追加历史版本，跳过与上一版本相同的值，返回写入条数"""
+    latest = _latest_versions(connection, [(court_id, column) for court_id, column, _ in changes])
+    now = datetime.now()
+    rows = []
+    for court_id, column, value in changes:
+        digest = value_hash(value)
+        version, last_digest = latest.get((court_id, column), (0, None))
+        if digest == last_digest:
+            continue  # 与上一版本相同（或从无到无），压缩掉
+        latest[(court_id, column)] = (version + 1, digest)
+        rows.append({
+            "court_id": court_id,
+            "column_name": column,
+            "version": version + 1,
+            "value_hash": digest,
+            "payload": dumps(value) if value is not None else None,
+            "writer": writer,
+            "created_at": now,
+        })
+    if rows:
+        connection.execute(PriceHistory.__table__.insert(), rows)
+    return len(rows)
+
+@event.listens_for(Session, "after_flush")
+def _record_price_writes(session: Session, flush_context):
+    changes = _collect_changes(session)
+    if not changes:
+        return
+    try:
+        _append(session.connection(), changes, session.info.get(WRITER_KEY) or default_writer())
+    except Exception as e:  # 旧库尚未建表时不影响正常写入
+        logger.warning(f"价格历史记录失败，跳过: {e}")
+
+def _check_column(column: str):
+    if column not in TRACKED_COLUMNS:
+        raise ValueError(f"不支持的价格字段: {column}，可选: {', '.join(TRACKED_COLUMNS)}")
+
+def history(db: Session, court_id: int, column: Optional[str] = None, limit: int = 50) -> List[Dict]:
+    """某场馆的价格历史，按时间倒序"""
+    query = db.query(PriceHistory).filter(PriceHistory.court_id == court_id)
+    if column:
+        _check_column(column)
+        query = query.filter(PriceHistory.column_name == column)
+    rows = query.order_by(PriceHistory.id.desc()).limit(limit).all()
+    return [{
+        "column": row.column_name,
+        "version": row.version,
+        "value": load_json(row.payload),
+        "writer": row.writer,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    } for row in rows]
+
+def values_as_of(db: Session, column: str, as_of: datetime,
+                 court_ids: Optional[List[int]] = None) -> Dict[int, Dict]:
+    """各场馆该字段在 as_of 时刻的值 {场馆ID: {value, version, writer, created_at}}"""
+    _check_column(column)
+    last = (select(func.max(PriceHistory.id).label("id"))
+            .where(PriceHistory.column_name == column, PriceHistory.created_at <= as_of))
+    if court_ids:
+        last = last.where(PriceHistory.court_id.in_(court_ids))
+    last = last.group_by(PriceHistory.court_id).subquery()
+    rows = db.query(PriceHistory).join(last, PriceHistory.id == last.c.id).all()
+    return {
+        row.court_id: {"value": load_json(row.payload), "version": row.version,
+                       "writer": row.writer, "created_at": row.created_at}
+        for row in rows
+    }
+
+def restore_as_of(db: Session, column: str, as_of: datetime, court_ids: Optional[List[int]] = None,
+                  dry_run: bool = False, writer: str = "restore") -> Dict:
+    """
+    把该字段恢复到 as_of 时刻的值；as_of 之前没有历史的场馆不变。
+    恢复本身也会作为新版本记入历史，可以再次恢复
+    """
+    snapshot = values_as_of(db, column, as_of, court_ids)
+    details = db.query(CourtDetail).filter(CourtDetail.court_id.in_(list(snapshot))).all() if snapshot else []
+    changed = []
+    for detail in details:
+        value = snapshot[detail.court_id]["value"]
+        if value_hash(getattr(detail, column)) == value_hash(value):
+            continue
+        changed.append(detail.court_id)
+        if not dry_run:
+            setattr(detail, column, value)
+
+    if changed and not dry_run:
+        with price_writer(db, writer):
+            db.commit()
+    return {
+        "column": column,
+        "as_of": as_of.isoformat(),
+        "courts_with_history": len(snapshot),
+        "changed": len(changed),
+        "changed_court_ids": changed,
+        "dry_run": dry_run,
+    }
+
+def record_values(db: Session, changes: List[Tuple[int, str, object]], writer: str) -> int:
+    """记录绕过会话写入（如直接SQL合并）的价格值 [(场馆ID, 字段, 值)]，返回写入条数"""
+    changes = [(court_id, column, value) for court_id, column, value in changes if column in TRACKED_COLUMNS]
+    written = _append(db.connection(), changes, writer) if changes else 0
+    db.commit()
+    return written
+
+def seed_baseline(db: Session, writer: str = "baseline") -> int:
+    """为现有价格值写入基线版本（与最新版本相同的跳过），返回写入条数"""
+    changes = []
+    for detail in db.query(CourtDetail).all():
+        for column in TRACKED_COLUMNS:
+            value = getattr(detail, column)
+            if value is not None:
+                changes.append((detail.court_id, column, value))
+    written = _append(db.connection(), changes, writer)
+    db.commit()
+    return written
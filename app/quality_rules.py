@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+数据质量规则引擎
+每项检查声明为一条规则：逐行规则对单个场馆（场馆字段 + 解析后的详情价格）判断，
+跨行规则（重复场馆、区域矛盾、坐标校验）先收集再批量向量化计算。
+一次流式扫描 场馆 LEFT JOIN 详情 驱动所有规则，逐行规则可按块在多进程中并行执行；
+结果为结构化报告：每条规则的问题数、问题场馆ID及样例
+"""
+
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .geo import normalize_lnglat
+from .json_types import loads
+
+logger = logging.getLogger(__name__)
+
+COURT_COLUMNS = ("id", "name", "address", "area", "area_name", "latitude", "longitude",
+                 "data_source", "created_at", "updated_at")
+# 列表型价格字段（每项为含 price 的对象）与对象型价格字段
+LIST_PRICE_COLUMNS = ("merged_prices", "bing_prices", "prices", "dianping_prices", "meituan_prices")
+DICT_PRICE_COLUMNS = ("manual_prices", "predict_prices")
+DETAIL_COLUMNS = ("id",) + LIST_PRICE_COLUMNS + DICT_PRICE_COLUMNS
+SEVERITIES = ("error", "warning", "info")
+# 报告中每条规则保留的样例数
+SAMPLE_LIMIT = 20
+DEFAULT_CHUNK_SIZE = 500
+
+# ========== 行 ==========
+class QualityRow:
+    """一个场馆及其详情（同一场馆多条详情时取ID最小的一条，与列表接口一致），价格字段解析一次"""
+
+    def __init__(self, court: Dict, details: List[Dict]):
+        self.court = court
+        self.details = details
+        self.prices: Dict[str, object] = {}
+        self.parse_errors: Dict[str, str] = {}
+        detail = details[0] if details else {}
+        for column in LIST_PRICE_COLUMNS + DICT_PRICE_COLUMNS:
+            raw = detail.get(column)
+            if raw is None or raw == "":
+                continue
+            try:
+                self.prices[column] = loads(raw)
+            except ValueError as e:
+                self.parse_errors[column] = str(e)
+
+    @property
+    def id(self) -> int:
+        return self.court["id"]
+
+    @property
+    def name(self) -> str:
+        return self.court["name"] or ""
+
+    @property
+    def address(self) -> str:
+        return self.court["address"] or ""
+
+    @cached_property
+    def lnglat(self) -> Optional[Tuple[float, float]]:
+        return normalize_lnglat(self.court["latitude"], self.court["longitude"])
+
+    def price_list(self, column: str) -> List:
+        value = self.prices.get(column)
+        return value if isinstance(value, list) else []
+
+# ========== 规则声明 ==========
+class Rule:
+    """逐行规则：check(row) 返回问题描述，无问题时返回None"""
+
+    def __init__(self, name: str, description: str, severity: str, check: Callable[[QualityRow], Optional[str]]):
+        if severity not in SEVERITIES:
+            raise ValueError(f"无效的严重程度: {severity}")
+        self.name = name
+        self.description = description
+        self.severity = severity
+        self.check = check
+
+class AggregateRule:
+    """跨行规则：扫描时 add(row) 收集所需字段，扫描结束后 finish() 返回 [(场馆ID, 场馆名称, 问题描述)]"""
+
+    name = ""
+    description = ""
+    severity = "warning"
+
+    def add(self, row: QualityRow):
+        raise NotImplementedError
+
+    def finish(self) -> List[Tuple[int, str, str]]:
+        """返回 [(场馆ID, 场馆名称, 问题描述)]"""
+        raise NotImplementedError
+
+ROW_RULES: Dict[str, Rule] = {}
+AGGREGATE_RULES: Dict[str, type] = {}
+
+def rule(name: str, description: str, severity: str = "warning"):
+    """注册逐行规则"""
+    def register(check):
+        ROW_RULES[name] = Rule(name, description, severity, check)
+        return check
+    return register
+
+def aggregate_rule(cls):
+    """注册跨行规则"""
+    AGGREGATE_RULES[cls.name] = cls
+    return cls
+
+# ========== 逐行规则 ==========
+@rule("price_format", "价格字段JSON格式：列表字段每项为含price的对象，人工/预测价格为对象", "error")
+def check_price_format(row: QualityRow) -> Optional[str]:
+    problems = [f"{column} 无法解析" for column in row.parse_errors]
+    for column in LIST_PRICE_COLUMNS:
+        value = row.prices.get(column)
+        if value is None:
+            continue
+        if not isinstance(value, list):
+            problems.append(f"{column} 不是数组")
+        elif any(not isinstance(item, dict) or "price" not in item for item in value):
+            problems.append(f"{column} 有缺少price的项")
+    for column in DICT_PRICE_COLUMNS:
+        value = row.prices.get(column)
+        if value is not None and not isinstance(value, dict):
+            problems.append(f"{column} 不是对象")
+    return "; ".join(problems) or None
+
+@rule("swimming_pool", "游泳池场馆应被过滤")
+def check_swimming_pool(row: QualityRow) -> Optional[str]:
+    if "游泳池" in row.name or "游泳池" in row.address:
+        return "名称或地址含“游泳池”"
+    return None
+
+@rule("created_at_missing", "created_at 为空")
+def check_created_at(row: QualityRow) -> Optional[str]:
+    return "created_at 为空" if row.court["created_at"] is None else None
+
+@rule("prediction_status", "无真实价格的场馆应有成功的预测价格（2KM步进法）", "info")
+def check_prediction_status(row: QualityRow) -> Optional[str]:
+    if any(row.price_list(column) for column in ("merged_prices", "bing_prices", "dianping_prices", "meituan_prices")):
+        return None
+    if row.lnglat is None:
+        return "无真实价格且无坐标，无法预测"
+    predict = row.prices.get("predict_prices")
+    if not isinstance(predict, dict):
+        return "无真实价格且未预测"
+    if predict.get("predict_failed"):
+        return f"预测失败: {predict.get('reason') or '未知原因'}"
+    if not (predict.get("peak_price") or predict.get("off_peak_price")):
+        return "预测结果没有价格"
+    return None
+
+@rule("protected_prices", "从备份恢复的预测价格应标记 protected")
+def check_protected_prices(row: QualityRow) -> Optional[str]:
+    predict = row.prices.get("predict_prices")
+    if isinstance(predict, dict) and ("restored_at" in predict or "original_bing_data" in predict) \
+            and not predict.get("protected"):
+        return "恢复的预测价格未标记 protected"
+    return None
+
+@rule("multiple_details", "每个场馆只应有一条详情记录")
+def check_multiple_details(row: QualityRow) -> Optional[str]:
+    if len(row.details) > 1:
+        return f"有 {len(row.details)} 条详情: {[d['id'] for d in row.details]}"
+    return None
+
+@rule("unknown_area", "区域不在目标区域配置中", "error")
+def check_unknown_area(row: QualityRow) -> Optional[str]:
+    area = row.court["area"]
+    return None if area in settings.target_areas else f"区域 {area!r} 不在目标区域中"
+
+# ========== 跨行规则 ==========
+class _CollectingRule(AggregateRule):
+    """收集 id、名称、地址、坐标原值、区域的跨行规则基类"""
+
+    def __init__(self):
+        self.ids, self.names, self.addresses = [], [], []
+        self.latitudes, self.longitudes, self.areas = [], [], []
+
+    def add(self, row: QualityRow):
+        self.ids.append(row.id)
+        self.names.append(row.name)
+        self.addresses.append(row.address)
+        self.latitudes.append(row.court["latitude"])
+        self.longitudes.append(row.court["longitude"])
+        self.areas.append(row.court["area"])
+
+    def lnglats(self) -> List[Optional[Tuple[float, float]]]:
+        return [normalize_lnglat(a, b) for a, b in zip(self.latitudes, self.longitudes)]
+
+@aggregate_rule
+class DuplicateCourts(_CollectingRule):
+    name = "duplicate_courts"
+    description = "疑似重复场馆（空间网格 + 名称/地址相似度）"
+
+    def finish(self):
+        from .scrapers.dedupe import CourtDeduplicator
+
+        names = dict(zip(self.ids, self.names))
+        clusters = CourtDeduplicator().find_clusters(self.ids, self.names, self.addresses, self.lnglats())
+        return [(court_id, names[court_id], f"与场馆 {cluster['keep_id']}（{cluster['names'][0]}）重复")
+                for cluster in clusters for court_id in cluster["ids"] if court_id != cluster["keep_id"]]
+
+@aggregate_rule
+class AreaContradiction(_CollectingRule):
+    name = "area_contradiction"
+    description = "区域与区域规则（丰台东西部、亦庄及区域范围）的分配结果不一致"
+
+    def finish(self):
+        from .scrapers.area_assigner import AreaAssigner
+
+        assigned = AreaAssigner().assign_many(self.names, self.addresses, self.lnglats(), self.areas)
+        return [(court_id, name, f"当前 {current}，规则应为 {area}")
+                for court_id, name, current, area in zip(self.ids, self.names, self.areas, assigned)
+                if area and area != current]
+
+@aggregate_rule
+class CoordinateIssues(_CollectingRule):
+    name = "coordinates"
+    description = "坐标超出北京范围、与地址行政区或所属区域不符"
+    severity = "error"
+
+    def _checks(self) -> List[Dict]:
+        from .scrapers.coord_validator import CoordinateValidator, parse_district
+
+        return CoordinateValidator().validate_many(
+            self.latitudes, self.longitudes, self.areas,
+            [parse_district(address, name) for address, name in zip(self.addresses, self.names)])
+
+    def finish(self):
+        from .scrapers.coord_validator import SWAPPED
+
+        findings = []
+        for court_id, name, check in zip(self.ids, self.names, self._checks()):
+            issues = [issue for issue in check["issues"] if issue != SWAPPED]
+            if issues:
+                findings.append((court_id, name, ", ".join(issues) + (f"（{check['detail']}）" if check["detail"] else "")))
+        return findings
+
+@aggregate_rule
+class SwappedCoordinates(CoordinateIssues):
+    name = "coordinates_swapped"
+    description = "坐标按字段名存储（与 latitude 存经度的约定相反），校验流程可自动修正"
+    severity = "info"
+
+    def finish(self):
+        from .scrapers.coord_validator import SWAPPED
+
+        return [(court_id, name, "latitude/longitude 字段颠倒")
+                for court_id, name, check in zip(self.ids, self.names, self._checks()) if SWAPPED in check["issues"]]
+
+# ========== 扫描 ==========
+def _scan_sql() -> str:
+    court = ", ".join(f"tc.{c}" for c in COURT_COLUMNS)
+    detail = ", ".join(f"cd.{c}" for c in DETAIL_COLUMNS)
+    return (f"SELECT {court}, {detail} FROM tennis_courts tc "
+            f"LEFT JOIN court_details cd ON cd.court_id = tc.id ORDER BY tc.id, cd.id")
+
+def iter_court_rows(db: Session) -> Iterator[Tuple[Dict, List[Dict]]]:
+    """流式读取 (场馆字段, [详情字段...])，一次扫描场馆与详情"""
+    connection = db.connection().execution_options(stream_results=True, yield_per=DEFAULT_CHUNK_SIZE)
+    result = connection.execute(text(_scan_sql()))
+    n_court = len(COURT_COLUMNS)
+    current, details = None, []
+    for values in result:
+        court = dict(zip(COURT_COLUMNS, values[:n_court]))
+        if current is not None and court["id"] != current["id"]:
+            yield current, details
+            details = []
+        current = court
+        if values[n_court] is not None:
+            details.append(dict(zip(DETAIL_COLUMNS, values[n_court:])))
+    if current is not None:
+        yield current, details
+
+def _chunks(items: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _check_rows(rows: List[QualityRow], rule_names: Sequence[str]) -> List[Tuple[str, int, str, str]]:
+    findings = []
+    for row in rows:
+        for name in rule_names:
+            message = ROW_RULES[name].check(row)
+            if message:
+                findings.append((name, row.id, row.name, message))
+    return findings
+
+def _check_chunk(raw_rows: List[Tuple[Dict, List[Dict]]], rule_names: Sequence[str]) -> List[Tuple[str, int, str, str]]:
+    """在工作进程中执行逐行规则"""
+    return _check_rows([QualityRow(court, details) for court, details in raw_rows], rule_names)
+
+def _select_rules(rules: Optional[Sequence[str]]) -> Tuple[List[str], List[str]]:
+    if not rules:
+        return list(ROW_RULES), list(AGGREGATE_RULES)
+    unknown = [name for name in rules if name not in ROW_RULES and name not in AGGREGATE_RULES]
+    if unknown:
+        raise ValueError(f"未知规则: {', '.join(unknown)}，可选: {', '.join(list(ROW_RULES) + list(AGGREGATE_RULES))}")
+    return [n for n in rules if n in ROW_RULES], [n for n in rules if n in AGGREGATE_RULES]
+
+def run_quality_rules(db: Session, rules: Optional[Sequence[str]] = None, workers: int = 1,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict:
+    """
+    一次扫描执行规则，返回报告：
+    {"scanned", "seconds", "rules": [{"name", "description", "severity", "count", "court_ids", "samples"}]}
+    workers > 1 时逐行规则按块在多进程中执行
+    """
+    started = time.time()
+    row_rules, aggregate_names = _select_rules(rules)
+    aggregates = [AGGREGATE_RULES[name]() for name in aggregate_names]
+    findings: List[Tuple[str, int, str, str]] = []
+    scanned = 0
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and row_rules else None
+    try:
+        pending = []
+        for chunk in _chunks(iter_court_rows(db), chunk_size):
+            scanned += len(chunk)
+            if aggregates or executor is None:
+                rows = [QualityRow(court, details) for court, details in chunk]
+                for aggregate in aggregates:
+                    for row in rows:
+                        aggregate.add(row)
+            if executor is None:
+                findings.extend(_check_rows(rows, row_rules))
+                continue
+            pending.append(executor.submit(_check_chunk, chunk, row_rules))
+            # 限制在途的块数，保持流式
+            if len(pending) >= workers * 2:
+                findings.extend(pending.pop(0).result())
+        for future in pending:
+            findings.extend(future.result())
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    for aggregate in aggregates:
+        findings.extend((aggregate.name, court_id, name, message) for court_id, name, message in aggregate.finish())
+
+    by_rule = {name: [] for name in row_rules + aggregate_names}
+    for name, court_id, court_name, message in findings:
+        by_rule[name].append((court_id, court_name, message))
+    report = []
+    for name, items in by_rule.items():
+        declared = ROW_RULES.get(name) or AGGREGATE_RULES[name]
+        items.sort(key=lambda item: item[0])
+        report.append({
+            "name": name,
+            "description": declared.description,
+            "severity": declared.severity,
+            "count": len(items),
+            "court_ids": [court_id for court_id, _, _ in items],
+            "samples": [{"court_id": court_id, "name": court_name, "message": message}
+                        for court_id, court_name, message in items[:SAMPLE_LIMIT]],
+        })
+    return {"scanned": scanned, "seconds": round(time.time() - started, 3), "rules": report}
+
+def report_counts(report: Dict) -> Dict[str, int]:
+    """报告中各规则的问题数 {规则名: 数量}"""
+    return {item["name"]: item["count"] for item in report["rules"]}
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+JSON响应类
+使用orjson直接输出UTF-8字节（中文不转义），未安装orjson时退化为标准库json
+"""
+
+import json
+from datetime import date, datetime
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # 未安装时退化为标准库json
+    orjson = None
+
+from fastapi.responses import JSONResponse
+
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "tolist"):  # numpy标量/数组
+        return value.tolist()
+    return str(value)
+
+def dumps_bytes(content: Any) -> bytes:
+    """序列化为UTF-8 JSON字节"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+class ORJSONResponse(JSONResponse):
+    """基于orjson的JSON响应"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
+
+class GeoJSONResponse(ORJSONResponse):
+    media_type = "application/geo+json"
@@ -5,6 +5,7 @@ from typing import List, Dict, Optional
 from datetime import datetime
 from ..config import settings
 from ..models import ScrapedCourtData
+from .http_cache import CachedSession
 
 class AmapScraper:
     """高德地图API爬虫"""
@@ -12,7 +13,7 @@ class AmapScraper:
     def __init__(self):
         self.api_key = settings.amap_api_key
         self.base_url = settings.amap_base_url
-        self.session = requests.Session()
+        self.session = CachedSession("amap")
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
@@ -75,7 +76,8 @@ class AmapScraper:
                     break
                 
                 page += 1
-                time.sleep(settings.request_delay)  # 请求间隔
+                if not getattr(response, 'from_cache', False):
+                    time.sleep(settings.request_delay)  # 请求间隔（缓存命中时无需等待）
                 
             except requests.RequestException as e:
                 print(f"请求错误：{e}")
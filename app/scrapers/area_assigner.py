@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+场馆区域分配引擎
+一次向量化计算所有场馆到所有目标区域中心的距离，
+结合丰台/亦庄的名称地址规则确定区域，并将结果与规则版本写回场馆表
+"""
+
+import logging
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..geo import haversine_km, normalize_lnglat
+from ..models import TennisCourt
+
+logger = logging.getLogger(__name__)
+
+# 规则有变化时递增，便于只重算旧版本的场馆
+AREA_RULES_VERSION = 1
+
+# 丰台区东西部按经度分界
+FENGTAI_SPLIT_LNG = 116.321
+
+class AreaAssigner:
+    """根据目标区域圆形范围及名称地址规则分配场馆区域"""
+
+    def __init__(self, target_areas: Optional[Dict[str, dict]] = None):
+        self.target_areas = target_areas or settings.target_areas
+        self.keys = list(self.target_areas.keys())
+        centers = [self.target_areas[k]["center"].split(",") for k in self.keys]
+        self.center_lng = np.array([float(c[0]) for c in centers])
+        self.center_lat = np.array([float(c[1]) for c in centers])
+        self.radius_km = np.array([self.target_areas[k]["radius"] / 1000.0 for k in self.keys])
+
+    def _rule_area(self, name: str, address: str, lng: Optional[float]) -> Optional[str]:
+        """名称地址规则（与 get_dynamic_area 一致），优先于圆形范围"""
+        if '丰台' in name or '丰台' in address:
+            if lng is not None and lng > FENGTAI_SPLIT_LNG:
+                return 'fengtai_east'
+            return 'fengtai_west'
+        if '亦庄' in name or '亦庄' in address:
+            return 'yizhuang'
+        return None
+
+    def assign_many(self, names: Sequence[str], addresses: Sequence[str],
+                    lnglats: Sequence[Optional[tuple]], current_areas: Sequence[Optional[str]]) -> List[Optional[str]]:
+        """
+        批量分配区域
+        坐标落在多个区域圆内时取中心最近的区域；不在任何区域内时保留当前区域
+        """
+        n = len(names)
+        if n == 0:
+            return []
+
+        lng = np.array([p[0] if p else np.nan for p in lnglats], dtype=np.float64)
+        lat = np.array([p[1] if p else np.nan for p in lnglats], dtype=np.float64)
+
+        # N×A 距离矩阵，区域外的距离置为无穷大
+        dist = haversine_km(lng[:, None], lat[:, None], self.center_lng[None, :], self.center_lat[None, :])
+        dist = np.where(dist < self.radius_km[None, :], dist, np.inf)
+        best = np.argmin(dist, axis=1)
+        inside = np.isfinite(dist[np.arange(n), best])
+
+        result = []
+        for i in range(n):
+            lng_i = None if np.isnan(lng[i]) else float(lng[i])
+            area = self._rule_area(names[i] or "", addresses[i] or "", lng_i)
+            if area is None:
+                area = self.keys[best[i]] if inside[i] else current_areas[i]
+            result.append(area)
+        return result
+
+    def assign(self, name: str, address: str, latitude: Optional[float], longitude: Optional[float],
+               current_area: Optional[str] = None) -> Optional[str]:
+        """分配单个场馆的区域，latitude/longitude 为数据库字段原值"""
+        return self.assign_many([name], [address], [normalize_lnglat(latitude, longitude)], [current_area])[0]
+
+    def apply_to_court(self, court: TennisCourt) -> bool:
+        """为ORM场馆对象写入区域及规则版本，返回区域是否变化"""
+        area = self.assign(court.name, court.address, court.latitude, court.longitude, court.area)
+        changed = bool(area) and area != court.area
+        if area:
+            court.area = area
+            if area in self.target_areas:
+                court.area_name = self.target_areas[area]["name"]
+        court.area_version = AREA_RULES_VERSION
+        return changed
+
+    def reassign_all(self, db: Session, only_stale: bool = False) -> Dict:
+        """批量重新分配区域，only_stale 为真时只处理规则版本过旧的场馆"""
+        query = db.query(TennisCourt.id, TennisCourt.name, TennisCourt.address, TennisCourt.latitude,
+                         TennisCourt.longitude, TennisCourt.area, TennisCourt.area_name)
+        if only_stale:
+            query = query.filter((TennisCourt.area_version.is_(None)) | (TennisCourt.area_version < AREA_RULES_VERSION))
+        rows = query.all()
+
+        areas = self.assign_many(
+            [r.name for r in rows],
+            [r.address for r in rows],
+            [normalize_lnglat(r.latitude, r.longitude) for r in rows],
+            [r.area for r in rows],
+        )
+
+        changes = []
+        moved = 0
+        for row, area in zip(rows, areas):
+            area_name = self.target_areas[area]["name"] if area in self.target_areas else row.area_name
+            if area != row.area:
+                moved += 1
+            changes.append({"id": row.id, "area": area, "area_name": area_name, "area_version": AREA_RULES_VERSION})
+
+        if changes:
+            db.execute(update(TennisCourt), changes)
+            db.commit()
+
+        logger.info(f"区域重新分配完成: 处理 {len(rows)} 个场馆, 变更 {moved} 个")
+        return {"total": len(rows), "changed": moved, "rules_version": AREA_RULES_VERSION}
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+BING搜索结果页抓取
+优先用连接池化的 httpx 直接请求结果页并以 lxml 解析 li.b_algo 自然结果，
+遇到验证页或解析不到结果时才回退到浏览器，并记录每个查询实际使用的路径
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+from lxml import etree, html as lxml_html
+
+from ..config import settings
+from .http_cache import HttpCache, cache_key
+
+logger = logging.getLogger(__name__)
+
+SEARCH_URL = "https://www.bing.com/search"
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+}
+MAX_RESULTS = 15
+# 验证/拦截页特征
+CHALLENGE_MARKERS = ("b_captcha", "/challenge/", "verify you are a human", "人机验证", "异常流量")
+B_ALGO_XPATH = "//li[contains(concat(' ', normalize-space(@class), ' '), ' b_algo ')]"
+WHITESPACE_RE = re.compile(r"\s+")
+
+# 路径：http（直接请求）、cache（HTTP缓存）、browser（浏览器回退）、none（均无结果）
+PATH_HTTP = "http"
+PATH_CACHE = "cache"
+PATH_BROWSER = "browser"
+PATH_NONE = "none"
+
+def is_challenge(page: str) -> bool:
+    """是否为验证/拦截页（解析不到结果时用于区分原因；正常结果页一定包含 b_results 容器）"""
+    lowered = page[:20000].lower()
+    if any(marker in lowered for marker in CHALLENGE_MARKERS):
+        return True
+    return "b_results" not in lowered
+
+def parse_serp(page: str, keyword: str) -> List[Dict]:
+    """解析结果页中的 li.b_algo 自然结果，字段与浏览器路径一致"""
+    try:
+        tree = lxml_html.fromstring(page)
+    except (ValueError, etree.ParserError):
+        return []
+
+    results = []
+    for item in tree.xpath(B_ALGO_XPATH):
+        text = WHITESPACE_RE.sub(" ", " ".join(item.itertext())).strip()
+        if len(text) <= 10:
+            continue
+        links = item.xpath(".//h2//a/@href")
+        results.append({
+            "title": keyword,
+            "snippet": text,
+            "link": links[0] if links else "",
+            "type": "li.b_algo",
+        })
+        if len(results) >= MAX_RESULTS:
+            break
+    return results
+
+class BingSerpFetcher:
+    """
+    BING结果页抓取器
+    browser_search 为浏览器回退函数（关键词 -> 结果列表），为空时不回退；
+    每次查询的路径、回退原因与耗时记录在 log 中，stats 为各路径次数
+    """
+
+    def __init__(self, browser_search: Optional[Callable[[str], List[Dict]]] = None,
+                 mode: Optional[str] = None, timeout: float = 10.0, cache: Optional[HttpCache] = None):
+        self.browser_search = browser_search
+        self.mode = mode or settings.http_cache_mode
+        ttls = settings.http_cache_ttls
+        self.ttl = ttls.get("bing", ttls.get("default"))
+        self.cache = cache or HttpCache()
+        self.client = httpx.Client(
+            headers=HEADERS,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+        )
+        self.stats: Counter = Counter()
+        self.log: List[Dict] = []
+
+    def _search_http(self, keyword: str, params: Dict) -> Tuple[Optional[List[Dict]], str]:
+        """HTTP路径，返回 (结果, 路径或失败原因)，失败时结果为None"""
+        key = cache_key("GET", SEARCH_URL, params, self.client.headers)
+        if self.mode != "live":
+            cached = self.cache.get("bing", key, None if self.mode == "replay-only" else self.ttl)
+            if cached:
+                return parse_serp(cached[1].decode("utf-8", errors="replace"), keyword), PATH_CACHE
+            if self.mode == "replay-only":
+                return None, "cache_miss"
+
+        try:
+            response = self.client.get(SEARCH_URL, params=params)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning(f"BING HTTP请求失败: {keyword}: {e}")
+            return None, "http_error"
+
+        page = response.text
+        results = parse_serp(page, keyword)
+        if not results:
+            return None, "challenge" if is_challenge(page) else "empty"
+
+        self.cache.put("bing", key, {"url": str(response.url), "status": response.status_code,
+                                     "fetched_at": time.time()}, page.encode("utf-8"))
+        return results, PATH_HTTP
+
+    def search(self, keyword: str, count: int = 20) -> Tuple[List[Dict], str]:
+        """搜索关键词，返回 (结果列表, 实际使用的路径)"""
+        start = time.perf_counter()
+        results, reason = self._search_http(keyword, {"q": keyword, "count": count})
+        path = reason
+        if results is None:
+            if self.browser_search is not None and self.mode != "replay-only":
+                results = self.browser_search(keyword)
+                path = PATH_BROWSER
+            else:
+                results, path = [], PATH_NONE
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.stats[path] += 1
+        self.log.append({
+            "keyword": keyword,
+            "path": path,
+            "fallback_reason": reason if path in (PATH_BROWSER, PATH_NONE) else None,
+            "results": len(results),
+            "elapsed_ms": round(elapsed_ms, 1),
+        })
+        return results, path
+
+    def close(self):
+        self.client.close()
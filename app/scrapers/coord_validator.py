@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+场馆坐标入库校验
+对一批场馆一次性向量化检查：经纬度字段是否颠倒、是否超出北京范围、
+是否远离所属区域中心、是否与地址所在行政区不符；
+颠倒的坐标自动修正，明显错误的坐标置空隔离，并写入审计记录
+"""
+
+import logging
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..geo import haversine_km
+from ..models import CoordinateAudit, TennisCourt
+
+logger = logging.getLogger(__name__)
+
+# 北京市经纬度范围 (最小经度, 最小纬度, 最大经度, 最大纬度)
+BEIJING_BOUNDS = (115.4, 39.4, 117.6, 41.1)
+# 距所属区域中心超过 区域半径×该倍数 时记录
+AREA_DISTANCE_FACTOR = 3.0
+# 行政区中心 (经度, 纬度) 及最大半径（KM），用于地址行政区一致性检查
+DISTRICT_CENTERS = {
+    "东城": (116.416, 39.928, 6),
+    "西城": (116.366, 39.912, 6),
+    "朝阳": (116.486, 39.948, 16),
+    "海淀": (116.298, 40.033, 20),
+    "丰台": (116.287, 39.858, 15),
+    "石景山": (116.223, 39.906, 8),
+    "门头沟": (115.890, 39.940, 35),
+    "房山": (115.950, 39.700, 40),
+    "通州": (116.660, 39.810, 20),
+    "顺义": (116.650, 40.130, 22),
+    "昌平": (116.230, 40.220, 30),
+    "大兴": (116.340, 39.730, 22),
+    "怀柔": (116.630, 40.470, 45),
+    "平谷": (117.120, 40.140, 25),
+    "密云": (116.840, 40.380, 40),
+    "延庆": (115.970, 40.460, 40),
+}
+# 行政区距离判断的容差（KM）
+DISTRICT_MARGIN_KM = 5.0
+DISTRICT_RE = re.compile("(" + "|".join(DISTRICT_CENTERS) + ")区")
+
+# 问题代码
+SWAPPED = "swapped"
+OUT_OF_BOUNDS = "out_of_bounds"
+DISTRICT_MISMATCH = "district_mismatch"
+FAR_FROM_AREA = "far_from_area"
+# 需要隔离（坐标置空）的问题
+QUARANTINE_ISSUES = {OUT_OF_BOUNDS, DISTRICT_MISMATCH}
+
+def parse_district(*texts: Optional[str]) -> Optional[str]:
+    """从地址/名称/高德adname中解析行政区（不含"区"字）"""
+    for text in texts:
+        if not text or not isinstance(text, str):
+            continue
+        match = DISTRICT_RE.search(text)
+        if match:
+            return match.group(1)
+    return None
+
+def _float_array(values: Sequence) -> np.ndarray:
+    result = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        try:
+            result[i] = float(value)
+        except (TypeError, ValueError):
+            pass
+    return result
+
+class CoordinateValidator:
+    """
+    坐标校验器
+    数据库约定 latitude 字段存储经度、longitude 字段存储纬度（与高德抓取一致），
+    按字段名存储的坐标视为颠倒并自动修正
+    """
+
+    def __init__(self, target_areas: Optional[Dict[str, dict]] = None, bounds=BEIJING_BOUNDS):
+        self.target_areas = target_areas or settings.target_areas
+        self.bounds = bounds
+        district_names = list(DISTRICT_CENTERS)
+        self.district_index = {name: i for i, name in enumerate(district_names)}
+        self.district_lng = np.array([DISTRICT_CENTERS[d][0] for d in district_names])
+        self.district_lat = np.array([DISTRICT_CENTERS[d][1] for d in district_names])
+        self.district_radius = np.array([DISTRICT_CENTERS[d][2] for d in district_names], dtype=float)
+
+    def _area_centers(self, areas: Sequence[Optional[str]]):
+        """各场馆所属区域的中心与半径，未知区域为NaN"""
+        lng = np.full(len(areas), np.nan)
+        lat = np.full(len(areas), np.nan)
+        radius = np.full(len(areas), np.nan)
+        for i, area in enumerate(areas):
+            config = self.target_areas.get(area) if area else None
+            if config:
+                center = config["center"].split(",")
+                lng[i], lat[i] = float(center[0]), float(center[1])
+                radius[i] = config["radius"] / 1000.0
+        return lng, lat, radius
+
+    def validate_many(self, latitudes: Sequence, longitudes: Sequence, areas: Sequence[Optional[str]],
+                      districts: Sequence[Optional[str]]) -> List[Dict]:
+        """
+        批量校验数据库字段原值，districts 为已解析的行政区（可为None）
+        返回每条记录的 {"latitude", "longitude", "issues", "action", "detail"}，
+        其中 latitude/longitude 为处理后应写入的字段值
+        """
+        n = len(latitudes)
+        if n == 0:
+            return []
+
+        a = _float_array(latitudes)
+        b = _float_array(longitudes)
+        present = ~(np.isnan(a) | np.isnan(b)) & ~((a == 0) & (b == 0))
+
+        # 与 normalize_lnglat 一致：longitude 字段明显是经度时视为按字段名存储
+        swapped = present & (np.abs(b) > 90) & (np.abs(a) <= 90)
+        lng = np.where(swapped, b, a)
+        lat = np.where(swapped, a, b)
+
+        min_lng, min_lat, max_lng, max_lat = self.bounds
+        in_bounds = (lng >= min_lng) & (lng <= max_lng) & (lat >= min_lat) & (lat <= max_lat)
+        out_of_bounds = present & ~in_bounds
+
+        # 行政区一致性：N 个场馆到各自地址行政区中心的距离
+        district_idx = np.array([self.district_index.get(d, -1) if d else -1 for d in districts])
+        has_district = present & in_bounds & (district_idx >= 0)
+        safe_idx = np.maximum(district_idx, 0)
+        district_dist = haversine_km(lng, lat, self.district_lng[safe_idx], self.district_lat[safe_idx])
+        district_mismatch = has_district & (district_dist > self.district_radius[safe_idx] + DISTRICT_MARGIN_KM)
+
+        # 所属区域中心距离
+        area_lng, area_lat, area_radius = self._area_centers(areas)
+        area_dist = haversine_km(lng, lat, area_lng, area_lat)
+        with np.errstate(invalid="ignore"):
+            far_from_area = present & in_bounds & (area_dist > area_radius * AREA_DISTANCE_FACTOR)
+
+        results = []
+        for i in range(n):
+            issues = []
+            if swapped[i]:
+                issues.append(SWAPPED)
+            if out_of_bounds[i]:
+                issues.append(OUT_OF_BOUNDS)
+            if district_mismatch[i]:
+                issues.append(DISTRICT_MISMATCH)
+            if far_from_area[i]:
+                issues.append(FAR_FROM_AREA)
+
+            detail = []
+            if district_mismatch[i]:
+                detail.append(f"距{districts[i]}区中心 {district_dist[i]:.1f}KM")
+            if far_from_area[i]:
+                detail.append(f"距{areas[i]}区域中心 {area_dist[i]:.1f}KM")
+
+            if QUARANTINE_ISSUES.intersection(issues):
+                action, new_lat, new_lng = "quarantined", None, None
+            elif swapped[i]:
+                action, new_lat, new_lng = "fixed", float(lng[i]), float(lat[i])
+            else:
+                action = "flagged" if issues else None
+                new_lat, new_lng = latitudes[i], longitudes[i]
+            results.append({
+                "latitude": new_lat,
+                "longitude": new_lng,
+                "issues": issues,
+                "action": action,
+                "detail": "; ".join(detail) or None,
+            })
+        return results
+
+    def validate_courts(self, courts: Sequence[TennisCourt]) -> List[Dict]:
+        """校验ORM场馆对象"""
+        return self.validate_many(
+            [c.latitude for c in courts],
+            [c.longitude for c in courts],
+            [c.area for c in courts],
+            [parse_district(c.address, c.name) for c in courts],
+        )
+
+def make_audit(check: Dict, court_id: Optional[int], court_name: str, source: str,
+               original_latitude, original_longitude) -> Dict:
+    """根据校验结果生成审计记录字段"""
+    return {
+        "court_id": court_id,
+        "court_name": court_name,
+        "source": source,
+        "issues": ",".join(check["issues"]),
+        "action": check["action"],
+        "original_latitude": original_latitude,
+        "original_longitude": original_longitude,
+        "latitude": check["latitude"],
+        "longitude": check["longitude"],
+        "detail": check["detail"],
+    }
+
+def apply_to_courts(db: Session, courts: Sequence[TennisCourt], source: str,
+                    validator: Optional[CoordinateValidator] = None) -> Dict[str, int]:
+    """
+    校验并就地修正/隔离ORM场馆对象的坐标，审计记录加入会话（由调用方提交）
+    返回各处理方式的数量
+    """
+    courts = list(courts)
+    if not courts:
+        return {}
+    if any(c.id is None for c in courts):
+        db.flush()  # 审计记录需要场馆ID
+
+    validator = validator or CoordinateValidator()
+    counts: Dict[str, int] = {}
+    for court, check in zip(courts, validator.validate_courts(courts)):
+        if not check["action"]:
+            continue
+        db.add(CoordinateAudit(**make_audit(check, court.id, court.name, source, court.latitude, court.longitude)))
+        court.latitude = check["latitude"]
+        court.longitude = check["longitude"]
+        counts[check["action"]] = counts.get(check["action"], 0) + 1
+
+    if counts:
+        logger.info(f"坐标校验({source}): {counts}")
+    return counts
+
+def validate_records(records: Iterable[Dict], audits: List[Dict], source: str = "import",
+                     chunk_size: int = 1000, validator: Optional[CoordinateValidator] = None) -> Iterator[Dict]:
+    """
+    流式校验导入记录（dict），按块向量化检查并就地修正坐标
+    审计记录追加到 audits，导入完成后由调用方写入
+    """
+    validator = validator or CoordinateValidator()
+
+    def flush(chunk):
+        checks = validator.validate_many(
+            [r.get("latitude") for r in chunk],
+            [r.get("longitude") for r in chunk],
+            [r.get("area") for r in chunk],
+            [parse_district(r.get("address"), r.get("name")) for r in chunk],
+        )
+        for record, check in zip(chunk, checks):
+            if check["action"]:
+                audits.append(make_audit(check, record.get("id"), record.get("name"), source,
+                                         record.get("latitude"), record.get("longitude")))
+                record["latitude"] = check["latitude"]
+                record["longitude"] = check["longitude"]
+        return chunk
+
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield from flush(chunk)
+            chunk = []
+    if chunk:
+        yield from flush(chunk)
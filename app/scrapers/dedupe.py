@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+重复场馆检测引擎
+按空间网格（默认300米）分块，相邻网格内的候选对用 rapidfuzz cpdist（cdist 的逐对版本）批量比较名称与地址，
+另以完整规范化名称为键捕获同名记录，并查集输出合并簇；
+DedupeIndex 支持抓取入库时逐条增量匹配
+"""
+
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from ..geo import court_lnglat, haversine_km
+from .venue_names import core_name, name_numbers, normalize_address, normalize_name, split_branch
+
+# 空间分块网格边长（米），同时是判定重复的最大距离
+DEDUPE_CELL_M = 300
+# 名称相似度阈值（0-100）：单独满足即视为重复
+NAME_THRESHOLD = 90
+# 名称与地址同时满足时视为重复
+NAME_WITH_ADDRESS_THRESHOLD = 75
+ADDRESS_THRESHOLD = 85
+# 两条记录都有分店名且相似度低于该值时，名称相似还需地址相似才视为重复
+BRANCH_CONFLICT_THRESHOLD = 50
+# 完整名称相同的记录视为重复的最大距离（KM），无坐标时不限距离
+SAME_NAME_MAX_KM = 2.0
+
+_M_PER_DEG_LAT = 110540.0
+_M_PER_DEG_LNG = 111320.0
+# 网格经度方向按北京纬度缩放，保证批量与增量使用同一套网格
+GRID_REF_LAT = 40.0
+_COS_REF_LAT = math.cos(math.radians(GRID_REF_LAT))
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+class CourtFeatures:
+    """场馆比较特征：核心名称、分店名、名称中的数字、完整名称、地址及坐标"""
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self.cores: List[str] = []
+        self.branches: List[str] = []
+        self.numbers: List[str] = []
+        self.full_names: List[str] = []
+        self.addrs: List[str] = []
+        self.lng: List[float] = []
+        self.lat: List[float] = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, court_id, name: str, address: str, lnglat: Optional[Tuple[float, float]]) -> int:
+        name = name or ""
+        self.ids.append(court_id)
+        self.cores.append(core_name(name))
+        self.branches.append(normalize_name(split_branch(name)[1]))
+        self.numbers.append(name_numbers(name))
+        self.full_names.append(normalize_name(name))
+        self.addrs.append(normalize_address(address or ""))
+        self.lng.append(lnglat[0] if lnglat else math.nan)
+        self.lat.append(lnglat[1] if lnglat else math.nan)
+        return len(self.ids) - 1
+
+class CourtDeduplicator:
+    """批量检测重复场馆"""
+
+    def __init__(self, cell_m: float = DEDUPE_CELL_M, name_threshold: float = NAME_THRESHOLD,
+                 name_with_address_threshold: float = NAME_WITH_ADDRESS_THRESHOLD,
+                 address_threshold: float = ADDRESS_THRESHOLD):
+        self.cell_m = cell_m
+        self.name_threshold = name_threshold
+        self.name_with_address_threshold = name_with_address_threshold
+        self.address_threshold = address_threshold
+
+    def cells(self, lng, lat):
+        """经纬度转为网格坐标，支持标量或numpy数组"""
+        cx = np.floor(np.asarray(lng) * _M_PER_DEG_LNG * _COS_REF_LAT / self.cell_m)
+        cy = np.floor(np.asarray(lat) * _M_PER_DEG_LAT / self.cell_m)
+        return cx, cy
+
+    def match_matrix(self, feats: CourtFeatures, rows: Sequence[int], cols: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        用 cdist 批量比较 rows×cols，返回 (是否重复的布尔矩阵, 名称+地址得分矩阵)
+        适合少量查询对大量候选（增量匹配）
+        """
+        pick = lambda values, idx: [values[i] for i in idx]
+        name_scores = process.cdist(pick(feats.cores, rows), pick(feats.cores, cols),
+                                    scorer=fuzz.ratio, dtype=np.uint8)
+        addr_scores = process.cdist(pick(feats.addrs, rows), pick(feats.addrs, cols),
+                                    scorer=fuzz.partial_ratio, dtype=np.uint8)
+        branch_scores = process.cdist(pick(feats.branches, rows), pick(feats.branches, cols),
+                                      scorer=fuzz.ratio, dtype=np.uint8)
+        ia, ib = np.meshgrid(np.asarray(rows), np.asarray(cols), indexing="ij")
+        matches = self._decide(feats, ia, ib, name_scores, addr_scores, branch_scores)
+        return matches, name_scores.astype(np.int32) + addr_scores
+
+    def match_pairs(self, feats: CourtFeatures, ia: np.ndarray, ib: np.ndarray) -> np.ndarray:
+        """
+        比较候选对 (ia[k], ib[k])，返回是否重复的布尔数组
+        先按距离过滤，再只对剩余的候选对计算名称/地址相似度
+        """
+        lng = np.asarray(feats.lng)
+        lat = np.asarray(feats.lat)
+        close = haversine_km(lng[ia], lat[ia], lng[ib], lat[ib]) * 1000 <= self.cell_m
+        matches = np.zeros(len(ia), dtype=bool)
+        ia, ib = ia[close], ib[close]
+        if len(ia) == 0:
+            return matches
+
+        # cpdist 为 cdist 的逐对版本：只计算网格候选对，不计算各网格成员的完整矩阵
+        pick = lambda values, idx: [values[i] for i in idx.tolist()]
+        pair_scores = lambda values, scorer: process.cpdist(pick(values, ia), pick(values, ib), scorer=scorer,
+                                                             dtype=np.float64, workers=-1)
+        name_scores = pair_scores(feats.cores, fuzz.ratio)
+        addr_scores = pair_scores(feats.addrs, fuzz.partial_ratio)
+        branch_scores = pair_scores(feats.branches, fuzz.ratio)
+        matches[close] = self._decide(feats, ia, ib, name_scores, addr_scores, branch_scores, check_distance=False)
+        return matches
+
+    def _decide(self, feats: CourtFeatures, ia: np.ndarray, ib: np.ndarray, name_scores, addr_scores,
+                branch_scores, check_distance: bool = True) -> np.ndarray:
+        """
+        判定规则：距离不超过网格边长，名称中的数字一致（1号场与2号场不合并），且
+        名称相似度达到阈值（两者分店名明显不同时不适用），或名称与地址同时较相似
+        """
+        pick = lambda values, idx: np.array([values[i] for i in idx.ravel()], dtype=object).reshape(idx.shape)
+        branch_a, branch_b = pick(feats.branches, ia), pick(feats.branches, ib)
+        branch_conflict = (branch_a != "") & (branch_b != "") & (branch_scores < BRANCH_CONFLICT_THRESHOLD)
+        number_conflict = pick(feats.numbers, ia) != pick(feats.numbers, ib)
+
+        strong = (name_scores >= self.name_threshold) & ~branch_conflict
+        weak = (name_scores >= self.name_with_address_threshold) & (addr_scores >= self.address_threshold)
+        matches = ~number_conflict & (strong | weak)
+        if check_distance:
+            lng = np.asarray(feats.lng)
+            lat = np.asarray(feats.lat)
+            matches &= haversine_km(lng[ia], lat[ia], lng[ib], lat[ib]) * 1000 <= self.cell_m
+        return matches
+
+    def _grid(self, feats: CourtFeatures) -> Dict[Tuple[int, int], List[int]]:
+        lng = np.asarray(feats.lng)
+        lat = np.asarray(feats.lat)
+        grid = defaultdict(list)
+        has_coord = np.isfinite(lng) & np.isfinite(lat)
+        if has_coord.any():
+            cx, cy = self.cells(lng, lat)
+            for i in np.flatnonzero(has_coord):
+                grid[(int(cx[i]), int(cy[i]))].append(int(i))
+        return grid
+
+    def find_clusters(self, ids: Sequence[int], names: Sequence[str], addresses: Sequence[str],
+                      lnglats: Sequence[Optional[Tuple[float, float]]]) -> List[Dict]:
+        """
+        检测重复场馆，返回合并簇列表（只包含2个及以上场馆的簇）
+        每个簇：{"keep_id": 最小ID, "ids": [...], "names": [...]}
+        """
+        feats = CourtFeatures()
+        for court_id, name, address, lnglat in zip(ids, names, addresses, lnglats):
+            feats.add(court_id, name, address, lnglat)
+        n = len(feats)
+        if n == 0:
+            return []
+        uf = _UnionFind(n)
+
+        # 1. 空间分块：每个网格只与自身及右、上方向的4个相邻网格组成候选对，每对只比较一次
+        grid = self._grid(feats)
+        pairs_a, pairs_b = [], []
+        for (gx, gy), members in grid.items():
+            for pos, a in enumerate(members):
+                for b in members[pos + 1:]:
+                    pairs_a.append(a)
+                    pairs_b.append(b)
+            for dx, dy in ((1, -1), (1, 0), (1, 1), (0, 1)):
+                others = grid.get((gx + dx, gy + dy))
+                if others:
+                    for a in members:
+                        pairs_a.extend([a] * len(others))
+                        pairs_b.extend(others)
+        if pairs_a:
+            ia, ib = np.array(pairs_a), np.array(pairs_b)
+            matches = self.match_pairs(feats, ia, ib)
+            for a, b in zip(ia[matches], ib[matches]):
+                uf.union(int(a), int(b))
+
+        # 2. 名称分块：完整规范化名称相同的记录
+        by_name = defaultdict(list)
+        for i, name in enumerate(feats.full_names):
+            if name:
+                by_name[name].append(i)
+        lng, lat = np.asarray(feats.lng), np.asarray(feats.lat)
+        for members in by_name.values():
+            if len(members) < 2:
+                continue
+            idx = np.array(members)
+            dist_km = haversine_km(lng[idx][:, None], lat[idx][:, None], lng[idx][None, :], lat[idx][None, :])
+            # 任一方无坐标时距离为nan，按同名处理
+            close = np.isnan(dist_km) | (dist_km <= SAME_NAME_MAX_KM)
+            for r, c in zip(*np.nonzero(np.triu(close, 1))):
+                uf.union(members[r], members[c])
+
+        clusters = defaultdict(list)
+        for i in range(n):
+            clusters[uf.find(i)].append(i)
+
+        result = []
+        for members in clusters.values():
+            if len(members) < 2:
+                continue
+            members.sort(key=lambda i: ids[i])
+            result.append({
+                "keep_id": ids[members[0]],
+                "ids": [ids[i] for i in members],
+                "names": [names[i] for i in members],
+            })
+        result.sort(key=lambda c: c["keep_id"])
+        return result
+
+    @staticmethod
+    def _same_name_close(feats: CourtFeatures, a: int, b: int) -> bool:
+        if math.isnan(feats.lng[a]) or math.isnan(feats.lng[b]):
+            return True
+        return haversine_km(feats.lng[a], feats.lat[a], feats.lng[b], feats.lat[b]) <= SAME_NAME_MAX_KM
+
+    def find_court_clusters(self, courts: Iterable) -> List[Dict]:
+        """对场馆ORM对象（或含 id/name/address/latitude/longitude 的行）检测重复"""
+        courts = list(courts)
+        return self.find_clusters(
+            [c.id for c in courts],
+            [c.name or "" for c in courts],
+            [c.address or "" for c in courts],
+            [court_lnglat(c) for c in courts],
+        )
+
+class DedupeIndex:
+    """已入库场馆的增量匹配索引，抓取入库时查找疑似重复的已有场馆"""
+
+    def __init__(self, deduplicator: Optional[CourtDeduplicator] = None):
+        self.dedupe = deduplicator or CourtDeduplicator()
+        self.feats = CourtFeatures()
+        self.grid = defaultdict(list)
+        self.by_name = defaultdict(list)
+
+    @classmethod
+    def from_courts(cls, courts: Iterable, deduplicator: Optional[CourtDeduplicator] = None) -> "DedupeIndex":
+        index = cls(deduplicator)
+        for court in courts:
+            index.add(court.id, court.name, court.address, court_lnglat(court))
+        return index
+
+    def _cell(self, lnglat: Tuple[float, float]) -> Tuple[int, int]:
+        cx, cy = self.dedupe.cells(lnglat[0], lnglat[1])
+        return int(cx), int(cy)
+
+    def add(self, court_id: int, name: str, address: str, lnglat: Optional[Tuple[float, float]]):
+        i = self.feats.add(court_id, name, address, lnglat)
+        if lnglat:
+            self.grid[self._cell(lnglat)].append(i)
+        if self.feats.full_names[i]:
+            self.by_name[self.feats.full_names[i]].append(i)
+
+    def find_match(self, name: str, address: str, lnglat: Optional[Tuple[float, float]]) -> Optional[int]:
+        """返回疑似重复的已有场馆ID，没有时返回None"""
+        # 查询记录临时追加到特征末尾，比较完成后移除
+        q = self.feats.add(None, name, address, lnglat)
+        try:
+            for i in self.by_name.get(self.feats.full_names[q], ()):
+                if self.dedupe._same_name_close(self.feats, q, i):
+                    return self.feats.ids[i]
+
+            if not lnglat:
+                return None
+            gx, gy = self._cell(lnglat)
+            candidates = [j for dx in (-1, 0, 1) for dy in (-1, 0, 1) for j in self.grid.get((gx + dx, gy + dy), ())]
+            if not candidates:
+                return None
+
+            matches, scores = self.dedupe.match_matrix(self.feats, [q], candidates)
+            hits = np.flatnonzero(matches[0])
+            if len(hits) == 0:
+                return None
+            best = hits[np.argmax(scores[0][hits])]
+            return self.feats.ids[candidates[best]]
+        finally:
+            for values in vars(self.feats).values():
+                values.pop()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+爬虫HTTP响应磁盘缓存
+缓存键为 (方法, URL, 规范化参数, 选定请求头)，响应以gzip压缩文件存储，
+按数据源设置有效期，总大小超出上限时按最近访问时间淘汰。
+三种模式：live（总是请求并写缓存）、cache-first（有效缓存优先）、replay-only（只读缓存，离线回放）
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+MODES = ("live", "cache-first", "replay-only")
+# 不参与缓存键的参数（密钥、时间戳等每次请求都会变化的值）
+IGNORED_PARAMS = frozenset({"key", "_", "t", "ts", "timestamp", "callback"})
+# 默认参与缓存键的请求头
+KEY_HEADERS = ("Accept", "Accept-Language")
+# 淘汰时清理到上限的比例，避免每次写入都触发淘汰
+EVICT_TARGET_RATIO = 0.9
+
+def http_ok(response: requests.Response) -> bool:
+    """默认的可缓存判断：状态码为200"""
+    return response.status_code == 200
+
+def _json_dict(response: requests.Response) -> Optional[Dict]:
+    try:
+        data = response.json()
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+def amap_ok(response: requests.Response) -> bool:
+    """高德：status 为 "1" 才是成功响应（密钥无效、超出配额等错误也以200返回）"""
+    data = _json_dict(response) if http_ok(response) else None
+    return data is not None and str(data.get("status")) == "1"
+
+def xiaohongshu_ok(response: requests.Response) -> bool:
+    """小红书：success 不为假、code 为0且带有 data（登录失效、验证码等错误也以200返回）"""
+    data = _json_dict(response) if http_ok(response) else None
+    return (data is not None and data.get("success", True) is not False
+            and str(data.get("code", 0)) == "0" and isinstance(data.get("data"), dict))
+
+# 各数据源的可缓存判断，未列出的数据源只看状态码
+CACHEABLE: Dict[str, Callable[[requests.Response], bool]] = {
+    "amap": amap_ok,
+    "xiaohongshu": xiaohongshu_ok,
+}
+
+class CacheMiss(requests.ConnectionError):
+    """replay-only 模式下缓存未命中（继承 RequestException，爬虫原有的异常处理可直接覆盖）"""
+
+def normalize_url(url: str, params=None) -> str:
+    """合并URL中的参数与params，去掉忽略的参数后排序"""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        items = params.items() if isinstance(params, dict) else params
+        query.extend((str(k), str(v)) for k, v in items if v is not None)
+    query = sorted((k, v) for k, v in query if k not in IGNORED_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, urlencode(query), ""))
+
+def cache_key(method: str, url: str, params=None, headers=None, data=None,
+              key_headers: Sequence[str] = KEY_HEADERS) -> str:
+    parts = [method.upper(), normalize_url(url, params)]
+    headers = CaseInsensitiveDict(headers or {})
+    for name in key_headers:
+        parts.append(f"{name.lower()}={headers.get(name, '')}")
+    if data:
+        parts.append(data if isinstance(data, str) else json.dumps(data, sort_keys=True, default=str))
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+class HttpCache:
+    """按数据源分目录的gzip响应缓存，同一目录在进程内共享大小统计"""
+
+    _lock = threading.Lock()
+    _sizes: Dict[str, int] = {}
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = os.path.abspath(cache_dir or settings.http_cache_dir)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.http_cache_max_mb * 1024 * 1024
+
+    def _path(self, source: str, key: str) -> str:
+        return os.path.join(self.cache_dir, source, key[:2], f"{key}.gz")
+
+    def get(self, source: str, key: str, ttl: Optional[float]) -> Optional[Tuple[Dict, bytes]]:
+        """读取缓存 (元数据, 响应体)，不存在或已过期（ttl为None时不检查）返回None"""
+        path = self._path(source, key)
+        try:
+            with gzip.open(path, "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError, EOFError):
+            return None
+        if ttl is not None and time.time() - meta.get("fetched_at", 0) > ttl:
+            return None
+        try:
+            os.utime(path)  # 记录访问时间，淘汰时优先删除久未访问的
+        except OSError:
+            pass
+        return meta, body
+
+    def put(self, source: str, key: str, meta: Dict, body: bytes):
+        path = self._path(source, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp, "wb", compresslevel=6) as f:
+            f.write(json.dumps(meta, ensure_ascii=False).encode("utf-8") + b"\n")
+            f.write(body)
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp, path)
+        self._account(os.path.getsize(path) - old_size)
+
+    def _scan(self):
+        """扫描缓存目录，返回 [(访问时间, 大小, 路径)]"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".gz"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _account(self, delta: int):
+        with self._lock:
+            if self.cache_dir not in self._sizes:
+                self._sizes[self.cache_dir] = sum(size for _, size, _ in self._scan())
+            else:
+                self._sizes[self.cache_dir] += delta
+            if self._sizes[self.cache_dir] > self.max_bytes:
+                self._sizes[self.cache_dir] = self._evict(int(self.max_bytes * EVICT_TARGET_RATIO))
+
+    def _evict(self, target: int) -> int:
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        logger.info(f"HTTP缓存淘汰 {removed} 个文件，当前 {total / 1024 / 1024:.1f} MB")
+        return total
+
+    def clear(self, source: Optional[str] = None):
+        """清空缓存（指定source时只清空该数据源）"""
+        target = os.path.join(self.cache_dir, source) if source else self.cache_dir
+        shutil.rmtree(target, ignore_errors=True)
+        with self._lock:
+            self._sizes.pop(self.cache_dir, None)
+
+def build_response(meta: Dict, body: bytes, request: Optional[requests.PreparedRequest] = None) -> requests.Response:
+    """由缓存内容构造 requests.Response"""
+    response = requests.Response()
+    response.status_code = meta["status"]
+    response.headers = CaseInsensitiveDict(meta.get("headers", {}))
+    response.url = meta["url"]
+    response.encoding = meta.get("encoding")
+    response.reason = meta.get("reason", "")
+    response._content = body
+    response.request = request
+    response.from_cache = True
+    return response
+
+class CachedSession(requests.Session):
+    """
+    带磁盘缓存的 requests.Session，可直接替换爬虫中的 requests.Session()
+    只缓存 methods 中的方法且 cacheable 判断为成功的响应（默认按数据源取 CACHEABLE，否则只看状态码200），
+    读取时不再满足判断的旧缓存视为未命中；响应对象的 from_cache 标记是否来自缓存
+    """
+
+    def __init__(self, source: str, mode: Optional[str] = None, ttl: Optional[float] = None,
+                 methods: Sequence[str] = ("GET",), key_headers: Sequence[str] = KEY_HEADERS,
+                 cache: Optional[HttpCache] = None,
+                 cacheable: Optional[Callable[[requests.Response], bool]] = None):
+        super().__init__()
+        self.source = source
+        self.mode = mode or settings.http_cache_mode
+        if self.mode not in MODES:
+            raise ValueError(f"未知的缓存模式: {self.mode}")
+        ttls = settings.http_cache_ttls
+        self.ttl = ttl if ttl is not None else ttls.get(source, ttls.get("default"))
+        self.methods = {m.upper() for m in methods}
+        self.key_headers = key_headers
+        self.cache = cache or HttpCache()
+        self.cacheable = cacheable or CACHEABLE.get(source, http_ok)
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "rejected": 0}
+
+    def request(self, method, url, params=None, data=None, headers=None, **kwargs):
+        method = method.upper()
+        if method not in self.methods:
+            return super().request(method, url, params=params, data=data, headers=headers, **kwargs)
+
+        merged_headers = CaseInsensitiveDict(self.headers)
+        merged_headers.update(headers or {})
+        key = cache_key(method, url, params, merged_headers, data or kwargs.get("json"), self.key_headers)
+
+        if self.mode != "live":
+            # replay-only 忽略有效期，离线时总是使用已有缓存
+            cached = self.cache.get(self.source, key, None if self.mode == "replay-only" else self.ttl)
+            if cached:
+                response = build_response(*cached)
+                if self.cacheable(response):
+                    self.stats["hits"] += 1
+                    return response
+            if self.mode == "replay-only":
+                self.stats["misses"] += 1
+                raise CacheMiss(f"缓存未命中（replay-only）: {method} {normalize_url(url, params)}")
+
+        self.stats["misses"] += 1
+        response = super().request(method, url, params=params, data=data, headers=headers, **kwargs)
+        response.from_cache = False
+        if not self.cacheable(response):
+            # 错误响应（包括以200返回的接口错误）不缓存，避免在有效期内被反复回放
+            self.stats["rejected"] += 1
+        else:
+            meta = {
+                "url": response.url,
+                "status": response.status_code,
+                "reason": response.reason,
+                "headers": {k: v for k, v in response.headers.items()
+                            if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")},
+                "encoding": response.encoding,
+                "fetched_at": time.time(),
+            }
+            self.cache.put(self.source, key, meta, response.content)
+            self.stats["stored"] += 1
+        return response
+
+def cached_page(source: str, url: str, fetch: Callable[[], str], mode: Optional[str] = None,
+                ttl: Optional[float] = None, cache: Optional[HttpCache] = None) -> str:
+    """
+    缓存浏览器渲染的页面源码（如 Selenium 的 page_source），fetch 为实际获取函数
+    空页面不缓存；replay-only 模式下未命中抛出 CacheMiss
+    """
+    mode = mode or settings.http_cache_mode
+    cache = cache or HttpCache()
+    ttls = settings.http_cache_ttls
+    ttl = ttl if ttl is not None else ttls.get(source, ttls.get("default"))
+    key = cache_key("BROWSER", url, key_headers=())
+
+    if mode != "live":
+        cached = cache.get(source, key, None if mode == "replay-only" else ttl)
+        if cached:
+            return cached[1].decode("utf-8")
+        if mode == "replay-only":
+            raise CacheMiss(f"缓存未命中（replay-only）: {url}")
+
+    html = fetch()
+    if html:
+        cache.put(source, key, {"url": url, "status": 200, "fetched_at": time.time()}, html.encode("utf-8"))
+    return html
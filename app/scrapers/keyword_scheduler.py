@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+BING价格搜索关键词调度
+按关键词模板统计命中率（搜索后提取到置信价格的比例），按期望收益排序模板，
+场馆已收集到足够的置信价格时提前结束；统计数据以JSON持久化，跨次运行累积
+"""
+
+import json
+import logging
+import os
+import re
+from typing import Dict, List, Tuple
+
+from .coord_validator import parse_district
+
+logger = logging.getLogger(__name__)
+
+STATS_FILE = "data/bing_keyword_stats.json"
+# 关键词模板，{name} 为清理后的场馆名称，{area} 为地址中的行政区
+TEMPLATES = [
+    "{name} 网球价格",
+    "{name} 网球预订",
+    "{name} 网球费用",
+    "{name} 网球收费",
+    "{name} 价格",
+    "{name} 预订",
+    "{name} 收费标准",
+    "{name} 会员价格",
+    "{name} 学生价格",
+    "{name} {area} 网球价格",
+    "{area} {name} 价格",
+    "{name} {area} 预订",
+]
+MAX_KEYWORDS = 8
+# 置信度达到该值视为置信价格（正态模型下约为均值±0.5σ以内，或无模型时的基础置信度）
+CONFIDENT_THRESHOLD = 0.3
+# 收集到该数量的不同置信小时价格（对应黄金/非黄金两档）后停止该场馆的搜索
+STOP_CONFIDENT_PRICES = 2
+# 按小时计价的价格类型，用于提前结束判断
+HOURLY_TYPES = ("标准价格", "会员价格", "学生价格")
+# 命中率的 Beta 先验，未尝试过的模板期望收益为 1/3，保证新模板也会被探索
+PRIOR_HITS = 1.0
+PRIOR_MISSES = 2.0
+
+def clean_court_name(court_name: str) -> str:
+    """去掉括号中的分店等信息"""
+    return re.sub(r'\([^)]*\)', '', court_name).strip()
+
+class KeywordScheduler:
+    """关键词模板调度器"""
+
+    def __init__(self, stats_file: str = STATS_FILE, max_keywords: int = MAX_KEYWORDS):
+        self.stats_file = stats_file
+        self.max_keywords = max_keywords
+        self.stats: Dict[str, Dict[str, int]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, int]]:
+        if not os.path.exists(self.stats_file):
+            return {}
+        try:
+            with open(self.stats_file, "r", encoding="utf-8") as f:
+                return json.load(f).get("templates", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"关键词统计读取失败，重新开始统计: {e}")
+            return {}
+
+    def save(self):
+        """原子写入统计文件"""
+        os.makedirs(os.path.dirname(self.stats_file) or ".", exist_ok=True)
+        tmp = f"{self.stats_file}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"templates": self.stats}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.stats_file)
+
+    def expected_yield(self, template: str) -> float:
+        """模板的期望命中率（带先验的平滑估计）"""
+        stat = self.stats.get(template, {})
+        hits = stat.get("hits", 0)
+        searches = stat.get("searches", 0)
+        return (hits + PRIOR_HITS) / (searches + PRIOR_HITS + PRIOR_MISSES)
+
+    def plan(self, court_name: str, court_address: str = "") -> List[Tuple[str, str]]:
+        """按期望收益排序的 [(模板, 关键词)]，最多 max_keywords 个"""
+        name = clean_court_name(court_name)
+        district = parse_district(court_address, court_name)
+        area = f"{district}区" if district else None
+
+        order = {template: i for i, template in enumerate(TEMPLATES)}
+        ranked = sorted(TEMPLATES, key=lambda t: (-self.expected_yield(t), order[t]))
+
+        planned, seen = [], set()
+        for template in ranked:
+            if "{area}" in template and not area:
+                continue
+            keyword = template.format(name=name, area=area)
+            if keyword in seen:
+                continue
+            seen.add(keyword)
+            planned.append((template, keyword))
+            if len(planned) >= self.max_keywords:
+                break
+        return planned
+
+    def record(self, template: str, prices: List[Dict]):
+        """记录一次搜索的结果"""
+        confident = [p for p in prices if p.get("confidence", 0) >= CONFIDENT_THRESHOLD]
+        stat = self.stats.setdefault(template, {"searches": 0, "hits": 0, "confident_prices": 0})
+        stat["searches"] += 1
+        stat["hits"] += 1 if confident else 0
+        stat["confident_prices"] += len(confident)
+
+    @staticmethod
+    def enough(prices: List[Dict], needed: int = STOP_CONFIDENT_PRICES) -> bool:
+        """是否已收集到足够的不同置信小时价格"""
+        values = {
+            p.get("price") for p in prices
+            if p.get("confidence", 0) >= CONFIDENT_THRESHOLD and p.get("type") in HOURLY_TYPES
+        }
+        return len(values) >= needed
+
+    def summary(self) -> List[Dict]:
+        """各模板统计，按期望收益降序"""
+        rows = []
+        for template in TEMPLATES:
+            stat = self.stats.get(template, {})
+            rows.append({
+                "template": template,
+                "searches": stat.get("searches", 0),
+                "hits": stat.get("hits", 0),
+                "expected_yield": round(self.expected_yield(template), 3),
+            })
+        return sorted(rows, key=lambda r: -r["expected_yield"])
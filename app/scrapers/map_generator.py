@@ -9,6 +9,9 @@ from datetime import datetime
 import logging
 from io import BytesIO
 
+from ..geo import normalize_lnglat
+from .tile_renderer import get_tile_renderer
+
 logger = logging.getLogger(__name__)
 
 class MapGenerator:
@@ -18,21 +21,37 @@ class MapGenerator:
         os.makedirs(self.cache_dir, exist_ok=True)
         # 优先使用传入的API Key，其次使用环境变量
         self.amap_key = amap_key or os.getenv("AMAP_KEY")
+        # 最近一次生成是否访问了网络服务（远程瓦片、静态图API），批量生成时据此限速
+        self.used_network = False
+
+    def prefetch_tiles(self, coordinates) -> int:
+        """预取多个场馆 [(latitude字段, longitude字段)] 地图所需的瓦片，每个瓦片只下载一次"""
+        points = [p for p in (normalize_lnglat(lat, lng) for lat, lng in coordinates) if p]
+        return get_tile_renderer().prefetch(points, zoom=16, width=600, height=300)
         
     def generate_smart_map(self, court_name: str, latitude: float, longitude: float) -> Optional[str]:
         """
-        以经纬度为中心生成地图图片，优先OSM，高德地图作为兜底
+        以经纬度为中心生成地图图片，优先本地拼接瓦片，其次OSM静态图，高德地图作为兜底
         """
         try:
             filename = f"{court_name}_{latitude}_{longitude}.png"
             filename = filename.replace("/", "_").replace("\\", "_")
             filepath = os.path.join(self.cache_dir, filename)
             
+            self.used_network = False
             # 如果文件已存在，直接返回
             if os.path.exists(filepath):
                 return filepath
             
-            # 优先使用OSM
+            # 优先本地拼接瓦片（瓦片各场馆共用缓存）
+            renderer = get_tile_renderer()
+            self.used_network = renderer.is_remote
+            tile_result = self._generate_tile_image(latitude, longitude, filepath)
+            if tile_result:
+                return tile_result
+
+            # 其次使用OSM静态图
+            self.used_network = True
             osm_result = self._generate_osm_image(latitude, longitude, filepath)
             if osm_result:
                 return osm_result
@@ -48,6 +67,19 @@ class MapGenerator:
             print(f"生成地图图片失败: {e}")
             return None
     
+    def _generate_tile_image(self, latitude: float, longitude: float, filepath: str) -> Optional[str]:
+        """拼接地图瓦片生成图片（与静态图一致：16级、600x300、中心红色图钉）"""
+        point = normalize_lnglat(latitude, longitude)
+        if point is None:
+            return None
+        try:
+            get_tile_renderer().render_to_file(filepath, point[0], point[1], zoom=16, size=(600, 300))
+            print(f"✅ 瓦片地图生成成功: {filepath}")
+            return filepath
+        except Exception as e:
+            print(f"❌ 瓦片地图生成失败: {e}")
+            return None
+
     def _generate_amap_image(self, latitude: float, longitude: float, filepath: str) -> Optional[str]:
         """使用高德地图API生成图片"""
         try:
@@ -6,7 +6,6 @@
 基于场馆地理位置的智能价格预测
 """
 
-import json
 import math
 import logging
 import re
@@ -14,6 +13,8 @@ from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
+from app.price_history import WRITER_KEY
 
 logger = logging.getLogger(__name__)
 
@@ -22,10 +23,13 @@ class PricePredictor:
     
     def __init__(self):
         self.db = next(get_db())
+        self.db.info[WRITER_KEY] = "predictor"  # 价格历史的写入方
         self.initial_radius = 2.0  # 初始搜索半径2KM
         self.step_radius = 1.0     # 扩展步长1KM
         self.min_data_count = 2    # 最小有效数据量，降为2家
         self.max_radius = 16.0     # 最大搜索半径16KM
+        # 邻域样本使用的场馆快照，同一预测器实例内首次取得后固定使用（见 _neighbor_snapshot）
+        self._snapshot = None
         
         # 三层次判断模型 - 场馆类型识别关键词
         self.indoor_keywords = [
@@ -222,7 +226,7 @@ class PricePredictor:
                 for field in [detail.bing_prices, detail.dianping_prices, detail.meituan_prices, detail.merged_prices]:
                     try:
                         if field:
-                            price_data = json.loads(field)
+                            price_data = load_json(field)
                             if price_data and len(price_data) > 0:
                                 has_real_price = True
                                 break
@@ -233,7 +237,7 @@ class PricePredictor:
             if not has_main_price and not has_real_price:
                 if detail and detail.predict_prices:
                     try:
-                        predict_data = json.loads(detail.predict_prices)
+                        predict_data = load_json(detail.predict_prices)
                         if predict_data and predict_data.get('peak_price'):
                             continue  # 已有预测价格，跳过
                     except:
@@ -243,6 +247,17 @@ class PricePredictor:
         
         return result
     
+    def _neighbor_snapshot(self):
+        """
+        邻域样本的场馆快照，同一实例内固定使用首次取得的快照。
+        预测只写 predict_prices，不影响邻域样本的坐标、类型与真实价格；
+        批量预测逐个提交时不必每个场馆都等待快照重建
+        """
+        if self._snapshot is None:
+            from app.court_snapshot import get_court_snapshot
+            self._snapshot = get_court_snapshot()
+        return self._snapshot
+    
     def find_nearby_courts_with_prices(self, target_court: TennisCourt, radius: float, filter_by_type: bool = True) -> List[Dict]:
         """在指定半径内查找有真实价格数据的邻域场馆"""
         if not target_court.latitude or not target_court.longitude:
@@ -255,43 +270,26 @@ class PricePredictor:
         else:
             logger.info(f"查找所有类型场馆: {target_court.name} -> {target_court_type}")
         
-        nearby_courts = []
-        all_courts = self.db.query(TennisCourt).all()
+        # 候选场馆的坐标、按名称判断的类型与真实价格取自场馆快照，筛选条件与逐个查询时一致
+        snapshot = self._neighbor_snapshot()
+        type_code = snapshot.strings.lookup(target_court_type) if filter_by_type else None
         
-        for court in all_courts:
-            if court.id == target_court.id:
-                continue  # 跳过自己
-            
-            # 排除包含"游泳池"的非网球场馆
-            if '游泳池' in court.name:
-                continue
-            
-            if not court.latitude or not court.longitude:
-                continue
-            
-            # 类型过滤（可选）
-            if filter_by_type:
-                court_type = self.determine_court_type(court.name)
-                if court_type != target_court_type:
-                    continue  # 跳过不同类型场馆
-            
+        nearby_courts = []
+        for i in snapshot.price_neighbors(target_court.id, type_code):
             # 计算距离
             distance = self.calculate_distance(
                 target_court.latitude, target_court.longitude,
-                court.latitude, court.longitude
+                float(snapshot.latitude[i]), float(snapshot.longitude[i])
             )
             
-            if distance <= radius:
-                # 检查是否有真实价格数据
-                detail = self.db.query(CourtDetail).filter(CourtDetail.court_id == court.id).first()
-                if detail:
-                    real_prices = self._extract_real_prices(detail)
-                    if real_prices:
-                        nearby_courts.append({
-                            'court': court,
-                            'distance': distance,
-                            'prices': real_prices
-                        })
+            # 检查是否有真实价格数据
+            real_prices = snapshot.real_prices(i)
+            if distance <= radius and real_prices:
+                nearby_courts.append({
+                    'court': self.db.get(TennisCourt, int(snapshot.ids[i])),
+                    'distance': distance,
+                    'prices': real_prices
+                })
         
         if filter_by_type:
             logger.info(f"找到 {len(nearby_courts)} 个同类型({target_court_type})邻域样本")
@@ -304,25 +302,25 @@ class PricePredictor:
         try:
             # 优先使用融合价格
             if detail.merged_prices:
-                price_data = json.loads(detail.merged_prices)
+                price_data = load_json(detail.merged_prices)
                 if price_data and isinstance(price_data, list) and len(price_data) > 0:
                     return self._parse_price_data(price_data)
             
             # 其次使用BING价格
             if detail.bing_prices:
-                price_data = json.loads(detail.bing_prices)
+                price_data = load_json(detail.bing_prices)
                 if price_data and isinstance(price_data, list) and len(price_data) > 0:
                     return self._parse_price_data(price_data)
             
             # 再次使用点评价格
             if detail.dianping_prices:
-                price_data = json.loads(detail.dianping_prices)
+                price_data = load_json(detail.dianping_prices)
                 if price_data and isinstance(price_data, list) and len(price_data) > 0:
                     return self._parse_price_data(price_data)
             
             # 最后使用美团价格
             if detail.meituan_prices:
-                price_data = json.loads(detail.meituan_prices)
+                price_data = load_json(detail.meituan_prices)
                 if price_data and isinstance(price_data, list) and len(price_data) > 0:
                     return self._parse_price_data(price_data)
             
@@ -531,7 +529,7 @@ class PricePredictor:
                         self.db.refresh(detail)
                     
                     # 更新预测价格
-                    detail.predict_prices = json.dumps(predict_result, ensure_ascii=False)
+                    detail.predict_prices = predict_result
                     self.db.commit()
                     
                     success_count += 1
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地瓦片拼接地图渲染
+按 (经纬度, 缩放级别, 图片尺寸) 计算覆盖的 Web Mercator 瓦片，缺失的瓦片通过连接池化的 httpx
+并发下载（瓦片源可配置，也可以是本地瓦片目录），用 Pillow 拼接、裁剪并绘制场馆标记。
+瓦片按 源/z/x/y 缓存在磁盘上，各场馆共用；同一瓦片并发请求时只下载一次，
+批量生成前可先 prefetch 所有场馆覆盖瓦片的并集，全市刷新时每个瓦片只下载一次。
+OSM公共瓦片服务按其使用政策限制为2个连接、不批量预取；输出图片右下角绘制瓦片版权声明
+"""
+
+import hashlib
+import logging
+import math
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from PIL import Image, ImageDraw, ImageFont
+
+from ..config import settings
+from ..geo import TILE_SIZE, MapViewport
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {"User-Agent": "AnotherFavorite-TileRenderer/1.0 (tennis court maps)"}
+BACKGROUND = (240, 240, 240)
+MARKER_COLOR = (230, 30, 30)
+# OSM公共瓦片服务：禁止批量预取，并发连接数不超过2
+OSM_TILE_HOSTS = ("tile.openstreetmap.org",)
+OSM_MAX_CONNECTIONS = 2
+
+TileKey = Tuple[int, int, int]  # (z, x, y)
+
+def tile_range(lng: float, lat: float, zoom: int, width: int, height: int) -> List[Tuple[TileKey, int, int]]:
+    """
+    以 (lng, lat) 为中心、width×height 像素的图片覆盖的瓦片及其在图片中的粘贴位置 [(瓦片, 左, 上)]
+    x 方向跨越180度经线时取模，y 超出范围的瓦片略去
+    """
+    view = MapViewport(lng, lat, zoom, width, height)
+    left, top = view.left, view.top
+    n = 2 ** zoom
+    x0, x1 = math.floor(left / TILE_SIZE), math.floor((left + width - 1) / TILE_SIZE)
+    y0, y1 = math.floor(top / TILE_SIZE), math.floor((top + height - 1) / TILE_SIZE)
+    return [((zoom, x % n, y), round(x * TILE_SIZE - left), round(y * TILE_SIZE - top))
+            for y in range(max(y0, 0), min(y1, n - 1) + 1) for x in range(x0, x1 + 1)]
+
+class TileMapRenderer:
+    """瓦片地图渲染器：tile_url 为含 {z}/{x}/{y} 的URL模板或本地瓦片路径模板"""
+
+    def __init__(self, tile_url: Optional[str] = None, cache_dir: Optional[str] = None,
+                 max_workers: Optional[int] = None, timeout: float = 10.0,
+                 attribution: Optional[str] = None):
+        self.tile_url = tile_url or settings.map_tile_url
+        self.is_remote = self.tile_url.startswith(("http://", "https://"))
+        host = (urlsplit(self.tile_url).hostname or "") if self.is_remote else ""
+        self.is_osm = any(host == h or host.endswith("." + h) for h in OSM_TILE_HOSTS)
+        # 不同瓦片源的缓存分目录存放
+        source_key = hashlib.sha1(self.tile_url.encode("utf-8")).hexdigest()[:12]
+        self.cache_dir = os.path.join(cache_dir or settings.map_tile_cache_dir, source_key)
+        self.max_workers = max_workers or settings.map_tile_workers
+        if self.is_osm:
+            self.max_workers = min(self.max_workers, OSM_MAX_CONNECTIONS)
+        self.attribution = settings.map_tile_attribution if attribution is None else attribution
+        self.client = httpx.Client(
+            headers=HEADERS,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_workers, max_keepalive_connections=self.max_workers),
+        ) if self.is_remote else None
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tile-fetch")
+        self._inflight: Dict[TileKey, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"cache_hits": 0, "fetched": 0, "failed": 0}
+
+    def close(self):
+        self.executor.shutdown()
+        if self.client is not None:
+            self.client.close()
+
+    # ========== 瓦片 ==========
+    def _cache_path(self, key: TileKey) -> str:
+        z, x, y = key
+        return os.path.join(self.cache_dir, str(z), str(x), f"{y}.png")
+
+    def _load_source(self, key: TileKey) -> Optional[bytes]:
+        z, x, y = key
+        location = self.tile_url.format(z=z, x=x, y=y)
+        if not self.is_remote:
+            try:
+                with open(location, "rb") as f:
+                    return f.read()
+            except FileNotFoundError:
+                return None
+        try:
+            response = self.client.get(location)
+            response.raise_for_status()
+            return response.content
+        except httpx.HTTPError as e:
+            logger.warning(f"瓦片下载失败 {z}/{x}/{y}: {e}")
+            return None
+
+    def _fetch(self, key: TileKey) -> Optional[bytes]:
+        """下载瓦片并写入磁盘缓存（临时文件 + 原子重命名）"""
+        data = self._load_source(key)
+        if data is None:
+            self.stats["failed"] += 1
+            return None
+        path = self._cache_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.stats["fetched"] += 1
+        return data
+
+    def _finish(self, key: TileKey, future: Future):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _request(self, key: TileKey) -> Optional[Future]:
+        """磁盘缓存命中返回None，否则返回下载任务（同一瓦片已在下载时复用同一任务）"""
+        if os.path.exists(self._cache_path(key)):
+            self.stats["cache_hits"] += 1
+            return None
+        with self._lock:
+            future = self._inflight.get(key)
+            created = future is None
+            # 检查缓存后、加锁前可能恰好有同一瓦片下载完成
+            if created and os.path.exists(self._cache_path(key)):
+                return None
+            if created:
+                future = self.executor.submit(self._fetch, key)
+                self._inflight[key] = future
+        # 任务可能已完成，回调会在当前线程立即执行，需在锁外注册
+        if created:
+            future.add_done_callback(lambda f, key=key: self._finish(key, f))
+        return future
+
+    def fetch_tiles(self, keys: Iterable[TileKey]) -> Dict[TileKey, Optional[Image.Image]]:
+        """并发获取瓦片（缓存优先），返回 {瓦片: 图片}，获取失败的为None"""
+        keys = list(dict.fromkeys(keys))
+        futures = {key: self._request(key) for key in keys}
+        tiles = {}
+        for key in keys:
+            if futures[key] is not None:
+                futures[key].result()
+            path = self._cache_path(key)
+            try:
+                tiles[key] = Image.open(path).convert("RGB") if os.path.exists(path) else None
+            except OSError as e:
+                logger.warning(f"瓦片缓存损坏，删除后重新下载: {path}: {e}")
+                os.remove(path)
+                tiles[key] = None
+        return tiles
+
+    def prefetch(self, points: Sequence[Tuple[float, float]], zoom: int, width: int, height: int) -> int:
+        """预取多个中心点 [(lng, lat)] 覆盖瓦片的并集（每个瓦片只下载一次），返回瓦片数；OSM公共瓦片服务不预取"""
+        if self.is_osm:
+            logger.info("OSM公共瓦片服务不允许批量预取，渲染时按需下载")
+            return 0
+        keys: Set[TileKey] = set()
+        for lng, lat in points:
+            keys.update(key for key, _, _ in tile_range(lng, lat, zoom, width, height))
+        futures = [f for f in (self._request(key) for key in keys) if f is not None]
+        for future in futures:
+            future.result()
+        return len(keys)
+
+    # ========== 渲染 ==========
+    def render(self, lng: float, lat: float, zoom: int = 16, size: Tuple[int, int] = (600, 300),
+               marker: bool = True, label: Optional[str] = None) -> Image.Image:
+        """拼接以 (lng, lat) 为中心的地图，marker 为真时在中心绘制场馆标记"""
+        width, height = size
+        placements = tile_range(lng, lat, zoom, width, height)
+        tiles = self.fetch_tiles(key for key, _, _ in placements)
+        if not any(tiles.values()):
+            raise RuntimeError(f"没有可用的地图瓦片: {lng},{lat} z{zoom}")
+
+        image = Image.new("RGB", (width, height), BACKGROUND)
+        for key, x, y in placements:
+            if tiles[key] is not None:
+                image.paste(tiles[key], (x, y))
+        draw = ImageDraw.Draw(image)
+        if marker:
+            self._draw_marker(draw, width / 2.0, height / 2.0, label)
+        if self.attribution:
+            self._draw_attribution(draw, width, height, self.attribution)
+        return image
+
+    @staticmethod
+    def _draw_attribution(draw: ImageDraw.ImageDraw, width: int, height: int, text: str):
+        """右下角白底的瓦片版权声明"""
+        font = ImageFont.load_default()
+        left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+        x = width - (right - left) - 4
+        y = height - (bottom - top) - 4
+        draw.rectangle([x - 3, y - 2 + top, width, height], fill=(255, 255, 255))
+        draw.text((x, y), text, fill=(60, 60, 60), font=font)
+
+    @staticmethod
+    def _draw_marker(draw: ImageDraw.ImageDraw, x: float, y: float, label: Optional[str]):
+        """图钉式标记：针尖落在 (x, y)"""
+        radius = 8
+        head_y = y - 2.5 * radius
+        draw.polygon([(x - radius * 0.6, head_y + radius * 0.5), (x + radius * 0.6, head_y + radius * 0.5), (x, y)],
+                     fill=MARKER_COLOR)
+        draw.ellipse([x - radius, head_y - radius, x + radius, head_y + radius],
+                     fill=MARKER_COLOR, outline=(255, 255, 255), width=2)
+        if label:
+            try:
+                font = ImageFont.truetype("arial.ttf", 12)
+            except OSError:
+                font = ImageFont.load_default()
+            draw.text((x + radius + 4, head_y - radius), label, fill=(0, 0, 0), font=font)
+
+    def render_to_file(self, filepath: str, lng: float, lat: float, **kwargs) -> str:
+        """渲染并保存为PNG（临时文件 + 原子重命名）"""
+        image = self.render(lng, lat, **kwargs)
+        directory = os.path.dirname(os.path.abspath(filepath))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".png")
+        os.close(fd)
+        try:
+            image.save(tmp_path, "PNG")
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return filepath
+
+_renderer: Optional[TileMapRenderer] = None
+_renderer_lock = threading.Lock()
+
+def get_tile_renderer() -> TileMapRenderer:
+    """进程内共享的渲染器（共用连接池、下载线程与在途瓦片表）"""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = TileMapRenderer()
+        return _renderer
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+外部场馆列表匹配器
+对本地场馆名称做一次规范化（保留分店名：连锁场馆靠分店名区分）并建立 n-gram 倒排索引，
+查询时先按共享 n-gram 的 IDF 加权得分召回候选，再用 rapidfuzz cpdist 对全部候选对批量打分，返回 top-k 结果
+"""
+
+import math
+from collections import defaultdict
+from typing import Callable, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from .venue_names import normalize_name
+
+NGRAM_SIZE = 2
+MAX_CANDIDATES = 50
+
+def ngrams(key: str, n: int = NGRAM_SIZE) -> Set[str]:
+    """规范化名称的 n-gram 集合，名称短于 n 时返回名称本身"""
+    if len(key) <= n:
+        return {key} if key else set()
+    return {key[i:i + n] for i in range(len(key) - n + 1)}
+
+class VenueMatcher:
+    """基于 n-gram 倒排索引的场馆名称匹配器，结果中的下标对应构造时传入的名称顺序"""
+
+    def __init__(self, names: Iterable[str], scorer: Callable = fuzz.ratio,
+                 n: int = NGRAM_SIZE, max_candidates: int = MAX_CANDIDATES):
+        self.names = list(names)
+        self.keys = [normalize_name(name) for name in self.names]
+        self.scorer = scorer
+        self.n = n
+        self.max_candidates = max_candidates
+
+        postings = defaultdict(list)
+        for i, key in enumerate(self.keys):
+            for gram in ngrams(key, n):
+                postings[gram].append(i)
+        total = len(self.keys)
+        self.postings = {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()}
+        # "网球"等高频 n-gram 权重低，召回时以区分度高的 n-gram 为主
+        self.idf = {gram: math.log(1 + total / len(ids)) for gram, ids in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def candidates(self, key: str) -> np.ndarray:
+        """召回与规范化名称共享 n-gram 最多（IDF 加权）的候选下标"""
+        grams = [gram for gram in ngrams(key, self.n) if gram in self.postings]
+        if not grams:
+            return np.empty(0, dtype=np.int64)
+        ids = np.concatenate([self.postings[gram] for gram in grams])
+        weights = np.concatenate([np.full(len(self.postings[gram]), self.idf[gram]) for gram in grams])
+        recall = np.bincount(ids, weights=weights, minlength=len(self.keys))
+        found = np.flatnonzero(recall)
+        if len(found) <= self.max_candidates:
+            return found
+        return found[np.argpartition(-recall[found], self.max_candidates)[:self.max_candidates]]
+
+    def match_many(self, queries: Sequence[str], top_k: int = 1,
+                   min_score: float = 0) -> List[List[Tuple[int, float]]]:
+        """批量匹配，每个查询返回按得分降序的 [(下标, 得分)]，得分范围 0-100"""
+        query_keys = [normalize_name(query) for query in queries]
+        results: List[List[Tuple[int, float]]] = [[] for _ in query_keys]
+
+        # 收集所有 (查询, 候选) 对后统一打分
+        pair_q, pair_c = [], []
+        for qi, key in enumerate(query_keys):
+            found = self.candidates(key)
+            pair_q.append(np.full(len(found), qi, dtype=np.int64))
+            pair_c.append(found)
+        if not pair_q:
+            return results
+        qi = np.concatenate(pair_q)
+        ci = np.concatenate(pair_c)
+        if not len(qi):
+            return results
+
+        # 所有候选对一次交给 rapidfuzz 在C层多线程逐对打分（cpdist 为 cdist 的逐对版本，只计算召回的候选对）
+        scores = process.cpdist([query_keys[q] for q in qi.tolist()], [self.keys[c] for c in ci.tolist()],
+                                scorer=self.scorer, dtype=np.float32, workers=-1).astype(float)
+        keep = scores >= min_score
+        qi, ci, scores = qi[keep], ci[keep], scores[keep]
+
+        # 按查询分组、组内得分降序，取每组前 top_k 个
+        order = np.lexsort((-scores, qi))
+        qi, ci, scores = qi[order], ci[order], scores[order]
+        group_start = np.searchsorted(qi, qi, side="left")
+        top = (np.arange(len(qi)) - group_start) < top_k
+        for q, c, score in zip(qi[top].tolist(), ci[top].tolist(), scores[top].tolist()):
+            results[q].append((c, score))
+        return results
+
+    def match(self, query: str, top_k: int = 1, min_score: float = 0) -> List[Tuple[int, float]]:
+        """匹配单个名称，返回按得分降序的 [(下标, 得分)]"""
+        return self.match_many([query], top_k, min_score)[0]
+
+    def best(self, query: str, min_score: float = 0) -> Tuple[Optional[int], float]:
+        """返回最佳匹配 (下标, 得分)，没有候选时返回 (None, 0)"""
+        found = self.match(query, 1, min_score)
+        return found[0] if found else (None, 0)
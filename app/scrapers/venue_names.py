@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+场馆名称/地址规范化
+全角转半角、统一小写、去除标点与空白，拆分末尾的分店名，
+供重复场馆检测与外部场馆列表匹配共用
+"""
+
+import re
+import unicodedata
+from typing import Tuple
+
+# 末尾括号中的分店/校区名，如 "(国贸店)"、"（京城俱乐部校区）"
+BRANCH_PAREN_RE = re.compile(r'[\(（\[【]([^\)）\]】]*)[\)）\]】]\s*$')
+# 无括号的分店名，如 "Tennislife网球学练馆国贸店"
+BRANCH_TAIL_RE = re.compile(r'(?<=[馆场部心])(\w{2,6}(?:店|分店|校区))$')
+DIGITS_RE = re.compile(r'\d+')
+# 标点、空白及下划线
+PUNCT_RE = re.compile(r'[\W_]+')
+# 场馆名称中的通用词，比较核心名称时去除（长词在前）
+GENERIC_TERMS = (
+    "网球俱乐部", "网球学练馆", "网球训练中心", "网球训练馆", "网球中心", "网球馆", "网球场",
+    "俱乐部", "学练馆", "运动中心", "体育中心", "网球", "tennis",
+)
+ADDRESS_PREFIXES = ("北京市", "北京")
+
+def to_halfwidth(text: str) -> str:
+    """全角字符转半角（NFKC），并转为小写"""
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+def split_branch(name: str) -> Tuple[str, str]:
+    """拆分为 (主体名称, 分店名)，均未规范化"""
+    name = unicodedata.normalize("NFKC", name or "").strip()
+    match = BRANCH_PAREN_RE.search(name)
+    if match:
+        return name[:match.start()].strip(), match.group(1).strip()
+    match = BRANCH_TAIL_RE.search(name)
+    if match:
+        return name[:match.start()].strip(), match.group(1)
+    return name, ""
+
+def normalize_name(name: str, strip_branch: bool = False) -> str:
+    """规范化场馆名称，strip_branch 为真时去掉分店名"""
+    if strip_branch:
+        name = split_branch(name)[0]
+    return PUNCT_RE.sub("", to_halfwidth(name))
+
+def name_numbers(name: str) -> str:
+    """名称中的数字（如 "1号场"），用于区分同一场馆的不同场地"""
+    return ",".join(DIGITS_RE.findall(to_halfwidth(split_branch(name)[0])))
+
+def core_name(name: str) -> str:
+    """去掉分店名和通用词后的核心名称，去除后过短时退回规范化主体名称"""
+    base = normalize_name(name, strip_branch=True)
+    core = base
+    for term in GENERIC_TERMS:
+        core = core.replace(term, "")
+    return core if len(core) >= 2 else base
+
+def normalize_address(address: str) -> str:
+    """规范化地址：去掉北京市前缀、标点与空白"""
+    text = to_halfwidth(address).strip()
+    for prefix in ADDRESS_PREFIXES:
+        if text.startswith(prefix):
+            text = text[len(prefix):]
+            break
+    return PUNCT_RE.sub("", text)
@@ -17,13 +17,15 @@ from typing import Optional, Dict, Any, List
 from urllib.parse import quote, urlencode
 from datetime import datetime
 
+from .http_cache import CachedSession
+
 logger = logging.getLogger(__name__)
 
 class XiaohongshuAPIScraper:
     """小红书API爬虫"""
     
     def __init__(self):
-        self.session = requests.Session()
+        self.session = CachedSession("xiaohongshu")
         self.base_url = "https://www.xiaohongshu.com"
         self.api_url = "https://www.xiaohongshu.com/api/sns/v1/search/notes"
         
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SQLite快照对比与选择性合并
+把快照（或任意备份库文件）ATTACH 到当前数据库连接上，按主键在SQL中逐行逐列比较，
+差异以游标分批流式返回，内存占用与表大小无关；
+合并为一条按键关联的 UPDATE，例如“实时库 bing_prices 为空时取快照中的值”
+"""
+
+import logging
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from .backup import SNAPSHOT_ID_RE, BackupError, BackupStore, sqlite_path
+
+logger = logging.getLogger(__name__)
+
+FETCH_BATCH = 1000
+SNAPSHOT_SCHEMA = "snap"
+# 视为空值的文本（JSON空对象/数组等）
+EMPTY_TEXTS = ("", "[]", "{}", "null")
+# 合并条件：live_empty（实时库为空时取快照值）、differs（与快照不同即取快照值）
+MERGE_MODES = ("live_empty", "differs")
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def _empty_sql(expr: str) -> str:
+    empties = ", ".join(f"'{v}'" for v in EMPTY_TEXTS)
+    return f"({expr} IS NULL OR TRIM({expr}) IN ({empties}))"
+
+@contextmanager
+def open_source(source: str, store: Optional[BackupStore] = None):
+    """对比来源：快照ID（重建到临时文件）或数据库文件路径"""
+    if SNAPSHOT_ID_RE.match(source):
+        with (store or BackupStore()).checkout(source) as path:
+            yield path
+    elif os.path.isfile(source):
+        yield source
+    else:
+        raise BackupError(f"快照不存在: {source}")
+
+class SnapshotDiff:
+    """当前数据库（main）与快照（snap）的对比"""
+
+    def __init__(self, snapshot_path: str, live_path: Optional[str] = None):
+        self.live_path = live_path or sqlite_path()
+        self.conn = sqlite3.connect(self.live_path, timeout=30)
+        self.conn.execute(f"ATTACH DATABASE ? AS {SNAPSHOT_SCHEMA}", (snapshot_path,))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ========== 表结构 ==========
+    def _table_names(self, schema: str) -> List[str]:
+        rows = self.conn.execute(
+            f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        )
+        return [row[0] for row in rows]
+
+    def tables(self) -> List[str]:
+        """两边都存在的表"""
+        snap = set(self._table_names(SNAPSHOT_SCHEMA))
+        return sorted(t for t in self._table_names("main") if t in snap)
+
+    def _table_info(self, schema: str, table: str) -> List[tuple]:
+        return self.conn.execute(f"PRAGMA {schema}.table_info({_quote(table)})").fetchall()
+
+    def _layout(self, table: str, key: Optional[Sequence[str]] = None,
+                columns: Optional[Sequence[str]] = None):
+        """(键列, 对比列)，对比列为两边共有的非键列"""
+        if table not in self.tables():
+            raise ValueError(f"表不存在或快照中没有该表: {table}")
+        live = self._table_info("main", table)
+        snap_columns = {row[1] for row in self._table_info(SNAPSHOT_SCHEMA, table)}
+        if key:
+            key = list(key)
+        else:
+            key = [row[1] for row in sorted(live, key=lambda r: r[5]) if row[5]]
+        if not key:
+            raise ValueError(f"表 {table} 没有主键，请指定键列")
+        common = [row[1] for row in live if row[1] in snap_columns]
+        missing = [c for c in key + list(columns or []) if c not in common]
+        if missing:
+            raise ValueError(f"列不存在: {', '.join(missing)}")
+        compare = [c for c in (columns or common) if c not in key]
+        return key, compare
+
+    @staticmethod
+    def _join(key: List[str]) -> str:
+        return " AND ".join(f"m.{_quote(k)} = s.{_quote(k)}" for k in key)
+
+    @staticmethod
+    def _changed(compare: List[str]) -> str:
+        # IS NOT 为空值安全的比较，NULL 与 NULL 视为相同
+        return " OR ".join(f"m.{_quote(c)} IS NOT s.{_quote(c)}" for c in compare) or "0"
+
+    # ========== 对比 ==========
+    def summary(self, table: str, key: Optional[Sequence[str]] = None,
+                columns: Optional[Sequence[str]] = None) -> Dict:
+        """单表差异计数：新增、删除、修改行数，以及各列修改次数"""
+        key, compare = self._layout(table, key, columns)
+        t, join = _quote(table), self._join(key)
+        added = self.conn.execute(
+            f"SELECT COUNT(*) FROM main.{t} m WHERE NOT EXISTS (SELECT 1 FROM {SNAPSHOT_SCHEMA}.{t} s WHERE {join})"
+        ).fetchone()[0]
+        removed = self.conn.execute(
+            f"SELECT COUNT(*) FROM {SNAPSHOT_SCHEMA}.{t} s WHERE NOT EXISTS (SELECT 1 FROM main.{t} m WHERE {join})"
+        ).fetchone()[0]
+        column_counts = {}
+        changed = 0
+        if compare:
+            sums = ", ".join(f"SUM(m.{_quote(c)} IS NOT s.{_quote(c)})" for c in compare)
+            row = self.conn.execute(
+                f"SELECT COUNT(*), {sums} FROM main.{t} m JOIN {SNAPSHOT_SCHEMA}.{t} s ON {join} "
+                f"WHERE {self._changed(compare)}"
+            ).fetchone()
+            changed = row[0]
+            column_counts = {c: n for c, n in zip(compare, row[1:]) if n}
+        return {"table": table, "key": key, "added": added, "removed": removed,
+                "changed": changed, "columns": column_counts}
+
+    def summary_all(self) -> List[Dict]:
+        """所有共有表的差异计数（无主键的表跳过）"""
+        results = []
+        for table in self.tables():
+            try:
+                results.append(self.summary(table))
+            except ValueError as e:
+                logger.info(f"跳过表 {table}: {e}")
+        return results
+
+    def _stream(self, sql: str) -> Iterator[tuple]:
+        cursor = self.conn.execute(sql)
+        try:
+            while True:
+                rows = cursor.fetchmany(FETCH_BATCH)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+    def diff_rows(self, table: str, key: Optional[Sequence[str]] = None,
+                  columns: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+        """
+        逐行差异：{"op": added/removed/changed, "key": {...}, "columns": {列: {"live": 值, "snapshot": 值}}}，
+        新增/删除行的 columns 为该行完整内容
+        """
+        key, compare = self._layout(table, key, columns)
+        t, join = _quote(table), self._join(key)
+        key_cols = ", ".join(f"m.{_quote(k)}" for k in key)
+        n = len(key)
+
+        if compare:
+            pairs = ", ".join(f"m.{_quote(c)}, s.{_quote(c)}" for c in compare)
+            sql = (f"SELECT {key_cols}, {pairs} FROM main.{t} m JOIN {SNAPSHOT_SCHEMA}.{t} s ON {join} "
+                   f"WHERE {self._changed(compare)} ORDER BY {key_cols}")
+            for row in self._stream(sql):
+                changes = {}
+                for i, column in enumerate(compare):
+                    live, snap = row[n + 2 * i], row[n + 2 * i + 1]
+                    if live != snap:
+                        changes[column] = {"live": live, "snapshot": snap}
+                yield {"op": "changed", "key": dict(zip(key, row[:n])), "columns": changes}
+
+        cols = key + compare
+        select_m = ", ".join(f"m.{_quote(c)}" for c in cols)
+        select_s = ", ".join(f"s.{_quote(c)}" for c in cols)
+        for op, sql in (
+            ("added", f"SELECT {select_m} FROM main.{t} m WHERE NOT EXISTS "
+                      f"(SELECT 1 FROM {SNAPSHOT_SCHEMA}.{t} s WHERE {join})"),
+            ("removed", f"SELECT {select_s} FROM {SNAPSHOT_SCHEMA}.{t} s WHERE NOT EXISTS "
+                        f"(SELECT 1 FROM main.{t} m WHERE {join})"),
+        ):
+            for row in self._stream(sql):
+                yield {"op": op, "key": dict(zip(key, row[:n])), "columns": dict(zip(compare, row[n:]))}
+
+    # ========== 合并 ==========
+    def merge(self, table: str, column: str, when: str = "live_empty", key: Optional[Sequence[str]] = None,
+              keys: Optional[Sequence] = None, dry_run: bool = False) -> Dict:
+        """
+        把快照中的 column 值合并到当前数据库（只取快照中非空的值）：
+        when=live_empty 时只填补当前为空的行，when=differs 时覆盖所有不同的行；
+        keys 限定单列键的取值范围。受影响的键保存在临时表 merge_keys 中，可用 merged_batches 读取
+        """
+        if when not in MERGE_MODES:
+            raise ValueError(f"无效的合并条件: {when}，可选: {', '.join(MERGE_MODES)}")
+        key, _ = self._layout(table, key, [column])
+        if column in key:
+            raise ValueError("不能合并键列")
+        t, c, join = _quote(table), _quote(column), self._join(key)
+        key_list = ", ".join(_quote(k) for k in key)
+        conditions = [f"NOT {_empty_sql('s.' + c)}", f"m.{c} IS NOT s.{c}"]
+        if when == "live_empty":
+            conditions.append(_empty_sql("m." + c))
+        params: List = []
+        if keys:
+            if len(key) != 1:
+                raise ValueError("限定键取值只支持单列键")
+            conditions.append(f"m.{_quote(key[0])} IN ({', '.join('?' * len(keys))})")
+            params.extend(keys)
+
+        self.conn.execute("DROP TABLE IF EXISTS temp.merge_keys")
+        self.conn.execute(
+            f"CREATE TEMP TABLE merge_keys AS SELECT {', '.join('m.' + _quote(k) for k in key)} "
+            f"FROM main.{t} m JOIN {SNAPSHOT_SCHEMA}.{t} s ON {join} WHERE {' AND '.join(conditions)}",
+            params,
+        )
+        matched = self.conn.execute("SELECT COUNT(*) FROM temp.merge_keys").fetchone()[0]
+        if matched and not dry_run:
+            with self.conn:
+                self.conn.execute(
+                    f"UPDATE main.{t} AS m SET {c} = s.{c} FROM {SNAPSHOT_SCHEMA}.{t} AS s "
+                    f"WHERE {join} AND ({', '.join('m.' + _quote(k) for k in key)}) IN (SELECT {key_list} FROM temp.merge_keys)"
+                )
+        sample = [dict(zip(key, row)) for row in self.conn.execute("SELECT * FROM temp.merge_keys LIMIT 100")]
+        return {"table": table, "column": column, "when": when, "key": key,
+                "merged": matched, "sample_keys": sample, "dry_run": dry_run}
+
+    def merged_batches(self, table: str, columns: Sequence[str]) -> Iterator[List[tuple]]:
+        """
+        分批读取上一次 merge 影响的行在当前数据库中的指定列；
+        每批读完即释放读锁，批次之间可以用其他连接写入
+        """
+        key = [row[1] for row in self.conn.execute("PRAGMA temp.table_info(merge_keys)")]
+        join = " AND ".join(f"m.{_quote(k)} = k.{_quote(k)}" for k in key)
+        select = ", ".join(f"m.{_quote(c)}" for c in columns)
+        last = 0
+        while True:
+            rows = self.conn.execute(
+                f"SELECT k.rowid, {select} FROM temp.merge_keys k JOIN main.{_quote(table)} m ON {join} "
+                f"WHERE k.rowid > ? ORDER BY k.rowid LIMIT ?", (last, FETCH_BATCH)
+            ).fetchall()
+            if not rows:
+                break
+            last = rows[-1][0]
+            yield [row[1:] for row in rows]
+
+def merge_from_snapshot(source: str, table: str, column: str, when: str = "live_empty",
+                        key: Optional[Sequence[str]] = None, keys: Optional[Sequence] = None,
+                        dry_run: bool = False) -> Dict:
+    """
+    从快照合并某列到当前数据库；合并 court_details 的价格字段时同时记入价格历史，
+    合并场馆/详情表后重算统计汇总表，并使进程内缓存失效
+    """
+    from .court_rollup import rebuild_rollups
+    from .database import SessionLocal
+    from .geo_index import bump_data_version
+    from .json_types import load_json
+    from .price_history import TRACKED_COLUMNS, record_values
+
+    with open_source(source) as path, SnapshotDiff(path) as diff:
+        result = diff.merge(table, column, when, key, keys, dry_run)
+        if dry_run or not result["merged"]:
+            return result
+
+        if table == "court_details" and column in TRACKED_COLUMNS:
+            db = SessionLocal()
+            try:
+                written = 0
+                for rows in diff.merged_batches(table, ["court_id", column]):
+                    changes = [(court_id, column, load_json(value)) for court_id, value in rows]
+                    written += record_values(db, changes, "snapshot_merge")
+                result["history_records"] = written
+            finally:
+                db.close()
+        if table in ("tennis_courts", "court_details"):
+            db = SessionLocal()
+            try:
+                rebuild_rollups(db)
+            finally:
+                db.close()
+    bump_data_version()
+    return result
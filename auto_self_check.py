@@ -10,6 +10,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from app.scrapers.price_predictor import PricePredictor
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 import json
 import sqlite3
 
@@ -30,7 +31,7 @@ def auto_self_check():
         detail = db.query(CourtDetail).filter(CourtDetail.court_id == court.id).first()
         if detail and detail.predict_prices:
             try:
-                predict_data = json.loads(detail.predict_prices)
+                predict_data = load_json(detail.predict_prices)
                 if predict_data.get('source_courts') == '全局同类型均值预测':
                     consecutive_count += 1
                     consecutive_global_cases.append({
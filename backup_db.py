@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库快照管理（SQLite在线备份，块级去重存储）
+用法:
+  python backup_db.py snapshot [说明]   创建快照并按保留策略清理
+  python backup_db.py list              列出快照
+  python backup_db.py verify <快照ID>   校验快照
+  python backup_db.py restore <快照ID>  在线恢复快照（恢复前自动创建安全快照）
+  python backup_db.py prune             按保留策略清理
+"""
+import sys
+from app.backup import BackupError, BackupStore
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    command = sys.argv[1]
+    store = BackupStore()
+    try:
+        if command == "snapshot":
+            label = sys.argv[2] if len(sys.argv) > 2 else None
+            summary = store.snapshot(label=label)
+            print(f"✅ 快照 {summary['id']}: {summary['size']} 字节, "
+                  f"新增 {summary['new_chunks']}/{summary['chunk_count']} 块 ({summary['new_bytes']} 字节)")
+            pruned = store.prune()
+            if pruned["removed"]:
+                print(f"🧹 清理 {len(pruned['removed'])} 个旧快照, {pruned['removed_chunks']} 个数据块")
+        elif command == "list":
+            for s in store.list_snapshots():
+                print(f"{s['id']}  {s['size']:>10} 字节  {s['row_counts']}  {s['label'] or ''}")
+            stats = store.stats()
+            print(f"\n共 {stats['snapshots']} 个快照, 逻辑大小 {stats['logical_bytes']} 字节, 实际占用 {stats['stored_bytes']} 字节")
+        elif command == "verify":
+            print(store.verify(sys.argv[2]))
+        elif command == "restore":
+            result = store.restore(sys.argv[2])
+            print(f"✅ 已恢复 {result['id']}: {result['row_counts']}（安全快照 {result['safety_snapshot']}）")
+        elif command == "prune":
+            print(store.prune())
+        else:
+            print(__doc__)
+            sys.exit(1)
+    except (BackupError, IndexError) as e:
+        print(f"❌ {e or '缺少快照ID'}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
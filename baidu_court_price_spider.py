@@ -2,27 +2,31 @@ import requests
 from bs4 import BeautifulSoup
 import re
 import json
-from difflib import SequenceMatcher
 import time
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
+from app.scrapers.venue_matcher import VenueMatcher
+from app.scrapers.http_cache import CachedSession, cached_page
 
 # 读取高德场馆库
 with open('courts.json', 'r', encoding='utf-8') as f:
     gaode_courts = json.load(f)
-
-def similar(a, b):
-    return SequenceMatcher(None, a, b).ratio()
+gaode_matcher = VenueMatcher([c['name'] for c in gaode_courts])
+# 匹配阈值（0-1）：原为原始名称 SequenceMatcher 得分 > 0.6；现为规范化名称的 rapidfuzz ratio，
+# 同一得分普遍更高，用本地场馆名的变体（前缀、分店名、全角括号、通用词）对比后取 0.65 与原判定最接近
+MATCH_THRESHOLD = 0.65
+# 带磁盘缓存的请求会话（HTTP_CACHE_MODE=replay-only 时可离线回放）
+http = CachedSession('baidu')
 
 def baidu_search(query, page=0):
     url = f'https://www.baidu.com/s?wd={query}&pn={page*10}'
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36'
     }
-    resp = requests.get(url, headers=headers, timeout=10)
+    resp = http.get(url, headers=headers, timeout=10)
     resp.encoding = resp.apparent_encoding
     return resp.text
 
@@ -58,37 +62,34 @@ def parse_baidu_results(html):
 
 def get_real_url(baidu_url):
     try:
-        resp = requests.get(baidu_url, timeout=10, allow_redirects=True)
+        resp = http.get(baidu_url, timeout=10, allow_redirects=True)
         return resp.url
     except Exception:
         return baidu_url
 
 def fetch_detail_page_selenium(url, driver):
-    try:
+    def fetch():
         driver.get(url)
         time.sleep(2)
         return driver.page_source
+    try:
+        return cached_page('baidu', url, fetch)
     except Exception:
         return ''
 
 def fetch_detail_page_requests(url):
     try:
         headers = {'User-Agent': 'Mozilla/5.0'}
-        resp = requests.get(url, headers=headers, timeout=10)
+        resp = http.get(url, headers=headers, timeout=10)
         resp.encoding = resp.apparent_encoding
         return resp.text
     except Exception:
         return ''
 
 def fuzzy_match(baidu_name, gaode_courts):
-    best = None
-    best_score = 0
-    for c in gaode_courts:
-        score = similar(baidu_name, c['name'])
-        if score > best_score:
-            best = c
-            best_score = score
-    return best, best_score
+    idx, score = gaode_matcher.best(baidu_name)
+    # 相似度换算为 0-1
+    return (gaode_courts[idx] if idx is not None else None), score / 100
 
 if __name__ == '__main__':
     keywords = [
@@ -109,7 +110,7 @@ if __name__ == '__main__':
             results = parse_baidu_results(html)
             for r in results:
                 match, score = fuzzy_match(r['name'], gaode_courts)
-                if match and score > 0.6:
+                if match and score > MATCH_THRESHOLD:
                     real_url = get_real_url(r['link']) if r['link'] else ''
                     detail_html = ''
                     if real_url:
@@ -5,6 +5,7 @@
 """
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 import json
 from datetime import datetime
 
@@ -21,7 +22,7 @@ def main():
         merged = []
         if detail.merged_prices:
             try:
-                merged = json.loads(detail.merged_prices)
+                merged = load_json(detail.merged_prices)
             except:
                 merged = []
         # 检查是否有原始爬取价格（点评/美团/真实）
@@ -38,7 +39,7 @@ def main():
         predict = []
         if detail.predict_prices:
             try:
-                p = json.loads(detail.predict_prices)
+                p = load_json(detail.predict_prices)
                 # 兼容多种结构
                 if isinstance(p, list):
                     predict = p
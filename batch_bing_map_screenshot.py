@@ -1,22 +1,60 @@
 #!/usr/bin/env python3
 """
 批量为三元桥区域所有场馆生成Bing地图截图，并写入数据库
+相邻场馆分为一组：每组只截一次大视口，组内各场馆按投影从同一截图中裁剪并绘制PIN，
+全程复用同一个浏览器，截图次数和耗时随场馆密度成比例下降
 """
 import os
 import sqlite3
-import subprocess
-from pathlib import Path
+import time
+
+from app.geo import lnglat_to_world_px, normalize_lnglat
+from selenium_bing_map_screenshot import (CROP_SIZE, capture_bing, capture_center, clear_area, crop_court,
+                                          open_driver, viewport_size)
 
-BING_SHOT_SCRIPT = 'selenium_bing_map_screenshot.py'
 DB_PATH = 'data/courts.db'
 MAP_CACHE = 'data/map_cache'
 ZOOM = 16  # 可调整，地铁/公交站建议14-17
+# 批量截图的窗口尺寸：未遮挡区域比单个场馆的裁剪尺寸大，才能一次覆盖多个场馆
+BATCH_WINDOW_SIZE = (2000, 1400)
 
 os.makedirs(MAP_CACHE, exist_ok=True)
 
 def is_valid_image(path):
     return os.path.exists(path) and os.path.getsize(path) > 1024
 
+def group_courts(courts, zoom, width, height):
+    """
+    贪心分组：组内场馆像素包围盒不超过（未遮挡区域 - 裁剪尺寸），保证一次截图能完整裁出组内每个场馆
+    courts 为 [(court_id, name, lng, lat, out_file)]，返回分组列表
+    """
+    left, top, right, bottom = clear_area(width, height)
+    span_w, span_h = right - left - CROP_SIZE[0], bottom - top - CROP_SIZE[1]
+    if span_w < 0 or span_h < 0:
+        raise ValueError(f'窗口 {width}x{height} 的未遮挡区域小于裁剪尺寸 {CROP_SIZE}')
+    xs, ys = lnglat_to_world_px([c[2] for c in courts], [c[3] for c in courts], zoom)
+    remaining = sorted(range(len(courts)), key=lambda i: (xs[i], ys[i]))
+    groups = []
+    while remaining:
+        seed = remaining[0]
+        min_x = max_x = xs[seed]
+        min_y = max_y = ys[seed]
+        members = [seed]
+        # 按与种子的距离由近到远尝试加入，加入后包围盒仍不超限才接受
+        candidates = sorted(remaining[1:], key=lambda i: (xs[i] - xs[seed]) ** 2 + (ys[i] - ys[seed]) ** 2)
+        for i in candidates:
+            if xs[i] - xs[seed] > span_w:
+                continue
+            nx0, nx1 = min(min_x, xs[i]), max(max_x, xs[i])
+            ny0, ny1 = min(min_y, ys[i]), max(max_y, ys[i])
+            if nx1 - nx0 <= span_w and ny1 - ny0 <= span_h:
+                min_x, max_x, min_y, max_y = nx0, nx1, ny0, ny1
+                members.append(i)
+        member_set = set(members)
+        remaining = [i for i in remaining if i not in member_set]
+        groups.append([courts[i] for i in members])
+    return groups
+
 def main():
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
@@ -27,38 +65,61 @@ def main():
         JOIN tennis_courts tc ON cd.court_id = tc.id
         WHERE tc.latitude IS NOT NULL AND tc.longitude IS NOT NULL
     """)
-    courts = cursor.fetchall()
-    print(f"共{len(courts)}个场馆")
-    for court_id, name, lat, lng in courts:
-        if not lat or not lng:
+    rows = cursor.fetchall()
+    print(f"共{len(rows)}个场馆")
+    courts = []
+    for court_id, name, lat, lng in rows:
+        point = normalize_lnglat(lat, lng)
+        if point is None:
             print(f"跳过无坐标: {name}")
             continue
         safe_name = name.replace('/', '_').replace(' ', '_')
-        out_file = f"{MAP_CACHE}/{safe_name}_{lat}_{lng}_bing.png"
         # 强制覆盖：无论图片是否存在都重新生成
-        print(f"生成: {name} ({lat},{lng}) -> {out_file}")
-        # 调用截图脚本
-        cmd = [
-            'python', BING_SHOT_SCRIPT,
-            str(lat), str(lng), str(ZOOM), out_file
-        ]
-        try:
-            subprocess.run(cmd, check=True)
-        except Exception as e:
-            print(f"截图失败: {e}")
-            continue
-        if is_valid_image(out_file):
-            # 写入数据库
-            cursor.execute(
-                "UPDATE court_details SET map_image=? WHERE court_id=?",
-                (out_file, court_id)
-            )
-            conn.commit()
-            print(f"✅ 已写入数据库: {out_file}")
-        else:
-            print(f"❌ 截图无效: {out_file}")
-    conn.close()
+        out_file = f"{MAP_CACHE}/{safe_name}_{lat}_{lng}_bing.png"
+        courts.append((court_id, name, point[0], point[1], out_file))
+    if not courts:
+        conn.close()
+        print("全部完成！")
+        return
+
+    start = time.time()
+    success = 0
+    driver = open_driver(BATCH_WINDOW_SIZE)
+    try:
+        width, height = viewport_size(driver)
+        groups = group_courts(courts, ZOOM, width, height)
+        print(f"📸 {len(courts)}个场馆分为{len(groups)}次截图（视口 {width}x{height}）")
+        for n, group in enumerate(groups, 1):
+            center_lng, center_lat = capture_center([(c[2], c[3]) for c in group], ZOOM, width, height)
+            print(f"\n[{n}/{len(groups)}] 截图中心 ({center_lng:.6f},{center_lat:.6f})，覆盖{len(group)}个场馆")
+            try:
+                im, view = capture_bing(driver, center_lng, center_lat, ZOOM)
+            except Exception as e:
+                print(f"截图失败: {e}")
+                continue
+            for court_id, name, lng, lat, out_file in group:
+                print(f"生成: {name} ({lng},{lat}) -> {out_file}")
+                try:
+                    crop_court(im, view, lng, lat, out_file)
+                except Exception as e:
+                    print(f"裁剪失败: {e}")
+                    continue
+                if is_valid_image(out_file):
+                    # 写入数据库
+                    cursor.execute(
+                        "UPDATE court_details SET map_image=? WHERE court_id=?",
+                        (out_file, court_id)
+                    )
+                    conn.commit()
+                    success += 1
+                    print(f"✅ 已写入数据库: {out_file}")
+                else:
+                    print(f"❌ 截图无效: {out_file}")
+    finally:
+        driver.quit()
+        conn.close()
+    print(f"\n成功 {success}/{len(courts)} 个场馆，截图{len(groups)}次，耗时 {time.time() - start:.1f}s")
     print("全部完成！")
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
@@ -61,6 +61,13 @@ def batch_generate_maps(amap_key: str = None):
         conn.close()
         return False
     
+    # 预取所有场馆地图覆盖瓦片的并集（相邻场馆共用瓦片，每个瓦片只下载一次）
+    try:
+        tile_count = map_generator.prefetch_tiles([(lat, lng) for _, _, lat, lng in courts])
+        print(f"🧩 已准备 {tile_count} 个地图瓦片")
+    except Exception as e:
+        print(f"⚠️  瓦片预取失败，逐个生成时再下载: {e}")
+
     # 批量生成地图
     success_count = 0
     fail_count = 0
@@ -122,8 +129,9 @@ def batch_generate_maps(amap_key: str = None):
             print(f"❌ 处理失败: {e}")
             fail_count += 1
         
-        # 控制频率，避免API限制
-        time.sleep(0.5)
+        # 访问了远程瓦片或静态图API时控制频率，避免API限制（本地瓦片与已有图片不限速）
+        if map_generator.used_network:
+            time.sleep(0.5)
     
     # 输出结果
     print(f"\n🎉 批量生成完成!")
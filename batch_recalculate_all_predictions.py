@@ -10,6 +10,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 from app.scrapers.price_predictor import PricePredictor
 import json
 from datetime import datetime
@@ -121,7 +122,7 @@ def batch_recalculate_all_predictions():
             detail = predictor.db.query(CourtDetail).filter(CourtDetail.court_id == court.id).first()
             if detail and detail.predict_prices:
                 try:
-                    predict_data = json.loads(detail.predict_prices)
+                    predict_data = load_json(detail.predict_prices)
                     if predict_data and not predict_data.get('predict_failed'):
                         area_success += 1
                     else:
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+JSON响应编码与压缩基准测试
+对比默认编码路径（Pydantic校验 + jsonable_encoder + json.dumps）与orjson直接序列化的耗时，
+以及原始/gzip/brotli 三种传输字节数
+用法: python benchmark_json_responses.py [重复次数]
+"""
+
+import gzip
+import json
+import sys
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+from app.main import app
+from app.models import TennisCourtResponse
+from app.responses import dumps_bytes
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+def timeit(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def default_encode(content, adapter=None):
+    """模拟FastAPI默认路径：响应模型校验 -> jsonable_encoder -> json.dumps"""
+    if adapter is not None:
+        content = adapter.dump_python(adapter.validate_python(content), mode="json")
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def report(name, content, adapter, repeat):
+    default_ms = timeit(lambda: default_encode(content, adapter), repeat)
+    orjson_ms = timeit(lambda: dumps_bytes(content), repeat)
+    raw = dumps_bytes(content)
+    gzip_size = len(gzip.compress(raw, compresslevel=6))
+    br_size = len(brotli.compress(raw, quality=4)) if brotli else None
+
+    print(f"\n=== {name} ===")
+    print(f"默认编码: {default_ms:.2f} ms, orjson: {orjson_ms:.2f} ms, 加速 {default_ms / orjson_ms:.1f}x")
+    print(f"原始: {len(raw)} 字节, gzip: {gzip_size} 字节 ({gzip_size / len(raw):.1%})", end="")
+    print(f", brotli: {br_size} 字节 ({br_size / len(raw):.1%})" if br_size else ", brotli: 未安装")
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"🔍 JSON响应基准测试（每项重复 {repeat} 次）")
+
+    with TestClient(app) as client:
+        courts = client.get("/api/courts/", params={"limit": 1000}).json()
+        detail_id = courts[0]["id"] if courts else 1
+        detail = client.get(f"/api/details/{detail_id}").json()
+
+        report(f"场馆列表（{len(courts)} 条）", courts, TypeAdapter(list[TennisCourtResponse]), repeat)
+        report(f"场馆详情（ID {detail_id}）", detail, None, repeat)
+
+        print("\n=== 端到端请求耗时 ===")
+        for url in ("/api/courts/?limit=1000", f"/api/details/{detail_id}"):
+            for encoding in ("identity", "gzip", "br"):
+                elapsed = timeit(lambda: client.get(url, headers={"Accept-Encoding": encoding}), max(1, repeat // 4))
+                r = client.get(url, headers={"Accept-Encoding": encoding})
+                size = r.headers.get("content-length", len(r.content))
+                print(f"{url} [{encoding}]: {elapsed:.1f} ms, 传输 {size} 字节")
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,7 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.scrapers.http_cache import cached_page
 
 # Selenium相关导入
 from selenium import webdriver
@@ -31,6 +32,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from bs4 import BeautifulSoup
 
 # 配置日志
 logging.basicConfig(
@@ -140,38 +142,36 @@ class BingPriceSpiderSelenium:
         try:
             # 构建BING搜索URL
             search_url = f"https://www.bing.com/search?q={quote_plus(keyword)}"
-            self.driver.get(search_url)
             
-            # 等待页面加载
-            time.sleep(2)
+            def fetch():
+                self.driver.get(search_url)
+                # 等待页面加载
+                time.sleep(2)
+                return self.driver.page_source
+            
+            # 搜索结果页经磁盘缓存（HTTP_CACHE_MODE=replay-only 时可离线回放），从页面源码中解析
+            soup = BeautifulSoup(cached_page('bing', search_url, fetch), 'html.parser')
             
             # 查找搜索结果
             search_results = []
             
             # 查找所有搜索结果
-            result_elements = self.driver.find_elements(By.CSS_SELECTOR, "li.b_algo")
+            result_elements = soup.select("li.b_algo")
             
             for element in result_elements[:5]:  # 只处理前5个结果
-                try:
-                    # 获取标题
-                    title_element = element.find_element(By.CSS_SELECTOR, "h2 a")
-                    title = title_element.get_attribute("textContent").strip()
-                    
-                    # 获取摘要
-                    snippet_element = element.find_element(By.CSS_SELECTOR, ".b_caption p")
-                    snippet = snippet_element.get_attribute("textContent").strip()
-                    
-                    # 获取链接
-                    link = title_element.get_attribute("href")
-                    
-                    search_results.append({
-                        "title": title,
-                        "snippet": snippet,
-                        "link": link
-                    })
-                    
-                except NoSuchElementException:
+                # 获取标题
+                title_element = element.select_one("h2 a")
+                # 获取摘要
+                snippet_element = element.select_one(".b_caption p")
+                if title_element is None or snippet_element is None:
                     continue
+                
+                search_results.append({
+                    "title": title_element.get_text().strip(),
+                    "snippet": snippet_element.get_text().strip(),
+                    # 获取链接
+                    "link": title_element.get("href")
+                })
             
             return search_results
             
@@ -22,7 +22,10 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 from app.scrapers.price_confidence_model import confidence_model
+from app.scrapers.bing_serp import BingSerpFetcher, PATH_CACHE
+from app.scrapers.keyword_scheduler import KeywordScheduler
 
 # Selenium相关导入
 from selenium import webdriver
@@ -44,6 +47,10 @@ class BingPriceSpiderEnhanced:
         self.headless = headless
         self.driver = None
         self.db = next(get_db())
+        # 结果页优先走HTTP，验证页或无结果时回退到浏览器
+        self.fetcher = BingSerpFetcher(browser_search=self.search_bing_browser)
+        # 关键词模板按历史命中率排序，统计跨次运行累积
+        self.scheduler = KeywordScheduler()
         
         # 初始化置信度模型
         logger.info("🔄 初始化价格置信度模型...")
@@ -77,6 +84,7 @@ class BingPriceSpiderEnhanced:
         """关闭驱动"""
         if self.driver:
             self.driver.quit()
+            self.driver = None
     
     def get_courts_for_enhanced_crawl(self) -> list:
         """
@@ -102,7 +110,7 @@ class BingPriceSpiderEnhanced:
             
             if detail and detail.bing_prices:
                 try:
-                    bing_data = json.loads(detail.bing_prices)
+                    bing_data = load_json(detail.bing_prices)
                     if isinstance(bing_data, list) and len(bing_data) > 0:
                         has_bing_prices = True
                         bing_price_count = len(bing_data)
@@ -127,52 +135,18 @@ class BingPriceSpiderEnhanced:
         return result
     
     def generate_enhanced_keywords(self, court_name: str, court_address: str) -> List[str]:
-        """生成增强版搜索关键词"""
-        # 清理场馆名称
-        clean_name = re.sub(r'\([^)]*\)', '', court_name).strip()
-        
-        # 提取地址关键词
-        address_keywords = []
-        if court_address:
-            # 提取区域信息
-            area_patterns = [r'([^区]+区)', r'([^路]+路)', r'([^街]+街)']
-            for pattern in area_patterns:
-                matches = re.findall(pattern, court_address)
-                address_keywords.extend(matches)
-        
-        # 基础关键词
-        base_keywords = [
-            f"{clean_name} 网球价格",
-            f"{clean_name} 网球预订",
-            f"{clean_name} 网球费用",
-            f"{clean_name} 网球收费",
-            f"{clean_name} 价格",
-            f"{clean_name} 预订",
-            f"{clean_name} 收费标准",
-            f"{clean_name} 会员价格",
-            f"{clean_name} 学生价格"
-        ]
-        
-        # 地址相关关键词
-        address_keywords = []
-        if court_address:
-            for area in address_keywords[:2]:  # 最多2个地址关键词
-                address_keywords.extend([
-                    f"{clean_name} {area} 网球价格",
-                    f"{area} {clean_name} 价格",
-                    f"{clean_name} {area} 预订"
-                ])
-        
-        # 组合关键词
-        all_keywords = base_keywords + address_keywords
-        
-        # 去重并限制数量
-        unique_keywords = list(dict.fromkeys(all_keywords))
-        return unique_keywords[:8]  # 最多8个关键词
+        """生成增强版搜索关键词（按模板期望收益排序）"""
+        return [keyword for _, keyword in self.scheduler.plan(court_name, court_address)]
     
     def search_bing_enhanced(self, keyword: str) -> List[Dict]:
-        """增强版BING搜索"""
+        """增强版BING搜索（HTTP优先，必要时回退浏览器）"""
+        return self.fetcher.search(keyword)[0]
+    
+    def search_bing_browser(self, keyword: str) -> List[Dict]:
+        """浏览器BING搜索，首次回退时才启动Chrome"""
         try:
+            if self.driver is None:
+                self.setup_driver()
             search_url = f"https://www.bing.com/search?q={quote_plus(keyword)}&count=20"
             self.driver.get(search_url)
             
@@ -293,22 +267,29 @@ class BingPriceSpiderEnhanced:
             court_type = court_data.get('court_type', '')
             logger.info(f"开始增强爬取场馆价格: {court_name}")
             
-            # 生成增强关键词
-            keywords = self.generate_enhanced_keywords(court_name, court_address)
+            # 生成增强关键词（按模板期望收益排序）
+            plan = self.scheduler.plan(court_name, court_address)
+            keywords = [keyword for _, keyword in plan]
+            searched_keywords = []
             
             all_prices = []
             found_prices_count = 0
+            total_results = 0
+            fetch_paths = {}
             
             print(f"\n🎾 正在爬取: {court_name}")
             print(f"📍 地址: {court_address}")
             print(f"🔍 使用关键词: {len(keywords)} 个")
             
-            for i, keyword in enumerate(keywords, 1):
+            for i, (template, keyword) in enumerate(plan, 1):
                 print(f"\n  [{i}/{len(keywords)}] 搜索: {keyword}")
+                searched_keywords.append(keyword)
                 
                 # 搜索BING
-                search_results = self.search_bing_enhanced(keyword)
-                print(f"     📄 找到 {len(search_results)} 个搜索结果")
+                search_results, fetch_path = self.fetcher.search(keyword)
+                total_results += len(search_results)
+                fetch_paths[fetch_path] = fetch_paths.get(fetch_path, 0) + 1
+                print(f"     📄 找到 {len(search_results)} 个搜索结果 [{fetch_path} {self.fetcher.log[-1]['elapsed_ms']:.0f}ms]")
                 
                 # 提取价格
                 keyword_prices = []
@@ -331,6 +312,8 @@ class BingPriceSpiderEnhanced:
                         all_prices.append(price_info)
                         keyword_prices.append(price_info)
                 
+                self.scheduler.record(template, keyword_prices)
+                
                 # 动态显示当前关键词找到的价格
                 if keyword_prices:
                     print(f"     💰 提取到 {len(keyword_prices)} 个价格:")
@@ -341,16 +324,24 @@ class BingPriceSpiderEnhanced:
                 else:
                     print(f"     ❌ 未找到有效价格")
                 
-                # 避免请求过快
-                time.sleep(1.5)
+                # 已有足够的置信价格时提前结束
+                if self.scheduler.enough(all_prices):
+                    if i < len(plan):
+                        print(f"     ⏹️  已收集到足够的置信价格，跳过剩余 {len(plan) - i} 个关键词")
+                    break
+                
+                # 避免请求过快（缓存命中时无需等待）
+                if fetch_path != PATH_CACHE:
+                    time.sleep(1.5)
             
             # 去重和排序
             unique_prices = self.deduplicate_prices_enhanced(all_prices)
             
             # 动态显示最终结果
             print(f"\n📊 爬取结果汇总:")
-            print(f"   🔍 搜索关键词: {len(keywords)} 个")
-            print(f"   📄 总搜索结果: {sum(len(self.search_bing_enhanced(k)) for k in keywords)} 个")
+            print(f"   🔍 搜索关键词: {len(searched_keywords)}/{len(keywords)} 个")
+            print(f"   📄 总搜索结果: {total_results} 个")
+            print(f"   🌐 获取路径: {fetch_paths}")
             print(f"   💰 原始价格数: {found_prices_count} 个")
             print(f"   ✅ 去重后价格: {len(unique_prices)} 个")
             
@@ -364,6 +355,9 @@ class BingPriceSpiderEnhanced:
             else:
                 print(f"   ❌ 未找到有效价格")
             
+            # 持久化模板统计
+            self.scheduler.save()
+            
             # 更新缓存
             success = self.update_price_cache_enhanced(court_data['detail_id'], unique_prices)
             
@@ -379,10 +373,12 @@ class BingPriceSpiderEnhanced:
                 "court_name": court_name,
                 "success": success,
                 "prices": unique_prices,
-                "keywords_used": keywords,
+                "keywords_used": searched_keywords,
+                "keywords_skipped": len(keywords) - len(searched_keywords),
                 "price_status": court_data['price_status'],
+                "fetch_paths": fetch_paths,
                 "stats": {
-                    "keywords_count": len(keywords),
+                    "keywords_count": len(searched_keywords),
                     "raw_prices_count": found_prices_count,
                     "unique_prices_count": len(unique_prices)
                 }
@@ -424,7 +420,7 @@ class BingPriceSpiderEnhanced:
                 existing_prices = []
                 if detail.bing_prices:
                     try:
-                        existing_prices = json.loads(detail.bing_prices)
+                        existing_prices = load_json(detail.bing_prices)
                     except:
                         pass
                 
@@ -457,9 +453,7 @@ class BingPriceSpiderEnhanced:
         print(f"⏰ 开始时间: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
         print("=" * 60)
         
-        # 设置驱动
-        self.setup_driver()
-        
+        # 浏览器只在HTTP路径失败时按需启动
         try:
             courts = self.get_courts_for_enhanced_crawl()
             if not courts:
@@ -526,6 +520,7 @@ class BingPriceSpiderEnhanced:
             print(f"   📈 成功率: {success_count/len(results)*100:.1f}%")
             print(f"   ⏱️  总耗时: {duration:.1f}秒")
             print(f"   🚀 平均速度: {len(results)/duration*60:.1f}个/分钟")
+            print(f"   🌐 获取路径: {dict(self.fetcher.stats)}")
             
             # 价格分布统计
             price_types = {}
@@ -550,6 +545,9 @@ class BingPriceSpiderEnhanced:
                 "success_rate": success_count/len(results)*100 if results else 0,
                 "speed_per_minute": len(results)/duration*60 if duration > 0 else 0,
                 "price_type_distribution": price_types,
+                "fetch_paths": dict(self.fetcher.stats),
+                "keyword_templates": self.scheduler.summary(),
+                "fetch_log": self.fetcher.log,
                 "results": results
             }
             
@@ -564,6 +562,7 @@ class BingPriceSpiderEnhanced:
             
         finally:
             self.close_driver()
+            self.fetcher.close()
 
 def main():
     """主函数"""
@@ -12,6 +12,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 
 def check_area_price_distribution():
     """检查各区域价格分布情况"""
@@ -43,14 +44,14 @@ def check_area_price_distribution():
                 real_prices = []
                 if detail.prices:
                     try:
-                        real_prices = json.loads(detail.prices)
+                        real_prices = load_json(detail.prices)
                     except Exception:
                         real_prices = []
                 # 解析预测价格
                 predict_prices = None
                 if detail.predict_prices:
                     try:
-                        predict_prices = json.loads(detail.predict_prices)
+                        predict_prices = load_json(detail.predict_prices)
                     except Exception:
                         predict_prices = None
                 has_real_price = real_prices and len(real_prices) > 0
@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import SessionLocal
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 import json
 
 def check_bing_price_structure():
@@ -28,7 +29,7 @@ def check_bing_price_structure():
             print(f"\\n🏟️ {court_name} (ID: {detail.court_id})")
             
             try:
-                prices = json.loads(detail.merged_prices)
+                prices = load_json(detail.merged_prices)
                 print(f"   价格数据类型: {type(prices)}")
                 print(f"   价格数据长度: {len(prices) if isinstance(prices, list) else 'N/A'}")
                 
@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import SessionLocal
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 import json
 
 def check_bing_prices_in_merged():
@@ -31,7 +32,7 @@ def check_bing_prices_in_merged():
             
             if detail.merged_prices:
                 try:
-                    merged_data = json.loads(detail.merged_prices)
+                    merged_data = load_json(detail.merged_prices)
                     if isinstance(merged_data, list) and len(merged_data) > 0:
                         print(f"   价格数量: {len(merged_data)}")
                         print(f"   价格来源: {[p.get('source', '未知') for p in merged_data[:3]]}")
@@ -56,7 +57,7 @@ def check_bing_prices_in_merged():
             
             if detail.merged_prices:
                 try:
-                    merged_data = json.loads(detail.merged_prices)
+                    merged_data = load_json(detail.merged_prices)
                     if isinstance(merged_data, list):
                         for price in merged_data:
                             if isinstance(price, dict) and price.get('source') == 'BING':
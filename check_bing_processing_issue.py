@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 import json
 import re
 from collections import defaultdict
@@ -43,7 +44,7 @@ def check_bing_processing_issue():
         
         # 分析原始BING价格
         try:
-            bing_data = json.loads(detail.bing_prices)
+            bing_data = load_json(detail.bing_prices)
             if isinstance(bing_data, list):
                 print(f"  原始BING价格数量: {len(bing_data)}")
                 
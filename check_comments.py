@@ -12,6 +12,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 
 def check_comments_cache():
     """检查评论数据缓存情况"""
@@ -42,7 +43,7 @@ def check_comments_cache():
             # 检查点评评论
             if detail.dianping_reviews:
                 try:
-                    dianping_data = json.loads(detail.dianping_reviews)
+                    dianping_data = load_json(detail.dianping_reviews)
                     if dianping_data and len(dianping_data) > 0:
                         has_dianping = True
                         dianping_comments_count += 1
@@ -52,7 +53,7 @@ def check_comments_cache():
             # 检查美团评论
             if detail.meituan_reviews:
                 try:
-                    meituan_data = json.loads(detail.meituan_reviews)
+                    meituan_data = load_json(detail.meituan_reviews)
                     if meituan_data and len(meituan_data) > 0:
                         has_meituan = True
                         meituan_comments_count += 1
@@ -69,13 +70,13 @@ def check_comments_cache():
             print(f"  美团评论: {'有' if has_meituan else '无'}")
             if has_dianping:
                 try:
-                    dianping_data = json.loads(detail.dianping_reviews)
+                    dianping_data = load_json(detail.dianping_reviews)
                     print(f"  点评评论数: {len(dianping_data)}")
                 except:
                     pass
             if has_meituan:
                 try:
-                    meituan_data = json.loads(detail.meituan_reviews)
+                    meituan_data = load_json(detail.meituan_reviews)
                     print(f"  美团评论数: {len(meituan_data)}")
                 except:
                     pass
@@ -1,5 +1,6 @@
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 from app.scrapers.price_predictor import PricePredictor
 import json
 
@@ -22,7 +23,7 @@ if court:
     detail = db.query(CourtDetail).filter(CourtDetail.court_id == court.id).first()
     if detail and detail.predict_prices:
         print(f"\n=== 当前预测价格 ===")
-        current_predict = json.loads(detail.predict_prices)
+        current_predict = load_json(detail.predict_prices)
         print(json.dumps(current_predict, ensure_ascii=False, indent=2))
     else:
         print(f"\n❌ 未找到预测价格数据")
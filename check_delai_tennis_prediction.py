@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 from app.scrapers.price_predictor import PricePredictor
 import json
 from datetime import datetime
@@ -43,7 +44,7 @@ def check_delai_tennis_prediction():
     detail = predictor.db.query(CourtDetail).filter(CourtDetail.court_id == target_court.id).first()
     if detail and detail.predict_prices:
         try:
-            predict_data = json.loads(detail.predict_prices)
+            predict_data = load_json(detail.predict_prices)
             if predict_data and not predict_data.get('predict_failed'):
                 print(f"\n📊 当前预测结果:")
                 print(f"   黄金价格: {predict_data.get('peak_price')}元")
@@ -63,7 +64,7 @@ def check_delai_tennis_prediction():
                         source_detail = predictor.db.query(CourtDetail).filter(CourtDetail.court_id == source['id']).first()
                         if source_detail and source_detail.merged_prices:
                             try:
-                                source_prices = json.loads(source_detail.merged_prices)
+                                source_prices = load_json(source_detail.merged_prices)
                                 if isinstance(source_prices, list) and len(source_prices) > 0:
                                     print(f"       价格: {source_prices[0].get('price', 'N/A')} ({source_prices[0].get('type', 'N/A')})")
                             except:
@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import SessionLocal
 from app.models import TennisCourt
+from app.scrapers.dedupe import CourtDeduplicator
 from collections import defaultdict
 
 def check_duplicate_courts():
@@ -22,28 +23,25 @@ def check_duplicate_courts():
         print(f"🔍 检查重复场馆情况\\n")
         print(f"总场馆数: {len(all_courts)}")
         
-        # 按名称分组
-        name_groups = defaultdict(list)
-        for court in all_courts:
-            name_groups[court.name].append(court)
-        
-        # 找出重复的场馆
-        duplicates = {name: courts for name, courts in name_groups.items() if len(courts) > 1}
+        # 按空间网格分块 + 名称/地址相似度检测重复
+        courts_by_id = {court.id: court for court in all_courts}
+        clusters = CourtDeduplicator().find_court_clusters(all_courts)
         
         print(f"\\n📊 重复场馆统计:")
-        print(f"   有重复的场馆名称: {len(duplicates)}")
+        print(f"   重复场馆簇: {len(clusters)}")
         
-        total_duplicates = sum(len(courts) - 1 for courts in duplicates.values())
+        total_duplicates = sum(len(cluster['ids']) - 1 for cluster in clusters)
         print(f"   重复场馆总数: {total_duplicates}")
         
         # 显示重复场馆详情
-        if duplicates:
+        if clusters:
             print(f"\\n🔍 重复场馆详情:")
-            for name, courts in list(duplicates.items())[:10]:  # 只显示前10个
-                print(f"\\n🏟️ 场馆名称: {name}")
-                print(f"   重复次数: {len(courts)}")
-                for i, court in enumerate(courts):
-                    print(f"   {i+1}. ID: {court.id}, 地址: {court.address}, 类型: {court.court_type}")
+            for cluster in clusters[:10]:  # 只显示前10个
+                print(f"\\n🏟️ 场馆名称: {cluster['names'][0]}")
+                print(f"   重复次数: {len(cluster['ids'])}")
+                for i, court_id in enumerate(cluster['ids']):
+                    court = courts_by_id[court_id]
+                    print(f"   {i+1}. ID: {court.id}, 名称: {court.name}, 地址: {court.address}, 类型: {court.court_type}")
         
         # 检查游泳池场馆
         print(f"\\n🏊 游泳池场馆详情:")
@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import SessionLocal
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 import json
 
 def check_guomao_prices():
@@ -45,7 +46,7 @@ def check_guomao_prices():
                 detail = db.query(CourtDetail).filter(CourtDetail.court_id == court.id).first()
                 if detail and detail.predict_prices:
                     try:
-                        predict_data = json.loads(detail.predict_prices)
+                        predict_data = load_json(detail.predict_prices)
                         if isinstance(predict_data, dict) and 'price' in predict_data:
                             price = predict_data['price']
                             if isinstance(price, (int, float)) and price > 0:
@@ -100,7 +101,7 @@ def check_guomao_prices():
                 detail = db.query(CourtDetail).filter(CourtDetail.court_id == court.id).first()
                 if detail and detail.predict_prices:
                     try:
-                        predict_data = json.loads(detail.predict_prices)
+                        predict_data = load_json(detail.predict_prices)
                         if isinstance(predict_data, dict) and 'price' in predict_data:
                             price = predict_data['price']
                             if isinstance(price, (int, float)) and price > 0:
@@ -153,7 +154,7 @@ def check_guomao_prices():
             detail = db.query(CourtDetail).filter(CourtDetail.court_id == court.id).first()
             if detail and detail.merged_prices:
                 try:
-                    merged_data = json.loads(detail.merged_prices)
+                    merged_data = load_json(detail.merged_prices)
                     if isinstance(merged_data, list):
                         for price_item in merged_data:
                             if isinstance(price_item, dict) and 'price' in price_item:
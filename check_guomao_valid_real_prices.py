@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import SessionLocal
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 import json
 
 def check_guomao_valid_real_prices():
@@ -23,7 +24,7 @@ def check_guomao_valid_real_prices():
             detail = db.query(CourtDetail).filter(CourtDetail.court_id == court.id).first()
             if detail and detail.merged_prices:
                 try:
-                    merged = json.loads(detail.merged_prices)
+                    merged = load_json(detail.merged_prices)
                     for item in merged:
                         if not item.get('is_predicted', True):
                             price_str = item.get('price', '')
@@ -10,6 +10,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 from app.scrapers.price_predictor import PricePredictor
 import json
 from datetime import datetime
@@ -42,7 +43,7 @@ def check_indoor_prediction_status():
         current_prediction = None
         if detail and detail.predict_prices:
             try:
-                current_prediction = json.loads(detail.predict_prices)
+                current_prediction = load_json(detail.predict_prices)
             except:
                 pass
         
@@ -67,7 +68,7 @@ def check_indoor_prediction_status():
             detail = predictor.db.query(CourtDetail).filter(CourtDetail.court_id == court.id).first()
             if detail and detail.predict_prices:
                 try:
-                    predict_data = json.loads(detail.predict_prices)
+                    predict_data = load_json(detail.predict_prices)
                     if predict_data.get('predict_failed'):
                         reason = predict_data.get('reason', '未知原因')
                         print(f"       失败原因: {reason}")
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 from app.database import SessionLocal
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 import json
 
 def main():
@@ -20,7 +21,7 @@ def main():
         if detail.predict_prices:
             print("\n【predict_prices 字段内容】")
             try:
-                predict = json.loads(detail.predict_prices)
+                predict = load_json(detail.predict_prices)
                 print(json.dumps(predict, ensure_ascii=False, indent=2))
             except Exception as e:
                 print(f"解析predict_prices失败: {e}")
@@ -30,7 +31,7 @@ def main():
         if detail.bing_prices:
             print("\n【bing_prices 字段内容】")
             try:
-                bing = json.loads(detail.bing_prices)
+                bing = load_json(detail.bing_prices)
                 print(json.dumps(bing, ensure_ascii=False, indent=2))
             except Exception as e:
                 print(f"解析bing_prices失败: {e}")
@@ -5,6 +5,7 @@
 
 from app.database import SessionLocal
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 import json
 
 def check_predict_prices():
@@ -18,7 +19,7 @@ def check_predict_prices():
             
             detail = db.query(CourtDetail).filter(CourtDetail.court_id == court.id).first()
             if detail and detail.predict_prices:
-                predict_prices = json.loads(detail.predict_prices)
+                predict_prices = load_json(detail.predict_prices)
                 print(f"预测价格数据类型: {type(predict_prices)}")
                 print(f"预测价格数据: {predict_prices}")
                 
@@ -47,7 +48,7 @@ def check_predict_prices():
         for court in test_courts:
             detail = db.query(CourtDetail).filter(CourtDetail.court_id == court.id).first()
             if detail and detail.predict_prices:
-                predict_prices = json.loads(detail.predict_prices)
+                predict_prices = load_json(detail.predict_prices)
                 print(f"\n{court.name}:")
                 print(f"  数据类型: {type(predict_prices)}")
                 if isinstance(predict_prices, dict):
@@ -12,6 +12,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 
 def check_predict_prices_format():
     """检查预测价格的数据格式"""
@@ -34,7 +35,7 @@ def check_predict_prices_format():
             print(f"数据类型: {type(detail.predict_prices)}")
             
             try:
-                parsed = json.loads(detail.predict_prices)
+                parsed = load_json(detail.predict_prices)
                 print(f"解析后: {parsed}")
                 print(f"解析后类型: {type(parsed)}")
                 
@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import SessionLocal
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 import json
 
 def check_price_data_issue():
@@ -35,7 +36,7 @@ def check_price_data_issue():
                 real_prices = []
                 if detail.merged_prices:
                     try:
-                        merged = json.loads(detail.merged_prices)
+                        merged = load_json(detail.merged_prices)
                         if merged and len(merged) > 0:
                             real_prices.extend(merged)
                     except:
@@ -43,7 +44,7 @@ def check_price_data_issue():
                 
                 if detail.bing_prices:
                     try:
-                        bing = json.loads(detail.bing_prices)
+                        bing = load_json(detail.bing_prices)
                         if bing and len(bing) > 0:
                             real_prices.extend(bing)
                     except:
@@ -51,7 +52,7 @@ def check_price_data_issue():
                 
                 if detail.dianping_prices:
                     try:
-                        dianping = json.loads(detail.dianping_prices)
+                        dianping = load_json(detail.dianping_prices)
                         if dianping and len(dianping) > 0:
                             real_prices.extend(dianping)
                     except:
@@ -59,7 +60,7 @@ def check_price_data_issue():
                 
                 if detail.meituan_prices:
                     try:
-                        meituan = json.loads(detail.meituan_prices)
+                        meituan = load_json(detail.meituan_prices)
                         if meituan and len(meituan) > 0:
                             real_prices.extend(meituan)
                     except:
@@ -73,7 +74,7 @@ def check_price_data_issue():
                 predict_prices = None
                 if detail.predict_prices:
                     try:
-                        predict_prices = json.loads(detail.predict_prices)
+                        predict_prices = load_json(detail.predict_prices)
                         print(f"   预测价格: {predict_prices}")
                     except:
                         print(f"   预测价格解析失败")
@@ -113,7 +114,7 @@ def check_price_data_issue():
                 # 检查预测价格
                 if detail.predict_prices:
                     try:
-                        predict_data = json.loads(detail.predict_prices)
+                        predict_data = load_json(detail.predict_prices)
                         if predict_data and (predict_data.get('peak_price') or predict_data.get('off_peak_price')):
                             has_predict = True
                     except:
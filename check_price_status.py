@@ -12,6 +12,7 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 
 def check_price_status():
     """检查价格状态"""
@@ -77,7 +78,7 @@ def check_price_cache_status():
             has_prices = False
             if detail.dianping_prices:
                 try:
-                    price_data = json.loads(detail.dianping_prices)
+                    price_data = load_json(detail.dianping_prices)
                     if price_data and len(price_data) > 0:
                         has_prices = True
                 except:
@@ -85,7 +86,7 @@ def check_price_cache_status():
             
             if detail.meituan_prices:
                 try:
-                    price_data = json.loads(detail.meituan_prices)
+                    price_data = load_json(detail.meituan_prices)
                     if price_data and len(price_data) > 0:
                         has_prices = True
                 except:
@@ -93,7 +94,7 @@ def check_price_cache_status():
             
             if detail.merged_prices:
                 try:
-                    price_data = json.loads(detail.merged_prices)
+                    price_data = load_json(detail.merged_prices)
                     if price_data and len(price_data) > 0:
                         has_prices = True
                 except:
@@ -118,15 +119,15 @@ def check_price_cache_status():
                 if detail.dianping_prices or detail.meituan_prices or detail.merged_prices:
                     try:
                         if detail.dianping_prices:
-                            price_data = json.loads(detail.dianping_prices)
+                            price_data = load_json(detail.dianping_prices)
                             if price_data and len(price_data) > 0:
                                 has_prices = True
                         if detail.meituan_prices:
-                            price_data = json.loads(detail.meituan_prices)
+                            price_data = load_json(detail.meituan_prices)
                             if price_data and len(price_data) > 0:
                                 has_prices = True
                         if detail.merged_prices:
-                            price_data = json.loads(detail.merged_prices)
+                            price_data = load_json(detail.merged_prices)
                             if price_data and len(price_data) > 0:
                                 has_prices = True
                     except:
@@ -10,6 +10,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import SessionLocal
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 import json
 
 def check_real_price_distribution():
@@ -35,7 +36,7 @@ def check_real_price_distribution():
                 # 检查BING价格
                 if detail.bing_prices:
                     try:
-                        price_data = json.loads(detail.bing_prices)
+                        price_data = load_json(detail.bing_prices)
                         if price_data and isinstance(price_data, list) and len(price_data) > 0:
                             has_real_prices = True
                             price_sources.append('bing')
@@ -45,7 +46,7 @@ def check_real_price_distribution():
                 # 检查融合价格
                 if detail.merged_prices:
                     try:
-                        price_data = json.loads(detail.merged_prices)
+                        price_data = load_json(detail.merged_prices)
                         if price_data and isinstance(price_data, list) and len(price_data) > 0:
                             has_real_prices = True
                             price_sources.append('merged')
@@ -55,7 +56,7 @@ def check_real_price_distribution():
                 # 检查点评价格
                 if detail.dianping_prices:
                     try:
-                        price_data = json.loads(detail.dianping_prices)
+                        price_data = load_json(detail.dianping_prices)
                         if price_data and isinstance(price_data, list) and len(price_data) > 0:
                             has_real_prices = True
                             price_sources.append('dianping')
@@ -65,7 +66,7 @@ def check_real_price_distribution():
                 # 检查美团价格
                 if detail.meituan_prices:
                     try:
-                        price_data = json.loads(detail.meituan_prices)
+                        price_data = load_json(detail.meituan_prices)
                         if price_data and isinstance(price_data, list) and len(price_data) > 0:
                             has_real_prices = True
                             price_sources.append('meituan')
@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 import json
 import re
 
@@ -47,7 +48,7 @@ def clean_abnormal_prices():
     # 检查并清理merged_prices
     if detail.merged_prices:
         try:
-            merged_data = json.loads(detail.merged_prices)
+            merged_data = load_json(detail.merged_prices)
             if isinstance(merged_data, list):
                 print(f"\n📊 当前merged_prices: {len(merged_data)}个价格")
                 
@@ -99,7 +100,7 @@ def clean_abnormal_prices():
     # 检查并清理bing_prices
     if detail.bing_prices:
         try:
-            bing_data = json.loads(detail.bing_prices)
+            bing_data = load_json(detail.bing_prices)
             if isinstance(bing_data, list):
                 print(f"\n📊 当前bing_prices: {len(bing_data)}个价格")
                 
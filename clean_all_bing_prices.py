@@ -12,6 +12,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json, load_json_copy
 import json
 import re
 import numpy as np
@@ -51,7 +52,7 @@ def clean_all_bing_prices():
         if not detail.bing_prices:
             continue
         try:
-            prices = json.loads(detail.bing_prices)
+            prices = load_json(detail.bing_prices)
             if not isinstance(prices, list):
                 continue
             court = next((c for c in courts if c.id == detail.court_id), None)
@@ -81,7 +82,7 @@ def clean_all_bing_prices():
         if not court or not detail.bing_prices:
             continue
         try:
-            prices = json.loads(detail.bing_prices)
+            prices = load_json_copy(detail.bing_prices)
             if not isinstance(prices, list):
                 continue
             new_prices = []
@@ -112,7 +113,7 @@ def clean_all_bing_prices():
             # merged_prices同步处理BING来源
             if detail.merged_prices:
                 try:
-                    merged = json.loads(detail.merged_prices)
+                    merged = load_json_copy(detail.merged_prices)
                     changed = False
                     for m in merged:
                         if m.get('source', '').upper().startswith('BING'):
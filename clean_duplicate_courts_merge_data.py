@@ -9,7 +9,9 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import SessionLocal
 from app.models import TennisCourt, CourtDetail
-from collections import defaultdict
+from app.scrapers.dedupe import CourtDeduplicator
+from app.backup import snapshot_before
+from app.json_types import load_json
 import json
 
 def merge_court_data(kept_court, duplicate_courts):
@@ -42,8 +44,8 @@ def merge_detail_data(kept_detail, duplicate_details):
         elif kept_detail.merged_prices and duplicate.merged_prices:
             # 如果两者都有价格数据，检查是否有非BING的价格
             try:
-                kept_prices = json.loads(kept_detail.merged_prices) if kept_detail.merged_prices else []
-                dup_prices = json.loads(duplicate.merged_prices) if duplicate.merged_prices else []
+                kept_prices = load_json(kept_detail.merged_prices) if kept_detail.merged_prices else []
+                dup_prices = load_json(duplicate.merged_prices) if duplicate.merged_prices else []
                 
                 # 检查是否有非BING的价格数据
                 kept_has_non_bing = any(p.get('source') != 'BING' for p in kept_prices)
@@ -97,21 +99,18 @@ def clean_duplicate_courts_with_merge():
         print(f"🔍 开始清理重复场馆（合并有效数据）\\n")
         print(f"清理前总场馆数: {len(all_courts)}")
         
-        # 按名称分组
-        name_groups = defaultdict(list)
-        for court in all_courts:
-            name_groups[court.name].append(court)
+        # 按空间网格分块 + 名称/地址相似度检测重复，每簇按ID排序
+        courts_by_id = {court.id: court for court in all_courts}
+        clusters = CourtDeduplicator().find_court_clusters(all_courts)
+        duplicates = [(cluster['names'][0], [courts_by_id[i] for i in cluster['ids']]) for cluster in clusters]
         
-        # 找出重复的场馆
-        duplicates = {name: courts for name, courts in name_groups.items() if len(courts) > 1}
-        
-        print(f"有重复的场馆名称: {len(duplicates)}")
+        print(f"重复场馆簇: {len(duplicates)}")
         
         # 记录要删除的场馆ID
         to_delete_ids = []
         kept_courts = []
         
-        for name, courts in duplicates.items():
+        for name, courts in duplicates:
             # 按ID排序，保留第一个（ID最小的）
             courts.sort(key=lambda x: x.id)
             kept_court = courts[0]
@@ -153,6 +152,9 @@ def clean_duplicate_courts_with_merge():
             print("取消删除操作")
             return
         
+        # 删除前创建数据库快照
+        snapshot_before("清理重复场馆前")
+        
         # 删除重复场馆的详情记录
         print("\\n🗑️ 删除重复场馆的详情记录...")
         deleted_details = db.query(CourtDetail).filter(CourtDetail.court_id.in_(to_delete_ids)).delete()
@@ -173,10 +175,9 @@ def clean_duplicate_courts_with_merge():
         print(f"   实际删除场馆数: {len(all_courts) - len(remaining_courts)}")
         
         # 检查是否还有重复
-        remaining_names = [court.name for court in remaining_courts]
-        unique_names = set(remaining_names)
-        print(f"   唯一场馆名称数: {len(unique_names)}")
-        print(f"   是否还有重复: {'是' if len(remaining_names) != len(unique_names) else '否'}")
+        remaining_clusters = CourtDeduplicator().find_court_clusters(remaining_courts)
+        print(f"   剩余重复场馆簇: {len(remaining_clusters)}")
+        print(f"   是否还有重复: {'是' if remaining_clusters else '否'}")
         
     except Exception as e:
         print(f"❌ 清理失败: {e}")
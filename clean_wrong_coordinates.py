@@ -4,6 +4,7 @@
 清理错误的经纬度数据：删除经纬度明显错误的记录
 """
 import sqlite3
+from app.backup import snapshot_before
 from collections import defaultdict
 
 def main():
@@ -99,6 +100,8 @@ def main():
     
     # 5. 删除错误记录
     if all_ids_to_delete:
+        # 删除前创建数据库快照
+        snapshot_before("清理错误坐标前", db_path='data/courts.db')
         print(f"\n🗑️  开始删除错误记录...")
         
         # 先删除court_details中的相关记录
@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import SessionLocal
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 import json
 import re
 
@@ -42,7 +43,7 @@ def convert_bing_to_predict_prices():
         print(f"总详情记录数: {len(details)}")
         for detail in details:
             try:
-                prices = json.loads(detail.merged_prices)
+                prices = load_json(detail.merged_prices)
                 if not prices or not isinstance(prices, list):
                     continue
                 bing_prices = []
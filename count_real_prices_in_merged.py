@@ -2,36 +2,29 @@
 # -*- coding: utf-8 -*-
 """
 统计merged_prices中is_predicted: False的真实价格总数，并输出部分样本
+（查询分析快照，快照不存在或超过1小时时先重新导出）
 """
-import sqlite3
-import json
+from app.analytics import Analytics, ensure_snapshot
 
 def main():
     print("🔍 统计merged_prices中真实价格数量...")
-    conn = sqlite3.connect('data/courts.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT tc.name, cd.merged_prices FROM tennis_courts tc LEFT JOIN court_details cd ON tc.id = cd.court_id WHERE cd.merged_prices IS NOT NULL AND cd.merged_prices != '' AND cd.merged_prices != '[]'")
-    results = cursor.fetchall()
-    real_count = 0
-    total_count = 0
-    samples = []
-    for name, prices in results:
-        try:
-            price_list = json.loads(prices)
-            for item in price_list:
-                total_count += 1
-                if not item.get('is_predicted', True):
-                    real_count += 1
-                    if len(samples) < 10:
-                        samples.append((name, item))
-        except Exception as e:
-            continue
-    print(f"\n✅ merged_prices中真实价格总数: {real_count}")
-    print(f"  merged_prices中所有价格项总数: {total_count}")
+    ensure_snapshot()
+    with Analytics() as analytics:
+        counts = analytics.query("""
+            SELECT COUNT(*) FILTER (WHERE is_predicted = false) AS real_count, COUNT(*) AS total_count
+            FROM prices WHERE column_name = 'merged_prices'
+        """)[0]
+        samples = analytics.query("""
+            SELECT c.name, p.price_type, p.price_text, p.unit, p.source
+            FROM prices p JOIN courts c ON c.id = p.court_id
+            WHERE p.column_name = 'merged_prices' AND p.is_predicted = false
+            ORDER BY p.detail_id, p.position LIMIT 10
+        """)
+    print(f"\n✅ merged_prices中真实价格总数: {counts['real_count']}")
+    print(f"  merged_prices中所有价格项总数: {counts['total_count']}")
     print("\n部分真实价格样本:")
-    for name, item in samples:
-        print(f"🏟️ {name} | {item}")
-    conn.close()
+    for sample in samples:
+        print(f"🏟️ {sample['name']} | {sample['price_type']} {sample['price_text']} {sample['unit'] or ''} ({sample['source']})")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
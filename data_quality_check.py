@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据质量检查（一次扫描执行全部规则，取代逐项全表扫描的 check_* 脚本）
+规则: 价格字段格式、重复场馆、游泳池、created_at、预测状态、受保护价格、多条详情、区域、坐标
+用法:
+  python data_quality_check.py [--rules=规则1,规则2] [--workers=N] [--json]
+      --workers 大于1时逐行规则按块多进程并行；--json 输出完整报告（含全部问题场馆ID）
+      存在 error 级问题时退出码为2，可用于批量任务后的检查
+"""
+import sys
+from app.database import SessionLocal
+from app.json_types import dumps
+from app.quality_rules import AGGREGATE_RULES, ROW_RULES, run_quality_rules
+
+SEVERITY_ICONS = {"error": "❌", "warning": "⚠️", "info": "ℹ️"}
+
+def main():
+    options = dict(a[2:].split("=", 1) for a in sys.argv[1:] if a.startswith("--") and "=" in a)
+    if any(a in ("-h", "--help") for a in sys.argv[1:]):
+        print(__doc__)
+        print(f"可选规则: {', '.join(list(ROW_RULES) + list(AGGREGATE_RULES))}")
+        return
+    rules = options["rules"].split(",") if options.get("rules") else None
+    db = SessionLocal()
+    try:
+        report = run_quality_rules(db, rules, workers=int(options.get("workers", 1)))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    if "--json" in sys.argv:
+        print(dumps(report))
+        return
+    print(f"🔍 扫描 {report['scanned']} 个场馆，耗时 {report['seconds']} 秒\n")
+    for item in report["rules"]:
+        icon = SEVERITY_ICONS[item["severity"]] if item["count"] else "✅"
+        print(f"{icon} {item['name']:<22} {item['count']:>5}  {item['description']}")
+        for sample in item["samples"][:5]:
+            print(f"      ID {sample['court_id']}: {sample['name']} - {sample['message']}")
+    if any(item["count"] and item["severity"] == "error" for item in report["rules"]):
+        sys.exit(2)
+
+if __name__ == "__main__":
+    main()
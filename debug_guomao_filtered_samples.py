@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import SessionLocal
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 from app.scrapers.price_predictor import PricePredictor
 from app.scrapers.price_confidence_model import PriceConfidenceModel
 import json
@@ -49,7 +50,7 @@ def debug_guomao_filtered_samples():
             detail = db.query(CourtDetail).filter(CourtDetail.court_id == court.id).first()
             if detail and detail.merged_prices:
                 try:
-                    merged = json.loads(detail.merged_prices)
+                    merged = load_json(detail.merged_prices)
                     if isinstance(merged, list):
                         real_prices = [p for p in merged if not p.get('is_predicted', True)]
                         if real_prices:
@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 from app.scrapers.price_predictor import PricePredictor
 import json
 
@@ -38,7 +39,7 @@ def debug_real_prices_extraction():
             print(f"   {detail.merged_prices}")
             
             try:
-                merged_data = json.loads(detail.merged_prices)
+                merged_data = load_json(detail.merged_prices)
                 print(f"   解析成功: {type(merged_data)}")
                 print(f"   内容: {merged_data}")
                 
@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 import json
 
 def extract_price_value(price_str):
@@ -28,7 +29,7 @@ def debug_shuangjing_prediction_chain():
         if not detail or not detail.predict_prices:
             continue
         try:
-            predict_data = json.loads(detail.predict_prices)
+            predict_data = load_json(detail.predict_prices)
         except:
             continue
         print(f"\n🏟️ {court.name} (ID: {court.id})")
@@ -45,7 +46,7 @@ def debug_shuangjing_prediction_chain():
                 sample_detail = db.query(CourtDetail).filter(CourtDetail.court_id == sample_court.id).first()
                 if sample_detail and sample_detail.merged_prices:
                     try:
-                        merged_data = json.loads(sample_detail.merged_prices)
+                        merged_data = load_json(sample_detail.merged_prices)
                         if isinstance(merged_data, list):
                             for price in merged_data:
                                 if price.get('source') == 'BING_PROCESSED':
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+当前数据库与快照/备份库的对比与选择性合并（取代整库读入内存对比的一次性脚本）
+来源可以是快照ID（见 backup_db.py list）或数据库文件路径，如 data/courts.db.backup
+用法:
+  python diff_snapshot.py <来源>                          各表差异计数
+  python diff_snapshot.py <来源> <表> [--rows] [--key=列]  单表差异，--rows 输出逐行差异(NDJSON)
+  python diff_snapshot.py <来源> --merge <表>.<列> [--when=live_empty|differs] [--key=列] [--apply]
+      例: python diff_snapshot.py data/courts.db.backup --merge court_details.bing_prices --key=court_id
+      不加 --apply 时只统计会合并的行
+"""
+import sys
+from app.backup import BackupError
+from app.json_types import dumps
+from app.snapshot_diff import SnapshotDiff, merge_from_snapshot, open_source
+
+def main():
+    options = dict(a[2:].split("=", 1) for a in sys.argv[1:] if a.startswith("--") and "=" in a)
+    flags = {a for a in sys.argv[1:] if a.startswith("--") and "=" not in a}
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+    source = args[0]
+    key = options["key"].split(",") if options.get("key") else None
+
+    try:
+        if "--merge" in flags:
+            if len(args) < 2 or "." not in args[1]:
+                print(__doc__)
+                sys.exit(1)
+            table, column = args[1].split(".", 1)
+            apply = "--apply" in flags
+            result = merge_from_snapshot(source, table, column, options.get("when", "live_empty"),
+                                         key, dry_run=not apply)
+            verb = "已合并" if apply else "将合并（未写入，加 --apply 执行）"
+            print(f"{'✅' if apply else '🔍'} {table}.{column} ({result['when']}): {verb} {result['merged']} 行")
+            if result.get("history_records"):
+                print(f"   价格历史新增 {result['history_records']} 条")
+            return
+
+        with open_source(source) as path, SnapshotDiff(path) as diff:
+            if len(args) < 2:
+                for s in diff.summary_all():
+                    print(f"{s['table']:<25} +{s['added']:<6} -{s['removed']:<6} ~{s['changed']:<6} {s['columns'] or ''}")
+            elif "--rows" in flags:
+                for row in diff.diff_rows(args[1], key):
+                    print(dumps(row))
+            else:
+                s = diff.summary(args[1], key)
+                print(f"{s['table']}（键 {','.join(s['key'])}）: 新增 {s['added']}, 删除 {s['removed']}, 修改 {s['changed']}")
+                for column, count in sorted(s["columns"].items(), key=lambda kv: -kv[1]):
+                    print(f"  {column:<25} {count}")
+    except (BackupError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from app.database import get_db
 from app.models import CourtDetail
+from app.json_types import load_json_copy
 import json
 
 def fix_bing_fields():
@@ -9,7 +10,7 @@ def fix_bing_fields():
         changed = False
         if d.merged_prices:
             try:
-                prices = json.loads(d.merged_prices)
+                prices = load_json_copy(d.merged_prices)
                 if isinstance(prices, list):
                     for p in prices:
                         if p.get('source') == 'BING_PROCESSED':
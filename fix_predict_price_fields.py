@@ -1,5 +1,6 @@
 from app.database import get_db
 from app.models import CourtDetail
+from app.json_types import load_json_copy
 import json
 
 def fix_predict_fields():
@@ -10,7 +11,7 @@ def fix_predict_fields():
         # 修正 merged_prices
         if d.merged_prices:
             try:
-                prices = json.loads(d.merged_prices)
+                prices = load_json_copy(d.merged_prices)
                 if isinstance(prices, list):
                     for p in prices:
                         if p.get('is_predicted'):
@@ -24,7 +25,7 @@ def fix_predict_fields():
         # 修正 predict_prices
         if d.predict_prices:
             try:
-                pred = json.loads(d.predict_prices)
+                pred = load_json_copy(d.predict_prices)
                 if isinstance(pred, dict):
                     if pred.get('peak_price') or pred.get('off_peak_price'):
                         if pred.get('predict_method') != '邻域分位数加权法':
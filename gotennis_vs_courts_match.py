@@ -2,7 +2,8 @@ import requests
 from bs4 import BeautifulSoup
 import json
 import pandas as pd
-from rapidfuzz import fuzz, process
+from rapidfuzz import fuzz
+from app.scrapers.venue_matcher import VenueMatcher
 
 # 1. 采集 gotennis 场馆列表
 GOTENNIS_URL = 'http://gotennis.cn/hall/frontend/list'
@@ -34,22 +35,19 @@ for c in courts:
         'local_addr': c.get('address', '')
     })
 
-# 3. 用 rapidfuzz 进行模糊匹配
+# 3. 用 n-gram 索引召回候选后以 rapidfuzz 打分
+matcher = VenueMatcher([lc['local_name'] for lc in local_courts], scorer=fuzz.token_sort_ratio)
+matches = matcher.match_many([hall['gotennis_name'] for hall in halls])
 results = []
-for hall in halls:
-    best = process.extractOne(
-        hall['gotennis_name'],
-        [lc['local_name'] for lc in local_courts],
-        scorer=fuzz.token_sort_ratio
-    )
-    best_idx = [lc['local_name'] for lc in local_courts].index(best[0]) if best else -1
+for hall, top in zip(halls, matches):
+    best_idx, best_score = top[0] if top else (-1, 0)
     best_local = local_courts[best_idx] if best_idx >= 0 else {'local_name': '', 'local_addr': ''}
     results.append({
         'gotennis_name': hall['gotennis_name'],
         'gotennis_addr': hall['gotennis_addr'],
         'local_name': best_local['local_name'],
         'local_addr': best_local['local_addr'],
-        'name_score': best[1] if best else 0
+        'name_score': best_score
     })
 
 # 4. 输出结果
@@ -4,10 +4,11 @@
 导入场馆数据到数据库
 """
 
-import json
-from datetime import datetime
+import os
 from app.database import get_db, init_db
 from app.models import TennisCourt
+from app.bulk_loader import load_courts_file
+from app.backup import snapshot_before
 
 def import_courts_data():
     """导入场馆数据"""
@@ -15,17 +16,9 @@ def import_courts_data():
     
     # 检查数据文件是否存在
     data_file = "courts_data.json"
-    try:
-        with open(data_file, 'r', encoding='utf-8') as f:
-            courts_data = json.load(f)
-    except FileNotFoundError:
+    if not os.path.exists(data_file):
         print(f"❌ 数据文件 {data_file} 不存在")
         return
-    except Exception as e:
-        print(f"❌ 读取数据文件失败: {e}")
-        return
-    
-    print(f"读取到 {len(courts_data)} 个场馆数据")
     
     # 初始化数据库
     init_db()
@@ -41,56 +34,25 @@ def import_courts_data():
         if response.lower() != 'y':
             print("取消导入")
             return
+        # 清空前创建数据库快照
+        snapshot_before("重新导入场馆数据前")
         # 清空现有数据
         db.query(TennisCourt).delete()
         db.commit()
         print("已清空现有数据")
     
-    # 导入数据
+    # 流式批量导入数据
     print("开始导入数据...")
-    imported_count = 0
-    
-    for court_data in courts_data:
-        try:
-            # 处理时间字段
-            created_at = None
-            updated_at = None
-            if court_data.get('created_at'):
-                created_at = datetime.fromisoformat(court_data['created_at'])
-            if court_data.get('updated_at'):
-                updated_at = datetime.fromisoformat(court_data['updated_at'])
-            
-            # 创建场馆对象
-            court = TennisCourt(
-                name=court_data.get('name'),
-                address=court_data.get('address'),
-                area=court_data.get('area'),
-                area_name=court_data.get('area_name'),
-                court_type=court_data.get('court_type'),
-                phone=court_data.get('phone'),
-                latitude=court_data.get('latitude'),
-                longitude=court_data.get('longitude'),
-                data_source=court_data.get('data_source'),
-                created_at=created_at,
-                updated_at=updated_at
-            )
-            
-            db.add(court)
-            imported_count += 1
-            
-            # 每100个提交一次
-            if imported_count % 100 == 0:
-                db.commit()
-                print(f"已导入 {imported_count} 个场馆...")
-                
-        except Exception as e:
-            print(f"❌ 导入场馆 {court_data.get('name', 'unknown')} 失败: {e}")
-            continue
-    
-    # 最终提交
-    db.commit()
+    try:
+        result = load_courts_file(data_file, keep_id=False)
+    except Exception as e:
+        print(f"❌ 导入失败: {e}")
+        return
+    imported_count = result['courts'] if result else 0
     
     print(f"✅ 导入完成: {imported_count} 个场馆")
+    if result and result['skipped']:
+        print(f"⚠️ 跳过 {result['skipped']} 条无效记录，详见日志")
     
     # 显示统计
     final_count = db.query(TennisCourt).count()
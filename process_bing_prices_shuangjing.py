@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 from app.scrapers.price_confidence_model import PriceConfidenceModel
 import json
 import re
@@ -47,7 +48,7 @@ def process_bing_prices_shuangjing():
             continue
         
         try:
-            bing_data = json.loads(detail.bing_prices)
+            bing_data = load_json(detail.bing_prices)
             if not isinstance(bing_data, list) or len(bing_data) == 0:
                 skipped_count += 1
                 continue
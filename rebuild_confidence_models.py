@@ -13,6 +13,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import SessionLocal
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json, load_json_copy
 from app.scrapers.price_confidence_model import PriceConfidenceModel
 
 # 设置日志
@@ -64,7 +65,7 @@ def recalculate_all_confidence_scores(confidence_model):
             # 重新计算BING价格置信度
             if detail.bing_prices:
                 try:
-                    bing_data = json.loads(detail.bing_prices)
+                    bing_data = load_json_copy(detail.bing_prices)
                     if isinstance(bing_data, list):
                         for price_item in bing_data:
                             if isinstance(price_item, dict):
@@ -94,7 +95,7 @@ def recalculate_all_confidence_scores(confidence_model):
             # 重新计算融合价格置信度
             if detail.merged_prices:
                 try:
-                    merged_data = json.loads(detail.merged_prices)
+                    merged_data = load_json_copy(detail.merged_prices)
                     if isinstance(merged_data, list):
                         for price_item in merged_data:
                             if isinstance(price_item, dict):
@@ -169,7 +170,7 @@ def analyze_confidence_distribution():
             # 分析BING价格置信度
             if detail.bing_prices:
                 try:
-                    bing_data = json.loads(detail.bing_prices)
+                    bing_data = load_json(detail.bing_prices)
                     if isinstance(bing_data, list):
                         for price_item in bing_data:
                             if isinstance(price_item, dict):
@@ -194,7 +195,7 @@ def analyze_confidence_distribution():
             # 分析融合价格置信度
             if detail.merged_prices:
                 try:
-                    merged_data = json.loads(detail.merged_prices)
+                    merged_data = load_json(detail.merged_prices)
                     if isinstance(merged_data, list):
                         for price_item in merged_data:
                             if isinstance(price_item, dict):
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+重算场馆统计汇总表（/stats/summary 与 /api/scraper/status 的数据来源）
+直接用SQL写库的脚本（不经过ORM会话）运行后执行一次，使统计与数据一致
+用法:
+  python rebuild_rollups.py
+"""
+from app.court_rollup import courts_summary, rebuild_rollups
+from app.database import SessionLocal, init_db
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        print(f"✅ 已重算 {rebuild_rollups(db)} 个场馆的统计汇总")
+        for area, stats in courts_summary(db)["price_coverage"].items():
+            print(f"  {stats['name']:<8} {stats['total']:>4} 个，有价格 {stats['priced']:>4}"
+                  f"（真实 {stats['real_priced']}，预测 {stats['predicted']}），覆盖率 {stats['coverage']:.1%}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -248,21 +248,11 @@ def check_results():
 
 def recalculate_area_fields():
     print("  🔄 重新分配全部场馆区域...")
-    conn = sqlite3.connect('data/courts.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, latitude, longitude FROM tennis_courts")
-    courts = cursor.fetchall()
-    updated = 0
-    for court_id, lat, lng in courts:
-        if lat is None or lng is None:
-            continue
-        area = assign_area_for_court(lat, lng)
-        if area:
-            cursor.execute("UPDATE tennis_courts SET area = ?, updated_at = ? WHERE id = ?", (area, datetime.now(), court_id))
-            updated += 1
-    conn.commit()
-    conn.close()
-    print(f"  ✅ 区域分配完成，更新了 {updated} 个场馆")
+    from app.scrapers.area_assigner import AreaAssigner
+    db = next(get_db())
+    result = AreaAssigner().reassign_all(db)
+    db.close()
+    print(f"  ✅ 区域分配完成，处理了 {result['total']} 个场馆，变更 {result['changed']} 个")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
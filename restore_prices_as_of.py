@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按时间点恢复价格字段（取代从备份文件/备份库逐字段拷回的恢复脚本）
+用法:
+  python restore_prices_as_of.py seed                              为现有价格写入基线版本
+  python restore_prices_as_of.py show <场馆ID> [字段]               查看价格历史
+  python restore_prices_as_of.py restore <字段> "<时间>" [场馆ID,...] [--apply]
+      例: python restore_prices_as_of.py restore bing_prices "2025-06-29 17:55"
+      不加 --apply 时只统计会变化的场馆
+"""
+import sys
+from datetime import datetime
+from app.database import SessionLocal, init_db
+from app.price_history import TRACKED_COLUMNS, history, restore_as_of, seed_baseline
+
+def main():
+    args = [a for a in sys.argv[1:] if a != "--apply"]
+    apply = "--apply" in sys.argv
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+    init_db()
+    db = SessionLocal()
+    try:
+        command = args[0]
+        if command == "seed":
+            print(f"✅ 写入基线版本 {seed_baseline(db)} 条")
+        elif command == "show" and len(args) >= 2:
+            for row in history(db, int(args[1]), args[2] if len(args) > 2 else None):
+                print(f"{row['created_at']}  {row['column']:<15} v{row['version']:<3} {row['writer']:<20} {row['value']}")
+        elif command == "restore" and len(args) >= 3:
+            as_of = datetime.fromisoformat(args[2])
+            court_ids = [int(c) for c in args[3].split(",")] if len(args) > 3 else None
+            result = restore_as_of(db, args[1], as_of, court_ids, dry_run=not apply)
+            verb = "已恢复" if apply else "将恢复（未写入，加 --apply 执行）"
+            print(f"{'✅' if apply else '🔍'} {result['column']} @ {result['as_of']}: "
+                  f"有历史 {result['courts_with_history']} 个场馆，{verb} {result['changed']} 个")
+            if result["changed_court_ids"]:
+                print(f"   场馆ID: {result['changed_court_ids']}")
+        else:
+            print(__doc__)
+            print(f"可选字段: {', '.join(TRACKED_COLUMNS)}")
+            sys.exit(1)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,109 @@
 #!/usr/bin/env python3
 """
 用Selenium自动打开Bing地图网页版，定位到指定经纬度和缩放级别，截图地图区域并保存为本地图片。
+PIN位置按 Web Mercator 投影由地图中心、缩放级别精确计算（app.geo.MapViewport）；
+批量截图时一次截取的视口可供多个相邻场馆各自裁剪（见 batch_bing_map_screenshot.py）
+用法: python selenium_bing_map_screenshot.py <lat> <lng> <zoom> <output_file>
 """
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 import time
 import sys
 import os
+from io import BytesIO
+from typing import List, Tuple
 from PIL import Image, ImageDraw
-import math
 
-def screenshot_bing(lat, lng, zoom, out_file):
-    url = f'https://www.bing.com/maps?cp={lat}~{lng}&lvl={zoom}'
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from app.geo import MapViewport, lnglat_to_world_px, world_px_to_lnglat
+
+WINDOW_SIZE = (1200, 800)
+# 地图被Bing页面UI（左侧搜索面板、顶部导航、右下控件）遮挡的边距：左、上、右、下
+UI_MARGINS = (300, 80, 100, 100)
+# 每个场馆输出图片的尺寸（1200x800窗口下即为未遮挡区域 [300,80,1100,700]）
+CROP_SIZE = (800, 620)
+PIN_RADIUS = 10
+
+def open_driver(window_size: Tuple[int, int] = WINDOW_SIZE):
     chrome_options = Options()
     chrome_options.add_argument('--headless')
     chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--window-size=1200,800')
-    driver = webdriver.Chrome(options=chrome_options)
+    chrome_options.add_argument(f'--window-size={window_size[0]},{window_size[1]}')
+    return webdriver.Chrome(options=chrome_options)
+
+def viewport_size(driver) -> Tuple[int, int]:
+    """浏览器视口的CSS像素尺寸（地图画布铺满视口，cp 参数的中心即视口中心）"""
+    width, height = driver.execute_script('return [window.innerWidth, window.innerHeight];')
+    return int(width), int(height)
+
+def clear_area(width: int, height: int) -> Tuple[int, int, int, int]:
+    """视口中不被页面UI遮挡的区域 (left, top, right, bottom)"""
+    left, top, right, bottom = UI_MARGINS
+    return left, top, width - right, height - bottom
+
+def capture_center(points: List[Tuple[float, float]], zoom: int, width: int, height: int) -> Tuple[float, float]:
+    """使多个场馆 [(lng, lat)] 的像素包围盒中心落在未遮挡区域中心时的地图中心 (lng, lat)"""
+    xs, ys = lnglat_to_world_px([p[0] for p in points], [p[1] for p in points], zoom)
+    left, top, right, bottom = clear_area(width, height)
+    # 未遮挡区域中心相对视口中心的偏移
+    dx = (left + right) / 2.0 - width / 2.0
+    dy = (top + bottom) / 2.0 - height / 2.0
+    lng, lat = world_px_to_lnglat((xs.min() + xs.max()) / 2.0 - dx, (ys.min() + ys.max()) / 2.0 - dy, zoom)
+    return float(lng), float(lat)
+
+def capture_bing(driver, lng: float, lat: float, zoom: int) -> Tuple[Image.Image, MapViewport]:
+    """打开以 (lng, lat) 为中心的Bing地图并截图，返回截图及其视口（截图像素与视口CSS像素一致）"""
+    url = f'https://www.bing.com/maps?cp={lat}~{lng}&lvl={zoom}'
+    driver.get(url)
+    time.sleep(5)  # 等待地图加载
+    # 自动点击公交图层按钮
+    try:
+        # 尝试查找并点击"图层"按钮
+        layer_btn = driver.find_element('xpath', "//button[contains(@aria-label, '图层') or contains(@aria-label, 'Layers')]")
+        layer_btn.click()
+        time.sleep(1)
+        # 查找公交/交通/Transit选项
+        transit_btn = driver.find_element('xpath', "//button[contains(@aria-label, '公交') or contains(@aria-label, '交通') or contains(@aria-label, 'Transit')]")
+        transit_btn.click()
+        print('✅ 已切换公交图层')
+        time.sleep(3)  # 等待公交线路渲染
+    except Exception as e:
+        print(f'⚠️ 未能自动切换公交图层: {e}')
+    width, height = viewport_size(driver)
+    im = Image.open(BytesIO(driver.get_screenshot_as_png())).convert('RGB')
+    # 高分屏截图按设备像素比缩放回CSS像素
+    if im.size != (width, height):
+        im = im.resize((width, height), Image.LANCZOS)
+    return im, MapViewport(lng, lat, zoom, width, height)
+
+def crop_court(im: Image.Image, view: MapViewport, lng: float, lat: float, out_file: str,
+               crop_size: Tuple[int, int] = CROP_SIZE) -> Tuple[float, float]:
+    """从截图中裁剪以场馆为中心的区域（限制在未遮挡区域内）并绘制PIN，返回PIN在输出图片中的像素坐标"""
+    x, y = view.to_pixel(lng, lat)
+    area_left, area_top, area_right, area_bottom = clear_area(view.width, view.height)
+    crop_w, crop_h = crop_size
+    left = int(round(min(max(float(x) - crop_w / 2.0, area_left), area_right - crop_w)))
+    top = int(round(min(max(float(y) - crop_h / 2.0, area_top), area_bottom - crop_h)))
+    print(f'裁剪区域: left={left}, top={top}, right={left + crop_w}, bottom={top + crop_h}')
+    cropped = im.crop((left, top, left + crop_w, top + crop_h))
+    center_x, center_y = float(x) - left, float(y) - top
+    print(f'PIN中心像素(投影计算): x={center_x:.1f}, y={center_y:.1f}')
+    draw = ImageDraw.Draw(cropped)
+    draw.ellipse([
+        center_x - PIN_RADIUS, center_y - PIN_RADIUS,
+        center_x + PIN_RADIUS, center_y + PIN_RADIUS
+    ], fill=(255,0,0), outline=(255,0,0))
+    cropped.save(out_file)
+    return center_x, center_y
+
+def screenshot_bing(lat, lng, zoom, out_file):
+    driver = open_driver()
     try:
-        driver.get(url)
-        time.sleep(5)  # 等待地图加载
-        # 自动点击公交图层按钮
-        try:
-            # 尝试查找并点击"图层"按钮
-            layer_btn = driver.find_element('xpath', "//button[contains(@aria-label, '图层') or contains(@aria-label, 'Layers')]")
-            layer_btn.click()
-            time.sleep(1)
-            # 查找公交/交通/Transit选项
-            transit_btn = driver.find_element('xpath', "//button[contains(@aria-label, '公交') or contains(@aria-label, '交通') or contains(@aria-label, 'Transit')]")
-            transit_btn.click()
-            print('✅ 已切换公交图层')
-            time.sleep(3)  # 等待公交线路渲染
-        except Exception as e:
-            print(f'⚠️ 未能自动切换公交图层: {e}')
-        driver.save_screenshot('full_bing_before.png')
-        driver.save_screenshot('full_bing.png')
-        # 裁剪地图区域（Bing地图主区域大致在页面中间，1200x800下约[300,80,1100,700]）
-        im = Image.open('full_bing.png')
-        left, top, right, bottom = 300, 80, 1100, 700
-        print(f'裁剪区域: left={left}, top={top}, right={right}, bottom={bottom}')
-        im = im.crop((left, top, right, bottom))
-        # 综合PIN偏移算法：
-        # 1. 先整体向左上（西北）偏移50像素（经验修正，适配Bing地图UI）
-        # 2. 再向西（左）偏移190米（约63像素，1像素≈3米）
-        offset_ui = 50  # UI修正
-        offset_west = 63  # 190米/3米每像素
-        center_x = (right - left) // 2 - offset_ui - offset_west
-        center_y = (bottom - top) // 2 - offset_ui
-        print(f'PIN中心像素(综合修正): x={center_x}, y={center_y}')
-        draw = ImageDraw.Draw(im)
-        pin_radius = 10
-        draw.ellipse([
-            center_x - pin_radius, center_y - pin_radius,
-            center_x + pin_radius, center_y + pin_radius
-        ], fill=(255,0,0), outline=(255,0,0))
-        im.save(out_file)
-        os.remove('full_bing.png')
+        width, height = viewport_size(driver)
+        center_lng, center_lat = capture_center([(lng, lat)], zoom, width, height)
+        im, view = capture_bing(driver, center_lng, center_lat, zoom)
+        crop_court(im, view, lng, lat, out_file)
         print(f'✅ Bing地图截图已保存为 {out_file}')
     finally:
         driver.quit()
@@ -68,4 +116,4 @@ if __name__ == '__main__':
     lng = float(sys.argv[2])
     zoom = int(sys.argv[3])
     out_file = sys.argv[4]
-    screenshot_bing(lat, lng, zoom, out_file) 
\ No newline at end of file
+    screenshot_bing(lat, lng, zoom, out_file)
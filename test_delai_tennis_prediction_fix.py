@@ -10,6 +10,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 from app.scrapers.price_predictor import PricePredictor
 import json
 from datetime import datetime
@@ -70,7 +71,7 @@ def test_delai_tennis_prediction_fix():
                         source_detail = predictor.db.query(CourtDetail).filter(CourtDetail.court_id == source['id']).first()
                         if source_detail and source_detail.merged_prices:
                             try:
-                                source_prices = json.loads(source_detail.merged_prices)
+                                source_prices = load_json(source_detail.merged_prices)
                                 if isinstance(source_prices, list) and len(source_prices) > 0:
                                     print(f"       价格: {source_prices[0].get('price', 'N/A')} ({source_prices[0].get('type', 'N/A')})")
                             except:
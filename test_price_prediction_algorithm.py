@@ -9,6 +9,7 @@ import sqlite3
 from app.scrapers.price_predictor import PricePredictor
 from app.database import get_db
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 
 def test_algorithm_data_source_recognition():
     """测试算法数据源识别"""
@@ -39,7 +40,7 @@ def test_algorithm_data_source_recognition():
         # 检查BING价格
         if detail.bing_prices:
             try:
-                bing_data = json.loads(detail.bing_prices)
+                bing_data = load_json(detail.bing_prices)
                 if isinstance(bing_data, list) and len(bing_data) > 0:
                     print(f"    ✅ BING价格: {len(bing_data)} 个")
                     # 测试算法是否能识别
@@ -58,7 +59,7 @@ def test_algorithm_data_source_recognition():
         # 检查合并价格
         if detail.merged_prices:
             try:
-                merged_data = json.loads(detail.merged_prices)
+                merged_data = load_json(detail.merged_prices)
                 if isinstance(merged_data, list) and len(merged_data) > 0:
                     print(f"    ✅ 合并价格: {len(merged_data)} 个")
                 else:
@@ -71,7 +72,7 @@ def test_algorithm_data_source_recognition():
         # 检查预测价格
         if detail.predict_prices:
             try:
-                predict_data = json.loads(detail.predict_prices)
+                predict_data = load_json(detail.predict_prices)
                 if predict_data:
                     print(f"    ✅ 预测价格: 已存在")
                 else:
@@ -129,7 +130,7 @@ def test_price_extraction():
         print(f"\n🏟️ 场馆: {court.name}")
         
         try:
-            bing_data = json.loads(detail.bing_prices)
+            bing_data = load_json(detail.bing_prices)
             if isinstance(bing_data, list) and len(bing_data) > 0:
                 print(f"  📊 BING价格数据: {len(bing_data)} 个")
                 
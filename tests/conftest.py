@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+测试公共夹具：所有测试使用临时目录中的SQLite数据库和数据目录，每个测试前重建全部表
+运行: python -m pytest -q tests
+"""
+
+import os
+import sys
+import tempfile
+
+# 必须在导入 app 之前设置，数据库引擎在导入时按配置创建
+TEST_DIR = tempfile.mkdtemp(prefix="tennis-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DIR}/courts.db"
+os.environ["ANALYTICS_DIR"] = os.path.join(TEST_DIR, "analytics")
+os.environ["HTTP_CACHE_DIR"] = os.path.join(TEST_DIR, "http_cache")
+os.environ["MAP_TILE_CACHE_DIR"] = os.path.join(TEST_DIR, "tile_cache")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+from app.database import Base, SessionLocal, engine
+import app.models  # noqa: F401  注册模型与会话事件
+from app.models import CourtDetail, TennisCourt
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+@pytest.fixture
+def db():
+    """空的数据库会话（每个测试重建全部表）"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+def make_court(db, name="测试网球场", address="北京市朝阳区测试路1号", area="guomao",
+               lng=116.468, lat=39.914, **fields) -> TennisCourt:
+    """插入一个场馆（latitude 字段存经度，与高德抓取数据的约定一致）"""
+    court = TennisCourt(name=name, address=address, area=area, area_name=area,
+                        latitude=lng, longitude=lat, data_source=fields.pop("data_source", "amap"), **fields)
+    db.add(court)
+    db.commit()
+    return court
+
+def make_detail(db, court, **fields) -> CourtDetail:
+    detail = CourtDetail(court_id=court.id, **fields)
+    db.add(detail)
+    db.commit()
+    return detail
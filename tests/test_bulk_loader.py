@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""流式批量导入：无效记录跳过计数，其它记录照常写入；异常中断时整表回滚"""
+
+import json
+import os
+
+import pytest
+
+from app.bulk_loader import bulk_insert, load_courts_file
+from app.models import CourtDetail, TennisCourt
+
+from .conftest import TEST_DIR
+
+def _court(court_id, name, lng=116.468, lat=39.914):
+    return {"id": court_id, "name": name, "address": "北京市朝阳区测试路1号", "area": "guomao",
+            "area_name": "国贸", "latitude": lng, "longitude": lat}
+
+def _write(data, filename="courts_data.json"):
+    path = os.path.join(TEST_DIR, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    return path
+
+def test_invalid_records_are_skipped(db):
+    courts = [_court(i, f"网球场{i}") for i in range(1, 8)]
+    courts[2]["name"] = None  # 违反非空约束
+    courts.append(_court(5, "重复ID的网球场"))  # 主键重复
+    courts.append("不是对象的记录")
+    details = [{"id": 1, "court_id": 1, "prices": [{"type": "黄金时间", "price": 200}]},
+               {"id": 2, "court_id": None},  # 违反非空约束
+               {"id": 3, "court_id": 2}]
+    path = _write({"courts": courts, "details": details})
+
+    result = load_courts_file(path, chunk_size=3)
+    assert result["courts"] == 6
+    assert result["details"] == 2
+    assert result["skipped"] == 4
+    assert sorted(c.id for c in db.query(TennisCourt).all()) == [1, 2, 4, 5, 6, 7]
+    assert db.get(TennisCourt, 5).name == "网球场5"
+    assert db.get(CourtDetail, 1).prices == [{"type": "黄金时间", "price": 200}]
+
+def test_skipped_records_are_reported(db):
+    errors = []
+    count = bulk_insert(TennisCourt.__table__, [_court(1, "网球场1"), _court(1, "网球场1")],
+                        errors=errors)
+    assert count == 1
+    assert [(e["table"], e["id"]) for e in errors] == [("tennis_courts", 1)]
+
+def test_interrupted_import_rolls_back_table(db):
+    def records():
+        yield from (_court(i, f"网球场{i}") for i in range(1, 5))
+        raise RuntimeError("读取中断")
+
+    with pytest.raises(RuntimeError):
+        bulk_insert(TennisCourt.__table__, records(), chunk_size=2)
+    # 已写入的块随事务一起回滚，二级索引也随之恢复
+    assert db.query(TennisCourt).count() == 0
+    assert db.execute(TennisCourt.__table__.select().where(TennisCourt.name == "网球场1")).first() is None
+    indexes = {row[1] for row in db.connection().exec_driver_sql("PRAGMA index_list('tennis_courts')")}
+    assert {i.name for i in TennisCourt.__table__.indexes} <= indexes
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""列式内存映射文件：写入后映射读回一致，损坏文件报错，原子替换不影响已映射的旧文件"""
+
+import os
+
+import numpy as np
+import pytest
+
+from app.column_file import ALIGN, ColumnFileError, map_columns, write_columns
+from app.court_snapshot import CourtSnapshot, SharedSnapshotFile, build_court_snapshot, write_marker
+
+from .conftest import TEST_DIR, make_court, make_detail
+
+def _path(name):
+    return os.path.join(TEST_DIR, "column_files", name)
+
+def test_round_trip():
+    path = _path("columns.bin")
+    grid = np.arange(12, dtype=np.float32).reshape(3, 4)
+    columns = {
+        "ids": np.array([3, 1, 2], dtype=np.int64),
+        "values": np.array([1.5, np.nan, -np.inf]),
+        "flags": np.array([True, False, True]),
+        "codes": np.array([-1, 0, 7], dtype=np.int8),
+        "grid": grid,
+        "strided": grid[:, ::2],  # 非连续数组
+        "names": np.array(["国贸", "", "望京"]),
+        "scalar": np.array(42, dtype=np.uint16),
+        "empty": np.array([], dtype=np.float64),
+    }
+    write_columns(path, columns, meta={"version": 7, "note": "测试"})
+    mapped_columns, meta, mapped = map_columns(path)
+    try:
+        assert meta == {"version": 7, "note": "测试"}
+        assert list(mapped_columns) == list(columns)
+        for name, array in columns.items():
+            loaded = mapped_columns[name]
+            assert loaded.dtype == array.dtype and loaded.shape == array.shape
+            np.testing.assert_array_equal(loaded, array)
+            assert not loaded.flags.writeable
+            assert loaded.ctypes.data % ALIGN == 0 or loaded.size == 0
+    finally:
+        del mapped_columns, loaded
+        mapped.close()
+
+def test_invalid_files():
+    with pytest.raises(ColumnFileError):
+        write_columns(_path("objects.bin"), {"bad": np.array([{"a": 1}], dtype=object)})
+    assert not os.path.exists(_path("objects.bin"))
+
+    garbage = _path("garbage.bin")
+    with open(garbage, "wb") as f:
+        f.write(b"not a column file at all")
+    with pytest.raises(ColumnFileError):
+        map_columns(garbage)
+
+    truncated = _path("truncated.bin")
+    write_columns(truncated, {"ids": np.arange(1000, dtype=np.int64)})
+    with open(truncated, "r+b") as f:
+        f.truncate(os.path.getsize(truncated) - 8)
+    with pytest.raises(ColumnFileError):
+        map_columns(truncated)
+
+def test_replace_keeps_old_mapping():
+    path = _path("replace.bin")
+    write_columns(path, {"ids": np.arange(5, dtype=np.int64)}, meta={"version": 1})
+    old_columns, _, old_mapped = map_columns(path)
+    write_columns(path, {"ids": np.arange(10, 20, dtype=np.int64)}, meta={"version": 2})
+    new_columns, meta, new_mapped = map_columns(path)
+    try:
+        np.testing.assert_array_equal(old_columns["ids"], np.arange(5))
+        np.testing.assert_array_equal(new_columns["ids"], np.arange(10, 20))
+        assert meta["version"] == 2
+        assert not [f for f in os.listdir(os.path.dirname(path)) if f.startswith(".tmp-")]
+    finally:
+        del old_columns, new_columns
+        old_mapped.close()
+        new_mapped.close()
+
+def test_court_snapshot_round_trip(db):
+    court = make_court(db, name="国贸室内网球馆", phone="010-1", court_count=4, has_roof=True)
+    make_detail(db, court, manual_prices={"peak_price": 200, "off_peak_price": 120})
+    make_court(db, name="望京网球场", area="wangjing", lng=None, lat=None, is_open=None)
+    built = build_court_snapshot(version=123)
+
+    path = _path("court_snapshot.bin")
+    built.save(path)
+    loaded = CourtSnapshot.load(path)
+    assert loaded.version == 123 and len(loaded) == len(built) == 2
+    assert loaded.rows_at(range(2)) == built.rows_at(range(2))
+    assert [loaded.real_prices(i) for i in range(2)] == [built.real_prices(i) for i in range(2)]
+    np.testing.assert_array_equal(loaded.positions([court.id, 999]), [0, -1])
+    np.testing.assert_array_equal(loaded.area_mask("wangjing"), [False, True])
+    assert not loaded.area_mask("no_such_area").any()
+
+    # 共享文件：版本号旧于数据库文件修改时间的快照可以映射，但不标记为最新
+    shared = SharedSnapshotFile(path)
+    assert shared.changed()
+    assert shared.load(write_marker()).marker is None
+    assert not shared.changed()
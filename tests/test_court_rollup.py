@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""场馆统计汇总表：增量维护与整体重算一致，会话事件在全新进程中可正常触发"""
+
+import os
+import subprocess
+import sys
+
+from app.court_rollup import courts_summary, rebuild_rollups, scraper_status
+from app.models import CourtRollup
+
+from .conftest import PROJECT_ROOT, TEST_DIR, make_court, make_detail
+
+def _rollup_rows(db):
+    return sorted((r.area, r.court_type, r.data_source, r.price_bucket, r.court_count, r.first_court_id)
+                  for r in db.query(CourtRollup).all())
+
+def test_incremental_matches_rebuild(db):
+    first = make_court(db, name="国贸网球馆")
+    make_court(db, name="国贸室外网球场", data_source="dianping")
+    rebuild_rollups(db)
+
+    # 新增场馆、修改区域、新增价格详情都走 after_flush 增量维护
+    third = make_court(db, name="望京网球中心", area="wangjing")
+    first.area = "wangjing"
+    db.commit()
+    make_detail(db, third, manual_prices={"peak_price": 200, "off_peak_price": 120})
+    incremental = _rollup_rows(db)
+
+    rebuild_rollups(db)
+    assert _rollup_rows(db) == incremental
+    assert scraper_status(db)["total_courts"] == 3
+
+def test_summary_price_coverage(db):
+    court = make_court(db, name="国贸网球馆")
+    make_court(db, name="国贸第二网球馆")
+    make_detail(db, court, manual_prices={"peak_price": 200})
+    rebuild_rollups(db)
+
+    coverage = courts_summary(db)["price_coverage"]["guomao"]
+    assert coverage["total"] == 2
+    assert coverage["priced"] == coverage["real_priced"] == 1
+    assert coverage["coverage"] == 0.5
+
+def test_first_flush_in_fresh_process(db):
+    """全新进程中只导入 database/models 就修改场馆，after_flush 中不能再注册新的会话事件"""
+    court = make_court(db)
+    make_detail(db, court)
+    rebuild_rollups(db)
+    script = (
+        "from app.database import SessionLocal\n"
+        "from app.models import TennisCourt\n"
+        "db = SessionLocal()\n"
+        "court = db.query(TennisCourt).first()\n"
+        "court.phone = '123'\n"
+        "db.commit()\n"
+    )
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{TEST_DIR}/courts.db")
+    result = subprocess.run([sys.executable, "-c", script], cwd=PROJECT_ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    db.expire_all()
+    assert db.get(type(court), court.id).phone == "123"
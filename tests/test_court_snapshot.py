@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""场馆快照：按写入标记判断是否过期，不受文件修改时间精度影响；批量预测固定使用同一快照"""
+
+import os
+
+import pytest
+
+from app import court_snapshot
+from app.court_snapshot import SharedSnapshotFile, get_court_snapshot
+from app.models import CourtDetail
+from app.scrapers.price_predictor import PricePredictor
+
+from .conftest import TEST_DIR, make_court, make_detail
+
+@pytest.fixture
+def builds(db, monkeypatch):
+    """清空进程内快照并统计构建次数"""
+    monkeypatch.setattr(court_snapshot, "_snapshot", None)
+    count = []
+    build = court_snapshot.build_court_snapshot
+
+    def counting_build(*args, **kwargs):
+        count.append(1)
+        return build(*args, **kwargs)
+
+    monkeypatch.setattr(court_snapshot, "build_court_snapshot", counting_build)
+    return count
+
+def _names(snapshot):
+    return sorted(row["name"] for row in snapshot.rows_at(range(len(snapshot))))
+
+def test_write_in_same_mtime_tick_is_detected(db, builds):
+    court = make_court(db, name="国贸网球馆")
+    first = get_court_snapshot()
+    assert get_court_snapshot() is first and len(builds) == 1
+
+    # 写入后把文件修改时间改回原值，模拟同一时间刻度内的提交
+    path = os.path.join(TEST_DIR, "courts.db")
+    stat = os.stat(path)
+    court.name = "国贸网球中心"
+    db.commit()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert _names(get_court_snapshot(max_wait=30)) == ["国贸网球中心"]
+    assert len(builds) == 2
+
+def test_batch_prediction_uses_one_snapshot(db, builds):
+    for i in range(3):
+        court = make_court(db, name=f"国贸网球场{i}", lng=116.468 + i * 0.001)
+        make_detail(db, court, merged_prices=[{"type": "黄金时间", "price": f"{150 + i * 10}元/小时"}])
+    targets = [make_court(db, name=f"待预测网球场{i}", lng=116.47 + i * 0.001) for i in range(3)]
+
+    predictor = PricePredictor()
+    try:
+        for court in targets:
+            court = predictor.db.get(type(court), court.id)
+            assert predictor.find_nearby_courts_with_prices(court, 5.0, filter_by_type=False)
+            detail = CourtDetail(court_id=court.id, predict_prices={"peak_price": 160})
+            predictor.db.add(detail)
+            predictor.db.commit()
+    finally:
+        predictor.db.close()
+    assert len(builds) == 1
+
+def test_shared_file_reuses_current_version(db, builds, monkeypatch):
+    make_court(db)
+    shared = SharedSnapshotFile(os.path.join(TEST_DIR, "shared", "court_snapshot.bin"))
+    published = shared.rebuild()
+    assert published.marker is not None and len(builds) == 1
+    # 没有新写入时，其他进程直接映射已发布的版本
+    other = SharedSnapshotFile(shared.path)
+    assert other.rebuild().version == published.version and len(builds) == 1
+    # 新写入后版本号落后于数据库文件，重新构建
+    make_court(db, name="新网球场", lng=116.47)
+    assert len(other.rebuild()) == 2 and len(builds) == 2
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""场馆列表与更新接口"""
+
+import orjson
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app import court_snapshot
+from app.api.courts import create_court, encode_cursor, get_courts, update_court
+from app.config import settings
+from app.models import TennisCourtCreate, TennisCourtUpdate
+
+from .conftest import make_court
+
+@pytest.fixture
+def fresh_snapshot(monkeypatch):
+    """清空进程内快照，下次读取时在调用线程中按当前数据库同步构建"""
+    monkeypatch.setattr(court_snapshot, "_snapshot", None)
+
+def _list(db, **params):
+    params = {"area": None, "skip": 0, "limit": 100, "order_by": None, "cursor": None, **params}
+    response = get_courts(db=db, **params)
+    return [row["id"] for row in orjson.loads(response.body)], response.headers.get("x-next-cursor")
+
+def _all_pages(db, limit, **params):
+    ids, cursor = _list(db, limit=limit, **params)
+    pages = [ids]
+    while cursor:
+        ids, cursor = _list(db, limit=limit, cursor=cursor, **{k: v for k, v in params.items() if k != "order_by"})
+        pages.append(ids)
+    return pages
+
+def _seed_updated_at(db):
+    """存量数据的更新时间有带/不带微秒两种文本格式，也有空值和重复值"""
+    stamps = [None, "2024-05-01 10:00:00", "2024-05-01 10:00:00.500000", "2024-05-01 10:00:00",
+              None, "2024-04-30 23:59:59.999999", "2024-05-02 08:00:00"]
+    courts = [make_court(db, name=f"网球场{i}", area="guomao" if i % 3 else "sanlitun") for i in range(len(stamps))]
+    for court, stamp in zip(courts, stamps):
+        db.execute(text("UPDATE tennis_courts SET updated_at = :stamp WHERE id = :id"), {"stamp": stamp, "id": court.id})
+    db.commit()
+    rows = db.execute(text("SELECT id, area, CAST(updated_at AS TEXT) FROM tennis_courts")).all()
+    return rows
+
+@pytest.mark.parametrize("order_by, key", [("updated_at", 2), ("area", 1)])
+def test_cursor_pages_cover_every_court_once(db, fresh_snapshot, order_by, key):
+    rows = _seed_updated_at(db)
+    # SQLite升序时NULL在前，同值按ID
+    expected = [r[0] for r in sorted(rows, key=lambda r: (r[key] is not None, r[key] or "", r[0]))]
+    for limit in (1, 2, 3, 7, 100):
+        pages = _all_pages(db, limit, order_by=order_by)
+        assert [i for page in pages for i in page] == expected
+        assert all(len(page) <= limit for page in pages)
+
+def test_cursor_with_area_filter(db, fresh_snapshot):
+    rows = _seed_updated_at(db)
+    expected = [r[0] for r in sorted(rows, key=lambda r: (r[2] is not None, r[2] or "", r[0])) if r[1] == "guomao"]
+    pages = _all_pages(db, 2, order_by="updated_at", area="guomao")
+    assert [i for page in pages for i in page] == expected
+
+def test_cursor_page_includes_courts_missing_from_snapshot(db, fresh_snapshot, monkeypatch):
+    _seed_updated_at(db)
+    stale = court_snapshot.build_court_snapshot()
+    added = [make_court(db, name=f"新网球场{i}").id for i in range(3)]
+    expected = [i for page in _all_pages(db, 3, order_by="area") for i in page]
+    # 快照尚未包含新场馆时，这些行从数据库读取，每页不缺行
+    monkeypatch.setattr("app.api.courts.get_court_snapshot", lambda: stale)
+    pages = _all_pages(db, 3, order_by="area")
+    assert [i for page in pages for i in page] == expected
+    assert set(added) <= set(expected)
+    assert all(len(page) == 3 for page in pages[:-1])
+    rows = orjson.loads(get_courts(db=db, area=None, skip=0, limit=100, order_by="area", cursor=None).body)
+    row = next(r for r in rows if r["id"] == added[-1])
+    assert row["name"] == "新网球场2" and row["court_type"] and "peak_price" in row
+
+def test_invalid_cursor(db, fresh_snapshot):
+    make_court(db)
+    for cursor in ("not-a-cursor", encode_cursor("updated_at", None, 1)[:-3], encode_cursor("name", "x", 1)):
+        with pytest.raises(HTTPException) as exc:
+            _list(db, cursor=cursor)
+        assert exc.value.status_code == 400
+
+def test_update_location_reassigns_area(db):
+    court = make_court(db, area="guomao")
+    # 坐标移到望京中心，未指定区域时按规则重新分配
+    update_court(court.id, TennisCourtUpdate(latitude=116.4828, longitude=39.9968), db)
+    assert court.area == "wangjing"
+
+def test_update_keeps_explicit_area(db):
+    court = make_court(db, area="guomao")
+    update_court(court.id, TennisCourtUpdate(area="sanlitun", area_name="三里屯"), db)
+    assert court.area == "sanlitun"
+    # 同时修改坐标与区域，仍以调用方指定的区域为准
+    update_court(court.id, TennisCourtUpdate(latitude=116.4828, longitude=39.9968, area="shuangjing"), db)
+    assert court.area == "shuangjing"
+
+def test_update_explicit_area_fills_area_name(db):
+    court = make_court(db, area="guomao")
+    update_court(court.id, TennisCourtUpdate(area="sanlitun"), db)
+    assert court.area_name == settings.target_areas["sanlitun"]["name"]
+    update_court(court.id, TennisCourtUpdate(area="shuangjing", area_name="双井"), db)
+    assert court.area_name == "双井"
+
+def test_create_keeps_explicit_area(db):
+    # 坐标在望京中心，调用方指定区域时不被规则覆盖
+    payload = dict(name="测试网球场", address="北京市朝阳区", latitude=116.4828, longitude=39.9968)
+    court = create_court(TennisCourtCreate(area="sanlitun", area_name="", **payload), db)
+    assert court.area == "sanlitun"
+    assert court.area_name == settings.target_areas["sanlitun"]["name"]
+    court = create_court(TennisCourtCreate(area="", area_name="", **payload), db)
+    assert court.area == "wangjing"
+
+def test_update_other_fields_keeps_area(db):
+    court = make_court(db, area="sanlitun")
+    update_court(court.id, TennisCourtUpdate(phone="010-12345678"), db)
+    assert court.area == "sanlitun"
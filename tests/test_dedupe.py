@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""重复场馆检测：网格候选对批量打分后的合并簇"""
+
+from app.scrapers.dedupe import CourtDeduplicator
+
+def _clusters(courts):
+    ids = list(range(1, len(courts) + 1))
+    names, addresses, lnglats = zip(*courts)
+    return sorted(c["ids"] for c in CourtDeduplicator().find_clusters(ids, names, addresses, lnglats))
+
+def test_find_clusters():
+    courts = [
+        ("朝阳公园网球中心", "北京市朝阳区朝阳公园南路1号", (116.4780, 39.9460)),
+        ("朝阳公园网球中心(南门)", "朝阳区朝阳公园南路1号", (116.4782, 39.9461)),
+        # 名称中的数字不同不合并
+        ("国贸1号网球场", "北京市朝阳区建国门外大街1号", (116.4680, 39.9140)),
+        ("国贸2号网球场", "北京市朝阳区建国门外大街1号", (116.4681, 39.9140)),
+        # 连锁场馆不同分店不合并
+        ("OPEN STAR网球俱乐部(百子湾店)", "北京市朝阳区百子湾路", (116.4900, 39.8950)),
+        ("OPEN STAR网球俱乐部(西大望路店)", "北京市朝阳区西大望路", (116.4902, 39.8951)),
+        # 同名但相距超过网格边长不合并
+        ("朝阳公园网球中心", "北京市朝阳区朝阳公园南路1号", (116.5200, 39.9460)),
+    ]
+    assert _clusters(courts) == [[1, 2]]
+
+def test_courts_without_coordinates_merge_by_full_name():
+    courts = [("万源网球俱乐部", "丰台区", None), ("万源网球俱乐部", "丰台区万源路", None), ("万源网球馆", "", None)]
+    assert _clusters(courts) == [[1, 2]]
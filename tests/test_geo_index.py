@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""地理索引最近邻：与暴力计算一致，数据范围外的查询和无匹配类型不做全网格扩展"""
+
+import time
+
+import numpy as np
+import pytest
+
+from app.geo import haversine_km
+from app.geo_index import CourtGeoIndex
+
+@pytest.fixture(scope="module")
+def index():
+    rng = np.random.default_rng(42)
+    n = 2000
+    lngs = rng.uniform(116.2, 116.6, n)
+    lats = rng.uniform(39.8, 40.1, n)
+    # 远处的一小簇场馆，使数据网格范围很大
+    lngs[:5], lats[:5] = rng.uniform(121.4, 121.5, 5), rng.uniform(31.2, 31.3, 5)
+    types = ["室内" if i % 3 == 0 else "室外" for i in range(n)]
+    return CourtGeoIndex(list(range(1, n + 1)), lngs, lats, [f"场馆{i}" for i in range(n)], types)
+
+def brute_force(index, lng, lat, k, court_type=None, max_km=None):
+    dist = haversine_km(lng, lat, index.lng, index.lat)
+    idx = np.arange(len(index.ids))
+    if court_type:
+        keep = np.asarray(index.court_types) == court_type
+        idx, dist = idx[keep], dist[keep]
+    if max_km is not None:
+        keep = dist <= max_km
+        idx, dist = idx[keep], dist[keep]
+    order = np.lexsort((idx, dist))[:k]
+    return [int(idx[i]) for i in order]
+
+@pytest.mark.parametrize("lng,lat,k,court_type,max_km", [
+    (116.40, 39.90, 5, None, None),
+    (116.40, 39.90, 20, "室内", None),
+    (116.21, 40.09, 10, "室外", 3.0),
+    (116.45, 39.95, 50, None, 0.5),
+    (121.45, 31.25, 8, None, None),   # 远处小簇：需要超过圈数上限后全量计算
+    (118.00, 35.00, 3, None, None),   # 数据之间的空白区域
+])
+def test_matches_brute_force(index, lng, lat, k, court_type, max_km):
+    result = index.nearest(lng, lat, k=k, court_type=court_type, max_km=max_km)
+    assert [i for i, _ in result] == brute_force(index, lng, lat, k, court_type, max_km)
+    distances = [d for _, d in result]
+    assert distances == sorted(distances)
+
+def test_random_queries_match_brute_force(index):
+    rng = np.random.default_rng(7)
+    for lng, lat in zip(rng.uniform(116.1, 116.7, 200), rng.uniform(39.7, 40.2, 200)):
+        assert [i for i, _ in index.nearest(lng, lat, k=7)] == brute_force(index, lng, lat, 7)
+
+@pytest.mark.parametrize("lng,lat,court_type", [
+    (0.0, 0.0, None),         # 数据范围外
+    (116.40, 39.90, "不存在的类型"),
+    (-179.9, -89.9, "室内"),
+])
+def test_bounded_time(index, lng, lat, court_type):
+    start = time.perf_counter()
+    result = index.nearest(lng, lat, k=5, court_type=court_type)
+    assert time.perf_counter() - start < 0.5
+    assert [i for i, _ in result] == brute_force(index, lng, lat, 5, court_type)
+
+def test_empty_index():
+    index = CourtGeoIndex([], [], [], [], [])
+    assert index.nearest(116.4, 39.9) == []
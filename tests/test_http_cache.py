@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTTP响应缓存：只缓存数据源判断为成功的响应，以200返回的接口错误不缓存也不回放"""
+
+import json
+
+import pytest
+import requests
+
+from app.scrapers.http_cache import CachedSession, CacheMiss, HttpCache
+
+AMAP_URL = "https://restapi.amap.com/v3/place/text"
+
+def _response(url, body, status=200):
+    response = requests.Response()
+    response.status_code = status
+    response.url = url
+    response.encoding = "utf-8"
+    response._content = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    return response
+
+class FakeServer:
+    """按调用顺序返回预设响应，并记录真实请求次数"""
+
+    def __init__(self, bodies):
+        self.bodies = list(bodies)
+        self.calls = 0
+
+    def __call__(self, session, method, url, **kwargs):
+        self.calls += 1
+        return _response(url, self.bodies.pop(0))
+
+@pytest.fixture
+def cache(tmp_path):
+    return HttpCache(cache_dir=str(tmp_path / "http_cache"))
+
+def _session(monkeypatch, server, source, cache, mode="cache-first"):
+    monkeypatch.setattr(requests.Session, "request",
+                        lambda self, method, url, **kwargs: server(self, method, url, **kwargs))
+    return CachedSession(source, mode=mode, cache=cache)
+
+def test_amap_error_body_not_cached(monkeypatch, cache):
+    server = FakeServer([
+        {"status": "0", "info": "INVALID_USER_KEY"},
+        {"status": "1", "pois": [{"name": "国贸网球馆"}]},
+        {"status": "1", "pois": []},
+    ])
+    session = _session(monkeypatch, server, "amap", cache)
+
+    first = session.get(AMAP_URL, params={"keywords": "网球", "key": "bad"})
+    assert first.json()["status"] == "0" and session.stats["rejected"] == 1
+    # 换了密钥（不参与缓存键）后重新请求，得到的是真实结果而不是缓存的错误
+    second = session.get(AMAP_URL, params={"keywords": "网球", "key": "good"})
+    assert second.json()["status"] == "1" and not second.from_cache
+    third = session.get(AMAP_URL, params={"keywords": "网球", "key": "good"})
+    assert third.from_cache and third.json()["pois"][0]["name"] == "国贸网球馆"
+    assert server.calls == 2
+
+def test_xiaohongshu_login_error_not_cached(monkeypatch, cache):
+    server = FakeServer([
+        {"success": False, "code": -100, "msg": "登录已过期"},
+        {"success": True, "code": 0, "data": {"notes": []}},
+    ])
+    session = _session(monkeypatch, server, "xiaohongshu", cache)
+    url = "https://edith.xiaohongshu.com/api/sns/web/v1/search/notes?keyword=网球"
+    assert session.get(url).json()["success"] is False
+    assert session.get(url).json()["success"] is True
+    assert session.get(url).from_cache
+    assert server.calls == 2
+
+def test_previously_cached_error_is_ignored(monkeypatch, cache):
+    # 旧版本缓存过的错误响应：cache-first 时重新请求，replay-only 时视为未命中
+    writer = _session(monkeypatch, FakeServer([{"status": "0", "info": "DAILY_QUERY_OVER_LIMIT"}]),
+                      "amap", cache, mode="live")
+    writer.cacheable = lambda response: True
+    writer.get(AMAP_URL, params={"keywords": "网球"})
+
+    server = FakeServer([{"status": "1", "pois": []}])
+    session = _session(monkeypatch, server, "amap", cache)
+    assert session.get(AMAP_URL, params={"keywords": "网球"}).json()["status"] == "1"
+    assert server.calls == 1
+
+    replay = CachedSession("amap", mode="replay-only", cache=cache)
+    assert replay.get(AMAP_URL, params={"keywords": "网球"}).from_cache
+    with pytest.raises(CacheMiss):
+        replay.get(AMAP_URL, params={"keywords": "羽毛球"})
+
+def test_other_sources_cache_http_200(monkeypatch, cache):
+    server = FakeServer([{"anything": 1}])
+    session = _session(monkeypatch, server, "dianping", cache)
+    session.get("https://example.com/a")
+    assert session.get("https://example.com/a").from_cache
+    assert server.calls == 1
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""JSON列：load_json 原样返回只读值；load_json_copy 返回副本，嵌套修改后重新赋值必须写库并记录价格历史"""
+
+import json
+
+from app.json_types import load_json, load_json_copy
+from app.models import CourtDetail
+from app.price_history import history
+
+from .conftest import make_court, make_detail
+
+def _reload(db, detail_id):
+    db.expire_all()
+    return db.get(CourtDetail, detail_id)
+
+def test_nested_edit_then_reassign_json_text(db):
+    court = make_court(db)
+    detail = make_detail(db, court, merged_prices=[{"type": "黄金时间", "price": 150, "source": "BING_PROCESSED"}])
+
+    # 与 fix_bing_price_fields.py 相同的写法：就地修改后以JSON文本重新赋值
+    prices = load_json_copy(detail.merged_prices)
+    for p in prices:
+        if p.get("source") == "BING_PROCESSED":
+            p["source"] = "BING融合价"
+    detail.merged_prices = json.dumps(prices, ensure_ascii=False)
+    db.commit()
+
+    assert _reload(db, detail.id).merged_prices[0]["source"] == "BING融合价"
+    versions = history(db, court.id, "merged_prices")
+    assert len(versions) == 2
+    assert versions[0]["value"][0]["source"] == "BING融合价"
+
+def test_nested_edit_then_reassign_object(db):
+    court = make_court(db)
+    detail = make_detail(db, court, predict_prices={"peak_price": 100, "detail": {"radius": 2}})
+
+    predict = load_json_copy(detail.predict_prices)
+    predict["detail"]["radius"] = 4
+    detail.predict_prices = predict
+    db.commit()
+
+    assert _reload(db, detail.id).predict_prices["detail"]["radius"] == 4
+
+def test_load_json_copy_does_not_alias_tracked_value(db):
+    court = make_court(db)
+    detail = make_detail(db, court, merged_prices=[{"price": 100}])
+    # 只读路径不复制
+    assert load_json(detail.merged_prices) is detail.merged_prices
+
+    prices = load_json_copy(detail.merged_prices)
+    prices[0]["price"] = 999
+    prices.append({"price": 1})
+    db.commit()
+
+    assert _reload(db, detail.id).merged_prices == [{"price": 100}]
+
+def test_load_json_text_and_defaults():
+    assert load_json('{"a": [1, 2]}') == {"a": [1, 2]}
+    assert load_json("", []) == []
+    assert load_json(None, {}) == {}
+    assert load_json("not json", "bad") == "bad"
+    assert load_json_copy('[1]') == [1]
+    assert load_json_copy(None, []) == []
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""价格字段历史：相同值压缩不重复记录，按时刻恢复后恢复本身也记入历史"""
+
+import time
+from datetime import datetime
+
+from app.models import PriceHistory
+from app.price_history import default_writer, history, price_writer, record_values, restore_as_of, seed_baseline, values_as_of
+
+from .conftest import make_court, make_detail
+
+PEAK = [{"type": "黄金时间", "price": 200}]
+OFF_PEAK = [{"type": "非黄金时间", "price": 120}]
+
+def _versions(db, court_id, column="prices"):
+    return [(h["version"], h["value"], h["writer"]) for h in reversed(history(db, court_id, column))]
+
+def _checkpoint() -> datetime:
+    time.sleep(0.01)
+    as_of = datetime.now()
+    time.sleep(0.01)
+    return as_of
+
+def test_unchanged_values_are_compacted(db):
+    court = make_court(db)
+    detail = make_detail(db, court, prices=PEAK, manual_prices={"peak_price": 200, "off_peak_price": 120})
+    # 键顺序不同的相同值、重复赋值都不产生新版本
+    detail.manual_prices = {"off_peak_price": 120, "peak_price": 200}
+    detail.prices = [dict(p) for p in PEAK]
+    db.commit()
+    with price_writer(db, "spider"):
+        detail.prices = OFF_PEAK
+        db.commit()
+    detail.prices = None
+    db.commit()
+
+    assert _versions(db, court.id) == [(1, PEAK, default_writer()), (2, OFF_PEAK, "spider"), (3, None, default_writer())]
+    assert len(history(db, court.id, "manual_prices")) == 1
+    # 绕过会话的写入与基线同样只记录变化
+    assert record_values(db, [(court.id, "prices", None), (court.id, "merged_prices", PEAK)], "merge") == 1
+    assert seed_baseline(db) == 0
+
+def test_restore_as_of(db):
+    court = make_court(db)
+    other = make_court(db, name="另一个网球场")
+    detail = make_detail(db, court, prices=PEAK)
+    as_of = _checkpoint()
+    detail.prices = OFF_PEAK
+    db.commit()
+    # as_of 之后才有历史的场馆不受影响
+    other_detail = make_detail(db, other, prices=OFF_PEAK)
+
+    assert values_as_of(db, "prices", as_of)[court.id]["value"] == PEAK
+    preview = restore_as_of(db, "prices", as_of, dry_run=True)
+    assert preview["changed_court_ids"] == [court.id] and detail.prices == OFF_PEAK
+
+    result = restore_as_of(db, "prices", as_of)
+    assert result["changed"] == 1 and result["courts_with_history"] == 1
+    db.expire_all()
+    assert detail.prices == PEAK and other_detail.prices == OFF_PEAK
+    assert _versions(db, court.id)[-1] == (3, PEAK, "restore")
+
+    # 恢复也是一个版本，可以再恢复回去
+    again = _checkpoint()
+    assert restore_as_of(db, "prices", again)["changed"] == 0
+    assert db.query(PriceHistory).filter(PriceHistory.court_id == court.id).count() == 3
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""快照对比与选择性合并：按主键逐列对比，合并只取快照中的非空值并记入价格历史"""
+
+import os
+import sqlite3
+
+import pytest
+
+from app.models import CourtDetail, TennisCourt
+from app.price_history import history
+from app.snapshot_diff import SnapshotDiff, merge_from_snapshot
+
+from .conftest import TEST_DIR, make_court, make_detail
+
+LIVE_PATH = os.path.join(TEST_DIR, "courts.db")
+SNAPSHOT_PATH = os.path.join(TEST_DIR, "snapshot.db")
+BING = '[{"type": "黄金时间", "price": 180}]'
+
+def _take_snapshot():
+    if os.path.exists(SNAPSHOT_PATH):
+        os.remove(SNAPSHOT_PATH)
+    live, snap = sqlite3.connect(LIVE_PATH), sqlite3.connect(SNAPSHOT_PATH)
+    try:
+        live.backup(snap)
+    finally:
+        live.close()
+        snap.close()
+
+@pytest.fixture
+def seeded(db):
+    """快照之后：修改一个场馆、新增一个、删除一个，清空两个详情的 bing_prices、修改一个"""
+    courts = [make_court(db, name=f"网球场{i}") for i in range(4)]
+    details = [make_detail(db, c, bing_prices=BING) for c in courts]
+    _take_snapshot()
+    courts[0].phone = "010-1"
+    courts[1].name = "改名的网球场"
+    make_court(db, name="新网球场")
+    db.delete(details[3])
+    db.delete(courts[3])
+    details[0].bing_prices = None
+    details[1].bing_prices = []
+    details[2].bing_prices = [{"type": "黄金时间", "price": 220}]
+    db.commit()
+    return courts, details
+
+def test_summary_and_rows(db, seeded):
+    courts, _ = seeded
+    with SnapshotDiff(SNAPSHOT_PATH, LIVE_PATH) as diff:
+        summary = diff.summary("tennis_courts", columns=["name", "phone"])
+        assert (summary["added"], summary["removed"], summary["changed"]) == (1, 1, 2)
+        assert summary["columns"] == {"name": 1, "phone": 1}
+
+        rows = list(diff.diff_rows("tennis_courts", columns=["name", "phone"]))
+        assert [(r["op"], r["key"]["id"]) for r in rows] == [
+            ("changed", courts[0].id), ("changed", courts[1].id), ("added", 5), ("removed", courts[3].id)]
+        assert rows[1]["columns"] == {"name": {"live": "改名的网球场", "snapshot": "网球场1"}}
+        assert rows[3]["columns"] == {"name": "网球场3", "phone": None}
+
+        with pytest.raises(ValueError):
+            diff.summary("tennis_courts", columns=["no_such_column"])
+
+def test_merge_modes(db, seeded):
+    _, details = seeded
+    ids = [d.court_id for d in details[:3]]
+    with SnapshotDiff(SNAPSHOT_PATH, LIVE_PATH) as diff:
+        preview = diff.merge("court_details", "bing_prices", key=["court_id"], dry_run=True)
+        # 实时库为空（NULL 与 []）的两行；已修改为其它值的行不覆盖
+        assert preview["merged"] == 2 and [k["court_id"] for k in preview["sample_keys"]] == ids[:2]
+        assert diff.merge("court_details", "bing_prices", "differs", key=["court_id"], dry_run=True)["merged"] == 3
+        assert diff.merge("court_details", "bing_prices", "differs", key=["court_id"],
+                          keys=[ids[2]], dry_run=True)["merged"] == 1
+        with pytest.raises(ValueError):
+            diff.merge("court_details", "court_id", key=["court_id"])
+    db.expire_all()
+    assert details[0].bing_prices is None
+
+def test_merge_from_snapshot_records_history(db, seeded):
+    _, details = seeded
+    result = merge_from_snapshot(SNAPSHOT_PATH, "court_details", "bing_prices", key=["court_id"])
+    assert result["merged"] == 2 and result["history_records"] == 2
+
+    db.expire_all()
+    prices = [{"type": "黄金时间", "price": 180}]
+    assert [d.bing_prices for d in details[:3]] == [prices, prices, [{"type": "黄金时间", "price": 220}]]
+    latest = history(db, details[0].court_id, "bing_prices", limit=1)[0]
+    assert (latest["value"], latest["writer"]) == (prices, "snapshot_merge")
+    # 合并后再对比，剩下的差异只有被修改为其它值的一行
+    with SnapshotDiff(SNAPSHOT_PATH, LIVE_PATH) as diff:
+        assert diff.summary("court_details", key=["court_id"], columns=["bing_prices"])["changed"] == 1
+    assert db.query(TennisCourt).count() == 4 and db.query(CourtDetail).count() == 3
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""瓦片拼接渲染：以本地瓦片目录代替瓦片服务，检查拼接位置、共享缓存与OSM使用限制"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PIL import Image
+
+from app.geo import lnglat_to_world_px
+from app.scrapers.tile_renderer import OSM_MAX_CONNECTIONS, TileMapRenderer, tile_range
+
+POINTS = [(116.468, 39.914), (116.470, 39.915), (116.30, 39.98)]
+
+def tile_color(x, y):
+    return ((x * 37) % 256, (y * 53) % 256, 128)
+
+@pytest.fixture
+def tile_source(tmp_path):
+    """为测试点生成纯色瓦片，颜色由瓦片坐标决定"""
+    for lng, lat in POINTS:
+        for (z, x, y), _, _ in tile_range(lng, lat, 16, 600, 300):
+            path = tmp_path / "tiles" / str(z) / str(x) / f"{y}.png"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            Image.new("RGB", (256, 256), tile_color(x, y)).save(path)
+    return str(tmp_path / "tiles" / "{z}" / "{x}" / "{y}.png")
+
+def _renderer(tile_source, tmp_path, **kwargs):
+    return TileMapRenderer(tile_url=tile_source, cache_dir=str(tmp_path / "cache"), max_workers=4, **kwargs)
+
+def test_stitched_pixels_match_tiles(tile_source, tmp_path):
+    renderer = _renderer(tile_source, tmp_path, attribution="")
+    lng, lat = POINTS[0]
+    image = renderer.render(lng, lat, marker=False)
+    cx, cy = lnglat_to_world_px(lng, lat, 16)
+    for px, py in [(0, 0), (599, 299), (120, 250), (450, 40)]:
+        wx, wy = float(cx) - 300 + px, float(cy) - 150 + py
+        assert image.getpixel((px, py)) == tile_color(int(wx // 256), int(wy // 256))
+    renderer.close()
+
+def test_tiles_shared_and_fetched_once(tile_source, tmp_path):
+    renderer = _renderer(tile_source, tmp_path)
+    unique = {key for lng, lat in POINTS for key, _, _ in tile_range(lng, lat, 16, 600, 300)}
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda p: renderer.render(*p), POINTS * 4))
+    assert renderer.stats["fetched"] == len(unique)
+    renderer.close()
+
+def test_attribution_drawn(tile_source, tmp_path):
+    lng, lat = POINTS[0]
+    plain = _renderer(tile_source, tmp_path, attribution="").render(lng, lat, marker=False)
+    credited = _renderer(tile_source, tmp_path, attribution="© OpenStreetMap contributors").render(
+        lng, lat, marker=False)
+    assert credited.getpixel((599, 299)) == (255, 255, 255)
+    assert credited.crop((400, 280, 600, 300)).tobytes() != plain.crop((400, 280, 600, 300)).tobytes()
+    assert credited.crop((0, 0, 400, 280)).tobytes() == plain.crop((0, 0, 400, 280)).tobytes()
+
+def test_osm_public_tiles_limited(tmp_path):
+    renderer = TileMapRenderer(tile_url="https://tile.openstreetmap.org/{z}/{x}/{y}.png",
+                               cache_dir=str(tmp_path / "cache"), max_workers=8)
+    assert renderer.is_osm and renderer.max_workers == OSM_MAX_CONNECTIONS
+    # 不批量预取，不发起任何请求
+    assert renderer.prefetch(POINTS, 16, 600, 300) == 0
+    assert renderer.stats["fetched"] == renderer.stats["failed"] == 0
+    renderer.close()
+
+def test_missing_tiles_raise(tile_source, tmp_path):
+    with pytest.raises(RuntimeError):
+        _renderer(tile_source, tmp_path).render(0.0, 0.0)
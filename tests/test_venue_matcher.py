@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""外部场馆列表匹配：批量打分与逐对打分一致，连锁场馆按分店名区分"""
+
+from rapidfuzz import fuzz
+
+from app.scrapers.venue_matcher import VenueMatcher
+from app.scrapers.venue_names import normalize_name
+
+LOCAL = [
+    "OPEN STAR网球俱乐部(百子湾店)",
+    "OPEN STAR网球俱乐部(西红门店)",
+    "酷爱网球(赛洛城店)",
+    "酷爱网球(瞰都嘉园店)",
+    "朝阳公园-网球中心",
+    "万源网球俱乐部",
+]
+
+def test_branch_distinguishes_chain_venues():
+    matcher = VenueMatcher(LOCAL)
+    assert LOCAL[matcher.best("北京OPEN STAR网球俱乐部（百子湾店）")[0]] == "OPEN STAR网球俱乐部(百子湾店)"
+    assert LOCAL[matcher.best("OPEN STAR网球俱乐部(西红门店)")[0]] == "OPEN STAR网球俱乐部(西红门店)"
+    assert LOCAL[matcher.best("酷爱网球（瞰都嘉园店）")[0]] == "酷爱网球(瞰都嘉园店)"
+
+def test_batch_scores_match_pairwise_scorer():
+    matcher = VenueMatcher(LOCAL)
+    queries = ["朝阳公园网球中心", "万源网球馆", "酷爱网球", "不相关的名字"]
+    for query, found in zip(queries, matcher.match_many(queries, top_k=3)):
+        expected = sorted(((i, fuzz.ratio(normalize_name(query), key)) for i, key in enumerate(matcher.keys)
+                           if i in {c for c, _ in found}), key=lambda item: -item[1])
+        assert [round(s, 3) for _, s in found] == [round(s, 3) for _, s in expected]
+        assert [s for _, s in found] == sorted((s for _, s in found), reverse=True)
+
+def test_min_score_and_no_candidates():
+    matcher = VenueMatcher(LOCAL)
+    assert matcher.best("xyz") == (None, 0)
+    assert matcher.match("朝阳网球", top_k=5, min_score=99) == []
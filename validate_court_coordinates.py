@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全表坐标校验（取代逐行检查的经纬度倒置/越界脚本）
+向量化检查经纬度颠倒、超出北京范围、行政区不符、远离所属区域，
+默认只输出结果，加 --fix 时修正/隔离并写入 coordinate_audits 审计表
+用法: python validate_court_coordinates.py [--fix]
+"""
+import sys
+from collections import Counter
+from app.database import SessionLocal, init_db
+from app.models import TennisCourt
+from app.scrapers.coord_validator import CoordinateValidator, apply_to_courts
+from app.backup import snapshot_before
+
+def main():
+    do_fix = '--fix' in sys.argv
+    init_db()
+    db = SessionLocal()
+    try:
+        courts = db.query(TennisCourt).order_by(TennisCourt.id).all()
+        print(f"🔍 校验 {len(courts)} 个场馆坐标...")
+
+        validator = CoordinateValidator()
+        checks = validator.validate_courts(courts)
+        summary = Counter()
+        for court, check in zip(courts, checks):
+            if not check["action"]:
+                continue
+            summary[check["action"]] += 1
+            if check["action"] != "fixed":
+                print(f"  ID {court.id}: {court.name} ({court.latitude}, {court.longitude}) "
+                      f"-> {check['action']} [{','.join(check['issues'])}] {check['detail'] or ''}")
+
+        print(f"\n📊 修正(颠倒): {summary['fixed']}, 隔离: {summary['quarantined']}, 仅记录: {summary['flagged']}")
+        if not do_fix:
+            print("未写入数据库，加 --fix 执行修正")
+            return
+
+        snapshot_before("全表坐标校验前")
+        counts = apply_to_courts(db, courts, "audit", validator)
+        db.commit()
+        print(f"✅ 已处理: {counts}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import SessionLocal
 from app.models import TennisCourt, CourtDetail
+from app.json_types import load_json
 import json
 
 def verify_cleanup_results():
@@ -51,7 +52,7 @@ def verify_cleanup_results():
                 # 检查真实价格（非BING）
                 if detail.merged_prices:
                     try:
-                        prices = json.loads(detail.merged_prices)
+                        prices = load_json(detail.merged_prices)
                         if prices and len(prices) > 0:
                             # 检查是否有非BING的价格
                             non_bing_prices = [p for p in prices if p.get('source') != 'BING']
@@ -65,7 +66,7 @@ def verify_cleanup_results():
                 # 检查预测价格
                 if detail.predict_prices:
                     try:
-                        predict_data = json.loads(detail.predict_prices)
+                        predict_data = load_json(detail.predict_prices)
                         if predict_data and (predict_data.get('peak_price') or predict_data.get('off_peak_price')):
                             has_predict = True
                     except:
@@ -94,7 +95,7 @@ def verify_cleanup_results():
             if detail:
                 if detail.merged_prices:
                     try:
-                        prices = json.loads(detail.merged_prices)
+                        prices = load_json(detail.merged_prices)
                         if prices and len(prices) > 0:
                             sources = [p.get('source', '未知') for p in prices[:3]]
                             print(f"   价格来源: {sources}")
@@ -104,7 +105,7 @@ def verify_cleanup_results():
                 
                 if detail.predict_prices:
                     try:
-                        predict_data = json.loads(detail.predict_prices)
+                        predict_data = load_json(detail.predict_prices)
                         if predict_data:
                             print(f"   预测价格: 黄金{predict_data.get('peak_price')}元, 非黄金{predict_data.get('off_peak_price')}元")
                     except: